@@ -20,6 +20,33 @@ MYSQL_CONFIG = {
     "collation": "utf8mb4_unicode_ci",
 }
 
+
+def _ler_replicas(valor: str) -> list[dict]:
+    """'host1:3307,host2' -> [{"host": "host1", "port": 3307}, {"host": "host2", "port": 3306}]"""
+    replicas = []
+    for item in filter(None, (parte.strip() for parte in valor.split(","))):
+        host, _, porta = item.partition(":")
+        replicas.append({"host": host, "port": int(porta or 3306)})
+    return replicas
+
+
+# Réplicas de leitura do MySQL (mesmo usuário/senha/banco do primário)
+# Leituras dos DAOs e relatórios vão para as réplicas (round_robin ou menos_conexoes);
+# réplicas com atraso acima de atraso_maximo (segundos) são ignoradas e, sem nenhuma
+# réplica utilizável, a leitura volta ao primário. Sem réplicas, tudo vai ao primário.
+# Servidor sem status de replicação conta como fora do ar, exceto os listados em
+# MYSQL_REPLICAS_SEM_REPLICACAO (cópias de leitura que não replicam, ex.: ambiente de testes).
+MYSQL_REPLICAS_CONFIG = {
+    "replicas": _ler_replicas(os.getenv("MYSQL_REPLICAS", ""))
+    + [
+        {**replica, "replicacao": False}
+        for replica in _ler_replicas(os.getenv("MYSQL_REPLICAS_SEM_REPLICACAO", ""))
+    ],
+    "balanceamento": os.getenv("MYSQL_REPLICAS_BALANCEAMENTO", "round_robin"),
+    "atraso_maximo": float(os.getenv("MYSQL_REPLICAS_ATRASO_MAXIMO", 5)),
+    "intervalo_verificacao": float(os.getenv("MYSQL_REPLICAS_INTERVALO_VERIFICACAO", 2)),
+}
+
 # Configurações MongoDB
 MONGODB_CONFIG = {
     "host": os.getenv("MONGODB_HOST", "localhost"),
@@ -27,6 +54,7 @@ MONGODB_CONFIG = {
     "database": os.getenv("MONGODB_DATABASE", "sistema_seguros_logs"),
     "username": os.getenv("MONGODB_USER", ""),
     "password": os.getenv("MONGODB_PASSWORD", ""),
+    "timeout_selecao_ms": int(os.getenv("MONGODB_TIMEOUT_SELECAO_MS", 5000)),
 }
 
 
@@ -36,3 +64,143 @@ def get_mongodb_uri():
     if MONGODB_CONFIG["username"] and MONGODB_CONFIG["password"]:
         return f"mongodb://{MONGODB_CONFIG['username']}:{MONGODB_CONFIG['password']}@{MONGODB_CONFIG['host']}:{MONGODB_CONFIG['port']}"
     return f"mongodb://{MONGODB_CONFIG['host']}:{MONGODB_CONFIG['port']}"
+
+
+# Configurações da política de auditoria
+# Operações de leitura (consultar/listar) podem ser amostradas ou agregadas em contadores
+# (opt-in: por padrão também são registradas integralmente); operações de escrita são sempre
+# registradas integralmente.
+AUDITORIA_CONFIG = {
+    "politica_arquivo": os.getenv("AUDITORIA_POLITICA_ARQUIVO", ""),
+    "modo_leitura": os.getenv("AUDITORIA_MODO_LEITURA", "sempre"),
+    "taxa_amostragem": float(os.getenv("AUDITORIA_TAXA_AMOSTRAGEM", 0.1)),
+    "intervalo_recarga": float(os.getenv("AUDITORIA_INTERVALO_RECARGA", 5)),
+}
+
+# Configurações do outbox transacional (MySQL -> MongoDB)
+# Quando habilitado, os efeitos colaterais no MongoDB são gravados na tabela 'outbox'
+# na mesma transação do registro de negócio e aplicados depois pelo relay.
+OUTBOX_CONFIG = {
+    "habilitado": os.getenv("OUTBOX_HABILITADO", "false").lower() in ("1", "true", "sim"),
+    "tamanho_lote": int(os.getenv("OUTBOX_TAMANHO_LOTE", 500)),
+    "intervalo_ociosidade": float(os.getenv("OUTBOX_INTERVALO_OCIOSIDADE", 1)),
+    "max_tentativas": int(os.getenv("OUTBOX_MAX_TENTATIVAS", 10)),
+}
+
+# Configurações do armazenamento de arquivos de sinistros (GridFS)
+# Arquivos são gravados em chunks de tamanho fixo e deduplicados pelo SHA-256 do conteúdo.
+DOCUMENTOS_CONFIG = {
+    "bucket": os.getenv("DOCUMENTOS_BUCKET", "arquivos_sinistros"),
+    "tamanho_chunk": int(os.getenv("DOCUMENTOS_TAMANHO_CHUNK", 1024 * 1024)),
+}
+
+# Configurações da exportação incremental (delta) para o data warehouse
+# Apenas linhas com updated_at anterior a NOW() - atraso_seguranca são exportadas, para não
+# perder linhas gravadas no mesmo segundo ou por transações ainda não confirmadas. Cada
+# execução reexporta (upserts idempotentes) o que foi gravado nos `sobreposicao` segundos
+# antes do corte anterior: cobre transações confirmadas até esse tempo depois de gravar.
+EXPORTACAO_CONFIG = {
+    "diretorio": os.getenv("EXPORTACAO_DIRETORIO", "export/delta"),
+    "tamanho_lote": int(os.getenv("EXPORTACAO_TAMANHO_LOTE", 5000)),
+    "atraso_seguranca": int(os.getenv("EXPORTACAO_ATRASO_SEGURANCA", 2)),
+    "sobreposicao": int(os.getenv("EXPORTACAO_SOBREPOSICAO", 60)),
+}
+
+# Configurações de concorrência (consultas paralelas MySQL + MongoDB)
+# Cada fonte tem o seu timeout; o orçamento limita o tempo total da consulta agregada.
+# Fontes que estouram o prazo são omitidas e o resultado é marcado como parcial.
+# Efeitos colaterais no MongoDB (auditoria, perfil, documentos) rodam em paralelo e o
+# serviço aguarda o término (aguardar, até timeout_efeitos) ou retorna logo (disparar).
+CONCORRENCIA_CONFIG = {
+    "max_workers": int(os.getenv("CONCORRENCIA_MAX_WORKERS", 8)),
+    "timeout_mysql": float(os.getenv("CONCORRENCIA_TIMEOUT_MYSQL", 1.0)),
+    "timeout_mongo": float(os.getenv("CONCORRENCIA_TIMEOUT_MONGO", 0.5)),
+    "orcamento": float(os.getenv("CONCORRENCIA_ORCAMENTO", 1.5)),
+    "modo_efeitos": os.getenv("CONCORRENCIA_MODO_EFEITOS", "aguardar"),
+    "timeout_efeitos": float(os.getenv("CONCORRENCIA_TIMEOUT_EFEITOS", 2.0)),
+}
+
+# Configurações das sequências hi-lo (numeração de apólices)
+# Cada processo reserva no MySQL um bloco de números e os distribui em memória; números de
+# blocos não usados até o fim do processo são descartados (a sequência tolera lacunas).
+SEQUENCIA_CONFIG = {
+    "tamanho_bloco": int(os.getenv("SEQUENCIA_TAMANHO_BLOCO", 1000)),
+}
+
+# Configurações das operações em lote (ex.: fechamento de sinistros, cancelamento por cliente)
+# Cada lote é um SELECT ... FOR UPDATE dos ids elegíveis e um único UPDATE, confirmados juntos.
+OPERACOES_LOTE_CONFIG = {
+    "tamanho_lote": int(os.getenv("OPERACOES_LOTE_TAMANHO", 1000)),
+}
+
+# Configurações dos disjuntores (circuit breakers) de MySQL e MongoDB
+# Após limite_falhas falhas de conexão seguidas, as chamadas ao backend falham na hora (sem
+# tentar conectar); uma sondagem é liberada após a espera, que dobra a cada sondagem falha.
+DISJUNTOR_CONFIG = {
+    "limite_falhas": int(os.getenv("DISJUNTOR_LIMITE_FALHAS", 3)),
+    "espera_inicial": float(os.getenv("DISJUNTOR_ESPERA_INICIAL", 1.0)),
+    "espera_maxima": float(os.getenv("DISJUNTOR_ESPERA_MAXIMA", 60.0)),
+}
+
+# Configurações do arquivamento (functions/arquivamento.py)
+# Apólices canceladas e sinistros fechados sem alteração há mais de dias_retencao dias vão para
+# as tabelas *_arquivo, em lotes de tamanho_lote linhas (um commit por lote, pausa entre lotes).
+ARQUIVAMENTO_CONFIG = {
+    "dias_retencao": int(os.getenv("ARQUIVAMENTO_DIAS_RETENCAO", 365)),
+    "tamanho_lote": int(os.getenv("ARQUIVAMENTO_TAMANHO_LOTE", 500)),
+    "pausa": float(os.getenv("ARQUIVAMENTO_PAUSA", 0)),
+}
+
+# Particionamento de 'sinistros' por data_ocorrencia (RANGE COLUMNS), ver database/db_setup.py
+# granularidade: "" (tabela única, com FK para apolices), "anual" ou "mensal".
+# A manutenção (functions/particionamento.py) mantém particoes_futuras períodos criados à frente
+# e, se particoes_retidas > 0, remove as partições mais antigas que isso (movendo as linhas
+# para sinistros_arquivo quando arquivar_ao_remover, senão registrando as exclusões).
+PARTICIONAMENTO_CONFIG = {
+    "granularidade": os.getenv("SINISTROS_PARTICIONAMENTO", ""),
+    "particoes_futuras": int(os.getenv("SINISTROS_PARTICOES_FUTURAS", 3)),
+    "particoes_retidas": int(os.getenv("SINISTROS_PARTICOES_RETIDAS", 0)),
+    "arquivar_ao_remover": os.getenv("SINISTROS_ARQUIVAR_PARTICOES", "true").lower()
+    in ("1", "true", "sim"),
+}
+
+# Configurações das migrações de schema (database/migracoes.py)
+# ALTERs usam DDL online (INSTANT, INPLACE com LOCK=NONE); quando impossível, a tabela é
+# copiada em lotes de tamanho_lote ids (pausa entre lotes) e trocada por RENAME TABLE.
+# lock_wait_timeout limita a espera pelo metadata lock, para um ALTER na fila não travar a carga.
+MIGRACOES_CONFIG = {
+    "tamanho_lote": int(os.getenv("MIGRACOES_TAMANHO_LOTE", 1000)),
+    "pausa": float(os.getenv("MIGRACOES_PAUSA", 0)),
+    "lock_wait_timeout": int(os.getenv("MIGRACOES_LOCK_WAIT_TIMEOUT", 5)),
+    "intervalo_progresso": float(os.getenv("MIGRACOES_INTERVALO_PROGRESSO", 2.0)),
+}
+
+# Busca textual (índices FULLTEXT de clientes.nome/endereco e sinistros.descricao)
+# parser: "ngram" (padrão) indexa n-gramas de ngram_token_size caracteres (variável do
+# servidor, 2 por padrão), então trechos de palavras também casam ("silv" -> "Silva");
+# "" usa o parser padrão do InnoDB, que só casa palavras inteiras ou prefixos.
+# Vale na criação dos índices. tamanho_trecho: caracteres do trecho destacado no resultado.
+BUSCA_TEXTUAL_CONFIG = {
+    "parser": os.getenv("BUSCA_TEXTUAL_PARSER", "ngram"),
+    "limite_padrao": int(os.getenv("BUSCA_TEXTUAL_LIMITE", 20)),
+    "tamanho_trecho": int(os.getenv("BUSCA_TEXTUAL_TAMANHO_TRECHO", 80)),
+}
+
+# Índice de prefixos de clientes em memória (functions/indice_clientes.py), usado na CLI para
+# escolher o cliente por nome ou CPF. A carga lê tamanho_lote clientes por página (keyset por
+# id); limite_sugestoes: clientes listados por busca. As gravações de outros processos são
+# lidas no máximo a cada intervalo_sincronizacao segundos, relendo margem_sincronizacao
+# segundos antes da última marca (linhas confirmadas depois de gravadas).
+INDICE_CLIENTES_CONFIG = {
+    "tamanho_lote": int(os.getenv("INDICE_CLIENTES_TAMANHO_LOTE", 10000)),
+    "limite_sugestoes": int(os.getenv("INDICE_CLIENTES_LIMITE_SUGESTOES", 10)),
+    "intervalo_sincronizacao": float(os.getenv("INDICE_CLIENTES_INTERVALO_SINCRONIZACAO", 30)),
+    "margem_sincronizacao": float(os.getenv("INDICE_CLIENTES_MARGEM_SINCRONIZACAO", 60)),
+}
+
+# Listagens paginadas por chave estrangeira (listar_por_cliente / listar_por_apolice em
+# functions/dao_mysql.py): linhas por página quando o chamador não passa limite. As páginas
+# seguintes são pedidas com apos_id = id da última linha da anterior.
+PAGINACAO_CONFIG = {
+    "tamanho_pagina": int(os.getenv("PAGINACAO_TAMANHO_PAGINA", 100)),
+}
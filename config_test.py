@@ -32,3 +32,11 @@ MONGODB_TEST_CONFIG = {
     "uri": get_mongodb_test_uri(),
     "database": "sistema_seguros_test_logs",  # Database separado para testes
 }
+
+
+# Segunda instância MySQL local usada como réplica nos testes de roteamento de leituras
+# (os testes são pulados se MYSQL_TEST_REPLICA_HOST não estiver definido)
+MYSQL_TEST_REPLICA_CONFIG = {
+    "host": os.getenv("MYSQL_TEST_REPLICA_HOST", ""),
+    "port": int(os.getenv("MYSQL_TEST_REPLICA_PORT", 3307)),
+}
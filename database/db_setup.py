@@ -4,13 +4,16 @@ Sprint 4 - Persistência Híbrida
 """
 import os
 import sys
+from datetime import date
+from typing import Optional
 
 import mysql.connector
 from mysql.connector import Error
 
 # Adiciona o diretório pai ao path para importar config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import MYSQL_CONFIG
+from config import BUSCA_TEXTUAL_CONFIG, MYSQL_CONFIG, PARTICIONAMENTO_CONFIG
+from database.migracoes import AlteracaoOnline, ComandosSQL, ExecutorMigracoes, Funcao, Migracao
 
 
 def get_connection():
@@ -30,6 +33,391 @@ def get_connection():
         return None
 
 
+# Triggers de exclusão (tombstones) para a exportação incremental.
+# O MySQL não dispara triggers em exclusões feitas por ON DELETE CASCADE, então cada trigger
+# registra também os descendentes que serão removidos em cascata.
+# Exclusões do arquivamento (variável de sessão @arquivamento definida) não são registradas:
+# a linha continua existindo, na tabela de arquivo.
+TRIGGERS_EXCLUSAO = {
+    "trg_clientes_exclusao": """
+        CREATE TRIGGER trg_clientes_exclusao BEFORE DELETE ON clientes FOR EACH ROW
+        IF @arquivamento IS NULL THEN
+            INSERT INTO exclusoes (entidade, entidade_id)
+                SELECT 'clientes', OLD.id
+                UNION ALL SELECT 'seguros', id FROM seguros WHERE cliente_id = OLD.id
+                UNION ALL SELECT 'apolices', id FROM apolices WHERE cliente_id = OLD.id
+                UNION ALL SELECT 'sinistros', s.id FROM sinistros s
+                    JOIN apolices a ON a.id = s.apolice_id WHERE a.cliente_id = OLD.id;
+        END IF
+    """,
+    "trg_seguros_exclusao": """
+        CREATE TRIGGER trg_seguros_exclusao BEFORE DELETE ON seguros FOR EACH ROW
+        IF @arquivamento IS NULL THEN
+            INSERT INTO exclusoes (entidade, entidade_id)
+                SELECT 'seguros', OLD.id
+                UNION ALL SELECT 'apolices', id FROM apolices WHERE seguro_id = OLD.id
+                UNION ALL SELECT 'sinistros', s.id FROM sinistros s
+                    JOIN apolices a ON a.id = s.apolice_id WHERE a.seguro_id = OLD.id;
+        END IF
+    """,
+    "trg_apolices_exclusao": """
+        CREATE TRIGGER trg_apolices_exclusao BEFORE DELETE ON apolices FOR EACH ROW
+        IF @arquivamento IS NULL THEN
+            INSERT INTO exclusoes (entidade, entidade_id)
+                SELECT 'apolices', OLD.id
+                UNION ALL SELECT 'sinistros', id FROM sinistros WHERE apolice_id = OLD.id;
+        END IF
+    """,
+    "trg_sinistros_exclusao": """
+        CREATE TRIGGER trg_sinistros_exclusao BEFORE DELETE ON sinistros FOR EACH ROW
+        IF @arquivamento IS NULL THEN
+            INSERT INTO exclusoes (entidade, entidade_id) VALUES ('sinistros', OLD.id);
+        END IF
+    """,
+}
+
+# Tabelas de arquivo (dados frios): mesmas colunas das tabelas de origem, sem chaves
+# estrangeiras nem AUTO_INCREMENT (o id é preservado), mais o instante do arquivamento
+TABELAS_ARQUIVO = {
+    "apolices_arquivo": """
+        CREATE TABLE IF NOT EXISTS apolices_arquivo (
+            id INT PRIMARY KEY,
+            cliente_id INT NOT NULL,
+            seguro_id INT NOT NULL,
+            numero VARCHAR(20) NULL,
+            data_emissao DATE,
+            status VARCHAR(50),
+            created_at TIMESTAMP NULL,
+            updated_at TIMESTAMP NULL,
+            arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_cliente (cliente_id),
+            INDEX idx_seguro (seguro_id),
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+    "sinistros_arquivo": """
+        CREATE TABLE IF NOT EXISTS sinistros_arquivo (
+            id INT PRIMARY KEY,
+            apolice_id INT NOT NULL,
+            data_ocorrencia DATE,
+            descricao TEXT,
+            status VARCHAR(50),
+            created_at TIMESTAMP NULL,
+            updated_at TIMESTAMP NULL,
+            arquivado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_apolice (apolice_id),
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """,
+}
+
+
+def criar_triggers_exclusao(cursor):
+    """(Re)cria os triggers que registram exclusões na tabela 'exclusoes'"""
+    for nome, ddl in TRIGGERS_EXCLUSAO.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        cursor.execute(ddl)
+
+
+def criar_tabelas_arquivo(cursor):
+    """Cria as tabelas de arquivo de apólices e sinistros, se não existirem"""
+    for ddl in TABELAS_ARQUIVO.values():
+        cursor.execute(ddl)
+
+
+# Colunas geradas de 'seguros' com os caminhos mais consultados do JSON 'detalhes'
+# (Automóvel: placa e ano; Residencial: valor; Vida: valor_segurado). São VIRTUAL: o valor
+# calculado fica gravado nos índices secundários, então as buscas leem só o índice, e as
+# colunas entram com ALGORITHM=INSTANT mesmo com 'seguros' referenciada por FKs (STORED
+# exigiria reconstruir a tabela por cópia). A placa é normalizada em maiúsculas, como em
+# utils.validar_placa; valores inválidos no JSON viram NULL em vez de rejeitar a gravação.
+COLUNAS_GERADAS_SEGUROS = {
+    "placa": "VARCHAR(10) GENERATED ALWAYS AS "
+    "(UPPER(JSON_VALUE(detalhes, '$.placa' RETURNING CHAR(10) NULL ON ERROR))) VIRTUAL",
+    "ano": "SMALLINT UNSIGNED GENERATED ALWAYS AS "
+    "(JSON_VALUE(detalhes, '$.ano' RETURNING UNSIGNED NULL ON ERROR)) VIRTUAL",
+    "valor_segurado": "DECIMAL(12, 2) GENERATED ALWAYS AS (COALESCE("
+    "JSON_VALUE(detalhes, '$.valor_segurado' RETURNING DECIMAL(12, 2) NULL ON ERROR), "
+    "JSON_VALUE(detalhes, '$.valor' RETURNING DECIMAL(12, 2) NULL ON ERROR))) VIRTUAL",
+}
+INDICES_GERADOS_SEGUROS = {
+    "idx_placa": "placa",
+    "idx_ano": "ano",
+    "idx_valor_segurado": "valor_segurado",
+}
+
+
+def ddl_colunas_geradas_seguros() -> str:
+    """Colunas geradas e seus índices, para o CREATE TABLE de 'seguros'"""
+    linhas = [f"{nome} {definicao}" for nome, definicao in COLUNAS_GERADAS_SEGUROS.items()]
+    linhas += [f"INDEX {indice} ({coluna})" for indice, coluna in INDICES_GERADOS_SEGUROS.items()]
+    return ",\n            ".join(linhas)
+
+
+# Índices FULLTEXT da busca textual (buscar_texto de ClienteDAO e SinistroDAO), com o parser
+# de BUSCA_TEXTUAL_CONFIG. As stopwords do InnoDB (lista em inglês) ficam desligadas na
+# criação: com o parser ngram, todo n-grama que contivesse uma delas ("a", "i"...) deixaria
+# de ser indexado. Tabelas particionadas não aceitam FULLTEXT: com 'sinistros' particionada a
+# busca por descrição usa LIKE.
+INDICES_TEXTUAIS = {
+    "clientes": ("ft_nome_endereco", ("nome", "endereco")),
+    "sinistros": ("ft_descricao", ("descricao",)),
+}
+SQL_SEM_STOPWORDS = "SET SESSION innodb_ft_enable_stopword = OFF"
+
+
+def ddl_indice_textual(tabela: str) -> str:
+    """Definição do índice FULLTEXT da tabela, para CREATE TABLE e ALTER TABLE ... ADD"""
+    nome, colunas = INDICES_TEXTUAIS[tabela]
+    parser = BUSCA_TEXTUAL_CONFIG["parser"]
+    ddl = f"FULLTEXT INDEX {nome} ({', '.join(colunas)})"
+    return f"{ddl} WITH PARSER {parser}" if parser else ddl
+
+
+def _indice_existe(cursor, tabela: str, indice: str) -> bool:
+    cursor.execute(
+        "SELECT 1 FROM information_schema.STATISTICS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s LIMIT 1",
+        (tabela, indice),
+    )
+    return bool(cursor.fetchall())
+
+
+def criar_indices_textuais(cursor):
+    """
+    Cria os índices FULLTEXT que faltam ('sinistros' particionada fica sem)
+
+    O InnoDB não constrói FULLTEXT com LOCK=NONE: durante a criação as leituras seguem, mas
+    as escritas na tabela esperam.
+    """
+    cursor.execute(SQL_SEM_STOPWORDS)
+    for tabela, (nome, _) in INDICES_TEXTUAIS.items():
+        if _indice_existe(cursor, tabela, nome) or listar_particoes(cursor, tabela):
+            continue
+        cursor.execute(
+            f"ALTER TABLE {tabela} ADD {ddl_indice_textual(tabela)}, "
+            "ALGORITHM=INPLACE, LOCK=SHARED"
+        )
+
+
+# Variante particionada de 'sinistros': RANGE COLUMNS (data_ocorrencia), uma partição por ano
+# ou mês, mais p_antigas (tudo antes da primeira) e p_futuras (MAXVALUE, mantida vazia pela
+# manutenção em functions/particionamento.py). Tabelas particionadas não aceitam chaves
+# estrangeiras e toda chave única precisa conter a coluna de particionamento, então:
+#   - a chave primária passa a ser (id, data_ocorrencia) e data_ocorrencia fica NOT NULL
+#     (o trigger de inserção usa a data corrente quando ela não é informada);
+#   - a FK para apolices vira os triggers de TRIGGERS_PARTICIONAMENTO: validação da apólice na
+#     gravação e exclusão em cascata dos sinistros, antes dos triggers de tombstone (PRECEDES)
+#     para que cada sinistro excluído seja registrado uma única vez.
+GRANULARIDADES_PARTICAO = ("anual", "mensal")
+PARTICAO_ANTIGAS = "p_antigas"
+PARTICAO_FUTURAS = "p_futuras"
+
+SQL_SINISTROS_PARTICIONADO = """
+        CREATE TABLE IF NOT EXISTS sinistros (
+            id INT AUTO_INCREMENT,
+            apolice_id INT NOT NULL,
+            data_ocorrencia DATE NOT NULL,
+            descricao TEXT,
+            status VARCHAR(50) DEFAULT 'aberto',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+            PRIMARY KEY (id, data_ocorrencia),
+            INDEX idx_apolice (apolice_id),
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+TRIGGERS_PARTICIONAMENTO = {
+    "trg_sinistros_integridade_ins": """
+        CREATE TRIGGER trg_sinistros_integridade_ins BEFORE INSERT ON sinistros FOR EACH ROW
+        BEGIN
+            IF NEW.data_ocorrencia IS NULL THEN
+                SET NEW.data_ocorrencia = CURRENT_DATE;
+            END IF;
+            IF NOT EXISTS (SELECT 1 FROM apolices WHERE id = NEW.apolice_id) THEN
+                SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Apólice do sinistro não existe';
+            END IF;
+        END
+    """,
+    "trg_sinistros_integridade_upd": """
+        CREATE TRIGGER trg_sinistros_integridade_upd BEFORE UPDATE ON sinistros FOR EACH ROW
+        BEGIN
+            IF NEW.data_ocorrencia IS NULL THEN
+                SET NEW.data_ocorrencia = OLD.data_ocorrencia;
+            END IF;
+            IF NEW.apolice_id <> OLD.apolice_id
+                AND NOT EXISTS (SELECT 1 FROM apolices WHERE id = NEW.apolice_id) THEN
+                SIGNAL SQLSTATE '23000' SET MESSAGE_TEXT = 'Apólice do sinistro não existe';
+            END IF;
+        END
+    """,
+    "trg_clientes_cascata_sinistros": """
+        CREATE TRIGGER trg_clientes_cascata_sinistros BEFORE DELETE ON clientes FOR EACH ROW
+        PRECEDES trg_clientes_exclusao
+        DELETE s FROM sinistros s JOIN apolices a ON a.id = s.apolice_id
+        WHERE a.cliente_id = OLD.id
+    """,
+    "trg_seguros_cascata_sinistros": """
+        CREATE TRIGGER trg_seguros_cascata_sinistros BEFORE DELETE ON seguros FOR EACH ROW
+        PRECEDES trg_seguros_exclusao
+        DELETE s FROM sinistros s JOIN apolices a ON a.id = s.apolice_id
+        WHERE a.seguro_id = OLD.id
+    """,
+    "trg_apolices_cascata_sinistros": """
+        CREATE TRIGGER trg_apolices_cascata_sinistros BEFORE DELETE ON apolices FOR EACH ROW
+        PRECEDES trg_apolices_exclusao
+        DELETE FROM sinistros WHERE apolice_id = OLD.id
+    """,
+}
+
+
+def _validar_granularidade(granularidade: str):
+    if granularidade not in GRANULARIDADES_PARTICAO:
+        raise ValueError(f"Granularidade de partição inválida: {granularidade!r}")
+
+
+def inicio_periodo(dia: date, granularidade: str) -> date:
+    """Primeiro dia do ano ou do mês que contém `dia`"""
+    _validar_granularidade(granularidade)
+    return date(dia.year, 1, 1) if granularidade == "anual" else date(dia.year, dia.month, 1)
+
+
+def deslocar_periodo(inicio: date, granularidade: str, periodos: int = 1) -> date:
+    """Início do período `periodos` anos/meses depois (negativo: antes) de `inicio`"""
+    _validar_granularidade(granularidade)
+    if granularidade == "anual":
+        return date(inicio.year + periodos, 1, 1)
+    meses = inicio.year * 12 + inicio.month - 1 + periodos
+    return date(meses // 12, meses % 12 + 1, 1)
+
+
+def periodos_entre(inicio: date, fim: date, granularidade: str) -> int:
+    """Quantos anos/meses separam os períodos de `inicio` e `fim`"""
+    _validar_granularidade(granularidade)
+    anos = fim.year - inicio.year
+    return anos if granularidade == "anual" else anos * 12 + fim.month - inicio.month
+
+
+def nome_particao(inicio: date, granularidade: str) -> str:
+    """p2025 (anual) ou p202503 (mensal)"""
+    _validar_granularidade(granularidade)
+    return f"p{inicio:%Y}" if granularidade == "anual" else f"p{inicio:%Y%m}"
+
+
+def definicao_particao(inicio: date, granularidade: str) -> str:
+    """PARTITION do período iniciado em `inicio`"""
+    limite = deslocar_periodo(inicio, granularidade)
+    return f"PARTITION {nome_particao(inicio, granularidade)} VALUES LESS THAN ('{limite}')"
+
+
+def definicao_particoes(granularidade: str, inicio: date, quantidade: int) -> str:
+    """Cláusula PARTITION BY com p_antigas, `quantidade` períodos desde `inicio` e p_futuras"""
+    inicio = inicio_periodo(inicio, granularidade)
+    particoes = [f"PARTITION {PARTICAO_ANTIGAS} VALUES LESS THAN ('{inicio}')"]
+    for i in range(quantidade):
+        periodo = deslocar_periodo(inicio, granularidade, i)
+        particoes.append(definicao_particao(periodo, granularidade))
+    particoes.append(f"PARTITION {PARTICAO_FUTURAS} VALUES LESS THAN (MAXVALUE)")
+    corpo = ",\n    ".join(particoes)
+    return f"PARTITION BY RANGE COLUMNS (data_ocorrencia) (\n    {corpo}\n)"
+
+
+def listar_particoes(cursor, tabela: str = "sinistros") -> list[tuple[str, Optional[date]]]:
+    """
+    Partições da tabela em ordem: [(nome, limite)], limite None para MAXVALUE
+
+    Retorna lista vazia se a tabela não é particionada.
+    """
+    cursor.execute(
+        "SELECT PARTITION_NAME, PARTITION_DESCRIPTION FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION",
+        (tabela,),
+    )
+    particoes = []
+    for nome, descricao in cursor.fetchall():
+        limite = None if descricao == "MAXVALUE" else date.fromisoformat(descricao.strip("'"))
+        particoes.append((nome, limite))
+    return particoes
+
+
+def criar_triggers_particionamento(cursor):
+    """(Re)cria os triggers que substituem a FK de sinistros -> apolices na variante particionada"""
+    for nome, ddl in TRIGGERS_PARTICIONAMENTO.items():
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+        cursor.execute(ddl)
+
+
+def particionar_sinistros(cursor, granularidade: str, particoes_futuras: int = 3) -> bool:
+    """
+    Converte a tabela 'sinistros' existente para a variante particionada
+
+    Remove a FK, preenche data_ocorrencia nula com a data de criação, troca a chave primária
+    e cria uma partição por período desde a menor data_ocorrencia até `particoes_futuras`
+    períodos à frente.
+
+    Returns:
+        bool: True se converteu; False se a tabela já era particionada
+    """
+    _validar_granularidade(granularidade)
+    if listar_particoes(cursor):
+        return False
+    cursor.execute(
+        "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+        "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = 'sinistros'"
+    )
+    for (restricao,) in cursor.fetchall():
+        cursor.execute(f"ALTER TABLE sinistros DROP FOREIGN KEY {restricao}")
+    indice_textual = INDICES_TEXTUAIS["sinistros"][0]
+    if _indice_existe(cursor, "sinistros", indice_textual):
+        cursor.execute(f"ALTER TABLE sinistros DROP INDEX {indice_textual}")
+    cursor.execute(
+        "UPDATE sinistros SET data_ocorrencia = DATE(created_at) WHERE data_ocorrencia IS NULL"
+    )
+    cursor.execute(
+        "ALTER TABLE sinistros MODIFY data_ocorrencia DATE NOT NULL, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id, data_ocorrencia)"
+    )
+    cursor.execute("SELECT MIN(data_ocorrencia) FROM sinistros")
+    hoje = inicio_periodo(date.today(), granularidade)
+    inicio = inicio_periodo(min(cursor.fetchone()[0] or hoje, hoje), granularidade)
+    quantidade = periodos_entre(inicio, hoje, granularidade) + 1 + particoes_futuras
+    particoes = definicao_particoes(granularidade, inicio, quantidade)
+    cursor.execute(f"ALTER TABLE sinistros {particoes}")
+    criar_triggers_particionamento(cursor)
+    return True
+
+
+def desparticionar_sinistros(cursor) -> bool:
+    """
+    Volta 'sinistros' para a tabela única com FK (desfaz particionar_sinistros)
+
+    Falha se houver sinistros de apólices inexistentes.
+
+    Returns:
+        bool: True se converteu; False se a tabela não era particionada
+    """
+    if not listar_particoes(cursor):
+        return False
+    for nome in TRIGGERS_PARTICIONAMENTO:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+    cursor.execute("ALTER TABLE sinistros REMOVE PARTITIONING")
+    cursor.execute(
+        "ALTER TABLE sinistros MODIFY data_ocorrencia DATE NULL, "
+        "DROP PRIMARY KEY, ADD PRIMARY KEY (id)"
+    )
+    cursor.execute(
+        "ALTER TABLE sinistros ADD FOREIGN KEY (apolice_id) REFERENCES apolices(id) "
+        "ON DELETE CASCADE"
+    )
+    criar_indices_textuais(cursor)
+    return True
+
+
 def criar_database():
     """Cria o banco de dados se não existir"""
     conn = get_connection()
@@ -64,6 +452,11 @@ def criar_tabelas():
         )
         cursor = conn.cursor()
 
+        # Instalação nova: o schema criado abaixo já está na última versão das migrações
+        cursor.execute("SHOW TABLES LIKE 'clientes'")
+        instalacao_nova = not cursor.fetchall()
+        cursor.execute(SQL_SEM_STOPWORDS)
+
         # Tabela de usuários
         cursor.execute(
             """
@@ -80,7 +473,7 @@ def criar_tabelas():
 
         # Tabela de clientes
         cursor.execute(
-            """
+            f"""
         CREATE TABLE IF NOT EXISTS clientes (
             id INT AUTO_INCREMENT PRIMARY KEY,
             nome VARCHAR(200) NOT NULL,
@@ -89,17 +482,20 @@ def criar_tabelas():
             email VARCHAR(100),
             data_nasc DATE,
             endereco TEXT,
+            hash_conteudo CHAR(64) NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             INDEX idx_cpf (cpf),
-            INDEX idx_nome (nome)
+            INDEX idx_nome (nome),
+            INDEX idx_updated (updated_at, id),
+            {ddl_indice_textual("clientes")}
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
         )
 
         # Tabela de seguros
         cursor.execute(
-            """
+            f"""
         CREATE TABLE IF NOT EXISTS seguros (
             id INT AUTO_INCREMENT PRIMARY KEY,
             tipo VARCHAR(50) NOT NULL,
@@ -111,7 +507,9 @@ def criar_tabelas():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
             INDEX idx_cliente (cliente_id),
-            INDEX idx_tipo (tipo)
+            INDEX idx_tipo (tipo),
+            INDEX idx_updated (updated_at, id),
+            {ddl_colunas_geradas_seguros()}
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
         )
@@ -123,6 +521,7 @@ def criar_tabelas():
             id INT AUTO_INCREMENT PRIMARY KEY,
             cliente_id INT NOT NULL,
             seguro_id INT NOT NULL,
+            numero VARCHAR(20) NULL,
             data_emissao DATE,
             status VARCHAR(50) DEFAULT 'ativa',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -130,15 +529,26 @@ def criar_tabelas():
             FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
             FOREIGN KEY (seguro_id) REFERENCES seguros(id) ON DELETE CASCADE,
             INDEX idx_cliente (cliente_id),
+            UNIQUE KEY uq_numero (numero),
             INDEX idx_seguro (seguro_id),
-            INDEX idx_status (status)
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
         )
 
-        # Tabela de sinistros
-        cursor.execute(
-            """
+        # Tabela de sinistros (particionada por data_ocorrencia se configurado)
+        granularidade = PARTICIONAMENTO_CONFIG["granularidade"]
+        if granularidade:
+            cursor.execute(
+                SQL_SINISTROS_PARTICIONADO
+                + definicao_particoes(
+                    granularidade, date.today(), 1 + PARTICIONAMENTO_CONFIG["particoes_futuras"]
+                )
+            )
+        else:
+            cursor.execute(
+                f"""
         CREATE TABLE IF NOT EXISTS sinistros (
             id INT AUTO_INCREMENT PRIMARY KEY,
             apolice_id INT NOT NULL,
@@ -149,12 +559,74 @@ def criar_tabelas():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (apolice_id) REFERENCES apolices(id) ON DELETE CASCADE,
             INDEX idx_apolice (apolice_id),
-            INDEX idx_status (status)
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id),
+            {ddl_indice_textual("sinistros")}
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+            )
+
+        # Tabela de outbox (efeitos no MongoDB gravados na mesma transação do negócio)
+        cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            colecao VARCHAR(64) NOT NULL,
+            operacao ENUM('inserir', 'atualizar') NOT NULL,
+            payload LONGBLOB NOT NULL,
+            tentativas INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+            processado_em TIMESTAMP(6) NULL,
+            INDEX idx_pendentes (processado_em, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
         """
         )
 
+        # Tabela de exclusões (tombstones) para a exportação incremental
+        cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS exclusoes (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entidade VARCHAR(32) NOT NULL,
+            entidade_id INT NOT NULL,
+            excluido_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_entidade (entidade, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        )
+
+        # Sequências com reserva de blocos (hi-lo), ex.: numeração de apólices
+        cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS sequencias (
+            nome VARCHAR(32) PRIMARY KEY,
+            proximo BIGINT NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        )
+
+        # Marcas d'água (high-water marks) da exportação incremental por entidade
+        cursor.execute(
+            """
+        CREATE TABLE IF NOT EXISTS marcas_exportacao (
+            entidade VARCHAR(32) PRIMARY KEY,
+            ultimo_updated_at TIMESTAMP NULL,
+            ultimo_id INT NOT NULL DEFAULT 0,
+            ultima_exclusao_id BIGINT NOT NULL DEFAULT 0,
+            ultimo_corte TIMESTAMP NULL,
+            exportado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        )
+        criar_tabelas_arquivo(cursor)
+        criar_triggers_exclusao(cursor)
+        if granularidade:
+            criar_triggers_particionamento(cursor)
+
         conn.commit()
+        if instalacao_nova:
+            ExecutorMigracoes(conn, MIGRACOES).registrar_baseline()
         print("Tabelas criadas com sucesso no MySQL!")
         cursor.close()
         conn.close()
@@ -165,28 +637,106 @@ def criar_tabelas():
         return False
 
 
-def atualizar_schema():
-    """Executa comandos de atualização do schema, se necessário."""
+# Migrações versionadas do schema (ver database/migracoes.py). Bancos criados por
+# criar_tabelas() já nascem na última versão; para alterar o schema, acrescente uma Migracao
+# ao fim da lista (e o mesmo DDL em criar_tabelas e em tests/conftest.py).
+MIGRACOES = [
+    Migracao(
+        1,
+        "Índice (updated_at, id) para a exportação incremental",
+        *[
+            AlteracaoOnline(tabela, "ADD INDEX idx_updated (updated_at, id)")
+            for tabela in ("clientes", "seguros", "apolices", "sinistros")
+        ],
+    ),
+    Migracao(
+        2,
+        "Número da apólice alocado por sequência hi-lo",
+        AlteracaoOnline("apolices", "ADD COLUMN numero VARCHAR(20) NULL AFTER seguro_id"),
+        AlteracaoOnline("apolices", "ADD UNIQUE KEY uq_numero (numero)"),
+        ComandosSQL(
+            """
+        CREATE TABLE IF NOT EXISTS sequencias (
+            nome VARCHAR(32) PRIMARY KEY,
+            proximo BIGINT NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+        """
+        ),
+    ),
+    Migracao(
+        3,
+        "Hash do conteúdo do cliente (sincronização por CPF)",
+        AlteracaoOnline("clientes", "ADD COLUMN hash_conteudo CHAR(64) NULL AFTER endereco"),
+    ),
+    Migracao(
+        4,
+        "Tabelas de arquivo e triggers de exclusão que ignoram o arquivamento",
+        Funcao(criar_tabelas_arquivo),
+        Funcao(criar_triggers_exclusao),
+    ),
+    Migracao(
+        5,
+        "Colunas geradas e índices de placa, ano e valor segurado em seguros.detalhes",
+        AlteracaoOnline(
+            "seguros",
+            ", ".join(
+                f"ADD COLUMN {nome} {definicao}"
+                for nome, definicao in COLUNAS_GERADAS_SEGUROS.items()
+            ),
+        ),
+        *[
+            AlteracaoOnline("seguros", f"ADD INDEX {indice} ({coluna})")
+            for indice, coluna in INDICES_GERADOS_SEGUROS.items()
+        ],
+    ),
+    Migracao(
+        6,
+        "Índices FULLTEXT da busca textual em clientes e sinistros",
+        Funcao(criar_indices_textuais),
+    ),
+    Migracao(
+        7,
+        "Corte da última exportação incremental (janela de sobreposição)",
+        AlteracaoOnline(
+            "marcas_exportacao", "ADD COLUMN ultimo_corte TIMESTAMP NULL AFTER ultima_exclusao_id"
+        ),
+    ),
+]
+
+
+def _conectar_database():
+    return mysql.connector.connect(
+        host=MYSQL_CONFIG["host"],
+        port=MYSQL_CONFIG["port"],
+        user=MYSQL_CONFIG["user"],
+        password=MYSQL_CONFIG["password"],
+        database=MYSQL_CONFIG["database"],
+    )
+
+
+def atualizar_schema(ate: Optional[int] = None):
+    """Aplica as migrações pendentes (até a versão `ate`) com DDL online"""
     try:
-        conn = mysql.connector.connect(
-            host=MYSQL_CONFIG["host"],
-            port=MYSQL_CONFIG["port"],
-            user=MYSQL_CONFIG["user"],
-            password=MYSQL_CONFIG["password"],
-            database=MYSQL_CONFIG["database"],
-        )
+        conn = _conectar_database()
+        executor = ExecutorMigracoes(conn, MIGRACOES, conectar=_conectar_database)
+        pendentes = [m.versao for m in executor.pendentes() if ate is None or m.versao <= ate]
+        aplicadas = executor.executar(ate)
+        if aplicadas != pendentes:
+            conn.close()
+            return False
         cursor = conn.cursor()
 
-        # Exemplo: adicionar uma coluna se não existir
-        # Descomente e adapte conforme necessário
-        # try:
-        #     cursor.execute("ALTER TABLE clientes ADD COLUMN novo_campo VARCHAR(100)")
-        #     print("Coluna 'novo_campo' adicionada com sucesso!")
-        # except Error as e:
-        #     if e.errno == 1060:  # Duplicate column name
-        #         print("Coluna já existe, pulando...")
-        #     else:
-        #         raise
+        # Particionamento de sinistros por data_ocorrencia (opcional, ver PARTICIONAMENTO_CONFIG)
+        granularidade = PARTICIONAMENTO_CONFIG["granularidade"]
+        if granularidade:
+            if particionar_sinistros(
+                cursor, granularidade, PARTICIONAMENTO_CONFIG["particoes_futuras"]
+            ):
+                print(f"Tabela 'sinistros' particionada ({granularidade})")
+            else:
+                criar_triggers_particionamento(cursor)
+                print("Tabela 'sinistros' já é particionada, pulando...")
 
         conn.commit()
         cursor.close()
@@ -206,7 +756,7 @@ if __name__ == "__main__":
     print()
 
     if criar_database():
-        if criar_tabelas():
+        if criar_tabelas() and atualizar_schema():
             print("\n✓ Setup completo!")
         else:
             print("\n✗ Erro ao criar tabelas")
@@ -0,0 +1,425 @@
+"""
+Migrações versionadas do schema MySQL (tabela schema_version)
+Cada Migracao tem um número de versão e uma lista de passos; o ExecutorMigracoes aplica as
+pendentes em ordem e registra cada uma em schema_version. Alterações de tabela usam DDL
+online: ALGORITHM=INSTANT, depois ALGORITHM=INPLACE com LOCK=NONE; se o MySQL não suportar
+nenhum dos dois para a alteração, a tabela é copiada em lotes para uma cópia já alterada,
+mantida em dia por triggers, e trocada pela original com um RENAME TABLE atômico.
+"""
+import os
+import re
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import MIGRACOES_CONFIG
+
+ALGORITMO_INSTANT = "INSTANT"
+ALGORITMO_INPLACE = "INPLACE"
+ESTRATEGIA_COPIA = "COPIA"
+ESTRATEGIA_SQL = "SQL"
+ESTRATEGIA_JA_APLICADA = "JA_APLICADA"
+
+# Alteração não suportada com o ALGORITHM/LOCK pedido
+_OPERACAO_NAO_SUPORTADA = (1845, 1846)
+# Tabela/coluna/índice já existe ou já foi removido: o passo já estava aplicado
+_JA_APLICADA = (1050, 1060, 1061, 1091)
+
+_LOCK_MIGRACOES = "schema_migracoes"
+
+SQL_SCHEMA_VERSION = """
+    CREATE TABLE IF NOT EXISTS schema_version (
+        versao INT PRIMARY KEY,
+        descricao VARCHAR(255) NOT NULL,
+        estrategia VARCHAR(100),
+        duracao_ms INT,
+        aplicada_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+"""
+
+
+class MigracaoError(Exception):
+    pass
+
+
+def calcular_eta(feitas: int, total: int, decorrido: float) -> Optional[float]:
+    """Segundos restantes estimados pelo ritmo até agora (None sem base para estimar)"""
+    if feitas <= 0 or total <= 0:
+        return None
+    return max(0.0, decorrido / feitas * (total - feitas))
+
+
+def imprimir_progresso(tabela: str, etapa: str, feitas: int, total: int, eta: Optional[float]):
+    """Callback de progresso padrão: uma linha por atualização"""
+    percentual = feitas / total * 100 if total else 100.0
+    previsao = f", ETA {eta:.0f}s" if eta is not None else ""
+    print(f"  {tabela}: {etapa} {percentual:.0f}% ({feitas}/{total}){previsao}")
+
+
+def ddl_da_copia(ddl: str, tabela: str, copia: str) -> str:
+    """
+    CREATE TABLE da cópia a partir do SHOW CREATE TABLE da original
+
+    Os nomes das FKs são únicos no schema: sem o CONSTRAINT explícito o MySQL gera
+    <copia>_ibfk_N, renomeado junto com a tabela no RENAME TABLE.
+    """
+    ddl = ddl.replace(f"CREATE TABLE `{tabela}`", f"CREATE TABLE `{copia}`", 1)
+    return re.sub(r"CONSTRAINT `[^`]+` FOREIGN KEY", "FOREIGN KEY", ddl)
+
+
+class AlteracaoOnline:
+    """ALTER TABLE sem travar escritas: INSTANT, INPLACE com LOCK=NONE ou cópia e troca"""
+
+    def __init__(
+        self,
+        tabela: str,
+        alteracao: str,
+        algoritmos: tuple[str, ...] = (ALGORITMO_INSTANT, ALGORITMO_INPLACE),
+        copiar_se_necessario: bool = True,
+    ):
+        """
+        Args:
+            tabela: tabela alterada
+            alteracao: cláusulas do ALTER TABLE (ex.: "ADD INDEX idx_status (status)")
+            algoritmos: algoritmos online tentados, em ordem
+            copiar_se_necessario: usa cópia e troca se nenhum algoritmo servir
+        """
+        self.tabela = tabela
+        self.alteracao = alteracao
+        self.algoritmos = algoritmos
+        self.copiar_se_necessario = copiar_se_necessario
+
+    def aplicar(self, executor: "ExecutorMigracoes") -> str:
+        for algoritmo in self.algoritmos:
+            try:
+                executor.alterar_online(self.tabela, self.alteracao, algoritmo)
+                return algoritmo
+            except Error as e:
+                if e.errno not in _OPERACAO_NAO_SUPORTADA:
+                    raise
+                print(f"  {self.tabela}: ALGORITHM={algoritmo} não suportado ({e.msg})")
+        if not self.copiar_se_necessario:
+            raise MigracaoError(f"Nenhum algoritmo online serve para alterar '{self.tabela}'")
+        executor.copiar_e_trocar(self.tabela, self.alteracao)
+        return ESTRATEGIA_COPIA
+
+
+class ComandosSQL:
+    """Comandos SQL executados em sequência (DDL idempotente, DML curta)"""
+
+    def __init__(self, *comandos: str):
+        self.comandos = comandos
+
+    def aplicar(self, executor: "ExecutorMigracoes") -> str:
+        for comando in self.comandos:
+            executor.cursor.execute(comando)
+        return ESTRATEGIA_SQL
+
+
+class Funcao:
+    """Passo implementado em Python: funcao(cursor)"""
+
+    def __init__(self, funcao: Callable[[Any], Any]):
+        self.funcao = funcao
+
+    def aplicar(self, executor: "ExecutorMigracoes") -> str:
+        self.funcao(executor.cursor)
+        return ESTRATEGIA_SQL
+
+
+class Migracao:
+    """Versão do schema: número crescente, descrição e passos"""
+
+    def __init__(self, versao: int, descricao: str, *passos):
+        self.versao = versao
+        self.descricao = descricao
+        self.passos = passos
+
+    def __repr__(self):
+        return f"Migracao({self.versao}, {self.descricao!r})"
+
+
+class _MonitorDDL(threading.Thread):
+    """Acompanha o ALTER em andamento pelo performance_schema, numa conexão separada"""
+
+    def __init__(self, conectar: Callable[[], Any], informar: Callable[[int, int], None]):
+        super().__init__(daemon=True)
+        self._conectar = conectar
+        self._informar = informar
+        self._parar = threading.Event()
+
+    def parar(self):
+        self._parar.set()
+        self.join()
+
+    def run(self):
+        # Melhor esforço: sem os instrumentos stage/innodb/alter% habilitados não há progresso
+        try:
+            conn = self._conectar()
+            cursor = conn.cursor()
+            while not self._parar.wait(MIGRACOES_CONFIG["intervalo_progresso"]):
+                cursor.execute(
+                    "SELECT WORK_COMPLETED, WORK_ESTIMATED "
+                    "FROM performance_schema.events_stages_current "
+                    "WHERE EVENT_NAME LIKE 'stage/innodb/alter%'"
+                )
+                linhas = cursor.fetchall()
+                if linhas and linhas[0][1]:
+                    self._informar(int(linhas[0][0]), int(linhas[0][1]))
+            cursor.close()
+            conn.close()
+        except Error:
+            pass
+
+
+class ExecutorMigracoes:
+    """Aplica as migrações pendentes e as registra em schema_version"""
+
+    def __init__(
+        self,
+        connection,
+        migracoes: list[Migracao],
+        tamanho_lote: Optional[int] = None,
+        pausa: Optional[float] = None,
+        progresso: Optional[Callable[[str, str, int, int, Optional[float]], None]] = None,
+        conectar: Optional[Callable[[], Any]] = None,
+    ):
+        """
+        Args:
+            connection: conexão MySQL com o database selecionado
+            migracoes: migrações conhecidas (qualquer ordem; versões únicas)
+            tamanho_lote: linhas por lote na cópia e troca (padrão: MIGRACOES_CONFIG)
+            pausa: segundos entre lotes da cópia, para ceder espaço à carga normal
+            progresso: callback(tabela, etapa, feitas, total, eta) (padrão: imprime)
+            conectar: fábrica de conexões para acompanhar o progresso dos ALTER INPLACE
+        """
+        versoes = [m.versao for m in migracoes]
+        if len(set(versoes)) != len(versoes):
+            raise ValueError(f"Versões de migração repetidas: {sorted(versoes)}")
+        cfg = MIGRACOES_CONFIG
+        self.conn = connection
+        self.cursor = None
+        self.migracoes = sorted(migracoes, key=lambda m: m.versao)
+        self.tamanho_lote = int(tamanho_lote or cfg["tamanho_lote"])
+        self.pausa = cfg["pausa"] if pausa is None else pausa
+        self.progresso = progresso or imprimir_progresso
+        self._conectar = conectar
+
+    def _informar(self, tabela: str, etapa: str, feitas: int, total: int, inicio: float):
+        self.progresso(
+            tabela, etapa, feitas, total, calcular_eta(feitas, total, time.time() - inicio)
+        )
+
+    def versoes_aplicadas(self) -> set[int]:
+        cursor = self.conn.cursor()
+        cursor.execute(SQL_SCHEMA_VERSION)
+        cursor.execute("SELECT versao FROM schema_version")
+        versoes = {versao for (versao,) in cursor.fetchall()}
+        cursor.close()
+        return versoes
+
+    def pendentes(self) -> list[Migracao]:
+        aplicadas = self.versoes_aplicadas()
+        return [m for m in self.migracoes if m.versao not in aplicadas]
+
+    def _registrar(self, migracao: Migracao, estrategias: list[str], duracao_ms: int):
+        self.cursor.execute(
+            "INSERT INTO schema_version (versao, descricao, estrategia, duracao_ms) "
+            "VALUES (%s, %s, %s, %s)",
+            (migracao.versao, migracao.descricao, ",".join(estrategias)[:100], duracao_ms),
+        )
+        self.conn.commit()
+
+    def registrar_baseline(self) -> list[int]:
+        """Marca todas as migrações como aplicadas (schema recém-criado já na versão atual)"""
+        pendentes = self.pendentes()
+        self.cursor = self.conn.cursor()
+        try:
+            for migracao in pendentes:
+                self._registrar(migracao, ["BASELINE"], 0)
+        finally:
+            self.cursor.close()
+        return [m.versao for m in pendentes]
+
+    def executar(self, ate: Optional[int] = None) -> list[int]:
+        """
+        Aplica as migrações pendentes até a versão `ate` (padrão: todas)
+
+        Para na primeira que falhar; as anteriores continuam registradas.
+
+        Returns:
+            list[int]: versões aplicadas nesta execução
+        """
+        aplicadas = []
+        self.cursor = self.conn.cursor()
+        try:
+            self.cursor.execute("SELECT GET_LOCK(%s, 0)", (_LOCK_MIGRACOES,))
+            if not self.cursor.fetchone()[0]:
+                print("Outra execução de migrações está em andamento; abortando.")
+                return aplicadas
+            # Espera curta pelo metadata lock: um ALTER na fila bloquearia as consultas seguintes
+            self.cursor.execute(
+                "SET SESSION lock_wait_timeout = %s", (MIGRACOES_CONFIG["lock_wait_timeout"],)
+            )
+            for migracao in self.pendentes():
+                if ate is not None and migracao.versao > ate:
+                    break
+                print(f"Migração {migracao.versao}: {migracao.descricao}")
+                inicio = time.time()
+                estrategias = [self._aplicar_passo(passo) for passo in migracao.passos]
+                self._registrar(migracao, estrategias, int((time.time() - inicio) * 1000))
+                aplicadas.append(migracao.versao)
+                print(f"✓ Migração {migracao.versao} aplicada ({', '.join(estrategias)})")
+        except (Error, MigracaoError) as e:
+            print(f"Erro ao aplicar migração: {e}")
+            self.conn.rollback()
+        finally:
+            try:
+                self.cursor.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_MIGRACOES,))
+                self.cursor.fetchall()
+                self.cursor.close()
+            except Error:
+                pass
+        return aplicadas
+
+    def _aplicar_passo(self, passo) -> str:
+        try:
+            return passo.aplicar(self)
+        except Error as e:
+            if e.errno in _JA_APLICADA:
+                print(f"  Passo já aplicado ({e.msg}), pulando...")
+                return ESTRATEGIA_JA_APLICADA
+            raise
+
+    def alterar_online(self, tabela: str, alteracao: str, algoritmo: str):
+        """ALTER TABLE com o algoritmo pedido (INPLACE sempre com LOCK=NONE)"""
+        opcoes = f"ALGORITHM={algoritmo}"
+        if algoritmo == ALGORITMO_INPLACE:
+            opcoes += ", LOCK=NONE"
+        monitor = None
+        if algoritmo == ALGORITMO_INPLACE and self._conectar:
+            inicio = time.time()
+            monitor = _MonitorDDL(
+                self._conectar,
+                lambda feitas, total: self._informar(tabela, "ALTER", feitas, total, inicio),
+            )
+            monitor.start()
+        try:
+            self.cursor.execute(f"ALTER TABLE {tabela} {alteracao}, {opcoes}")
+        finally:
+            if monitor:
+                monitor.parar()
+
+    def _triggers(self, tabela: str) -> list[tuple[str, str, str, str]]:
+        """Triggers da tabela em ordem de execução: [(nome, momento, evento, corpo)]"""
+        self.cursor.execute(
+            "SELECT TRIGGER_NAME, ACTION_TIMING, EVENT_MANIPULATION, ACTION_STATEMENT "
+            "FROM information_schema.TRIGGERS "
+            "WHERE TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE = %s "
+            "ORDER BY EVENT_MANIPULATION, ACTION_TIMING, ACTION_ORDER",
+            (tabela,),
+        )
+        return self.cursor.fetchall()
+
+    def _colunas_gravaveis(self, tabela: str) -> list[str]:
+        """Colunas da tabela em ordem, sem as geradas (não aceitam valor em INSERT)"""
+        self.cursor.execute(
+            "SELECT COLUMN_NAME, EXTRA FROM information_schema.COLUMNS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION",
+            (tabela,),
+        )
+        return [nome for nome, extra in self.cursor.fetchall() if "GENERATED" not in extra.upper()]
+
+    def copiar_e_trocar(self, tabela: str, alteracao: str):
+        """
+        Alteração por cópia: cria a cópia vazia já alterada, copia as linhas em lotes de id
+        (triggers replicam as escritas concorrentes), troca as tabelas com RENAME TABLE e
+        recria na nova tabela os triggers que existiam na original, com as duas tabelas
+        bloqueadas para escrita. Colunas geradas não são copiadas: a cópia as recalcula.
+
+        Tabelas referenciadas por FKs de outras não podem ser trocadas (as FKs seguiriam a
+        tabela antiga): para elas só há ALTER INPLACE.
+        """
+        cursor = self.cursor
+        cursor.execute(
+            "SELECT DISTINCT TABLE_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+            "WHERE CONSTRAINT_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME = %s",
+            (tabela,),
+        )
+        dependentes = [nome for (nome,) in cursor.fetchall()]
+        if dependentes:
+            raise MigracaoError(
+                f"'{tabela}' é referenciada por FKs de {dependentes}: cópia e troca impossível"
+            )
+        copia, antiga = f"_{tabela}_nova", f"_{tabela}_antiga"
+        sincronia = [f"trg_{tabela}_migracao_{sufixo}" for sufixo in ("ins", "upd", "del")]
+        cursor.execute(f"DROP TABLE IF EXISTS {copia}, {antiga}")
+        for nome in sincronia:
+            cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+
+        cursor.execute(f"SHOW CREATE TABLE {tabela}")
+        cursor.execute(ddl_da_copia(cursor.fetchone()[1], tabela, copia))
+        cursor.execute(f"ALTER TABLE {copia} {alteracao}")
+        colunas_copia = set(self._colunas_gravaveis(copia))
+        colunas = [nome for nome in self._colunas_gravaveis(tabela) if nome in colunas_copia]
+        if "id" not in colunas:
+            raise MigracaoError(f"Cópia e troca exige a coluna 'id' em '{tabela}'")
+        lista = ", ".join(colunas)
+        novos = ", ".join(f"NEW.{coluna}" for coluna in colunas)
+        originais = self._triggers(tabela)
+
+        # Escritas concorrentes chegam à cópia pelos triggers (REPLACE: a versão mais nova vence)
+        cursor.execute(
+            f"CREATE TRIGGER {sincronia[0]} AFTER INSERT ON {tabela} FOR EACH ROW "
+            f"REPLACE INTO {copia} ({lista}) VALUES ({novos})"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {sincronia[1]} AFTER UPDATE ON {tabela} FOR EACH ROW BEGIN "
+            f"DELETE FROM {copia} WHERE id = OLD.id; "
+            f"REPLACE INTO {copia} ({lista}) VALUES ({novos}); END"
+        )
+        cursor.execute(
+            f"CREATE TRIGGER {sincronia[2]} AFTER DELETE ON {tabela} FOR EACH ROW "
+            f"DELETE FROM {copia} WHERE id = OLD.id"
+        )
+
+        cursor.execute(f"SELECT MIN(id), MAX(id) FROM {tabela}")
+        menor, maior = cursor.fetchone()
+        lotes = range(menor, maior + 1, self.tamanho_lote) if maior is not None else range(0)
+        total, inicio = (maior - menor + 1) if maior is not None else 0, time.time()
+        for lote_inicio in lotes:
+            lote_fim = lote_inicio + self.tamanho_lote - 1
+            # IGNORE: linha já gravada pelos triggers é mais nova que a desta cópia
+            cursor.execute(
+                f"INSERT IGNORE INTO {copia} ({lista}) SELECT {lista} FROM {tabela} "
+                "WHERE id BETWEEN %s AND %s LOCK IN SHARE MODE",
+                (lote_inicio, lote_fim),
+            )
+            self.conn.commit()
+            copiadas = min(lote_fim, maior) - menor + 1
+            self._informar(tabela, "cópia (ids)", copiadas, total, inicio)
+            if self.pausa:
+                time.sleep(self.pausa)
+
+        # Os triggers acompanham a tabela renomeada: os originais são recriados na nova tabela.
+        # Sob LOCK TABLES ... WRITE nenhuma escrita acontece entre o RENAME e a recriação (ela
+        # pularia tombstones e verificações de integridade). Criá-los antes na cópia não serve:
+        # disparariam com as escritas dos triggers de sincronia.
+        cursor.execute(f"LOCK TABLES {tabela} WRITE, {copia} WRITE")
+        try:
+            cursor.execute(f"RENAME TABLE {tabela} TO {antiga}, {copia} TO {tabela}")
+            for nome in sincronia:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            for nome, momento, evento, corpo in originais:
+                cursor.execute(f"DROP TRIGGER IF EXISTS {nome}")
+                cursor.execute(
+                    f"CREATE TRIGGER {nome} {momento} {evento} ON {tabela} FOR EACH ROW {corpo}"
+                )
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        cursor.execute(f"DROP TABLE {antiga}")
@@ -4,14 +4,84 @@ Sprint 4 - Persistência Híbrida (logs e documentos complementares)
 """
 import os
 import sys
-from datetime import datetime
+from datetime import date, datetime
+from decimal import Decimal
 
-from pymongo import ASCENDING, DESCENDING, MongoClient
+from bson.codec_options import CodecOptions, TypeCodec, TypeEncoder, TypeRegistry
+from bson.decimal128 import Decimal128
+from pymongo import ASCENDING, DESCENDING, MongoClient, monitoring
 from pymongo.errors import ConnectionFailure, OperationFailure
 
 # Adiciona o diretório pai ao path para importar config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import MONGODB_CONFIG, get_mongodb_uri
+from config import DOCUMENTOS_CONFIG, MONGODB_CONFIG, get_mongodb_uri
+from functions.disjuntor import (
+    DISJUNTOR_MONGODB,
+    ESTADO_FECHADO,
+    ESTADO_SEMIABERTO,
+    obter_disjuntor,
+)
+
+
+class _DateCodec(TypeEncoder):
+    """Grava datas (sem hora) como string ISO - BSON só suporta datetime nativamente"""
+
+    python_type = date
+
+    def transform_python(self, value):
+        return value.isoformat()
+
+
+class _DecimalCodec(TypeCodec):
+    """Grava Decimal (ex: DECIMAL do MySQL) como Decimal128 e lê de volta como Decimal"""
+
+    python_type = Decimal
+    bson_type = Decimal128
+
+    def transform_python(self, value):
+        return Decimal128(value)
+
+    def transform_bson(self, value):
+        return value.to_decimal()
+
+
+def _codificar_objeto_dominio(valor):
+    """Fallback para objetos de domínio (Cliente, Seguro, Apolice, Sinistro...)"""
+    if hasattr(valor, "to_dict"):
+        return valor.to_dict()
+    if hasattr(valor, "__dict__"):
+        return {k: v for k, v in vars(valor).items() if not k.startswith("_")}
+    raise TypeError(f"Tipo não suportado para gravação no MongoDB: {type(valor).__name__}")
+
+
+# Registro de tipos aplicado a todas as coleções: dispensa a cópia/conversão prévia dos documentos
+CODEC_OPTIONS = CodecOptions(
+    type_registry=TypeRegistry(
+        [_DateCodec(), _DecimalCodec()], fallback_encoder=_codificar_objeto_dominio
+    )
+)
+
+
+def aplicar_codecs(database):
+    """Retorna o database (ex: injetado em testes) configurado com o registro de tipos"""
+    if database is None or database.codec_options.type_registry is CODEC_OPTIONS.type_registry:
+        return database
+    return database.with_options(codec_options=CODEC_OPTIONS)
+
+
+class _MonitorDisjuntor(monitoring.ServerHeartbeatListener):
+    """Heartbeats do driver alimentam o disjuntor: a queda é detectada sem esperar uma operação"""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        disjuntor = obter_disjuntor(DISJUNTOR_MONGODB)
+        if disjuntor.estado == ESTADO_FECHADO and disjuntor.falhas_consecutivas:
+            disjuntor.registrar_sucesso()
+
+    def failed(self, event):
+        obter_disjuntor(DISJUNTOR_MONGODB).registrar_falha()
 
 
 class MongoDBConnection:
@@ -22,29 +92,67 @@ class MongoDBConnection:
 
     @classmethod
     def get_client(cls):
-        """Retorna o cliente MongoDB (singleton)"""
+        """Retorna o cliente MongoDB (singleton); None se fora do ar ou com o disjuntor aberto"""
         if cls._client is None:
+            disjuntor = obter_disjuntor(DISJUNTOR_MONGODB)
+            if not disjuntor.permitir():
+                return None
             try:
-                cls._client = MongoClient(get_mongodb_uri(), serverSelectionTimeoutMS=5000)
+                cls._client = MongoClient(
+                    get_mongodb_uri(),
+                    serverSelectionTimeoutMS=MONGODB_CONFIG["timeout_selecao_ms"],
+                    event_listeners=[_MonitorDisjuntor()],
+                )
                 # Testa a conexão
                 cls._client.admin.command("ping")
+                disjuntor.registrar_sucesso()
                 print(
                     f"✓ Conectado ao MongoDB em {MONGODB_CONFIG['host']}:{MONGODB_CONFIG['port']}"
                 )
             except ConnectionFailure as e:
+                disjuntor.registrar_falha()
                 print(f"✗ Erro ao conectar ao MongoDB: {e}")
+                if cls._client is not None:
+                    cls._client.close()
                 cls._client = None
         return cls._client
 
     @classmethod
     def get_database(cls):
-        """Retorna o banco de dados"""
-        if cls._db is None:
-            client = cls.get_client()
-            if client:
-                cls._db = client[MONGODB_CONFIG["database"]]
+        """
+        Retorna o banco de dados
+
+        Com o disjuntor aberto retorna None na hora (os serviços seguem sem MongoDB, ex.:
+        auditoria só em arquivo); vencida a espera, um ping decide se o circuito fecha.
+        """
+        if cls._db is not None:
+            disjuntor = obter_disjuntor(DISJUNTOR_MONGODB)
+            if not disjuntor.permitir():
+                return None
+            if disjuntor.estado == ESTADO_SEMIABERTO and not cls._sondar(disjuntor):
+                return None
+            return cls._db
+        client = cls.get_client()
+        if client:
+            cls._db = client.get_database(MONGODB_CONFIG["database"], codec_options=CODEC_OPTIONS)
         return cls._db
 
+    @classmethod
+    def _sondar(cls, disjuntor) -> bool:
+        try:
+            cls._client.admin.command("ping")
+        except ConnectionFailure:
+            disjuntor.registrar_falha()
+            return False
+        disjuntor.registrar_sucesso()
+        return True
+
+    @staticmethod
+    def registrar_erro(erro: Exception):
+        """Conta no disjuntor erros de conectividade de uma operação (rede, seleção de servidor)"""
+        if isinstance(erro, ConnectionFailure):
+            obter_disjuntor(DISJUNTOR_MONGODB).registrar_falha()
+
     @classmethod
     def close(cls):
         """Fecha a conexão"""
@@ -72,8 +180,27 @@ def criar_colecoes():
         auditoria.create_index([("usuario", ASCENDING)])
         auditoria.create_index([("operacao", ASCENDING)])
         auditoria.create_index([("entidade", ASCENDING)])
+        # Idempotência das entradas aplicadas pelo relay do outbox
+        auditoria.create_index([("_outbox_id", ASCENDING)], unique=True, sparse=True)
         print("✓ Índices de 'auditoria' criados")
 
+        # Coleção de contadores agregados de leituras (política de auditoria)
+        if "auditoria_contadores" not in db.list_collection_names():
+            db.create_collection("auditoria_contadores")
+            print("✓ Coleção 'auditoria_contadores' criada")
+
+        contadores = db["auditoria_contadores"]
+        contadores.create_index(
+            [
+                ("minuto", DESCENDING),
+                ("usuario", ASCENDING),
+                ("entidade", ASCENDING),
+                ("operacao", ASCENDING),
+            ],
+            unique=True,
+        )
+        print("✓ Índices de 'auditoria_contadores' criados")
+
         # Coleção de documentos de sinistros
         if "sinistros_documentos" not in db.list_collection_names():
             db.create_collection("sinistros_documentos")
@@ -84,8 +211,17 @@ def criar_colecoes():
         sinistros_docs.create_index([("sinistro_id", ASCENDING)])
         sinistros_docs.create_index([("apolice_id", ASCENDING)])
         sinistros_docs.create_index([("timestamp", DESCENDING)])
+        sinistros_docs.create_index([("_outbox_id", ASCENDING)], unique=True, sparse=True)
         print("✓ Índices de 'sinistros_documentos' criados")
 
+        # Arquivos de sinistros (GridFS): o nome do arquivo é o SHA-256 do conteúdo
+        arquivos = db[f"{DOCUMENTOS_CONFIG['bucket']}.files"]
+        arquivos.create_index([("filename", ASCENDING)], unique=True)
+        db[f"{DOCUMENTOS_CONFIG['bucket']}.chunks"].create_index(
+            [("files_id", ASCENDING), ("n", ASCENDING)], unique=True
+        )
+        print(f"✓ Índices do bucket '{DOCUMENTOS_CONFIG['bucket']}' criados")
+
         # Coleção de perfil/engajamento de clientes (opcional)
         if "clientes_perfil" not in db.list_collection_names():
             db.create_collection("clientes_perfil")
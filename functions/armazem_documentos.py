@@ -0,0 +1,167 @@
+"""
+Armazém de arquivos de sinistros (GridFS)
+Fotos, boletins de ocorrência e laudos são gravados em chunks de tamanho fixo e
+endereçados pelo SHA-256 do conteúdo: o mesmo arquivo anexado a vários sinistros
+é armazenado uma única vez e os documentos guardam apenas a referência.
+"""
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import uuid
+from collections.abc import Iterator
+from contextlib import ExitStack
+from typing import Any, BinaryIO, Optional, Union
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DOCUMENTOS_CONFIG
+
+OrigemArquivo = Union[str, os.PathLike, bytes, BinaryIO]
+
+
+class ArmazemDocumentos:
+    """Armazém de arquivos deduplicado por SHA-256 - Suporta injeção de dependência"""
+
+    def __init__(self, database=None, tamanho_chunk: Optional[int] = None):
+        """Inicializa o armazém. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection."""
+        self._external_db = database
+        self.tamanho_chunk = tamanho_chunk or DOCUMENTOS_CONFIG["tamanho_chunk"]
+        self._bucket = None
+
+    def _get_db(self):
+        if self._external_db is not None:
+            return self._external_db
+        from database.mongo_setup import MongoDBConnection
+
+        return MongoDBConnection.get_database()
+
+    def _get_bucket(self):
+        if self._bucket is None:
+            from gridfs import GridFSBucket
+
+            db = self._get_db()
+            if db is None:
+                raise Exception("Erro: MongoDB não disponível")
+            self._bucket = GridFSBucket(
+                db, bucket_name=DOCUMENTOS_CONFIG["bucket"], chunk_size_bytes=self.tamanho_chunk
+            )
+        return self._bucket
+
+    def _colecao_arquivos(self):
+        return self._get_db()[f"{DOCUMENTOS_CONFIG['bucket']}.files"]
+
+    def _resumir(self, arquivo: BinaryIO, copia: Optional[BinaryIO] = None) -> tuple[str, int]:
+        """SHA-256 e tamanho do conteúdo, lido em chunks; grava-o também em `copia`, se houver"""
+        hasher = hashlib.sha256()
+        tamanho = 0
+        while True:
+            chunk = arquivo.read(self.tamanho_chunk)
+            if not chunk:
+                return hasher.hexdigest(), tamanho
+            hasher.update(chunk)
+            tamanho += len(chunk)
+            if copia is not None:
+                copia.write(chunk)
+
+    def armazenar(
+        self,
+        origem: OrigemArquivo,
+        nome_arquivo: Optional[str] = None,
+        content_type: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """
+        Grava o arquivo lendo e enviando um chunk por vez (memória limitada ao tamanho do chunk)
+
+        O SHA-256 é calculado antes do envio: conteúdo já armazenado não é enviado de novo.
+        Origens sem seek() são copiadas para um arquivo temporário durante o cálculo.
+
+        Args:
+            origem: caminho do arquivo, bytes ou objeto binário com read()
+            nome_arquivo: nome original (padrão: nome do caminho informado)
+            content_type: tipo MIME opcional
+
+        Returns:
+            dict: referência {sha256, gridfs_id, tamanho, nome_arquivo, content_type}
+        """
+        from pymongo.errors import DuplicateKeyError
+
+        bucket = self._get_bucket()
+        with ExitStack() as pilha:
+            if isinstance(origem, (str, os.PathLike)):
+                nome_arquivo = nome_arquivo or os.path.basename(os.fspath(origem))
+                arquivo = pilha.enter_context(open(origem, "rb"))
+            elif isinstance(origem, (bytes, bytearray)):
+                arquivo = io.BytesIO(origem)
+            else:
+                arquivo = origem
+
+            if getattr(arquivo, "seekable", lambda: False)():
+                inicio = arquivo.tell()
+                sha256, tamanho = self._resumir(arquivo)
+                arquivo.seek(inicio)
+            else:
+                temporario = pilha.enter_context(
+                    tempfile.SpooledTemporaryFile(max_size=self.tamanho_chunk)
+                )
+                sha256, tamanho = self._resumir(arquivo, copia=temporario)
+                arquivo = temporario
+                arquivo.seek(0)
+
+            existente = self._colecao_arquivos().find_one({"filename": sha256}, {"_id": 1})
+            if existente is None:
+                # Nome temporário até o fim do envio: um upload interrompido nunca fica com
+                # o nome do hash
+                with bucket.open_upload_stream(
+                    f"tmp-{uuid.uuid4().hex}", metadata={"content_type": content_type}
+                ) as upload:
+                    while True:
+                        chunk = arquivo.read(self.tamanho_chunk)
+                        if not chunk:
+                            break
+                        upload.write(chunk)
+                    novo_id = upload._id
+                try:
+                    bucket.rename(novo_id, sha256)
+                    existente = {"_id": novo_id}
+                except DuplicateKeyError:
+                    # Upload concorrente do mesmo conteúdo venceu a corrida
+                    bucket.delete(novo_id)
+                    existente = self._colecao_arquivos().find_one({"filename": sha256}, {"_id": 1})
+
+        return {
+            "sha256": sha256,
+            "gridfs_id": existente["_id"],
+            "tamanho": tamanho,
+            "nome_arquivo": nome_arquivo,
+            "content_type": content_type,
+        }
+
+    def existe(self, sha256: str) -> bool:
+        return self._colecao_arquivos().count_documents({"filename": sha256}, limit=1) > 0
+
+    def ler_em_chunks(self, sha256: str) -> Iterator[bytes]:
+        """Gera o conteúdo do arquivo em chunks de tamanho fixo"""
+        with self._get_bucket().open_download_stream_by_name(sha256) as download:
+            while True:
+                chunk = download.read(self.tamanho_chunk)
+                if not chunk:
+                    return
+                yield chunk
+
+    def baixar(self, sha256: str, destino: Union[str, os.PathLike, BinaryIO]) -> int:
+        """
+        Grava o arquivo em `destino` (caminho ou objeto binário com write())
+
+        Returns:
+            int: quantidade de bytes gravados
+        """
+        if isinstance(destino, (str, os.PathLike)):
+            with open(destino, "wb") as arquivo:
+                return self.baixar(sha256, arquivo)
+        total = 0
+        for chunk in self.ler_em_chunks(sha256):
+            destino.write(chunk)
+            total += len(chunk)
+        return total
@@ -0,0 +1,180 @@
+"""
+Arquivamento (dados quentes/frios) de apólices canceladas e sinistros fechados
+Linhas em status terminal sem alteração há mais de dias_retencao dias saem de 'apolices' e
+'sinistros' para 'apolices_arquivo' e 'sinistros_arquivo', em lotes curtos: cada lote trava
+só os seus ids (SELECT ... FOR UPDATE), copia, exclui e confirma antes do próximo.
+
+Uma apólice só é arquivada quando todos os seus sinistros estão fechados; os sinistros dela
+são movidos no mesmo lote, antes da apólice (o ON DELETE CASCADE os apagaria). As exclusões
+do arquivamento não geram tombstones (ver TRIGGERS_EXCLUSAO em database/db_setup.py).
+Consultas e relatórios enxergam as linhas arquivadas com incluir_arquivados=True.
+"""
+import os
+import sys
+import time
+from typing import Optional
+
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import ARQUIVAMENTO_CONFIG
+from functions.dao_mysql import ApoliceDAO, SinistroDAO, get_connection
+
+# Status terminais que permitem arquivar
+STATUS_APOLICE_ARQUIVAVEL = ("cancelada",)
+STATUS_SINISTRO_ARQUIVAVEL = ("fechado",)
+
+
+def _colunas(dao) -> str:
+    return ", ".join(dao._COLUNAS + dao._COLUNAS_CONTROLE)
+
+
+def _marcadores(itens) -> str:
+    return ", ".join(["%s"] * len(itens))
+
+
+class Arquivador:
+    """Move as linhas elegíveis para as tabelas de arquivo - Suporta injeção de dependência"""
+
+    def __init__(
+        self,
+        dias_retencao: Optional[int] = None,
+        tamanho_lote: Optional[int] = None,
+        pausa: Optional[float] = None,
+        connection=None,
+    ):
+        """
+        Args:
+            dias_retencao: dias sem alteração (updated_at) antes de arquivar (padrão: config)
+            tamanho_lote: linhas travadas e movidas por transação
+            pausa: segundos entre lotes, para ceder espaço à carga normal
+            connection: Conexão MySQL opcional. Se None, abre uma por execução.
+        """
+        cfg = ARQUIVAMENTO_CONFIG
+        self.dias_retencao = cfg["dias_retencao"] if dias_retencao is None else dias_retencao
+        self.tamanho_lote = int(tamanho_lote or cfg["tamanho_lote"])
+        self.pausa = cfg["pausa"] if pausa is None else pausa
+        self._external_conn = connection
+
+    def _get_conn(self):
+        return self._external_conn if self._external_conn else get_connection()
+
+    def _should_close(self):
+        return self._external_conn is None
+
+    def _mover(self, cursor, tabela: str, colunas: str, coluna_chave: str, ids: list[int]):
+        """Copia para <tabela>_arquivo e exclui da tabela quente as linhas com coluna IN ids"""
+        filtro = f"{coluna_chave} IN ({_marcadores(ids)})"
+        cursor.execute(
+            f"INSERT INTO {tabela}_arquivo ({colunas}) "
+            f"SELECT {colunas} FROM {tabela} WHERE {filtro}",
+            tuple(ids),
+        )
+        cursor.execute(f"DELETE FROM {tabela} WHERE {filtro}", tuple(ids))
+        return cursor.rowcount
+
+    def _arquivar_em_lotes(self, tabela: str, sql_candidatos: str, parametros: tuple, mover):
+        """
+        Repete lotes de SELECT id ... LIMIT n FOR UPDATE + mover(cursor, ids) + commit
+
+        Linhas movidas deixam de ser candidatas: basta repetir a consulta até um lote curto.
+
+        Returns:
+            int: linhas da tabela arquivadas (inclui os lotes confirmados antes de um erro)
+        """
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        total = 0
+        cursor = conn.cursor()
+        try:
+            # Sinaliza aos triggers de exclusão que as linhas não deixam de existir
+            cursor.execute("SET @arquivamento = 1")
+            while True:
+                cursor.execute(
+                    f"{sql_candidatos} ORDER BY id LIMIT %s FOR UPDATE",
+                    (*parametros, self.tamanho_lote),
+                )
+                ids = [linha[0] for linha in cursor.fetchall()]
+                if ids:
+                    mover(cursor, ids)
+                conn.commit()
+                total += len(ids)
+                if len(ids) < self.tamanho_lote:
+                    break
+                if self.pausa:
+                    time.sleep(self.pausa)
+        except Error as e:
+            print(f"Erro ao arquivar {tabela}: {e}")
+            conn.rollback()
+        finally:
+            try:
+                cursor.execute("SET @arquivamento = NULL")
+                cursor.close()
+            except Error:
+                pass
+            if self._should_close():
+                conn.close()
+        return total
+
+    def arquivar_sinistros(self) -> int:
+        """Arquiva sinistros fechados sem alteração no período de retenção"""
+        status = STATUS_SINISTRO_ARQUIVAVEL
+        colunas = _colunas(SinistroDAO)
+        return self._arquivar_em_lotes(
+            "sinistros",
+            f"SELECT id FROM sinistros WHERE status IN ({_marcadores(status)}) "
+            "AND updated_at < NOW() - INTERVAL %s DAY",
+            (*status, self.dias_retencao),
+            lambda cursor, ids: self._mover(cursor, "sinistros", colunas, "id", ids),
+        )
+
+    def arquivar_apolices(self) -> int:
+        """
+        Arquiva apólices canceladas sem alteração no período de retenção e seus sinistros
+
+        Apólices com algum sinistro ainda não fechado ficam na tabela quente.
+        """
+        status = STATUS_APOLICE_ARQUIVAVEL
+        fechados = STATUS_SINISTRO_ARQUIVAVEL
+        colunas_apolice, colunas_sinistro = _colunas(ApoliceDAO), _colunas(SinistroDAO)
+
+        def mover(cursor, ids):
+            # Trava e move os sinistros antes que a exclusão da apólice os apague em cascata
+            cursor.execute(
+                f"SELECT id FROM sinistros WHERE apolice_id IN ({_marcadores(ids)}) FOR UPDATE",
+                tuple(ids),
+            )
+            cursor.fetchall()
+            self._mover(cursor, "sinistros", colunas_sinistro, "apolice_id", ids)
+            self._mover(cursor, "apolices", colunas_apolice, "id", ids)
+
+        return self._arquivar_em_lotes(
+            "apolices",
+            f"SELECT id FROM apolices a WHERE a.status IN ({_marcadores(status)}) "
+            "AND a.updated_at < NOW() - INTERVAL %s DAY "
+            "AND NOT EXISTS (SELECT 1 FROM sinistros s WHERE s.apolice_id = a.id "
+            f"AND s.status NOT IN ({_marcadores(fechados)}))",
+            (*status, self.dias_retencao, *fechados),
+            mover,
+        )
+
+    def arquivar_tudo(self) -> dict[str, int]:
+        """
+        Executa o arquivamento completo: sinistros fechados, depois apólices canceladas
+
+        Returns:
+            dict: {"sinistros": n, "apolices": n} linhas arquivadas diretamente em cada tabela
+            (sinistros movidos junto com a apólice contam apenas na apólice)
+        """
+        return {"sinistros": self.arquivar_sinistros(), "apolices": self.arquivar_apolices()}
+
+
+if __name__ == "__main__":
+    print("=== Arquivamento de apólices canceladas e sinistros fechados ===")
+    arquivador = Arquivador()
+    print(f"Retenção: {arquivador.dias_retencao} dias | lote: {arquivador.tamanho_lote} linhas")
+    resultado = arquivador.arquivar_tudo()
+    print(f"✓ Sinistros arquivados: {resultado['sinistros']}")
+    print(f"✓ Apólices arquivadas: {resultado['apolices']}")
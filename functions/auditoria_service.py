@@ -12,20 +12,55 @@ from typing import Any, Optional
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 try:
-    from database.mongo_setup import MongoDBConnection
+    from database.mongo_setup import MongoDBConnection, aplicar_codecs
 
     MONGODB_DISPONIVEL = True
 except ImportError:
     MONGODB_DISPONIVEL = False
     print("⚠ MongoDB não disponível - logs serão salvos apenas em arquivo")
 
+from functions.armazem_documentos import ArmazemDocumentos
+from functions.politica_auditoria import (
+    MODO_AGREGAR,
+    MODO_AMOSTRAR,
+    AgregadorContadores,
+    PoliticaAuditoria,
+    obter_agregador_padrao,
+    obter_politica_padrao,
+)
+
+
+def _com_codecs(database):
+    """Aplica o registro de tipos BSON (date, Decimal, objetos de domínio) a um database injetado"""
+    if database is None or not MONGODB_DISPONIVEL:
+        return database
+    return aplicar_codecs(database)
+
 
 class AuditoriaService:
     """Serviço de auditoria que grava logs no MongoDB e arquivo - Suporta injeção de dependência"""
 
-    def __init__(self, database=None):
-        """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection."""
-        self._external_db = database
+    def __init__(
+        self,
+        database=None,
+        politica: Optional[PoliticaAuditoria] = None,
+        agregador: Optional[AgregadorContadores] = None,
+        outbox=None,
+    ):
+        """
+        Inicializa o serviço.
+
+        Args:
+            database: MongoDB database opcional. Se None, obtém do MongoDBConnection.
+            politica: Política de amostragem/agregação. Se None, usa a política do processo.
+            agregador: Agregador de contadores. Se None, usa o agregador do processo.
+            outbox: OutboxDAO opcional. Se informado, os logs são enfileirados no MySQL
+                e aplicados no MongoDB pelo relay.
+        """
+        self._external_db = _com_codecs(database)
+        self.outbox = outbox
+        self.politica = politica or obter_politica_padrao()
+        self.agregador = agregador or obter_agregador_padrao()
 
     def _get_db(self):
         """Retorna database externo ou obtém do MongoDBConnection"""
@@ -56,10 +91,24 @@ class AuditoriaService:
             status: Status da operação (sucesso, erro, warning)
 
         Returns:
-            str: ID do log inserido no MongoDB, ou None se falhou
+            str: ID do log inserido no MongoDB, ou None se falhou/foi amostrado/agregado
         """
         timestamp = datetime.now()
 
+        # Leituras podem ser amostradas ou agregadas conforme a política
+        modo, taxa = self.politica.decidir(entidade, operacao, status)
+        if modo == MODO_AGREGAR:
+            encerrados = self.agregador.registrar(
+                usuario, entidade, operacao, timestamp, destino=self._gravar_contadores
+            )
+            if encerrados:
+                self._gravar_contadores(encerrados)
+            return None
+        if modo == MODO_AMOSTRAR:
+            if not self.politica.amostrar(taxa):
+                return None
+            detalhes = {**(detalhes or {}), "taxa_amostragem": taxa}
+
         log_documento = {
             "timestamp": timestamp,
             "usuario": usuario,
@@ -70,14 +119,21 @@ class AuditoriaService:
             "detalhes": detalhes or {},
         }
 
-        # Grava no MongoDB se disponível
+        # Com outbox, o log entra na transação MySQL corrente e é aplicado depois pelo relay
         log_id = None
+        if self.outbox is not None:
+            self.outbox.enfileirar("auditoria", "inserir", documento=log_documento)
+            _gravar_log_arquivo(log_documento)
+            return log_id
+
+        # Grava no MongoDB se disponível
         try:
             db = self._get_db()
             if db is not None:
                 resultado = db["auditoria"].insert_one(log_documento)
                 log_id = str(resultado.inserted_id)
         except Exception as e:
+            MongoDBConnection.registrar_erro(e)
             print(f"Erro ao gravar log no MongoDB: {e}")
 
         # Também grava em arquivo (backup)
@@ -85,6 +141,133 @@ class AuditoriaService:
 
         return log_id
 
+    def registrar_logs(
+        self,
+        usuario: str,
+        operacao: str,
+        entidade: str,
+        entidade_ids: list[int],
+        detalhes: Optional[dict[str, Any]] = None,
+        status: str = "sucesso",
+    ) -> int:
+        """
+        Registra a mesma operação para várias entidades com um único insert_many (operações
+        em lote); um log por entidade, como em registrar_log
+
+        Returns:
+            int: quantidade de logs gravados no MongoDB
+        """
+        timestamp = datetime.now()
+        documentos = [
+            {
+                "timestamp": timestamp,
+                "usuario": usuario,
+                "operacao": operacao,
+                "entidade": entidade,
+                "entidade_id": entidade_id,
+                "status": status,
+                "detalhes": detalhes or {},
+            }
+            for entidade_id in entidade_ids
+        ]
+        if not documentos:
+            return 0
+
+        if self.outbox is not None:
+            self.outbox.enfileirar_lote(
+                "auditoria", "inserir", [{"documento": documento} for documento in documentos]
+            )
+            _gravar_logs_arquivo(documentos)
+            return 0
+
+        gravados = 0
+        try:
+            db = self._get_db()
+            if db is not None:
+                resultado = db["auditoria"].insert_many(documentos, ordered=False)
+                gravados = len(resultado.inserted_ids)
+        except Exception as e:
+            MongoDBConnection.registrar_erro(e)
+            print(f"Erro ao gravar logs em lote no MongoDB: {e}")
+
+        _gravar_logs_arquivo(documentos)
+        return gravados
+
+    def _gravar_contadores(self, contadores: list[dict[str, Any]]):
+        """Grava contadores agregados no MongoDB (upsert com $inc) e no arquivo"""
+        try:
+            db = self._get_db()
+            if db is not None:
+                from pymongo import UpdateOne
+
+                operacoes = [
+                    UpdateOne(
+                        {
+                            "minuto": c["minuto"],
+                            "usuario": c["usuario"],
+                            "entidade": c["entidade"],
+                            "operacao": c["operacao"],
+                        },
+                        {"$inc": {"total": c["total"]}},
+                        upsert=True,
+                    )
+                    for c in contadores
+                ]
+                db["auditoria_contadores"].bulk_write(operacoes, ordered=False)
+        except Exception as e:
+            MongoDBConnection.registrar_erro(e)
+            print(f"Erro ao gravar contadores de auditoria no MongoDB: {e}")
+
+        for c in contadores:
+            _gravar_log_arquivo(
+                {
+                    "timestamp": c["minuto"],
+                    "usuario": c["usuario"],
+                    "operacao": c["operacao"],
+                    "entidade": c["entidade"],
+                    "status": "agregado",
+                    "detalhes": {"total": c["total"]},
+                }
+            )
+
+    def descarregar_contadores(self):
+        """Força a gravação de todos os contadores pendentes (inclusive do minuto corrente)"""
+        pendentes = self.agregador.extrair_todos()
+        if pendentes:
+            self._gravar_contadores(pendentes)
+        return len(pendentes)
+
+    def consultar_contadores(
+        self,
+        usuario: Optional[str] = None,
+        entidade: Optional[str] = None,
+        operacao: Optional[str] = None,
+        limite: int = 100,
+    ):
+        """Consulta contadores agregados de leituras no MongoDB"""
+        try:
+            db = self._get_db()
+            if db is None:
+                return []
+
+            filtro = {}
+            if usuario:
+                filtro["usuario"] = usuario
+            if entidade:
+                filtro["entidade"] = entidade
+            if operacao:
+                filtro["operacao"] = operacao
+
+            contadores = list(
+                db["auditoria_contadores"].find(filtro).sort("minuto", -1).limit(limite)
+            )
+            for contador in contadores:
+                contador["_id"] = str(contador["_id"])
+            return contadores
+        except Exception as e:
+            print(f"Erro ao consultar contadores: {e}")
+            return []
+
     def consultar_logs(
         self,
         usuario: Optional[str] = None,
@@ -134,9 +317,12 @@ class AuditoriaService:
 class SinistroDocumentosService:
     """Serviço para gerenciar documentos e anexos de sinistros no MongoDB - Suporta injeção de dependência"""
 
-    def __init__(self, database=None):
-        """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection."""
-        self._external_db = database
+    def __init__(self, database=None, outbox=None):
+        """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection.
+        outbox: OutboxDAO opcional para enfileirar as gravações na transação MySQL corrente."""
+        self._external_db = _com_codecs(database)
+        self.outbox = outbox
+        self.armazem = ArmazemDocumentos(self._external_db)
 
     def _get_db(self):
         if self._external_db is not None:
@@ -145,6 +331,45 @@ class SinistroDocumentosService:
             return MongoDBConnection.get_database()
         return None
 
+    def _montar_documento(
+        self,
+        sinistro_id: int,
+        tipo_documento: str,
+        caminho_arquivo: Optional[str] = None,
+        descricao: Optional[str] = None,
+        apolice_id: Optional[int] = None,
+        conteudo: Optional[str] = None,
+        metadados: Optional[dict[str, Any]] = None,
+        arquivo=None,
+        nome_arquivo: Optional[str] = None,
+    ) -> dict[str, Any]:
+        """Monta o documento do sinistro, gravando o arquivo anexado no armazém se houver"""
+        from bson import ObjectId
+
+        # _id atribuído aqui: é conhecido antes da gravação, inclusive via outbox
+        documento = {
+            "_id": ObjectId(),
+            "sinistro_id": sinistro_id,
+            "tipo_documento": tipo_documento,
+            "metadados": metadados or {},
+            "timestamp": datetime.now(),
+        }
+
+        # Adiciona campos opcionais
+        if apolice_id:
+            documento["apolice_id"] = apolice_id
+        if caminho_arquivo:
+            documento["caminho_arquivo"] = caminho_arquivo
+        if descricao:
+            documento["descricao"] = descricao
+        if conteudo:
+            documento["conteudo"] = conteudo
+        if arquivo is not None:
+            # O arquivo vai direto para o armazém (conteúdo endereçado é idempotente,
+            # mesmo com outbox); só a referência segue no documento
+            documento["arquivo"] = self.armazem.armazenar(arquivo, nome_arquivo=nome_arquivo)
+        return documento
+
     def adicionar_documento(
         self,
         sinistro_id: int,
@@ -154,6 +379,8 @@ class SinistroDocumentosService:
         apolice_id: Optional[int] = None,
         conteudo: Optional[str] = None,
         metadados: Optional[dict[str, Any]] = None,
+        arquivo=None,
+        nome_arquivo: Optional[str] = None,
     ):
         """
         Adiciona um documento/observação ao sinistro
@@ -166,30 +393,36 @@ class SinistroDocumentosService:
             apolice_id: ID da apólice (opcional, para compatibilidade)
             conteudo: Conteúdo textual (para observações)
             metadados: Metadados adicionais
+            arquivo: Caminho, bytes ou stream binário a ser gravado no armazém (GridFS).
+                O documento guarda apenas a referência (sha256/gridfs_id/tamanho).
+            nome_arquivo: Nome original do arquivo anexado
         """
+        try:
+            documento = self._montar_documento(
+                sinistro_id,
+                tipo_documento,
+                caminho_arquivo=caminho_arquivo,
+                descricao=descricao,
+                apolice_id=apolice_id,
+                conteudo=conteudo,
+                metadados=metadados,
+                arquivo=arquivo,
+                nome_arquivo=nome_arquivo,
+            )
+        except Exception as e:
+            print(f"Erro ao armazenar arquivo do documento: {e}")
+            return None
+
+        if self.outbox is not None:
+            self.outbox.enfileirar("sinistros_documentos", "inserir", documento=documento)
+            return str(documento["_id"])
+
         try:
             db = self._get_db()
             if db is None:
                 print("MongoDB não disponível")
                 return None
 
-            documento = {
-                "sinistro_id": sinistro_id,
-                "tipo_documento": tipo_documento,
-                "metadados": metadados or {},
-                "timestamp": datetime.now(),
-            }
-
-            # Adiciona campos opcionais
-            if apolice_id:
-                documento["apolice_id"] = apolice_id
-            if caminho_arquivo:
-                documento["caminho_arquivo"] = caminho_arquivo
-            if descricao:
-                documento["descricao"] = descricao
-            if conteudo:
-                documento["conteudo"] = conteudo
-
             resultado = db["sinistros_documentos"].insert_one(documento)
             return str(resultado.inserted_id)
         except Exception as e:
@@ -216,6 +449,128 @@ class SinistroDocumentosService:
             print(f"Erro ao listar documentos: {e}")
             return []
 
+    def listar_documentos_por_sinistros(self, sinistro_ids: list[int]) -> Optional[dict[int, list]]:
+        """
+        Documentos de vários sinistros numa única consulta ($in), agrupados por sinistro_id
+
+        Returns:
+            dict: {sinistro_id: [documentos]} ou None se o MongoDB não estiver disponível
+        """
+        try:
+            agrupados: dict[int, list] = {sinistro_id: [] for sinistro_id in sinistro_ids}
+            if not sinistro_ids:
+                return agrupados
+            db = self._get_db()
+            if db is None:
+                return None
+
+            cursor = (
+                db["sinistros_documentos"]
+                .find({"sinistro_id": {"$in": list(sinistro_ids)}})
+                .sort("timestamp", -1)
+            )
+            for doc in cursor:
+                doc["_id"] = str(doc["_id"])
+                agrupados.setdefault(doc["sinistro_id"], []).append(doc)
+            return agrupados
+        except Exception as e:
+            print(f"Erro ao listar documentos dos sinistros: {e}")
+            return None
+
+    def adicionar_documentos(
+        self,
+        sinistro_id: int,
+        documentos: list[dict[str, Any]],
+        apolice_id: Optional[int] = None,
+        metadados: Optional[dict[str, Any]] = None,
+    ) -> dict[str, Any]:
+        """
+        Adiciona vários documentos ao sinistro com um único insert_many
+
+        Args:
+            sinistro_id: ID do sinistro
+            documentos: lista de dicts com os mesmos campos de adicionar_documento
+                (tipo_documento obrigatório; caminho_arquivo, descricao, conteudo, metadados,
+                arquivo, nome_arquivo opcionais)
+            apolice_id: ID da apólice aplicado a todos os documentos
+            metadados: metadados comuns, mesclados aos de cada documento
+
+        Returns:
+            dict: {"inseridos": [ids], "falhas": [{"indice", "tipo_documento", "erro"}]}
+                  onde "indice" é a posição do documento na lista recebida
+        """
+        campos = ("caminho_arquivo", "descricao", "conteudo", "arquivo", "nome_arquivo")
+        resultado = {"inseridos": [], "falhas": []}
+
+        def falhar(indice, item, erro):
+            print(f"Erro ao adicionar documento {indice} do sinistro {sinistro_id}: {erro}")
+            resultado["falhas"].append(
+                {"indice": indice, "tipo_documento": item.get("tipo_documento"), "erro": erro}
+            )
+
+        # Validação e montagem: documentos inválidos não impedem os demais
+        validos, indices = [], []
+        for indice, item in enumerate(documentos):
+            if not item.get("tipo_documento"):
+                falhar(indice, item, "tipo_documento é obrigatório")
+                continue
+            try:
+                validos.append(
+                    self._montar_documento(
+                        sinistro_id,
+                        item["tipo_documento"],
+                        apolice_id=item.get("apolice_id", apolice_id),
+                        metadados={**(metadados or {}), **(item.get("metadados") or {})},
+                        **{campo: item.get(campo) for campo in campos},
+                    )
+                )
+                indices.append(indice)
+            except Exception as e:
+                falhar(indice, item, f"Erro ao armazenar arquivo: {e}")
+
+        if not validos:
+            return resultado
+
+        if self.outbox is not None:
+            self.outbox.enfileirar_lote(
+                "sinistros_documentos", "inserir", [{"documento": d} for d in validos]
+            )
+            resultado["inseridos"] = [str(documento["_id"]) for documento in validos]
+            return resultado
+
+        from pymongo.errors import BulkWriteError
+
+        db = self._get_db()
+        if db is None:
+            for indice in indices:
+                falhar(indice, documentos[indice], "MongoDB não disponível")
+            return resultado
+
+        try:
+            db["sinistros_documentos"].insert_many(validos, ordered=False)
+            rejeitados = {}
+        except BulkWriteError as e:
+            # ordered=False: todos os documentos são tentados; writeErrors indica os rejeitados
+            rejeitados = {erro["index"]: erro.get("errmsg") for erro in e.details["writeErrors"]}
+        except Exception as e:
+            rejeitados = {posicao: str(e) for posicao in range(len(validos))}
+
+        for posicao, (indice, documento) in enumerate(zip(indices, validos)):
+            if posicao in rejeitados:
+                falhar(indice, documentos[indice], rejeitados[posicao])
+            else:
+                resultado["inseridos"].append(str(documento["_id"]))
+        resultado["falhas"].sort(key=lambda falha: falha["indice"])
+        return resultado
+
+    def ler_arquivo(self, sha256: str):
+        """Gera o conteúdo de um arquivo anexado em chunks (memória limitada)"""
+        return self.armazem.ler_em_chunks(sha256)
+
+    def baixar_arquivo(self, sha256: str, destino) -> int:
+        """Grava um arquivo anexado em `destino` (caminho ou stream binário)"""
+        return self.armazem.baixar(sha256, destino)
+
     # Métodos alias para compatibilidade com testes
     def listar_documentos_sinistro(self, sinistro_id: int):
         """Alias para listar_documentos"""
@@ -244,12 +599,18 @@ class SinistroDocumentosService:
             return []
 
 
+# Contatos por $push em adicionar_contatos (cada um tem poucas centenas de bytes)
+_CONTATOS_POR_PUSH = 1000
+
+
 class ClientePerfilService:
     """Serviço para gerenciar perfil e histórico de engajamento do cliente - Suporta injeção de dependência"""
 
-    def __init__(self, database=None):
-        """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection."""
-        self._external_db = database
+    def __init__(self, database=None, outbox=None):
+        """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection.
+        outbox: OutboxDAO opcional para enfileirar as gravações na transação MySQL corrente."""
+        self._external_db = _com_codecs(database)
+        self.outbox = outbox
 
     def _get_db(self):
         if self._external_db is not None:
@@ -265,18 +626,28 @@ class ClientePerfilService:
         historico_contato: Optional[list] = None,
     ):
         """Atualiza ou cria o perfil de engajamento do cliente"""
+        perfil = {
+            "cliente_id": cliente_id,
+            "preferencias": preferencias or {},
+            "historico_contato": historico_contato or [],
+            "ultima_atualizacao": datetime.now(),
+        }
+
+        if self.outbox is not None:
+            self.outbox.enfileirar(
+                "clientes_perfil",
+                "atualizar",
+                filtro={"cliente_id": cliente_id},
+                atualizacao={"$set": perfil},
+                upsert=True,
+            )
+            return True
+
         try:
             db = self._get_db()
             if db is None:
                 return False
 
-            perfil = {
-                "cliente_id": cliente_id,
-                "preferencias": preferencias or {},
-                "historico_contato": historico_contato or [],
-                "ultima_atualizacao": datetime.now(),
-            }
-
             db["clientes_perfil"].update_one(
                 {"cliente_id": cliente_id}, {"$set": perfil}, upsert=True
             )
@@ -299,52 +670,116 @@ class ClientePerfilService:
         1. adicionar_contato(cliente_id, dict_contato) - dict com todos os campos
         2. adicionar_contato(cliente_id, tipo, descricao, metadados) - campos separados
         """
+        # Se segundo parâmetro é dict, usa ele diretamente
+        if isinstance(tipo_contato_ou_dict, dict):
+            contato_dict = tipo_contato_ou_dict.copy()
+            contato = {
+                "timestamp": datetime.now(),
+                "tipo": contato_dict.get("tipo", "OUTROS"),
+                "descricao": contato_dict.get("descricao", ""),
+            }
+            # Preserva 'assunto' e outros campos como estão
+            for key in ["assunto", "data", "observacoes"]:
+                if key in contato_dict:
+                    contato[key] = contato_dict[key]
+
+            # Adiciona campos não-especiais em metadados
+            metadados_extra = {
+                k: v
+                for k, v in contato_dict.items()
+                if k not in ["tipo", "assunto", "descricao", "data", "observacoes"]
+            }
+            if metadados_extra:
+                contato["metadados"] = metadados_extra
+        else:
+            # Formato antigo: parâmetros separados
+            contato = {
+                "timestamp": datetime.now(),
+                "tipo": tipo_contato_ou_dict,
+                "descricao": descricao or "",
+                "metadados": metadados or {},
+            }
+
+        atualizacao = {
+            "$push": {"historico_contato": contato},
+            "$set": {"ultima_atualizacao": datetime.now()},
+        }
+
+        if self.outbox is not None:
+            self.outbox.enfileirar(
+                "clientes_perfil",
+                "atualizar",
+                filtro={"cliente_id": cliente_id},
+                atualizacao=atualizacao,
+                upsert=True,
+            )
+            return True
+
         try:
             db = self._get_db()
             if db is None:
                 return False
 
-            # Se segundo parâmetro é dict, usa ele diretamente
-            if isinstance(tipo_contato_ou_dict, dict):
-                contato_dict = tipo_contato_ou_dict.copy()
-                contato = {
-                    "timestamp": datetime.now(),
-                    "tipo": contato_dict.get("tipo", "OUTROS"),
-                    "descricao": contato_dict.get("descricao", ""),
-                }
-                # Preserva 'assunto' e outros campos como estão
-                for key in ["assunto", "data", "observacoes"]:
-                    if key in contato_dict:
-                        contato[key] = contato_dict[key]
-
-                # Adiciona campos não-especiais em metadados
-                metadados_extra = {
-                    k: v
-                    for k, v in contato_dict.items()
-                    if k not in ["tipo", "assunto", "descricao", "data", "observacoes"]
-                }
-                if metadados_extra:
-                    contato["metadados"] = metadados_extra
-            else:
-                # Formato antigo: parâmetros separados
-                contato = {
-                    "timestamp": datetime.now(),
-                    "tipo": tipo_contato_ou_dict,
-                    "descricao": descricao or "",
-                    "metadados": metadados or {},
-                }
+            db["clientes_perfil"].update_one({"cliente_id": cliente_id}, atualizacao, upsert=True)
+            return True
+        except Exception as e:
+            print(f"Erro ao adicionar contato: {e}")
+            return False
 
-            db["clientes_perfil"].update_one(
-                {"cliente_id": cliente_id},
-                {
-                    "$push": {"historico_contato": contato},
-                    "$set": {"ultima_atualizacao": datetime.now()},
-                },
-                upsert=True,
+    def adicionar_contatos(self, cliente_id: int, contatos: list[dict[str, Any]]) -> bool:
+        """
+        Adiciona vários contatos ao histórico do cliente com $push/$each
+
+        Os contatos vão em blocos de _CONTATOS_POR_PUSH (um update por bloco, todos num
+        bulk_write ou num único INSERT no outbox), para nenhum update passar do limite de
+        16 MB de um documento BSON.
+
+        Args:
+            contatos: dicts com tipo, descricao e metadados (como no formato de campos separados
+                de adicionar_contato)
+        """
+        if not contatos:
+            return True
+        agora = datetime.now()
+        historico = [
+            {
+                "timestamp": agora,
+                "tipo": c["tipo"],
+                "descricao": c.get("descricao") or "",
+                "metadados": c.get("metadados") or {},
+            }
+            for c in contatos
+        ]
+        atualizacoes = [
+            {
+                "$push": {"historico_contato": {"$each": historico[i : i + _CONTATOS_POR_PUSH]}},
+                "$set": {"ultima_atualizacao": agora},
+            }
+            for i in range(0, len(historico), _CONTATOS_POR_PUSH)
+        ]
+        filtro = {"cliente_id": cliente_id}
+
+        if self.outbox is not None:
+            self.outbox.enfileirar_lote(
+                "clientes_perfil",
+                "atualizar",
+                [{"filtro": filtro, "atualizacao": a, "upsert": True} for a in atualizacoes],
+            )
+            return True
+
+        try:
+            db = self._get_db()
+            if db is None:
+                return False
+
+            from pymongo import UpdateOne
+
+            db["clientes_perfil"].bulk_write(
+                [UpdateOne(filtro, a, upsert=True) for a in atualizacoes], ordered=True
             )
             return True
         except Exception as e:
-            print(f"Erro ao adicionar contato: {e}")
+            print(f"Erro ao adicionar contatos: {e}")
             return False
 
     def obter_perfil(self, cliente_id: int):
@@ -373,12 +808,16 @@ class ClientePerfilService:
         return self.atualizar_perfil(cliente_id, preferencias, historico_contato)
 
 
+CACHE_HIT = "hit"
+CACHE_MISS = "miss"
+
+
 class RelatorioMetadadosService:
     """Serviço para registrar metadados de relatórios exportados - Suporta injeção de dependência"""
 
     def __init__(self, database=None):
         """Inicializa o serviço. Args: database: MongoDB database opcional. Se None, obtém do MongoDBConnection."""
-        self._external_db = database
+        self._external_db = _com_codecs(database)
 
     def _get_db(self):
         if self._external_db is not None:
@@ -397,6 +836,8 @@ class RelatorioMetadadosService:
         total_registros: Optional[int] = None,
         registros_total: Optional[int] = None,
         filtros: Optional[dict[str, Any]] = None,
+        versao_dados: Optional[dict[str, Any]] = None,
+        cache: Optional[str] = None,
     ):
         """
         Registra metadados de uma exportação de relatório
@@ -410,6 +851,8 @@ class RelatorioMetadadosService:
             total_registros: Total de registros no relatório (novo)
             registros_total: Total de registros (antigo, para compatibilidade)
             filtros: Filtros aplicados na exportação
+            versao_dados: Impressão digital dos dados de origem (ver dao_mysql.versao_dados)
+            cache: "hit" se o arquivo existente foi reaproveitado, "miss" se foi gerado
         """
         try:
             db = self._get_db()
@@ -431,6 +874,13 @@ class RelatorioMetadadosService:
                 "registros_total": total,
                 "filtros": filtros or {},
             }
+            if versao_dados is not None:
+                metadados["versao_dados"] = versao_dados
+                metadados["cache"] = cache or CACHE_MISS
+                # Permite detectar se o arquivo foi sobrescrito por outra exportação
+                if os.path.exists(file_path):
+                    metadados["arquivo_mtime"] = os.path.getmtime(file_path)
+                    metadados["arquivo_tamanho"] = os.path.getsize(file_path)
 
             resultado = db["relatorios_exportados"].insert_one(metadados)
             return str(resultado.inserted_id)
@@ -438,6 +888,78 @@ class RelatorioMetadadosService:
             print(f"Erro ao registrar exportação: {e}")
             return None
 
+    def buscar_em_cache(
+        self,
+        tipo_relatorio: str,
+        formato: str,
+        versao_dados: dict[str, Any],
+        filtros: Optional[dict[str, Any]] = None,
+        arquivo: Optional[str] = None,
+    ) -> Optional[dict[str, Any]]:
+        """
+        Busca uma exportação anterior com os mesmos filtros e a mesma versão dos dados
+
+        Args:
+            arquivo: restringe a busca a exportações gravadas neste caminho
+
+        Returns:
+            dict: metadados da exportação cujo arquivo ainda está intacto, ou None
+        """
+        try:
+            db = self._get_db()
+            if db is None:
+                return None
+
+            filtro = {
+                "tipo_relatorio": tipo_relatorio,
+                "formato": formato,
+                "filtros": filtros or {},
+                "versao_dados": versao_dados,
+            }
+            if arquivo:
+                filtro["arquivo"] = arquivo
+            anterior = db["relatorios_exportados"].find_one(filtro, sort=[("timestamp", -1)])
+            if anterior is None:
+                return None
+
+            arquivo = anterior["arquivo"]
+            if (
+                not os.path.exists(arquivo)
+                or os.path.getmtime(arquivo) != anterior.get("arquivo_mtime")
+                or os.path.getsize(arquivo) != anterior.get("arquivo_tamanho")
+            ):
+                return None
+
+            anterior["_id"] = str(anterior["_id"])
+            return anterior
+        except Exception as e:
+            print(f"Erro ao buscar relatório em cache: {e}")
+            return None
+
+    def estatisticas_cache(self, tipo_relatorio: Optional[str] = None) -> dict[str, Any]:
+        """Retorna a contagem de hits/misses do cache de relatórios"""
+        estatisticas = {CACHE_HIT: 0, CACHE_MISS: 0, "taxa_acerto": 0.0}
+        try:
+            db = self._get_db()
+            if db is None:
+                return estatisticas
+
+            filtro = {"cache": {"$exists": True}}
+            if tipo_relatorio:
+                filtro["tipo_relatorio"] = tipo_relatorio
+            for grupo in db["relatorios_exportados"].aggregate(
+                [{"$match": filtro}, {"$group": {"_id": "$cache", "total": {"$sum": 1}}}]
+            ):
+                estatisticas[grupo["_id"]] = grupo["total"]
+
+            total = estatisticas[CACHE_HIT] + estatisticas[CACHE_MISS]
+            if total:
+                estatisticas["taxa_acerto"] = estatisticas[CACHE_HIT] / total
+            return estatisticas
+        except Exception as e:
+            print(f"Erro ao calcular estatísticas do cache: {e}")
+            return estatisticas
+
     def buscar_por_tipo(self, tipo_relatorio: str):
         """Busca relatórios exportados por tipo"""
         try:
@@ -483,6 +1005,11 @@ class RelatorioMetadadosService:
 
 def _gravar_log_arquivo(log_documento: dict[str, Any]):
     """Grava log em arquivo como backup"""
+    _gravar_logs_arquivo([log_documento])
+
+
+def _gravar_logs_arquivo(log_documentos: list[dict[str, Any]]):
+    """Grava logs em arquivo como backup (uma abertura do arquivo para todo o lote)"""
     try:
         import os
 
@@ -491,7 +1018,8 @@ def _gravar_log_arquivo(log_documento: dict[str, Any]):
 
         log_file = os.path.join(log_dir, "auditoria.log")
 
-        with open(log_file, "a", encoding="utf-8") as f:
+        linhas = []
+        for log_documento in log_documentos:
             timestamp = log_documento["timestamp"].strftime("%Y-%m-%d %H:%M:%S")
             linha = f"{timestamp} | {log_documento['usuario']} | {log_documento['operacao']} | {log_documento['entidade']}"
             if log_documento.get("entidade_id"):
@@ -499,6 +1027,9 @@ def _gravar_log_arquivo(log_documento: dict[str, Any]):
             linha += f" | Status: {log_documento['status']}"
             if log_documento.get("detalhes"):
                 linha += f" | Detalhes: {log_documento['detalhes']}"
-            f.write(linha + "\n")
+            linhas.append(linha + "\n")
+
+        with open(log_file, "a", encoding="utf-8") as f:
+            f.writelines(linhas)
     except Exception as e:
         print(f"Erro ao gravar log em arquivo: {e}")
@@ -0,0 +1,187 @@
+"""
+Execução concorrente de consultas (MySQL + MongoDB)
+Um pool de threads compartilhado executa as consultas de fontes independentes em paralelo;
+cada fonte tem um prazo próprio, limitado pelo orçamento total da operação. Fontes que não
+respondem a tempo são omitidas em vez de atrasar a resposta inteira. O mesmo pool executa
+os efeitos colaterais independentes das operações de escrita (GrupoEfeitos).
+
+Conexões MySQL não são thread-safe: cada tarefa deve usar a sua própria conexão ou ser a
+única tarefa a usar a conexão injetada. O cliente do MongoDB é thread-safe.
+"""
+import atexit
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Optional
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import CONCORRENCIA_CONFIG
+
+ERRO_TIMEOUT = "timeout"
+
+# Modos de execução dos efeitos colaterais
+MODO_AGUARDAR = "aguardar"
+MODO_DISPARAR = "disparar"
+
+# Rastro de execução (um registro por efeito, em DEBUG): mostra a sobreposição das chamadas
+logger_rastro = logging.getLogger("concorrencia.rastro")
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def obter_executor() -> ThreadPoolExecutor:
+    """Pool de threads compartilhado (criado sob demanda)"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=CONCORRENCIA_CONFIG["max_workers"],
+                    thread_name_prefix="concorrencia",
+                )
+    return _executor
+
+
+def encerrar_executor(aguardar: bool = True):
+    """Encerra o pool compartilhado (um novo é criado no próximo uso)"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=aguardar)
+            _executor = None
+
+
+atexit.register(encerrar_executor, False)
+
+
+def submeter(funcao: Callable[..., Any], *args, **kwargs) -> Future:
+    return obter_executor().submit(funcao, *args, **kwargs)
+
+
+class Prazo:
+    """Orçamento de tempo de uma operação, com prazos por fonte limitados pelo total"""
+
+    def __init__(self, orcamento: Optional[float] = None):
+        self.inicio = time.monotonic()
+        orcamento = CONCORRENCIA_CONFIG["orcamento"] if orcamento is None else orcamento
+        self.fim = self.inicio + orcamento
+
+    def ate(self, timeout_fonte: float) -> float:
+        """Instante limite de uma fonte iniciada agora: min(agora + timeout, fim do orçamento)"""
+        return min(time.monotonic() + timeout_fonte, self.fim)
+
+    def decorrido(self) -> float:
+        return time.monotonic() - self.inicio
+
+
+def aguardar(futuro: Future, limite: float, padrao: Any = None) -> tuple[Any, Optional[str]]:
+    """
+    Aguarda o resultado até o instante `limite` (time.monotonic())
+
+    Returns:
+        tuple: (resultado, None) ou (padrao, erro) - erro é ERRO_TIMEOUT ou a mensagem da exceção.
+        Uma tarefa que estourou o prazo continua no pool, mas o resultado é descartado.
+    """
+    try:
+        return futuro.result(timeout=max(0.0, limite - time.monotonic())), None
+    except FuturesTimeoutError:
+        futuro.cancel()
+        return padrao, ERRO_TIMEOUT
+    except Exception as e:
+        return padrao, str(e) or type(e).__name__
+
+
+class GrupoEfeitos:
+    """
+    Efeitos colaterais independentes de uma operação (auditoria, perfil, documentos)
+
+    Os efeitos rodam em paralelo no pool compartilhado. A falha de um efeito não afeta os
+    demais nem a operação: o erro é impresso e registrado no rastro.
+
+    Uso:
+        efeitos = GrupoEfeitos("emitir_apolice")
+        efeitos.adicionar("auditoria", auditoria.registrar_log, ...)
+        efeitos.adicionar("perfil", perfil.adicionar_contato, ...)
+        efeitos.executar()
+    """
+
+    def __init__(
+        self,
+        operacao: str,
+        modo: Optional[str] = None,
+        timeout: Optional[float] = None,
+        paralelo: bool = True,
+    ):
+        """
+        Args:
+            operacao: nome da operação (aparece no rastro)
+            modo: MODO_AGUARDAR (padrão) ou MODO_DISPARAR (retorna sem esperar os efeitos)
+            timeout: espera máxima no modo aguardar (padrão: CONCORRENCIA_CONFIG)
+            paralelo: False executa em sequência na thread atual (ex.: efeitos enfileirados
+                no outbox, que compartilham a conexão MySQL da transação)
+        """
+        self.operacao = operacao
+        self.modo = modo or CONCORRENCIA_CONFIG["modo_efeitos"]
+        if self.modo not in (MODO_AGUARDAR, MODO_DISPARAR):
+            raise ValueError(f"Modo de execução inválido: {self.modo}")
+        self.timeout = CONCORRENCIA_CONFIG["timeout_efeitos"] if timeout is None else timeout
+        self.paralelo = paralelo
+        self.rastro: list[dict[str, Any]] = []
+        self._efeitos: list[tuple[str, Callable[..., Any], tuple, dict]] = []
+        self._inicio = 0.0
+
+    def adicionar(self, nome: str, funcao: Callable[..., Any], *args, **kwargs):
+        self._efeitos.append((nome, funcao, args, kwargs))
+
+    def _executar_efeito(self, nome: str, funcao: Callable[..., Any], args, kwargs):
+        inicio = time.monotonic()
+        erro = None
+        try:
+            funcao(*args, **kwargs)
+        except Exception as e:
+            erro = str(e) or type(e).__name__
+            print(f"Erro no efeito colateral '{nome}' de {self.operacao}: {erro}")
+        registro = {
+            "efeito": nome,
+            "thread": threading.current_thread().name,
+            "inicio_ms": round((inicio - self._inicio) * 1000, 2),
+            "fim_ms": round((time.monotonic() - self._inicio) * 1000, 2),
+            "erro": erro,
+        }
+        self.rastro.append(registro)
+        logger_rastro.debug("operacao=%s %s", self.operacao, registro)
+        return erro
+
+    def executar(self) -> dict[str, Optional[str]]:
+        """
+        Executa os efeitos
+
+        Returns:
+            dict: {efeito: erro ou None}; vazio no modo disparar (os efeitos terminam em
+                  segundo plano e aparecem no rastro ao concluir)
+        """
+        self._inicio = time.monotonic()
+        efeitos, self._efeitos = self._efeitos, []
+        # Um único efeito aguardado não ganha nada com a troca de thread
+        if not self.paralelo or (len(efeitos) == 1 and self.modo == MODO_AGUARDAR):
+            return {nome: self._executar_efeito(nome, f, a, k) for nome, f, a, k in efeitos}
+
+        futuros = {
+            submeter(self._executar_efeito, nome, f, a, k): nome for nome, f, a, k in efeitos
+        }
+        if self.modo == MODO_DISPARAR:
+            return {}
+
+        concluidos, pendentes = wait(futuros, timeout=self.timeout)
+        resultado = {futuros[futuro]: futuro.result() for futuro in concluidos}
+        for futuro in pendentes:
+            nome = futuros[futuro]
+            resultado[nome] = ERRO_TIMEOUT
+            print(f"Efeito colateral '{nome}' de {self.operacao} excedeu {self.timeout}s")
+        return resultado
@@ -3,23 +3,88 @@ Data Access Objects (DAOs) para MySQL - REFATORADO
 Sprint 4 - Persistência Híbrida com Injeção de Dependência
 Suporta injeção de conexão para testes isolados
 """
+import hashlib
+import itertools
 import json
 import os
+import re
 import sys
-from typing import Any, Optional
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from decimal import Decimal
+from typing import Any, Callable, Optional
 
 import mysql.connector
 from mysql.connector import Error
 
 # Adiciona o diretório pai ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from config import MYSQL_CONFIG
-
-
-def get_connection():
-    """Cria e retorna uma conexão com o MySQL"""
+from config import (
+    BUSCA_TEXTUAL_CONFIG,
+    MYSQL_CONFIG,
+    MYSQL_REPLICAS_CONFIG,
+    OPERACOES_LOTE_CONFIG,
+    PAGINACAO_CONFIG,
+)
+from functions.disjuntor import DISJUNTOR_MYSQL, obter_disjuntor
+from functions.exceptions import LoteInterrompidoError
+from functions.replicas import RoteadorLeitura
+from utils.utils import destacar_trecho
+
+_roteador_leitura: Optional[RoteadorLeitura] = None
+_roteador_lock = threading.Lock()
+# Leituras forçadas ao primário por contexto de execução (thread ou tarefa), como as
+# conexões vinculadas mais abaixo
+_leitura_no_primario: ContextVar[bool] = ContextVar("leitura_no_primario", default=False)
+
+
+def obter_roteador_leitura() -> Optional[RoteadorLeitura]:
+    """Roteador de réplicas do processo (None se não há réplicas configuradas)"""
+    global _roteador_leitura
+    if _roteador_leitura is None and MYSQL_REPLICAS_CONFIG["replicas"]:
+        with _roteador_lock:
+            if _roteador_leitura is None:
+                _roteador_leitura = RoteadorLeitura()
+    return _roteador_leitura
+
+
+@contextmanager
+def leitura_no_primario():
+    """
+    Força as leituras do contexto atual a irem ao primário (read-your-writes)
+
+    Usado automaticamente por transacao(); use também quando uma leitura precisa enxergar
+    uma escrita recém-confirmada fora de uma transação.
+    """
+    token = _leitura_no_primario.set(True)
     try:
-        return mysql.connector.connect(
+        yield
+    finally:
+        _leitura_no_primario.reset(token)
+
+
+def get_connection(leitura: bool = False):
+    """
+    Cria e retorna uma conexão com o MySQL
+
+    Args:
+        leitura: True para consultas: usa uma réplica (se configurada, em dia e fora de
+            leitura_no_primario()); caso contrário, o primário
+
+    Com o disjuntor do MySQL aberto (primário fora do ar), retorna None sem tentar conectar.
+    """
+    if leitura and not _leitura_no_primario.get():
+        roteador = obter_roteador_leitura()
+        if roteador is not None:
+            conn = roteador.obter_conexao()
+            if conn is not None:
+                return conn
+    disjuntor = obter_disjuntor(DISJUNTOR_MYSQL)
+    if not disjuntor.permitir():
+        return None
+    try:
+        conn = mysql.connector.connect(
             host=MYSQL_CONFIG["host"],
             port=MYSQL_CONFIG["port"],
             user=MYSQL_CONFIG["user"],
@@ -29,20 +94,800 @@ def get_connection():
             collation=MYSQL_CONFIG["collation"],
         )
     except Error as e:
+        disjuntor.registrar_falha()
         print(f"Erro ao conectar ao MySQL: {e}")
         return None
+    disjuntor.registrar_sucesso()
+    return conn
+
+
+def _decimal_para_float(valor):
+    return float(valor) if isinstance(valor, Decimal) else valor
+
+
+def _json_para_dict(valor):
+    if isinstance(valor, (str, bytes, bytearray)):
+        try:
+            return json.loads(valor)
+        except ValueError:
+            return valor
+    return valor
+
+
+def _dict_para_json(valor):
+    """Valor gravável numa coluna JSON: dict vira texto; o de uma LinhaPreguicosa já é texto"""
+    if isinstance(valor, dict):
+        return json.dumps(valor)
+    return valor
+
+
+# Decodificadores por coluna: equivalente, no MySQL, ao registro de tipos BSON do MongoDB
+_DECODIFICADORES_COLUNA = {
+    "valor": _decimal_para_float,
+    "valor_segurado": _decimal_para_float,
+    "detalhes": _json_para_dict,
+}
+# Colunas JSON decodificadas só no primeiro acesso (ver LinhaPreguicosa)
+_COLUNAS_PREGUICOSAS = ("detalhes",)
+
+
+class LinhaPreguicosa(dict):
+    """
+    Linha de consulta cujas colunas JSON só são decodificadas no primeiro acesso
+
+    Para quem consome é um dict comum (indexação, get, items, ==, json.dumps, csv), mas quem
+    lê apenas tipo e valor não paga o json.loads de 'detalhes'. bruto() devolve o texto
+    JSON sem decodificar, para exportadores que só repassam a coluna. O encoder BSON do
+    pymongo lê o dict direto em C: para gravar a linha no MongoDB, passe dict(linha).
+    """
+
+    __slots__ = ("_pendentes",)
+
+    def __init__(self, colunas: list[str], row):
+        super().__init__(zip(colunas, row))
+        self._pendentes = {
+            coluna
+            for coluna in _COLUNAS_PREGUICOSAS
+            if isinstance(dict.get(self, coluna), (str, bytes, bytearray))
+        }
+
+    def _decodificar(self, coluna):
+        if coluna in self._pendentes:
+            self._pendentes.discard(coluna)
+            bruto = dict.__getitem__(self, coluna)
+            dict.__setitem__(self, coluna, _DECODIFICADORES_COLUNA[coluna](bruto))
+
+    def _decodificar_tudo(self):
+        for coluna in list(self._pendentes):
+            self._decodificar(coluna)
+        return self
+
+    @property
+    def decodificada(self) -> bool:
+        """True quando não há mais colunas JSON pendentes"""
+        return not self._pendentes
+
+    def bruto(self, coluna: str):
+        """Texto JSON da coluna: o lido do banco se ainda não decodificado"""
+        if coluna in self._pendentes:
+            bruto = dict.__getitem__(self, coluna)
+            return bruto if isinstance(bruto, str) else bytes(bruto).decode("utf-8")
+        valor = dict.__getitem__(self, coluna)
+        if coluna in _COLUNAS_PREGUICOSAS and isinstance(valor, (dict, list)):
+            return json.dumps(valor, ensure_ascii=False)
+        return valor
+
+    def __getitem__(self, coluna):
+        self._decodificar(coluna)
+        return dict.__getitem__(self, coluna)
+
+    def get(self, coluna, padrao=None):
+        self._decodificar(coluna)
+        return dict.get(self, coluna, padrao)
+
+    def __eq__(self, outro):
+        if isinstance(outro, LinhaPreguicosa):
+            outro._decodificar_tudo()
+        return dict.__eq__(self._decodificar_tudo(), outro)
+
+    def __ne__(self, outro):
+        igual = self.__eq__(outro)
+        return igual if igual is NotImplemented else not igual
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # copy/deepcopy/pickle produzem um dict comum já decodificado
+        return (dict, (list(self.items()),))
+
+
+def _decodificando_tudo(nome: str):
+    """Método de dict que antes decodifica as colunas pendentes"""
+    metodo = getattr(dict, nome)
+
+    def decodificando(self, *args, **kwargs):
+        self._decodificar_tudo()
+        return metodo(self, *args, **kwargs)
+
+    decodificando.__name__ = nome
+    decodificando.__doc__ = metodo.__doc__
+    return decodificando
+
+
+# __iter__ sobrescrito também faz dict(linha) e {**linha} passarem por keys()/__getitem__
+for _nome in (
+    "__iter__",
+    "__reversed__",
+    "__repr__",
+    "__or__",
+    "__ror__",
+    "__ior__",
+    "__setitem__",
+    "__delitem__",
+    "items",
+    "values",
+    "copy",
+    "pop",
+    "popitem",
+    "setdefault",
+    "update",
+    "clear",
+):
+    setattr(LinhaPreguicosa, _nome, _decodificando_tudo(_nome))
+
+
+def _decodificar_linha(colunas: list[str], row) -> dict[str, Any]:
+    """
+    Converte uma linha do cursor em dict aplicando os decodificadores por coluna
+
+    Com uma coluna JSON (detalhes) a linha é uma LinhaPreguicosa e o JSON só é decodificado
+    quando a coluna for lida.
+    """
+    if any(coluna in _COLUNAS_PREGUICOSAS for coluna in colunas):
+        linha = LinhaPreguicosa(colunas, row)
+    else:
+        linha = dict(zip(colunas, row))
+    for coluna, decodificador in _DECODIFICADORES_COLUNA.items():
+        if coluna not in _COLUNAS_PREGUICOSAS and dict.get(linha, coluna) is not None:
+            dict.__setitem__(linha, coluna, decodificador(dict.__getitem__(linha, coluna)))
+    return linha
+
+
+class _ConexaoTransacional:
+    """Conexão compartilhada por uma unidade de trabalho.
+
+    Repassa tudo à conexão real, mas ignora commit() e close() dos DAOs:
+    quem confirma (ou desfaz) a transação é o contexto transacao().
+    """
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+@contextmanager
+def transacao(connection=None):
+    """
+    Executa vários DAOs numa única transação MySQL.
+
+    Uso:
+        with transacao(conn) as tx:
+            cliente_id = ClienteDAO(tx).criar(dados)
+            OutboxDAO(tx).enfileirar(...)
+
+    Args:
+        connection: Conexão MySQL opcional. Se None, cria uma nova (fechada ao final).
+    """
+    if isinstance(connection, _ConexaoTransacional):
+        # Transação aninhada: participa da transação externa
+        yield connection
+        return
+
+    conn = connection if connection else get_connection()
+    if not conn:
+        raise Exception("Erro: Conexão com banco de dados não disponível")
+    try:
+        with leitura_no_primario():
+            yield _ConexaoTransacional(conn)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        if connection is None:
+            conn.close()
+
+
+# Conexões de unidades de trabalho vinculadas a DAOs ({id(dao): conexão}), por contexto de
+# execução (thread ou tarefa): outra thread usando os mesmos DAOs não enxerga a transação
+_conexoes_vinculadas: ContextVar[dict] = ContextVar("conexoes_vinculadas")
+
+
+def conexao_vinculada(dao):
+    """Conexão à qual o DAO foi vinculado no contexto atual (vincular_conexao) ou None"""
+    return _conexoes_vinculadas.get({}).get(id(dao))
+
+
+@contextmanager
+def vincular_conexao(daos, conn):
+    """
+    Faz os DAOs usarem `conn` (ex.: a de transacao()) só no contexto atual, até o fim do bloco
+
+    Uso:
+        with transacao() as tx, vincular_conexao([cliente_dao, outbox], tx):
+            cliente_dao.criar(dados)  # na transação; em outras threads, conexão própria
+    """
+    vinculadas = {**_conexoes_vinculadas.get({}), **{id(dao): conn for dao in daos}}
+    token = _conexoes_vinculadas.set(vinculadas)
+    try:
+        yield conn
+    finally:
+        _conexoes_vinculadas.reset(token)
+
+
+# Tabelas de negócio com updated_at (ON UPDATE CURRENT_TIMESTAMP)
+TABELAS_VERSIONADAS = ("clientes", "seguros", "apolices", "sinistros")
+# Tabelas de arquivo (dados frios movidos pelo functions.arquivamento), também com updated_at
+TABELAS_ARQUIVO = ("apolices_arquivo", "sinistros_arquivo")
+
+
+def versao_dados(tabelas: tuple[str, ...] = TABELAS_VERSIONADAS, connection=None):
+    """
+    Impressão digital dos dados de origem: MAX(updated_at) e COUNT(*) por tabela
+
+    Qualquer inserção, atualização ou exclusão altera ao menos um dos dois valores.
+
+    Returns:
+        dict: {tabela: {"max_updated_at": str | None, "total": int}} ou None em caso de erro
+    """
+    desconhecidas = set(tabelas) - set(TABELAS_VERSIONADAS) - set(TABELAS_ARQUIVO)
+    if desconhecidas:
+        raise ValueError(f"Tabelas sem controle de versão: {sorted(desconhecidas)}")
+
+    conn = connection if connection else get_connection(leitura=True)
+    if not conn:
+        return None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            " UNION ALL ".join(
+                f"SELECT '{tabela}', MAX(updated_at), COUNT(*) FROM {tabela}" for tabela in tabelas
+            )
+        )
+        versao = {
+            tabela: {"max_updated_at": str(maximo) if maximo else None, "total": total}
+            for tabela, maximo, total in cursor.fetchall()
+        }
+        cursor.close()
+        if connection is None:
+            conn.close()
+        return versao
+    except Error as e:
+        print(f"Erro ao calcular versão dos dados: {e}")
+        return None
+
+
+# Operadores aceitos como sufixo do filtro: filtrar(valor__gte=1000)
+_OPERADORES_FILTRO = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<=", "ne": "<>"}
+
+
+class _ConsultaMixin:
+    """
+    Consultas com filtro, ordenação e limite executadas no MySQL (SQL parametrizado)
+
+    Cada DAO define _TABELA e _COLUNAS (colunas retornadas, na ordem do listar()).
+    Nomes de colunas são validados contra essa lista; valores sempre vão como parâmetros.
+    """
+
+    _TABELA: str = ""
+    _COLUNAS: tuple[str, ...] = ()
+    _COLUNAS_CONTROLE: tuple[str, ...] = ("created_at", "updated_at")
+    # Atribuições acrescentadas a todo UPDATE de atualizar_se (ex.: invalidar um hash)
+    _ATRIBUICOES_EXTRAS: tuple[str, ...] = ()
+    # Tabela com as linhas arquivadas (mesmas colunas), consultada só com incluir_arquivados=True
+    _TABELA_ARQUIVO: Optional[str] = None
+    # Colunas geradas pelo MySQL (indexadas): aceitas em filtros, ordenação e agregações, mas
+    # não retornadas nas linhas nem gravadas
+    _COLUNAS_GERADAS: tuple[str, ...] = ()
+    # Colunas do índice FULLTEXT usado por buscar_texto (INDICES_TEXTUAIS em db_setup.py)
+    _COLUNAS_BUSCA: tuple[str, ...] = ()
+
+    def _origem(self, incluir_arquivados: bool = False) -> str:
+        """
+        Tabela de origem do FROM
+
+        Com incluir_arquivados=True vira uma tabela derivada (UNION ALL da tabela quente com a
+        de arquivo) com o mesmo nome, para que filtros, ordenação e agrupamentos não mudem.
+        """
+        if not incluir_arquivados or not self._TABELA_ARQUIVO:
+            return self._TABELA
+        colunas = ", ".join(self._COLUNAS + self._COLUNAS_CONTROLE)
+        return (
+            f"(SELECT {colunas} FROM {self._TABELA} UNION ALL "
+            f"SELECT {colunas} FROM {self._TABELA_ARQUIVO}) AS {self._TABELA}"
+        )
+
+    def _get_conn_leitura(self):
+        """Conexão para consultas: a injetada (unidade de trabalho/testes) ou uma réplica"""
+        conn = conexao_vinculada(self)
+        if conn is None:
+            conn = self._external_conn if self._external_conn else get_connection(leitura=True)
+        return conn
+
+    def _projecao(self, colunas: Optional[list[str]] = None) -> list[str]:
+        """Colunas do SELECT: todas as de _COLUNAS ou só as pedidas (validadas)"""
+        if not colunas:
+            return list(self._COLUNAS)
+        return [self._validar_coluna(coluna) for coluna in colunas]
+
+    def _validar_coluna(self, coluna: str, gravacao: bool = False) -> str:
+        validas = self._COLUNAS + self._COLUNAS_CONTROLE
+        if not gravacao:
+            validas += self._COLUNAS_GERADAS
+        if coluna not in validas:
+            raise ValueError(f"Coluna inválida para '{self._TABELA}': {coluna}")
+        return coluna
+
+    def _compilar_filtros(self, filtros: dict[str, Any]) -> tuple[str, list]:
+        """
+        Converte filtros em cláusula WHERE
+
+        campo=valor -> campo = %s (None -> IS NULL; lista/tupla/set -> IN)
+        campo__gt/gte/lt/lte/ne=valor -> comparação
+        campo__in=[...] -> IN
+        """
+        clausulas, valores = [], []
+        for chave, valor in filtros.items():
+            coluna, _, operador = chave.partition("__")
+            self._validar_coluna(coluna)
+            if operador == "in" or (not operador and isinstance(valor, (list, tuple, set))):
+                itens = list(valor)
+                if not itens:
+                    clausulas.append("1 = 0")
+                    continue
+                clausulas.append(f"{coluna} IN ({', '.join(['%s'] * len(itens))})")
+                valores.extend(itens)
+            elif not operador:
+                if valor is None:
+                    clausulas.append(f"{coluna} IS NULL")
+                else:
+                    clausulas.append(f"{coluna} = %s")
+                    valores.append(valor)
+            elif operador in _OPERADORES_FILTRO:
+                clausulas.append(f"{coluna} {_OPERADORES_FILTRO[operador]} %s")
+                valores.append(valor)
+            else:
+                raise ValueError(f"Operador de filtro inválido: {operador}")
+        where = f" WHERE {' AND '.join(clausulas)}" if clausulas else ""
+        return where, valores
+
+    def _compilar_ordem(self, order_by) -> str:
+        """'campo' (ascendente), '-campo' (descendente) ou lista desses"""
+        if not order_by:
+            return ""
+        if isinstance(order_by, str):
+            order_by = [order_by]
+        partes = []
+        for campo in order_by:
+            descendente = campo.startswith("-")
+            coluna = self._validar_coluna(campo.lstrip("-"))
+            partes.append(f"{coluna} DESC" if descendente else coluna)
+        return f" ORDER BY {', '.join(partes)}"
+
+    def filtrar(
+        self,
+        order_by=None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        incluir_arquivados: bool = False,
+        colunas: Optional[list[str]] = None,
+        **filtros,
+    ) -> list[dict[str, Any]]:
+        """
+        Lista registros filtrando, ordenando e limitando no banco
+
+        Ex: ApoliceDAO().filtrar(status="ativa", cliente_id=7, order_by="-data_emissao", limit=10)
+        incluir_arquivados=True considera também as linhas da tabela de arquivo.
+        colunas=[...] projeta só as colunas pedidas (padrão: todas de _COLUNAS).
+        """
+        colunas = self._projecao(colunas)
+        where, valores = self._compilar_filtros(filtros)
+        origem = self._origem(incluir_arquivados)
+        sql = f"SELECT {', '.join(colunas)} FROM {origem}{where}"
+        sql += self._compilar_ordem(order_by)
+        if limit is not None:
+            sql += " LIMIT %s"
+            valores.append(int(limit))
+            if offset:
+                sql += " OFFSET %s"
+                valores.append(int(offset))
+
+        conn = self._get_conn_leitura()
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, tuple(valores))
+            rows = cursor.fetchall()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return [_decodificar_linha(colunas, row) for row in rows]
+        except Error as e:
+            print(f"Erro ao filtrar {self._TABELA}: {e}")
+            return []
+
+    def _listar_por_chave(
+        self, coluna: str, valor: int, apos_id: int = 0, limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """
+        Página (keyset) dos registros de uma chave estrangeira, em ordem de id
+
+        WHERE coluna = %s AND id > %s ORDER BY id usa o índice secundário da coluna
+        (que no InnoDB já contém o id), então o custo depende só do tamanho da página.
+        Sem limite, a página tem PAGINACAO_CONFIG["tamanho_pagina"] linhas: nunca é a
+        chave inteira, então quem precisa de tudo pede as páginas seguintes com apos_id.
+        """
+        limite = int(limite or PAGINACAO_CONFIG["tamanho_pagina"])
+        return self.filtrar(order_by="id", limit=limite, **{coluna: valor, "id__gt": apos_id})
+
+    def buscar_texto(
+        self, termo: str, limite: Optional[int] = None, offset: int = 0, **filtros
+    ) -> list[dict[str, Any]]:
+        """
+        Busca textual no índice FULLTEXT, ordenada por relevância
+
+        Toda palavra do termo precisa ocorrer (MATCH ... AGAINST em modo booleano); com o
+        parser ngram vale também trecho de palavra ("silv" acha "Silva"). Cada resultado traz
+        "relevancia" e "trecho" (contexto da primeira ocorrência, com as palavras entre **).
+        Filtros extras como em filtrar(); página com limite/offset. Linhas de uma transação
+        ainda aberta não aparecem: o InnoDB indexa o texto no commit.
+
+        Ex: ClienteDAO().buscar_texto("silva paulista", limite=10)
+            SinistroDAO().buscar_texto("vidro quebrado", status="aberto", offset=20)
+        """
+        palavras = re.findall(r"\w+", termo or "")
+        if not self._COLUNAS_BUSCA or not palavras:
+            return []
+        limite = int(limite or BUSCA_TEXTUAL_CONFIG["limite_padrao"])
+        colunas = list(self._COLUNAS)
+        match = f"MATCH({', '.join(self._COLUNAS_BUSCA)}) AGAINST (%s IN BOOLEAN MODE)"
+        sufixo = "" if BUSCA_TEXTUAL_CONFIG["parser"] else "*"
+        booleano = " ".join(f"+{palavra}{sufixo}" for palavra in palavras)
+        where, valores = self._compilar_filtros(filtros)
+        where = f"{where} AND {match}" if where else f" WHERE {match}"
+        sql = (
+            f"SELECT {', '.join(colunas)}, {match} AS relevancia FROM {self._TABELA}{where} "
+            "ORDER BY relevancia DESC, id LIMIT %s OFFSET %s"
+        )
+        parametros = (booleano, *valores, booleano, limite, int(offset))
 
+        conn = self._get_conn_leitura()
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, parametros)
+            except Error as e:
+                if e.errno != 1191:
+                    raise
+                # Sem índice FULLTEXT (ex.: 'sinistros' particionada): varredura com LIKE
+                print(f"Índice FULLTEXT ausente em '{self._TABELA}'; buscando com LIKE.")
+                cursor.execute(*self._sql_busca_like(colunas, palavras, filtros, limite, offset))
+            rows = cursor.fetchall()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+        except Error as e:
+            print(f"Erro na busca textual em {self._TABELA}: {e}")
+            return []
+        resultados = []
+        for row in rows:
+            linha = _decodificar_linha(colunas, row[:-1])
+            linha["relevancia"] = float(row[-1])
+            linha["trecho"] = self._trecho(linha, palavras)
+            resultados.append(linha)
+        return resultados
+
+    def _trecho(self, linha: dict[str, Any], palavras: list[str]) -> Optional[str]:
+        """Contexto da primeira ocorrência nas colunas de busca (ou o início do texto)"""
+        tamanho = BUSCA_TEXTUAL_CONFIG["tamanho_trecho"]
+        textos = [linha[coluna] for coluna in self._COLUNAS_BUSCA if linha[coluna]]
+        for texto in textos:
+            trecho = destacar_trecho(texto, palavras, tamanho)
+            if trecho:
+                return trecho
+        return textos[0][:tamanho] if textos else None
+
+    def _sql_busca_like(
+        self, colunas: list[str], palavras: list[str], filtros: dict, limite: int, offset: int
+    ) -> tuple[str, tuple]:
+        """Equivalente de buscar_texto sem índice FULLTEXT: cada palavra em alguma coluna"""
+        where, valores = self._compilar_filtros(filtros)
+        clausulas = [where[len(" WHERE ") :]] if where else []
+        for palavra in palavras:
+            clausulas.append(
+                "(" + " OR ".join(f"{coluna} LIKE %s" for coluna in self._COLUNAS_BUSCA) + ")"
+            )
+            valores += [f"%{palavra}%"] * len(self._COLUNAS_BUSCA)
+        sql = (
+            f"SELECT {', '.join(colunas)}, 0 AS relevancia FROM {self._TABELA} "
+            f"WHERE {' AND '.join(clausulas)} ORDER BY id LIMIT %s OFFSET %s"
+        )
+        return sql, (*valores, limite, int(offset))
+
+    def _agregar(
+        self,
+        expressao: str,
+        agrupar_por: Optional[str],
+        filtros: dict[str, Any],
+        incluir_arquivados: bool = False,
+    ):
+        """Executa SELECT <expressao> [GROUP BY] e retorna o escalar ou {grupo: valor}"""
+        where, valores = self._compilar_filtros(filtros)
+        origem = self._origem(incluir_arquivados)
+        if agrupar_por:
+            grupo = self._validar_coluna(agrupar_por)
+            sql = f"SELECT {grupo}, {expressao} FROM {origem}{where} GROUP BY {grupo}"
+        else:
+            sql = f"SELECT {expressao} FROM {origem}{where}"
+
+        conn = self._get_conn_leitura()
+        if not conn:
+            return {} if agrupar_por else None
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, tuple(valores))
+            rows = cursor.fetchall()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            if agrupar_por:
+                return {grupo: _decimal_para_float(valor) for grupo, valor in rows}
+            return _decimal_para_float(rows[0][0]) if rows else None
+        except Error as e:
+            print(f"Erro ao agregar {self._TABELA}: {e}")
+            return {} if agrupar_por else None
+
+    def contar(
+        self, agrupar_por: Optional[str] = None, incluir_arquivados: bool = False, **filtros
+    ):
+        """
+        COUNT(*) no banco
+
+        Returns:
+            int, ou dict {grupo: total} quando agrupar_por é informado
+        """
+        resultado = self._agregar("COUNT(*)", agrupar_por, filtros, incluir_arquivados)
+        return resultado if agrupar_por else int(resultado or 0)
+
+    def existe(self, **filtros) -> bool:
+        """Verifica se há ao menos um registro (SELECT 1 ... LIMIT 1)"""
+        where, valores = self._compilar_filtros(filtros)
+        conn = self._get_conn_leitura()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(f"SELECT 1 FROM {self._TABELA}{where} LIMIT 1", tuple(valores))
+            encontrado = cursor.fetchone() is not None
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return encontrado
+        except Error as e:
+            print(f"Erro ao verificar {self._TABELA}: {e}")
+            return False
+
+    def diferenca(self, dados: dict[str, Any], anterior: dict[str, Any]) -> dict[str, Any]:
+        """Colunas de `dados` cujo valor difere da versão conhecida `anterior` (exceto id)"""
+        return {
+            coluna: valor
+            for coluna, valor in dados.items()
+            if coluna in self._COLUNAS
+            and coluna != "id"
+            and (coluna not in anterior or anterior[coluna] != valor)
+        }
+
+    def atualizar_se(self, registro_id: int, valores: dict[str, Any], **condicoes) -> bool:
+        """
+        UPDATE condicional (compare-and-set) de uma linha, sem leitura prévia
+
+        Ex: ApoliceDAO().atualizar_se(7, {"status": "cancelada"}, status="ativa")
+            -> UPDATE apolices SET status = %s WHERE id = %s AND status = %s
+
+        Returns:
+            bool: True se a linha existia e atendia às condições (mesmo que já tivesse os
+                  valores: o rowcount conta só linhas alteradas, então 0 é conferido com SELECT)
+        """
+        if not valores:
+            return False
+        atribuicoes = [f"{self._validar_coluna(coluna, gravacao=True)} = %s" for coluna in valores]
+        atribuicoes.extend(self._ATRIBUICOES_EXTRAS)
+        where, parametros = self._compilar_filtros({"id": registro_id, **condicoes})
+        sql = f"UPDATE {self._TABELA} SET {', '.join(atribuicoes)}{where}"
 
-class UsuarioDAO:
+        conn = self._get_conn()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            cursor.execute(sql, (*valores.values(), *parametros))
+            atualizado = cursor.rowcount > 0
+            if not atualizado:
+                # Linha que já tinha os valores (ex.: gravados por operação concorrente)
+                cursor.execute(f"SELECT 1 FROM {self._TABELA}{where} FOR UPDATE", parametros)
+                atualizado = cursor.fetchone() is not None
+            conn.commit()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return atualizado
+        except Error as e:
+            print(f"Erro ao atualizar {self._TABELA}: {e}")
+            return False
+
+    def atualizar_diferenca(
+        self, registro_id: int, dados: dict[str, Any], anterior: dict[str, Any]
+    ) -> bool:
+        """
+        Grava só as colunas alteradas em relação a `anterior` (versão já lida pelo chamador)
+
+        O UPDATE é condicionado a essas colunas ainda terem o valor anterior: se outra operação
+        alterou a linha nesse meio tempo, nada é gravado (sem lost update). Colunas com
+        decodificador (JSON, DECIMAL) não entram na condição.
+
+        Returns:
+            bool: True se gravou (ou não havia diferença); False se a linha mudou ou não existe
+        """
+        valores = self.diferenca(dados, anterior)
+        if not valores:
+            return True
+        condicoes = {
+            coluna: anterior[coluna]
+            for coluna in valores
+            if coluna in anterior and coluna not in _DECODIFICADORES_COLUNA
+        }
+        return self.atualizar_se(registro_id, valores, **condicoes)
+
+    def transicionar_status(self, registro_id: int, de, para: str) -> bool:
+        """
+        Muda o status só se o atual for `de` (str ou lista de status aceitos)
+
+        Returns:
+            bool: True se a transição ocorreu; False se o status atual não permite ou não existe
+        """
+        return self.atualizar_se(registro_id, {"status": para}, status=de)
+
+    def transicionar_status_em_lote(
+        self,
+        para: str,
+        de=None,
+        ids: Optional[list[int]] = None,
+        tamanho_lote: Optional[int] = None,
+        ao_alterar_lote: Optional[Callable[[list[int], Any], None]] = None,
+        **filtros,
+    ) -> list[int]:
+        """
+        Muda o status de muitas linhas com um único UPDATE por lote
+
+        Cada lote é uma transação própria: SELECT id ... FOR UPDATE das linhas elegíveis,
+        UPDATE ... WHERE id IN (...) e ao_alterar_lote(ids, conexao), confirmados juntos. Os
+        locks e o undo ficam limitados a um lote; linhas alteradas por outra operação entre
+        lotes simplesmente deixam de ser elegíveis.
+
+        Ex: SinistroDAO().transicionar_status_em_lote("fechado", de="aberto", ids=[1, 2, 3])
+            ApoliceDAO().transicionar_status_em_lote("cancelada", de="ativa", cliente_id=7)
+
+        Args:
+            para: novo status
+            de: status de origem aceito(s) (padrão: qualquer status diferente de `para`)
+            ids: ids candidatos; se None, todas as linhas que atendem aos filtros
+            tamanho_lote: linhas por UPDATE (padrão: OPERACOES_LOTE_CONFIG)
+            ao_alterar_lote: chamado na transação de cada lote com os ids alterados e a conexão
+                (ex.: enfileirar no outbox os efeitos do lote)
+
+        Returns:
+            list[int]: ids efetivamente alterados
+
+        Raises:
+            LoteInterrompidoError: um lote falhou (e foi desfeito); `confirmados` traz os ids
+                dos lotes anteriores, já confirmados
+        """
+        tamanho = int(tamanho_lote or OPERACOES_LOTE_CONFIG["tamanho_lote"])
+        if de is None:
+            filtros["status__ne"] = para
+        else:
+            filtros["status"] = de
+        if ids is not None:
+            ids = list(ids)
+            lotes = ({**filtros, "id": ids[i : i + tamanho]} for i in range(0, len(ids), tamanho))
+            limite = ""
+        else:
+            # Linhas alteradas deixam de atender à condição de status: basta repetir o filtro
+            lotes = itertools.repeat(filtros)
+            limite = f" ORDER BY id LIMIT {tamanho}"
+
+        conn = self._get_conn()
+        if not conn:
+            return []
+        alterados = []
+        try:
+            for filtros_lote in lotes:
+                # Numa unidade de trabalho externa, o lote participa dela (quem confirma é ela)
+                with transacao(conn) as tx:
+                    cursor = tx.cursor()
+                    where, valores = self._compilar_filtros(filtros_lote)
+                    cursor.execute(
+                        f"SELECT id FROM {self._TABELA}{where}{limite} FOR UPDATE", tuple(valores)
+                    )
+                    lote = [linha[0] for linha in cursor.fetchall()]
+                    if lote:
+                        cursor.execute(
+                            f"UPDATE {self._TABELA} SET status = %s "
+                            f"WHERE id IN ({', '.join(['%s'] * len(lote))})",
+                            (para, *lote),
+                        )
+                    cursor.close()
+                    if lote and ao_alterar_lote:
+                        ao_alterar_lote(lote, tx)
+                alterados.extend(lote)
+                if ids is None and len(lote) < tamanho:
+                    break
+        except Exception as e:  # Error do MySQL ou do ao_alterar_lote
+            print(f"Erro ao atualizar status em lote de {self._TABELA}: {e}")
+            raise LoteInterrompidoError(
+                f"Lote de {self._TABELA} interrompido após {len(alterados)} linhas: {e}",
+                alterados,
+            ) from e
+        finally:
+            if self._should_close():
+                conn.close()
+        return alterados
+
+    def somar(
+        self,
+        coluna: str,
+        agrupar_por: Optional[str] = None,
+        incluir_arquivados: bool = False,
+        **filtros,
+    ):
+        """
+        SUM(coluna) no banco
+
+        Returns:
+            float, ou dict {grupo: soma} quando agrupar_por é informado
+        """
+        coluna = self._validar_coluna(coluna)
+        return self._agregar(
+            f"COALESCE(SUM({coluna}), 0)", agrupar_por, filtros, incluir_arquivados
+        )
+
+
+class UsuarioDAO(_ConsultaMixin):
     """DAO para gerenciar usuários - Suporta injeção de dependência"""
 
+    _TABELA = "usuarios"
+    _COLUNAS = ("id", "username", "senha", "tipo")
+    _COLUNAS_CONTROLE = ("created_at",)
+
     def __init__(self, connection=None):
         """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
         self._external_conn = connection
 
     def _get_conn(self):
         """Retorna conexão externa ou cria nova"""
-        return self._external_conn if self._external_conn else get_connection()
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
 
     def _should_close(self):
         """Retorna True se deve fechar conexão (quando não é externa)"""
@@ -71,7 +916,7 @@ class UsuarioDAO:
             return 0
 
     def ler_por_username(self, username: str) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
@@ -93,7 +938,7 @@ class UsuarioDAO:
 
     def ler_por_id(self, usuario_id: int) -> Optional[dict[str, Any]]:
         """Busca usuário por ID"""
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
@@ -117,7 +962,7 @@ class UsuarioDAO:
         return self.ler_por_id(usuario_id)
 
     def listar(self) -> list[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return []
         try:
@@ -133,15 +978,45 @@ class UsuarioDAO:
             return []
 
 
-class ClienteDAO:
+# Colunas do cliente cobertas pelo hash de conteúdo (o CPF é a chave da sincronização)
+_COLUNAS_HASH_CLIENTE = ("nome", "telefone", "email", "data_nasc", "endereco")
+
+_SQL_UPSERT_CLIENTE = """
+    INSERT INTO clientes (nome, cpf, telefone, email, data_nasc, endereco, hash_conteudo)
+    VALUES (%s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        nome = VALUES(nome),
+        telefone = VALUES(telefone),
+        email = VALUES(email),
+        data_nasc = VALUES(data_nasc),
+        endereco = VALUES(endereco),
+        hash_conteudo = VALUES(hash_conteudo)
+"""
+
+
+def hash_conteudo_cliente(cliente: dict[str, Any]) -> str:
+    """SHA-256 do conteúdo do cliente (datas em ISO; campos ausentes contam como None)"""
+    conteudo = [cliente.get(coluna) for coluna in _COLUNAS_HASH_CLIENTE]
+    serializado = json.dumps(conteudo, default=str, ensure_ascii=False)
+    return hashlib.sha256(serializado.encode("utf-8")).hexdigest()
+
+
+class ClienteDAO(_ConsultaMixin):
     """DAO para gerenciar clientes - Suporta injeção de dependência"""
 
+    _TABELA = "clientes"
+    _COLUNAS = ("id", "nome", "cpf", "telefone", "email", "data_nasc", "endereco")
+    _COLUNAS_BUSCA = ("nome", "endereco")
+    # Alterações fora da sincronização invalidam o hash: o próximo snapshot regrava a linha
+    _ATRIBUICOES_EXTRAS = ("hash_conteudo = NULL",)
+
     def __init__(self, connection=None):
         """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
         self._external_conn = connection
 
     def _get_conn(self):
-        return self._external_conn if self._external_conn else get_connection()
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
 
     def _should_close(self):
         return self._external_conn is None
@@ -155,7 +1030,7 @@ class ClienteDAO:
             # Aceita tanto data_nasc quanto data_nasc
             data_nasc = cliente.get("data_nasc") or cliente.get("data_nasc")
             cursor.execute(
-                "INSERT INTO clientes (nome, cpf, telefone, email, data_nasc, endereco) VALUES (%s, %s, %s, %s, %s, %s)",
+                "INSERT INTO clientes (nome, cpf, telefone, email, data_nasc, endereco, hash_conteudo) VALUES (%s, %s, %s, %s, %s, %s, %s)",
                 (
                     cliente["nome"],
                     cliente["cpf"],
@@ -163,6 +1038,7 @@ class ClienteDAO:
                     cliente.get("email"),
                     data_nasc,
                     cliente["endereco"],
+                    hash_conteudo_cliente(cliente),
                 ),
             )
             conn.commit()
@@ -173,10 +1049,72 @@ class ClienteDAO:
             return id_
         except Error as e:
             print(f"Erro ao criar cliente: {e}")
-            raise Exception(f"Erro ao criar cliente: {e}")
+            raise Exception(f"Erro ao criar cliente: {e}") from e
+
+    def upsert_em_lote(
+        self, clientes: list[dict[str, Any]], tamanho_lote: Optional[int] = None
+    ) -> dict[str, int]:
+        """
+        Sincroniza um snapshot de clientes pelo CPF (INSERT ... ON DUPLICATE KEY UPDATE)
+
+        Por lote: um SELECT dos hashes dos CPFs recebidos e um único INSERT de várias linhas
+        só com os clientes novos ou alterados; linhas com o mesmo hash de conteúdo não são
+        regravadas (nem têm o updated_at alterado). Reenviar o mesmo snapshot não muda nada.
+        Se um CPF se repete no lote, vale a última ocorrência.
+
+        Returns:
+            dict: {"inseridos": n, "atualizados": n, "inalterados": n}
+        """
+        tamanho = int(tamanho_lote or OPERACOES_LOTE_CONFIG["tamanho_lote"])
+        resultado = {"inseridos": 0, "atualizados": 0, "inalterados": 0}
+        conn = self._get_conn()
+        if not conn:
+            raise Exception("Erro: Conexão com banco de dados não disponível")
+        try:
+            cursor = conn.cursor()
+            for inicio in range(0, len(clientes), tamanho):
+                por_cpf = {c["cpf"]: c for c in clientes[inicio : inicio + tamanho]}
+                cursor.execute(
+                    "SELECT cpf, hash_conteudo FROM clientes "
+                    f"WHERE cpf IN ({', '.join(['%s'] * len(por_cpf))})",
+                    tuple(por_cpf),
+                )
+                hashes = dict(cursor.fetchall())
+
+                linhas = []
+                for cpf, cliente in por_cpf.items():
+                    hash_conteudo = hash_conteudo_cliente(cliente)
+                    if cpf not in hashes:
+                        resultado["inseridos"] += 1
+                    elif hashes[cpf] == hash_conteudo:
+                        resultado["inalterados"] += 1
+                        continue
+                    else:
+                        resultado["atualizados"] += 1
+                    linhas.append(
+                        (
+                            cliente["nome"],
+                            cpf,
+                            cliente.get("telefone"),
+                            cliente.get("email"),
+                            cliente.get("data_nasc"),
+                            cliente.get("endereco"),
+                            hash_conteudo,
+                        )
+                    )
+                if linhas:
+                    cursor.executemany(_SQL_UPSERT_CLIENTE, linhas)
+                conn.commit()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return resultado
+        except Error as e:
+            print(f"Erro ao sincronizar clientes: {e}")
+            raise Exception(f"Erro ao sincronizar clientes: {e}") from e
 
     def ler_por_id(self, cliente_id: int) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
@@ -206,7 +1144,7 @@ class ClienteDAO:
         return self.ler_por_id(cliente_id)
 
     def ler_por_cpf(self, cpf: str) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
@@ -231,7 +1169,17 @@ class ClienteDAO:
             print(f"Erro ao ler cliente por CPF: {e}")
             return None
 
-    def atualizar(self, cliente_id: int, dados: dict[str, Any]) -> bool:
+    def atualizar(
+        self, cliente_id: int, dados: dict[str, Any], anterior: Optional[dict[str, Any]] = None
+    ) -> bool:
+        """
+        Atualiza os campos fornecidos
+
+        Com `anterior` (versão já lida), grava só as colunas alteradas via compare-and-set
+        (ver atualizar_diferenca).
+        """
+        if anterior is not None:
+            return self.atualizar_diferenca(cliente_id, dados, anterior)
         conn = self._get_conn()
         if not conn:
             return False
@@ -266,6 +1214,7 @@ class ClienteDAO:
             if not campos:
                 return False  # Nada para atualizar
 
+            campos.extend(self._ATRIBUICOES_EXTRAS)
             valores.append(cliente_id)
             query = f"UPDATE clientes SET {', '.join(campos)} WHERE id=%s"
 
@@ -299,7 +1248,7 @@ class ClienteDAO:
             return False
 
     def listar(self) -> list[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return []
         try:
@@ -325,15 +1274,21 @@ class ClienteDAO:
             return []
 
 
-class SeguroDAO:
+class SeguroDAO(_ConsultaMixin):
     """DAO para gerenciar seguros - Suporta injeção de dependência"""
 
+    _TABELA = "seguros"
+    _COLUNAS = ("id", "tipo", "descricao", "valor", "detalhes", "cliente_id")
+    # Extraídas de 'detalhes' pelo MySQL (ver COLUNAS_GERADAS_SEGUROS em database/db_setup.py)
+    _COLUNAS_GERADAS = ("placa", "ano", "valor_segurado")
+
     def __init__(self, connection=None):
         """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
         self._external_conn = connection
 
     def _get_conn(self):
-        return self._external_conn if self._external_conn else get_connection()
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
 
     def _should_close(self):
         return self._external_conn is None
@@ -345,9 +1300,7 @@ class SeguroDAO:
         try:
             cursor = conn.cursor()
             # Converte detalhes para JSON se for dict
-            detalhes = seguro.get("detalhes")
-            if isinstance(detalhes, dict):
-                detalhes = json.dumps(detalhes)
+            detalhes = _dict_para_json(seguro.get("detalhes"))
 
             cursor.execute(
                 "INSERT INTO seguros (tipo, descricao, valor, detalhes, cliente_id) VALUES (%s, %s, %s, %s, %s)",
@@ -369,14 +1322,18 @@ class SeguroDAO:
             print(f"Erro ao criar seguro: {e}")
             return 0
 
-    def ler_por_id(self, seguro_id: int) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+    def ler_por_id(
+        self, seguro_id: int, colunas: Optional[list[str]] = None
+    ) -> Optional[dict[str, Any]]:
+        """Seguro pelo id; colunas=[...] projeta só as colunas pedidas"""
+        colunas = self._projecao(colunas)
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT id, tipo, descricao, valor, detalhes, cliente_id FROM seguros WHERE id = %s",
+                f"SELECT {', '.join(colunas)} FROM seguros WHERE id = %s",
                 (seguro_id,),
             )
             row = cursor.fetchone()
@@ -384,16 +1341,7 @@ class SeguroDAO:
             if self._should_close():
                 conn.close()
             if row:
-                resultado = dict(
-                    zip(["id", "tipo", "descricao", "valor", "detalhes", "cliente_id"], row)
-                )
-                # Parse JSON se detalhes for string
-                if resultado["detalhes"] and isinstance(resultado["detalhes"], str):
-                    try:
-                        resultado["detalhes"] = json.loads(resultado["detalhes"])
-                    except:
-                        pass
-                return resultado
+                return _decodificar_linha(colunas, row)
             return None
         except Error as e:
             print(f"Erro ao ler seguro: {e}")
@@ -403,7 +1351,17 @@ class SeguroDAO:
         """Alias para ler_por_id - compatibilidade com testes"""
         return self.ler_por_id(seguro_id)
 
-    def atualizar(self, seguro_id: int, dados: dict[str, Any]) -> bool:
+    def atualizar(
+        self, seguro_id: int, dados: dict[str, Any], anterior: Optional[dict[str, Any]] = None
+    ) -> bool:
+        """
+        Atualiza os campos fornecidos
+
+        Com `anterior` (versão já lida), grava só as colunas alteradas via compare-and-set
+        (ver atualizar_diferenca).
+        """
+        if anterior is not None:
+            return self.atualizar_diferenca(seguro_id, dados, anterior)
         conn = self._get_conn()
         if not conn:
             return False
@@ -423,10 +1381,7 @@ class SeguroDAO:
                 valores.append(dados["valor"])
             if "detalhes" in dados:
                 campos.append("detalhes=%s")
-                detalhes = dados["detalhes"]
-                if isinstance(detalhes, dict):
-                    detalhes = json.dumps(detalhes)
-                valores.append(detalhes)
+                valores.append(_dict_para_json(dados["detalhes"]))
             if "cliente_id" in dados:
                 campos.append("cliente_id=%s")
                 valores.append(dados["cliente_id"])
@@ -466,43 +1421,74 @@ class SeguroDAO:
             print(f"Erro ao deletar seguro: {e}")
             return False
 
-    def listar(self) -> list[dict[str, Any]]:
-        conn = self._get_conn()
+    def listar_por_cliente(
+        self, cliente_id: int, apos_id: int = 0, limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Seguros do cliente (idx_cliente); pagine com apos_id = último id da página anterior"""
+        return self._listar_por_chave("cliente_id", cliente_id, apos_id, limite)
+
+    def buscar_por_placa(self, placa: str) -> list[dict[str, Any]]:
+        """
+        Seguros de automóvel com a placa (idx_placa), sem decodificar o JSON de cada seguro
+
+        A placa é comparada em maiúsculas, como em utils.validar_placa.
+        """
+        return self.filtrar(placa=placa.strip().upper(), order_by="id")
+
+    def listar_por_ano(self, ano_min: int, ano_max: Optional[int] = None) -> list[dict[str, Any]]:
+        """Seguros de automóvel com ano entre ano_min e ano_max (idx_ano)"""
+        filtros = {"ano__gte": ano_min}
+        if ano_max is not None:
+            filtros["ano__lte"] = ano_max
+        return self.filtrar(order_by=["ano", "id"], **filtros)
+
+    def listar_por_valor_segurado(
+        self, minimo: float, maximo: Optional[float] = None, limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Seguros com valor segurado na faixa (idx_valor_segurado), maiores primeiro"""
+        filtros = {"valor_segurado__gte": minimo}
+        if maximo is not None:
+            filtros["valor_segurado__lte"] = maximo
+        return self.filtrar(order_by=["-valor_segurado", "id"], limit=limite, **filtros)
+
+    def listar(self, colunas: Optional[list[str]] = None) -> list[dict[str, Any]]:
+        """
+        Todos os seguros
+
+        'detalhes' só é decodificado quando lido (LinhaPreguicosa); relatórios que não
+        precisam dele podem nem trazê-lo do banco com colunas=["id", "tipo", "valor"].
+        """
+        colunas = self._projecao(colunas)
+        conn = self._get_conn_leitura()
         if not conn:
             return []
         try:
             cursor = conn.cursor()
-            cursor.execute("SELECT id, tipo, descricao, valor, detalhes, cliente_id FROM seguros")
+            cursor.execute(f"SELECT {', '.join(colunas)} FROM seguros")
             rows = cursor.fetchall()
             cursor.close()
             if self._should_close():
                 conn.close()
-            resultado = []
-            for row in rows:
-                item = dict(
-                    zip(["id", "tipo", "descricao", "valor", "detalhes", "cliente_id"], row)
-                )
-                if item["detalhes"] and isinstance(item["detalhes"], str):
-                    try:
-                        item["detalhes"] = json.loads(item["detalhes"])
-                    except:
-                        pass
-                resultado.append(item)
-            return resultado
+            return [_decodificar_linha(colunas, row) for row in rows]
         except Error as e:
             print(f"Erro ao listar seguros: {e}")
             return []
 
 
-class ApoliceDAO:
+class ApoliceDAO(_ConsultaMixin):
     """DAO para gerenciar apólices - Suporta injeção de dependência"""
 
+    _TABELA = "apolices"
+    _TABELA_ARQUIVO = "apolices_arquivo"
+    _COLUNAS = ("id", "cliente_id", "seguro_id", "numero", "data_emissao", "status")
+
     def __init__(self, connection=None):
         """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
         self._external_conn = connection
 
     def _get_conn(self):
-        return self._external_conn if self._external_conn else get_connection()
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
 
     def _should_close(self):
         return self._external_conn is None
@@ -514,10 +1500,11 @@ class ApoliceDAO:
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "INSERT INTO apolices (cliente_id, seguro_id, data_emissao, status) VALUES (%s, %s, %s, %s)",
+                "INSERT INTO apolices (cliente_id, seguro_id, numero, data_emissao, status) VALUES (%s, %s, %s, %s, %s)",
                 (
                     apolice["cliente_id"],
                     apolice["seguro_id"],
+                    apolice.get("numero"),
                     apolice.get("data_emissao"),
                     apolice.get("status", "ativa"),
                 ),
@@ -530,16 +1517,16 @@ class ApoliceDAO:
             return id_
         except Error as e:
             print(f"Erro ao criar apólice: {e}")
-            raise Exception(f"Erro ao criar apólice: {e}")
+            raise Exception(f"Erro ao criar apólice: {e}") from e
 
     def ler_por_id(self, apolice_id: int) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT id, cliente_id, seguro_id, data_emissao, status FROM apolices WHERE id = %s",
+                "SELECT id, cliente_id, seguro_id, numero, data_emissao, status FROM apolices WHERE id = %s",
                 (apolice_id,),
             )
             row = cursor.fetchone()
@@ -553,6 +1540,7 @@ class ApoliceDAO:
                             "id",
                             "cliente_id",
                             "seguro_id",
+                            "numero",
                             "data_emissao",
                             "status",
                         ],
@@ -568,7 +1556,17 @@ class ApoliceDAO:
         """Alias para ler_por_id - compatibilidade com testes"""
         return self.ler_por_id(apolice_id)
 
-    def atualizar(self, apolice_id: int, dados: dict[str, Any]) -> bool:
+    def atualizar(
+        self, apolice_id: int, dados: dict[str, Any], anterior: Optional[dict[str, Any]] = None
+    ) -> bool:
+        """
+        Atualiza os campos fornecidos
+
+        Com `anterior` (versão já lida), grava só as colunas alteradas via compare-and-set
+        (ver atualizar_diferenca).
+        """
+        if anterior is not None:
+            return self.atualizar_diferenca(apolice_id, dados, anterior)
         conn = self._get_conn()
         if not conn:
             return False
@@ -625,14 +1623,73 @@ class ApoliceDAO:
             print(f"Erro ao deletar apólice: {e}")
             return False
 
+    def listar_por_cliente(
+        self, cliente_id: int, apos_id: int = 0, limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Apólices do cliente (idx_cliente); pagine com apos_id = último id da página anterior"""
+        return self._listar_por_chave("cliente_id", cliente_id, apos_id, limite)
+
+    def listar_com_sinistros_por_cliente(self, cliente_id: int) -> list[dict[str, Any]]:
+        """
+        Apólices do cliente com o seguro e os sinistros de cada uma, numa única consulta
+
+        Returns:
+            list: apólices (ordem de id) com "seguro" (tipo/descricao/valor) e "sinistros"
+        """
+        conn = self._get_conn_leitura()
+        if not conn:
+            return []
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                SELECT a.id, a.seguro_id, a.numero, a.data_emissao, a.status,
+                       s.tipo, s.descricao, s.valor,
+                       si.id, si.data_ocorrencia, si.descricao, si.status
+                FROM apolices a
+                JOIN seguros s ON s.id = a.seguro_id
+                LEFT JOIN sinistros si ON si.apolice_id = a.id
+                WHERE a.cliente_id = %s
+                ORDER BY a.id, si.id
+                """,
+                (cliente_id,),
+            )
+            rows = cursor.fetchall()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+        except Error as e:
+            print(f"Erro ao listar apólices do cliente: {e}")
+            return []
+
+        apolices: dict[int, dict[str, Any]] = {}
+        for row in rows:
+            apolice_id = row[0]
+            if apolice_id not in apolices:
+                apolices[apolice_id] = {
+                    "id": apolice_id,
+                    "cliente_id": cliente_id,
+                    "seguro_id": row[1],
+                    "numero": row[2],
+                    "data_emissao": row[3],
+                    "status": row[4],
+                    "seguro": _decodificar_linha(["tipo", "descricao", "valor"], row[5:8]),
+                    "sinistros": [],
+                }
+            if row[8] is not None:
+                apolices[apolice_id]["sinistros"].append(
+                    dict(zip(["id", "data_ocorrencia", "descricao", "status"], row[8:]))
+                )
+        return list(apolices.values())
+
     def listar(self) -> list[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return []
         try:
             cursor = conn.cursor()
             cursor.execute(
-                "SELECT id, cliente_id, seguro_id, data_emissao, status FROM apolices"
+                "SELECT id, cliente_id, seguro_id, numero, data_emissao, status FROM apolices"
             )
             rows = cursor.fetchall()
             cursor.close()
@@ -645,6 +1702,7 @@ class ApoliceDAO:
                             "id",
                             "cliente_id",
                             "seguro_id",
+                            "numero",
                             "data_emissao",
                             "status",
                         ],
@@ -658,15 +1716,21 @@ class ApoliceDAO:
             return []
 
 
-class SinistroDAO:
+class SinistroDAO(_ConsultaMixin):
     """DAO para gerenciar sinistros - Suporta injeção de dependência"""
 
+    _TABELA = "sinistros"
+    _TABELA_ARQUIVO = "sinistros_arquivo"
+    _COLUNAS = ("id", "apolice_id", "data_ocorrencia", "descricao", "status")
+    _COLUNAS_BUSCA = ("descricao",)
+
     def __init__(self, connection=None):
         """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
         self._external_conn = connection
 
     def _get_conn(self):
-        return self._external_conn if self._external_conn else get_connection()
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
 
     def _should_close(self):
         return self._external_conn is None
@@ -694,10 +1758,10 @@ class SinistroDAO:
             return id_
         except Error as e:
             print(f"Erro ao criar sinistro: {e}")
-            raise Exception(f"Erro ao criar sinistro: {e}")
+            raise Exception(f"Erro ao criar sinistro: {e}") from e
 
     def ler_por_id(self, sinistro_id: int) -> Optional[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return None
         try:
@@ -732,7 +1796,17 @@ class SinistroDAO:
         """Alias para ler_por_id - compatibilidade com testes"""
         return self.ler_por_id(sinistro_id)
 
-    def atualizar(self, sinistro_id: int, dados: dict[str, Any]) -> bool:
+    def atualizar(
+        self, sinistro_id: int, dados: dict[str, Any], anterior: Optional[dict[str, Any]] = None
+    ) -> bool:
+        """
+        Atualiza os campos fornecidos
+
+        Com `anterior` (versão já lida), grava só as colunas alteradas via compare-and-set
+        (ver atualizar_diferenca).
+        """
+        if anterior is not None:
+            return self.atualizar_diferenca(sinistro_id, dados, anterior)
         conn = self._get_conn()
         if not conn:
             return False
@@ -789,8 +1863,29 @@ class SinistroDAO:
             print(f"Erro ao deletar sinistro: {e}")
             return False
 
+    def listar_por_apolice(
+        self, apolice_id: int, apos_id: int = 0, limite: Optional[int] = None
+    ) -> list[dict[str, Any]]:
+        """Sinistros da apólice (idx_apolice); pagine com apos_id = último id da página anterior"""
+        return self._listar_por_chave("apolice_id", apolice_id, apos_id, limite)
+
+    def listar_por_periodo(
+        self, data_ini=None, data_fim=None, incluir_arquivados: bool = False, **filtros
+    ) -> list[dict[str, Any]]:
+        """
+        Sinistros com data_ocorrencia no período (limites inclusivos, None = aberto), por id
+
+        O predicado vai para o WHERE, então na variante particionada de 'sinistros' só as
+        partições do período são lidas (partition pruning).
+        """
+        if data_ini is not None:
+            filtros["data_ocorrencia__gte"] = data_ini
+        if data_fim is not None:
+            filtros["data_ocorrencia__lte"] = data_fim
+        return self.filtrar(order_by="id", incluir_arquivados=incluir_arquivados, **filtros)
+
     def listar(self) -> list[dict[str, Any]]:
-        conn = self._get_conn()
+        conn = self._get_conn_leitura()
         if not conn:
             return []
         try:
@@ -0,0 +1,135 @@
+"""
+Disjuntores (circuit breakers) por backend: MySQL e MongoDB
+Após limite_falhas falhas de conexão consecutivas o circuito abre e as chamadas falham na hora
+(sem tentar conectar) até o fim da espera; então uma única chamada de sondagem passa
+(semiaberto). Sucesso fecha o circuito; falha reabre com a espera dobrada, até espera_maxima.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import DISJUNTOR_CONFIG
+
+ESTADO_FECHADO = "fechado"
+ESTADO_ABERTO = "aberto"
+ESTADO_SEMIABERTO = "semiaberto"
+
+DISJUNTOR_MYSQL = "mysql"
+DISJUNTOR_MONGODB = "mongodb"
+
+
+class Disjuntor:
+    """Máquina de estados fechado/aberto/semiaberto com espera exponencial - thread-safe"""
+
+    def __init__(
+        self,
+        nome: str,
+        limite_falhas: Optional[int] = None,
+        espera_inicial: Optional[float] = None,
+        espera_maxima: Optional[float] = None,
+        relogio: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            nome: backend protegido (aparece nas mensagens e métricas)
+            limite_falhas: falhas consecutivas que abrem o circuito (padrão: DISJUNTOR_CONFIG)
+            espera_inicial: segundos até a primeira sondagem após abrir
+            espera_maxima: teto da espera, que dobra a cada sondagem que falha
+            relogio: fonte de tempo (injetável em testes)
+        """
+        cfg = DISJUNTOR_CONFIG
+        self.nome = nome
+        self.limite_falhas = limite_falhas or cfg["limite_falhas"]
+        self.espera_inicial = cfg["espera_inicial"] if espera_inicial is None else espera_inicial
+        self.espera_maxima = cfg["espera_maxima"] if espera_maxima is None else espera_maxima
+        self._relogio = relogio
+        self._lock = threading.Lock()
+        self.estado = ESTADO_FECHADO
+        self.falhas_consecutivas = 0
+        self.espera = self.espera_inicial
+        self._reabre_em = 0.0
+        self._contadores = {"sucessos": 0, "falhas": 0, "rejeitadas": 0, "aberturas": 0}
+
+    def permitir(self) -> bool:
+        """
+        Decide se a chamada pode tentar o backend
+
+        Com o circuito aberto retorna False sem custo; vencida a espera, libera uma única
+        chamada de sondagem (as demais continuam rejeitadas até o resultado dela).
+        """
+        with self._lock:
+            if self.estado == ESTADO_FECHADO:
+                return True
+            if self.estado == ESTADO_ABERTO and self._relogio() >= self._reabre_em:
+                self.estado = ESTADO_SEMIABERTO
+                return True
+            self._contadores["rejeitadas"] += 1
+            return False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self._contadores["sucessos"] += 1
+            self.falhas_consecutivas = 0
+            if self.estado != ESTADO_FECHADO:
+                print(f"✓ Circuito '{self.nome}' fechado: backend respondeu à sondagem")
+                self.estado = ESTADO_FECHADO
+                self.espera = self.espera_inicial
+
+    def registrar_falha(self):
+        with self._lock:
+            self._contadores["falhas"] += 1
+            self.falhas_consecutivas += 1
+            if self.estado == ESTADO_SEMIABERTO:
+                self.espera = min(self.espera * 2, self.espera_maxima)
+            elif self.estado == ESTADO_ABERTO or self.falhas_consecutivas < self.limite_falhas:
+                return
+            self.estado = ESTADO_ABERTO
+            self._reabre_em = self._relogio() + self.espera
+            self._contadores["aberturas"] += 1
+            print(
+                f"⚠ Circuito '{self.nome}' aberto após {self.falhas_consecutivas} falha(s): "
+                f"nova tentativa em {self.espera:g}s"
+            )
+
+    def metricas(self) -> dict[str, Any]:
+        """Estado e contadores acumulados do disjuntor"""
+        with self._lock:
+            proxima = None
+            if self.estado == ESTADO_ABERTO:
+                proxima = round(max(0.0, self._reabre_em - self._relogio()), 3)
+            return {
+                "estado": self.estado,
+                "falhas_consecutivas": self.falhas_consecutivas,
+                "espera_atual": self.espera,
+                "proxima_sondagem_em": proxima,
+                **self._contadores,
+            }
+
+
+_disjuntores: dict[str, Disjuntor] = {}
+_disjuntores_lock = threading.Lock()
+
+
+def obter_disjuntor(nome: str) -> Disjuntor:
+    """Disjuntor compartilhado do processo para o backend"""
+    with _disjuntores_lock:
+        if nome not in _disjuntores:
+            _disjuntores[nome] = Disjuntor(nome)
+        return _disjuntores[nome]
+
+
+def metricas_disjuntores() -> dict[str, dict[str, Any]]:
+    """Métricas de todos os disjuntores em uso: {backend: metricas}"""
+    with _disjuntores_lock:
+        disjuntores = list(_disjuntores.values())
+    return {d.nome: d.metricas() for d in disjuntores}
+
+
+def reiniciar_disjuntores():
+    """Descarta os disjuntores (voltam fechados no próximo uso)"""
+    with _disjuntores_lock:
+        _disjuntores.clear()
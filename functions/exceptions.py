@@ -40,3 +40,15 @@ class ValorInvalido(Exception):
 
 class PermissaoNegada(Exception):
     pass
+
+
+class FonteIndisponivelError(Exception):
+    pass
+
+
+class LoteInterrompidoError(Exception):
+    """Falha num lote de uma operação em lotes; `confirmados`: ids dos lotes já confirmados"""
+
+    def __init__(self, mensagem: str, confirmados: list):
+        super().__init__(mensagem)
+        self.confirmados = confirmados
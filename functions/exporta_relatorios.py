@@ -1,49 +1,167 @@
 import csv
 import json
 import os
-from datetime import datetime
+
+from functions.auditoria_service import CACHE_HIT, CACHE_MISS, RelatorioMetadadosService
 
 # Sprint 4 - Usa DAOs do MySQL (não mais SQLite)
-from functions.dao_mysql import ApoliceDAO, ClienteDAO, SeguroDAO, SinistroDAO
+from functions.dao_mysql import (
+    TABELAS_ARQUIVO,
+    ApoliceDAO,
+    ClienteDAO,
+    LinhaPreguicosa,
+    SeguroDAO,
+    SinistroDAO,
+    versao_dados,
+)
+from functions.exportacao_incremental import exportar_incremental_todos
 
 EXPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "export")
 
 
-def receita_mensal_prevista_cli_export():
+def _exportar_com_cache(
+    tipo_relatorio,
+    caminho,
+    tabelas,
+    gerar,
+    filtros=None,
+    formato="CSV",
+    usuario="sistema",
+    mysql_connection=None,
+    mongo_database=None,
+):
+    """
+    Gera o arquivo do relatório ou reaproveita a última exportação se os dados não mudaram.
+    A versão dos dados (MAX(updated_at) + COUNT(*) das tabelas de origem) é gravada junto
+    com os metadados da exportação; hits e misses ficam visíveis em 'relatorios_exportados'.
+
+    Args:
+        gerar: função gerar(caminho) que grava o arquivo e retorna o total de registros
+               (None se nada foi gravado)
+        mysql_connection / mongo_database: conexões opcionais (injeção de dependência)
+
+    Returns:
+        bool: True se o arquivo existente foi reaproveitado (cache hit)
+    """
+    metadados = RelatorioMetadadosService(mongo_database)
+    caminho = os.path.abspath(caminho)
+    versao = versao_dados(tabelas, connection=mysql_connection)
+
+    if versao is not None:
+        anterior = metadados.buscar_em_cache(
+            tipo_relatorio, formato, versao, filtros, arquivo=caminho
+        )
+        if anterior:
+            metadados.registrar_exportacao(
+                tipo_relatorio=tipo_relatorio,
+                formato=formato,
+                usuario=usuario,
+                caminho_arquivo=caminho,
+                total_registros=anterior["registros_total"],
+                filtros=filtros,
+                versao_dados=versao,
+                cache=CACHE_HIT,
+            )
+            return True
+
+    total = gerar(caminho)
+    if total is not None:
+        metadados.registrar_exportacao(
+            tipo_relatorio=tipo_relatorio,
+            formato=formato,
+            usuario=usuario,
+            caminho_arquivo=caminho,
+            total_registros=total,
+            filtros=filtros,
+            versao_dados=versao,
+            cache=CACHE_MISS,
+        )
+    return False
+
+
+def _origens(tabelas, incluir_arquivados):
+    """Tabelas de origem do relatório, com as de arquivo correspondentes se incluídas"""
+    if not incluir_arquivados:
+        return tabelas
+    return tabelas + tuple(f"{t}_arquivo" for t in tabelas if f"{t}_arquivo" in TABELAS_ARQUIVO)
+
+
+def _gravar_csv(path, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
+        writer.writeheader()
+        # Colunas JSON (detalhes) vão como texto JSON, repassado sem decodificar
+        writer.writerows(
+            {k: row.bruto(k) for k in row.keys()} if isinstance(row, LinhaPreguicosa) else row
+            for row in rows
+        )
+
+
+def _ler_csv(path, conversores=None):
+    """Lê um CSV exportado aplicando conversores por coluna (ex: {"mensalidade": float})"""
+    conversores = conversores or {}
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            {k: conversores[k](v) if k in conversores else v for k, v in row.items()}
+            for row in csv.DictReader(f)
+        ]
+
+
+def _calcular_receita_mensal_prevista():
     # Instancia os DAOs
     apolice_dao = ApoliceDAO()
     seguro_dao = SeguroDAO()
     
-    apolices = apolice_dao.listar()
-    seguros = seguro_dao.listar()
-    total = 0
+    # Filtro de status no MySQL (collation *_ci: equivale ao antigo .lower() == "ativa")
+    apolices = apolice_dao.filtrar(status="ativa", order_by="id")
+    seguros = {
+        s["id"]: s
+        for s in seguro_dao.filtrar(
+            id=list({a["seguro_id"] for a in apolices}), colunas=["id", "tipo", "valor"]
+        )
+    }
     rows = []
     for apolice in apolices:
-        if apolice.get("status", "").lower() == "ativa":
-            seguro = next((s for s in seguros if s["id"] == apolice.get("seguro_id")), None)
-            valor = seguro.get("valor", 0) if seguro else 0
-            # Converte Decimal para float
-            if valor:
-                valor = float(valor)
-            tipo = seguro.get("tipo", "") if seguro else ""
-            if tipo == "Automóvel":
-                mensal = 200.0
-            elif tipo == "Residencial":
-                mensal = valor * 0.005
-            elif tipo == "Vida":
-                mensal = valor * 0.01
-            else:
-                mensal = 0
-            total += mensal
-            rows.append(
-                {
-                    "apolice_id": apolice["id"],
-                    "cliente_id": apolice["cliente_id"],
-                    "seguro_id": apolice["seguro_id"],
-                    "tipo": tipo,
-                    "mensalidade": round(mensal, 2),
-                }
-            )
+        seguro = seguros.get(apolice.get("seguro_id"))
+        valor = seguro.get("valor", 0) if seguro else 0
+        tipo = seguro.get("tipo", "") if seguro else ""
+        if tipo == "Automóvel":
+            mensal = 200.0
+        elif tipo == "Residencial":
+            mensal = valor * 0.005
+        elif tipo == "Vida":
+            mensal = valor * 0.01
+        else:
+            mensal = 0
+        rows.append(
+            {
+                "apolice_id": apolice["id"],
+                "cliente_id": apolice["cliente_id"],
+                "seguro_id": apolice["seguro_id"],
+                "tipo": tipo,
+                "mensalidade": round(mensal, 2),
+            }
+        )
+    return rows
+
+
+def receita_mensal_prevista_cli_export(usuario="sistema"):
+    path = os.path.join(EXPORT_DIR, "receita_mensal_prevista.csv")
+    rows = []
+
+    def gerar(caminho):
+        rows.extend(_calcular_receita_mensal_prevista())
+        if not rows:
+            return None
+        _gravar_csv(caminho, rows)
+        return len(rows)
+
+    em_cache = _exportar_com_cache(
+        "receita_mensal_prevista", path, ("apolices", "seguros"), gerar, usuario=usuario
+    )
+    if em_cache:
+        rows = _ler_csv(path, {"mensalidade": float})
+    total = sum(r["mensalidade"] for r in rows)
     print("\n--- Receita Mensal Prevista (Apolices Ativas) ---")
     if not rows:
         print("Nenhuma apólice ativa encontrada.")
@@ -54,24 +172,21 @@ def receita_mensal_prevista_cli_export():
             f"{r['apolice_id']:<8} {r['cliente_id']:<8} {r['seguro_id']:<8} {r['tipo']:<12} R$ {r['mensalidade']:<10.2f}"
         )
     print(f"Total previsto: R$ {total:.2f}")
-    # Exporta CSV
-    path = os.path.join(EXPORT_DIR, "receita_mensal_prevista.csv")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"CSV exportado para {path}")
+    if em_cache:
+        print(f"CSV reaproveitado (dados inalterados): {path}")
+    else:
+        print(f"CSV exportado para {path}")
 
 
-def top_clientes_valor_segurado_cli_export(top_n=5):
+def _calcular_top_clientes_valor_segurado(top_n, incluir_arquivados=False):
     # Instancia os DAOs
     cliente_dao = ClienteDAO()
     apolice_dao = ApoliceDAO()
     seguro_dao = SeguroDAO()
     
     clientes = cliente_dao.listar()
-    apolices = apolice_dao.listar()
-    seguros = seguro_dao.listar()
+    apolices = apolice_dao.filtrar(order_by="id", incluir_arquivados=incluir_arquivados)
+    seguros = seguro_dao.listar(colunas=["id", "valor"])
     ranking = []
     for cliente in clientes:
         valor = 0
@@ -80,55 +195,60 @@ def top_clientes_valor_segurado_cli_export(top_n=5):
                 seguro = next((s for s in seguros if s["id"] == apolice["seguro_id"]), None)
                 if seguro:
                     valor_seguro = seguro.get("valor", 0) or 0
-                    # Converte Decimal para float
-                    if valor_seguro:
-                        valor_seguro = float(valor_seguro)
                     valor += valor_seguro
         ranking.append(
             {"cliente_id": cliente["id"], "nome": cliente["nome"], "valor_segurado": valor}
         )
     ranking.sort(key=lambda x: x["valor_segurado"], reverse=True)
+    return ranking[:top_n]
+
+
+def top_clientes_valor_segurado_cli_export(top_n=5, usuario="sistema", incluir_arquivados=False):
+    path = os.path.join(EXPORT_DIR, "top_clientes_valor_segurado.csv")
+    ranking = []
+
+    def gerar(caminho):
+        ranking.extend(_calcular_top_clientes_valor_segurado(top_n, incluir_arquivados))
+        if not ranking:
+            return None
+        _gravar_csv(caminho, ranking)
+        return len(ranking)
+
+    em_cache = _exportar_com_cache(
+        "top_clientes_valor_segurado",
+        path,
+        _origens(("clientes", "apolices", "seguros"), incluir_arquivados),
+        gerar,
+        filtros={"top_n": top_n, "incluir_arquivados": incluir_arquivados},
+        usuario=usuario,
+    )
+    if em_cache:
+        ranking = _ler_csv(path, {"valor_segurado": float})
     print(f"\n--- Top {top_n} Clientes por Valor Segurado ---")
     if not ranking:
         print("Nenhum cliente encontrado.")
         return
     print(f"{'ID':<6} {'Nome':<20} {'Valor Segurado':<15}")
-    for r in ranking[:top_n]:
+    for r in ranking:
         print(f"{r['cliente_id']:<6} {r['nome']:<20} R$ {r['valor_segurado']:<12.2f}")
-    # Exporta CSV
-    path = os.path.join(EXPORT_DIR, "top_clientes_valor_segurado.csv")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=ranking[0].keys())
-        writer.writeheader()
-        writer.writerows(ranking[:top_n])
-    print(f"CSV exportado para {path}")
+    if em_cache:
+        print(f"CSV reaproveitado (dados inalterados): {path}")
+    else:
+        print(f"CSV exportado para {path}")
 
 
-def sinistros_status_periodo_cli_export(data_ini=None, data_fim=None):
+def _calcular_sinistros_status_periodo(data_ini, data_fim, incluir_arquivados=False):
     # Instancia o DAO
     sinistro_dao = SinistroDAO()
     
-    sinistros = sinistro_dao.listar()
+    # Período filtrado no banco (partition pruning na variante particionada de sinistros)
+    sinistros = sinistro_dao.listar_por_periodo(
+        data_ini.date() if data_ini else None,
+        data_fim.date() if data_fim else None,
+        incluir_arquivados=incluir_arquivados,
+    )
     rows = []
     for s in sinistros:
-        data = s.get("data_ocorrencia")
-        if data:
-            try:
-                # Tenta formato MySQL (YYYY-MM-DD) ou objeto date
-                if isinstance(data, str):
-                    try:
-                        data_dt = datetime.strptime(data, "%Y-%m-%d")
-                    except ValueError:
-                        data_dt = datetime.strptime(data, "%d/%m/%Y")
-                else:
-                    # Objeto date
-                    data_dt = datetime.combine(data, datetime.min.time())
-            except Exception:
-                continue
-            if data_ini and data_dt < data_ini:
-                continue
-            if data_fim and data_dt > data_fim:
-                continue
         rows.append(
             {
                 "id": s["id"],
@@ -138,6 +258,36 @@ def sinistros_status_periodo_cli_export(data_ini=None, data_fim=None):
                 "status": s["status"],
             }
         )
+    return rows
+
+
+def sinistros_status_periodo_cli_export(
+    data_ini=None, data_fim=None, usuario="sistema", incluir_arquivados=False
+):
+    path = os.path.join(EXPORT_DIR, "sinistros_status_periodo.csv")
+    rows = []
+
+    def gerar(caminho):
+        rows.extend(_calcular_sinistros_status_periodo(data_ini, data_fim, incluir_arquivados))
+        if not rows:
+            return None
+        _gravar_csv(caminho, rows)
+        return len(rows)
+
+    em_cache = _exportar_com_cache(
+        "sinistros_status_periodo",
+        path,
+        _origens(("sinistros",), incluir_arquivados),
+        gerar,
+        filtros={
+            "data_ini": data_ini.isoformat() if data_ini else None,
+            "data_fim": data_fim.isoformat() if data_fim else None,
+            "incluir_arquivados": incluir_arquivados,
+        },
+        usuario=usuario,
+    )
+    if em_cache:
+        rows = _ler_csv(path)
     # Agrupa por status
     status_count = {}
     for r in rows:
@@ -154,120 +304,170 @@ def sinistros_status_periodo_cli_export(data_ini=None, data_fim=None):
     print("\nResumo por status:")
     for k, v in status_count.items():
         print(f"{k}: {v}")
-    # Exporta CSV
-    path = os.path.join(EXPORT_DIR, "sinistros_status_periodo.csv")
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=rows[0].keys())
-        writer.writeheader()
-        writer.writerows(rows)
-    print(f"CSV exportado para {path}")
+    if em_cache:
+        print(f"CSV reaproveitado (dados inalterados): {path}")
+    else:
+        print(f"CSV exportado para {path}")
 
 
-def exportar_clientes_csv(path="clientes_export.csv"):
-    cliente_dao = ClienteDAO()
-    clientes = cliente_dao.listar()
-    if not clientes:
-        print("Nenhum cliente para exportar.")
-        return
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=clientes[0].keys())
-        writer.writeheader()
-        writer.writerows(clientes)
+def exportar_clientes_csv(path="clientes_export.csv", usuario="sistema"):
+    def gerar(caminho):
+        cliente_dao = ClienteDAO()
+        clientes = cliente_dao.listar()
+        if not clientes:
+            print("Nenhum cliente para exportar.")
+            return None
+        _gravar_csv(caminho, clientes)
+        return len(clientes)
 
+    _exportar_com_cache("clientes", path, ("clientes",), gerar, usuario=usuario)
 
-def exportar_clientes_json(path="clientes_export.json"):
-    cliente_dao = ClienteDAO()
-    clientes = cliente_dao.listar()
-    # Converte date objects para string
-    for c in clientes:
-        if "data_nasc" in c and c["data_nasc"]:
-            c["data_nasc"] = str(c["data_nasc"])
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(clientes, f, ensure_ascii=False, indent=2, default=str)
 
+def exportar_clientes_json(path="clientes_export.json", usuario="sistema"):
+    def gerar(caminho):
+        cliente_dao = ClienteDAO()
+        clientes = cliente_dao.listar()
+        # Converte date objects para string
+        for c in clientes:
+            if "data_nasc" in c and c["data_nasc"]:
+                c["data_nasc"] = str(c["data_nasc"])
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(clientes, f, ensure_ascii=False, indent=2, default=str)
+        return len(clientes)
 
-def exportar_seguros_csv(path="seguros_export.csv"):
-    seguro_dao = SeguroDAO()
-    seguros = seguro_dao.listar()
-    if not seguros:
-        print("Nenhum seguro para exportar.")
-        return
-    # Converte Decimal e outros tipos para string
-    for s in seguros:
-        if "valor" in s and s["valor"]:
-            s["valor"] = float(s["valor"])
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=seguros[0].keys())
-        writer.writeheader()
-        writer.writerows(seguros)
+    _exportar_com_cache("clientes", path, ("clientes",), gerar, formato="JSON", usuario=usuario)
 
 
-def exportar_seguros_json(path="seguros_export.json"):
-    seguro_dao = SeguroDAO()
-    seguros = seguro_dao.listar()
-    # Converte Decimal para float
-    for s in seguros:
-        if "valor" in s and s["valor"]:
-            s["valor"] = float(s["valor"])
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(seguros, f, ensure_ascii=False, indent=2, default=str)
+def exportar_seguros_csv(path="seguros_export.csv", usuario="sistema"):
+    def gerar(caminho):
+        seguro_dao = SeguroDAO()
+        seguros = seguro_dao.listar()
+        if not seguros:
+            print("Nenhum seguro para exportar.")
+            return None
+        _gravar_csv(caminho, seguros)
+        return len(seguros)
 
+    _exportar_com_cache("seguros", path, ("seguros",), gerar, usuario=usuario)
 
-def exportar_apolices_csv(path="apolices_export.csv"):
-    apolice_dao = ApoliceDAO()
-    apolices = apolice_dao.listar()
-    if not apolices:
-        print("Nenhuma apólice para exportar.")
-        return
-    # Converte date objects para string
-    for a in apolices:
-        if "data_emissao" in a and a["data_emissao"]:
-            a["data_emissao"] = str(a["data_emissao"])
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=apolices[0].keys())
-        writer.writeheader()
-        writer.writerows(apolices)
 
+def exportar_seguros_json(path="seguros_export.json", usuario="sistema"):
+    def gerar(caminho):
+        seguro_dao = SeguroDAO()
+        seguros = seguro_dao.listar()
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(seguros, f, ensure_ascii=False, indent=2, default=str)
+        return len(seguros)
 
-def exportar_apolices_json(path="apolices_export.json"):
-    apolice_dao = ApoliceDAO()
-    apolices = apolice_dao.listar()
-    # Converte date objects para string
-    for a in apolices:
-        if "data_emissao" in a and a["data_emissao"]:
-            a["data_emissao"] = str(a["data_emissao"])
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(apolices, f, ensure_ascii=False, indent=2, default=str)
+    _exportar_com_cache("seguros", path, ("seguros",), gerar, formato="JSON", usuario=usuario)
 
 
-def exportar_sinistros_csv(path="sinistros_export.csv"):
-    sinistro_dao = SinistroDAO()
-    sinistros = sinistro_dao.listar()
-    if not sinistros:
-        print("Nenhum sinistro para exportar.")
-        return
-    # Converte date objects para string
-    for s in sinistros:
-        if "data_ocorrencia" in s and s["data_ocorrencia"]:
-            s["data_ocorrencia"] = str(s["data_ocorrencia"])
-    with open(path, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=sinistros[0].keys())
-        writer.writeheader()
-        writer.writerows(sinistros)
+def exportar_apolices_csv(path="apolices_export.csv", usuario="sistema", incluir_arquivados=False):
+    def gerar(caminho):
+        apolice_dao = ApoliceDAO()
+        apolices = apolice_dao.filtrar(order_by="id", incluir_arquivados=incluir_arquivados)
+        if not apolices:
+            print("Nenhuma apólice para exportar.")
+            return None
+        # Converte date objects para string
+        for a in apolices:
+            if "data_emissao" in a and a["data_emissao"]:
+                a["data_emissao"] = str(a["data_emissao"])
+        _gravar_csv(caminho, apolices)
+        return len(apolices)
 
+    _exportar_com_cache(
+        "apolices",
+        path,
+        _origens(("apolices",), incluir_arquivados),
+        gerar,
+        filtros={"incluir_arquivados": True} if incluir_arquivados else None,
+        usuario=usuario,
+    )
 
-def exportar_sinistros_json(path="sinistros_export.json"):
-    sinistro_dao = SinistroDAO()
-    sinistros = sinistro_dao.listar()
-    # Converte date objects para string
-    for s in sinistros:
-        if "data_ocorrencia" in s and s["data_ocorrencia"]:
-            s["data_ocorrencia"] = str(s["data_ocorrencia"])
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(sinistros, f, ensure_ascii=False, indent=2, default=str)
+
+def exportar_apolices_json(
+    path="apolices_export.json", usuario="sistema", incluir_arquivados=False
+):
+    def gerar(caminho):
+        apolice_dao = ApoliceDAO()
+        apolices = apolice_dao.filtrar(order_by="id", incluir_arquivados=incluir_arquivados)
+        # Converte date objects para string
+        for a in apolices:
+            if "data_emissao" in a and a["data_emissao"]:
+                a["data_emissao"] = str(a["data_emissao"])
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(apolices, f, ensure_ascii=False, indent=2, default=str)
+        return len(apolices)
+
+    _exportar_com_cache(
+        "apolices",
+        path,
+        _origens(("apolices",), incluir_arquivados),
+        gerar,
+        formato="JSON",
+        filtros={"incluir_arquivados": True} if incluir_arquivados else None,
+        usuario=usuario,
+    )
+
+
+def exportar_sinistros_csv(
+    path="sinistros_export.csv", usuario="sistema", incluir_arquivados=False
+):
+    def gerar(caminho):
+        sinistro_dao = SinistroDAO()
+        sinistros = sinistro_dao.filtrar(order_by="id", incluir_arquivados=incluir_arquivados)
+        if not sinistros:
+            print("Nenhum sinistro para exportar.")
+            return None
+        # Converte date objects para string
+        for s in sinistros:
+            if "data_ocorrencia" in s and s["data_ocorrencia"]:
+                s["data_ocorrencia"] = str(s["data_ocorrencia"])
+        _gravar_csv(caminho, sinistros)
+        return len(sinistros)
+
+    _exportar_com_cache(
+        "sinistros",
+        path,
+        _origens(("sinistros",), incluir_arquivados),
+        gerar,
+        filtros={"incluir_arquivados": True} if incluir_arquivados else None,
+        usuario=usuario,
+    )
 
 
-def exportar_todos():
+def exportar_sinistros_json(
+    path="sinistros_export.json", usuario="sistema", incluir_arquivados=False
+):
+    def gerar(caminho):
+        sinistro_dao = SinistroDAO()
+        sinistros = sinistro_dao.filtrar(order_by="id", incluir_arquivados=incluir_arquivados)
+        # Converte date objects para string
+        for s in sinistros:
+            if "data_ocorrencia" in s and s["data_ocorrencia"]:
+                s["data_ocorrencia"] = str(s["data_ocorrencia"])
+        with open(caminho, "w", encoding="utf-8") as f:
+            json.dump(sinistros, f, ensure_ascii=False, indent=2, default=str)
+        return len(sinistros)
+
+    _exportar_com_cache(
+        "sinistros",
+        path,
+        _origens(("sinistros",), incluir_arquivados),
+        gerar,
+        formato="JSON",
+        filtros={"incluir_arquivados": True} if incluir_arquivados else None,
+        usuario=usuario,
+    )
+
+
+def exportar_todos(incremental=False):
+    if incremental:
+        # Apenas o que mudou desde a última execução (ver functions/exportacao_incremental.py)
+        exportar_incremental_todos()
+        print("Exportação incremental concluída!")
+        return
     exportar_clientes_csv()
     exportar_clientes_json()
     exportar_seguros_csv()
@@ -280,4 +480,6 @@ def exportar_todos():
 
 
 if __name__ == "__main__":
-    exportar_todos()
+    import sys
+
+    exportar_todos(incremental="--delta" in sys.argv)
@@ -0,0 +1,348 @@
+"""
+Exportação incremental (delta) para o data warehouse
+Exporta apenas as linhas alteradas desde a última execução, usando uma marca d'água
+(updated_at, id) por entidade e o índice idx_updated (updated_at, id) para a varredura.
+Exclusões são capturadas pelos triggers da tabela 'exclusoes' (tombstones).
+
+Limite: a marca supõe que as linhas ficam visíveis na ordem de (updated_at, id) e de
+exclusoes.id. Uma transação confirmada depois da leitura, com updated_at (ou id de tombstone)
+anterior à marca, só é vista porque cada execução reexporta o que foi gravado nos
+`sobreposicao` segundos antes do corte anterior (upserts e exclusões são idempotentes).
+Transações que ficam abertas por mais que atraso_seguranca + sobreposicao são perdidas.
+
+Formato do arquivo (JSON Lines):
+    {"operacao": "upsert", "entidade": "clientes", "dados": {...}}
+    {"operacao": "excluir", "entidade": "clientes", "id": 42}
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import EXPORTACAO_CONFIG
+from functions.dao_mysql import TABELAS_VERSIONADAS, _decodificar_linha, get_connection
+
+# Marca inicial: nenhuma linha exportada ainda
+_MARCA_INICIAL = {
+    "ultimo_updated_at": datetime(1970, 1, 1),
+    "ultimo_id": 0,
+    "ultima_exclusao_id": 0,
+    "ultimo_corte": None,
+}
+
+
+def _validar_entidade(entidade: str):
+    if entidade not in TABELAS_VERSIONADAS:
+        raise ValueError(f"Entidade sem exportação incremental: {entidade}")
+
+
+class ExportacaoIncrementalDAO:
+    """DAO das marcas d'água, alterações e exclusões - Suporta injeção de dependência"""
+
+    def __init__(self, connection=None):
+        """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
+        self._external_conn = connection
+
+    def _get_conn(self):
+        return self._external_conn if self._external_conn else get_connection()
+
+    def _should_close(self):
+        return self._external_conn is None
+
+    def _consultar(self, sql: str, parametros: tuple = ()) -> tuple[list, tuple]:
+        conn = self._get_conn()
+        if not conn:
+            raise Exception("Erro: Conexão com banco de dados não disponível")
+        cursor = conn.cursor()
+        cursor.execute(sql, parametros)
+        linhas = cursor.fetchall()
+        colunas = cursor.column_names
+        cursor.close()
+        if self._should_close():
+            conn.close()
+        return linhas, colunas
+
+    def instante_corte(self, atraso_segundos: int) -> datetime:
+        """Horário do servidor menos o atraso de segurança (limite superior da varredura)"""
+        linhas, _ = self._consultar("SELECT NOW() - INTERVAL %s SECOND", (atraso_segundos,))
+        return linhas[0][0]
+
+    def obter_marca(self, entidade: str) -> dict[str, Any]:
+        _validar_entidade(entidade)
+        linhas, _ = self._consultar(
+            "SELECT ultimo_updated_at, ultimo_id, ultima_exclusao_id, ultimo_corte "
+            "FROM marcas_exportacao WHERE entidade = %s",
+            (entidade,),
+        )
+        if not linhas or linhas[0][0] is None:
+            marca = dict(_MARCA_INICIAL)
+            if linhas:
+                marca["ultima_exclusao_id"] = linhas[0][2]
+                marca["ultimo_corte"] = linhas[0][3]
+            return marca
+        ultimo_updated_at, ultimo_id, ultima_exclusao_id, ultimo_corte = linhas[0]
+        return {
+            "ultimo_updated_at": ultimo_updated_at,
+            "ultimo_id": ultimo_id,
+            "ultima_exclusao_id": ultima_exclusao_id,
+            "ultimo_corte": ultimo_corte,
+        }
+
+    def salvar_marca(self, entidade: str, marca: dict[str, Any]) -> bool:
+        _validar_entidade(entidade)
+        conn = self._get_conn()
+        if not conn:
+            return False
+        try:
+            cursor = conn.cursor()
+            ultimo_updated_at = marca["ultimo_updated_at"]
+            if ultimo_updated_at == _MARCA_INICIAL["ultimo_updated_at"]:
+                ultimo_updated_at = None
+            cursor.execute(
+                """
+                INSERT INTO marcas_exportacao
+                    (entidade, ultimo_updated_at, ultimo_id, ultima_exclusao_id, ultimo_corte)
+                VALUES (%s, %s, %s, %s, %s)
+                ON DUPLICATE KEY UPDATE
+                    ultimo_updated_at = VALUES(ultimo_updated_at),
+                    ultimo_id = VALUES(ultimo_id),
+                    ultima_exclusao_id = VALUES(ultima_exclusao_id),
+                    ultimo_corte = VALUES(ultimo_corte)
+                """,
+                (
+                    entidade,
+                    ultimo_updated_at,
+                    marca["ultimo_id"],
+                    marca["ultima_exclusao_id"],
+                    marca["ultimo_corte"],
+                ),
+            )
+            conn.commit()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return True
+        except Error as e:
+            print(f"Erro ao salvar marca de exportação: {e}")
+            return False
+
+    def buscar_alteracoes(
+        self,
+        entidade: str,
+        apos_updated_at: datetime,
+        apos_id: int,
+        ate: datetime,
+        limite: int,
+    ) -> list[dict[str, Any]]:
+        """
+        Próxima página (keyset) de linhas com (updated_at, id) após a posição e antes do corte
+
+        A posição é a marca d'água ou, para reexportar a janela de sobreposição, o início
+        dela com id 0.
+        """
+        _validar_entidade(entidade)
+        linhas, colunas = self._consultar(
+            f"""
+            SELECT * FROM {entidade}
+            WHERE updated_at < %s
+              AND (updated_at > %s OR (updated_at = %s AND id > %s))
+            ORDER BY updated_at, id
+            LIMIT %s
+            """,
+            (ate, apos_updated_at, apos_updated_at, apos_id, limite),
+        )
+        return [_decodificar_linha(colunas, linha) for linha in linhas]
+
+    def buscar_exclusoes(
+        self,
+        entidade: str,
+        apos_id: int,
+        ate: datetime,
+        limite: int,
+        marca_id: Optional[int] = None,
+        desde: Optional[datetime] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Próxima página de tombstones da entidade com id após apos_id e antes do corte
+
+        Com `desde`, além dos posteriores a marca_id, traz os de id menor registrados a partir
+        de `desde` (janela de sobreposição); apos_id é então só a posição da página.
+        """
+        _validar_entidade(entidade)
+        condicao, parametros = "", ()
+        if desde is not None:
+            condicao, parametros = " AND (id > %s OR excluido_em >= %s)", (marca_id, desde)
+        linhas, _ = self._consultar(
+            f"""
+            SELECT id, entidade_id, excluido_em FROM exclusoes
+            WHERE entidade = %s AND id > %s AND excluido_em < %s{condicao}
+            ORDER BY id
+            LIMIT %s
+            """,
+            (entidade, apos_id, ate, *parametros, limite),
+        )
+        return [
+            {"id": id_, "entidade_id": entidade_id, "excluido_em": excluido_em}
+            for id_, entidade_id, excluido_em in linhas
+        ]
+
+    def limpar_exclusoes_exportadas(self, sobreposicao: Optional[int] = None) -> int:
+        """
+        Remove tombstones já exportados para as suas entidades
+
+        Mantém os da janela de sobreposição do último corte: a próxima execução os relê para
+        achar tombstones de id menor confirmados depois dela.
+        """
+        if sobreposicao is None:
+            sobreposicao = EXPORTACAO_CONFIG["sobreposicao"]
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                DELETE e FROM exclusoes e
+                JOIN marcas_exportacao m ON m.entidade = e.entidade
+                WHERE e.id <= m.ultima_exclusao_id
+                  AND (m.ultimo_corte IS NULL
+                       OR e.excluido_em < m.ultimo_corte - INTERVAL %s SECOND)
+                """,
+                (sobreposicao,),
+            )
+            conn.commit()
+            removidos = cursor.rowcount
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return removidos
+        except Error as e:
+            print(f"Erro ao limpar exclusões exportadas: {e}")
+            return 0
+
+
+def exportar_incremental(
+    entidade: str,
+    diretorio: Optional[str] = None,
+    tamanho_lote: Optional[int] = None,
+    connection=None,
+    atraso_seguranca: Optional[int] = None,
+    sobreposicao: Optional[int] = None,
+) -> dict[str, Any]:
+    """
+    Exporta as alterações e exclusões da entidade desde a última execução
+
+    A marca d'água só avança depois que o arquivo foi gravado por completo; se a exportação
+    falhar no meio, a próxima execução recomeça da marca anterior. Linhas e tombstones
+    gravados nos `sobreposicao` segundos antes do corte anterior são exportados de novo
+    (ver o limite no docstring do módulo); eles entram nas contagens.
+
+    Returns:
+        dict: {"entidade", "arquivo", "alterados", "excluidos", "marca"}
+              ("arquivo" é None quando não havia nada a exportar)
+    """
+    _validar_entidade(entidade)
+    diretorio = diretorio or EXPORTACAO_CONFIG["diretorio"]
+    tamanho_lote = tamanho_lote or EXPORTACAO_CONFIG["tamanho_lote"]
+
+    conn = connection if connection else get_connection()
+    if not conn:
+        raise Exception("Erro: Conexão com banco de dados não disponível")
+    dao = ExportacaoIncrementalDAO(conn)
+    try:
+        marca = dao.obter_marca(entidade)
+        if atraso_seguranca is None:
+            atraso_seguranca = EXPORTACAO_CONFIG["atraso_seguranca"]
+        if sobreposicao is None:
+            sobreposicao = EXPORTACAO_CONFIG["sobreposicao"]
+        ate = dao.instante_corte(atraso_seguranca)
+        desde = None
+        if marca["ultimo_corte"] is not None and sobreposicao > 0:
+            desde = marca["ultimo_corte"] - timedelta(seconds=sobreposicao)
+        # Janela anterior à marca: recomeça do início dela; senão, da própria marca
+        if desde is not None and desde < marca["ultimo_updated_at"]:
+            posicao = (desde, 0)
+        else:
+            posicao = (marca["ultimo_updated_at"], marca["ultimo_id"])
+        posicao_exclusao = 0 if desde is not None else marca["ultima_exclusao_id"]
+
+        os.makedirs(diretorio, exist_ok=True)
+        caminho = os.path.join(diretorio, f"{entidade}_{datetime.now():%Y%m%d_%H%M%S_%f}.jsonl")
+        alterados = excluidos = 0
+        with open(caminho, "w", encoding="utf-8") as f:
+            while True:
+                linhas = dao.buscar_alteracoes(entidade, *posicao, ate, tamanho_lote)
+                for linha in linhas:
+                    registro = {"operacao": "upsert", "entidade": entidade, "dados": linha}
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                alterados += len(linhas)
+                if linhas:
+                    posicao = (linhas[-1]["updated_at"], linhas[-1]["id"])
+                    if posicao > (marca["ultimo_updated_at"], marca["ultimo_id"]):
+                        marca["ultimo_updated_at"], marca["ultimo_id"] = posicao
+                if len(linhas) < tamanho_lote:
+                    break
+
+            while True:
+                exclusoes = dao.buscar_exclusoes(
+                    entidade,
+                    posicao_exclusao,
+                    ate,
+                    tamanho_lote,
+                    marca_id=marca["ultima_exclusao_id"],
+                    desde=desde,
+                )
+                for exclusao in exclusoes:
+                    registro = {
+                        "operacao": "excluir",
+                        "entidade": entidade,
+                        "id": exclusao["entidade_id"],
+                        "excluido_em": exclusao["excluido_em"],
+                    }
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+                excluidos += len(exclusoes)
+                if exclusoes:
+                    posicao_exclusao = exclusoes[-1]["id"]
+                    marca["ultima_exclusao_id"] = max(marca["ultima_exclusao_id"], posicao_exclusao)
+                if len(exclusoes) < tamanho_lote:
+                    break
+
+        if not alterados and not excluidos:
+            os.remove(caminho)
+            caminho = None
+        marca["ultimo_corte"] = ate
+        dao.salvar_marca(entidade, marca)
+
+        return {
+            "entidade": entidade,
+            "arquivo": caminho,
+            "alterados": alterados,
+            "excluidos": excluidos,
+            "marca": marca,
+        }
+    finally:
+        if connection is None:
+            conn.close()
+
+
+def exportar_incremental_todos(diretorio: Optional[str] = None, connection=None):
+    """Executa a exportação incremental de todas as entidades"""
+    resultados = []
+    for entidade in TABELAS_VERSIONADAS:
+        resultado = exportar_incremental(entidade, diretorio, connection=connection)
+        print(
+            f"{entidade}: {resultado['alterados']} alterados, {resultado['excluidos']} excluídos"
+            + (f" -> {resultado['arquivo']}" if resultado["arquivo"] else "")
+        )
+        resultados.append(resultado)
+    return resultados
+
+
+if __name__ == "__main__":
+    print("=== Exportação incremental (delta) ===")
+    exportar_incremental_todos()
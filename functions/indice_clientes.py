@@ -0,0 +1,327 @@
+"""
+Índice de prefixos de clientes em memória (busca por nome ou CPF enquanto se digita)
+Em vez de uma árvore de objetos, as chaves ficam num único buffer de bytes e o índice é um
+array de posições nesse buffer, ordenado pela chave: a busca de um prefixo é uma busca
+binária (O(log n)) e cada cliente custa poucas dezenas de bytes, o que cabe em memória com
+milhões de clientes. Chaves normalizadas (sem caixa e sem acento, como a collation do MySQL):
+
+    nome: o nome a partir de cada palavra ("maria da silva", "silva"), exceto preposições
+    CPF:  só os dígitos ("12345678901"), com prefixo próprio para não casar com nomes
+
+Construído em páginas (keyset por id) a partir do ClienteDAO, lendo do primário; gravações do
+próprio processo entram com registrar()/remover() e as de outros processos com sincronizar()
+(updated_at), chamado sob demanda ou a cada intervalo por sincronizar_se_vencido().
+"""
+import os
+import re
+import sys
+import time
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections.abc import Iterable
+from datetime import timedelta
+from typing import Any, Optional
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import INDICE_CLIENTES_CONFIG
+from functions.dao_mysql import ClienteDAO, leitura_no_primario
+
+# Palavras que não iniciam chave ("da" sozinho acharia metade dos clientes)
+_PREPOSICOES = frozenset({"d", "da", "das", "de", "do", "dos", "e"})
+# Separa chave e id no registro; fim de registro. Nenhum dos dois sobra após normalizar.
+_SEPARADOR, _FIM = b"\x00", b"\n"
+_PREFIXO_CPF = b"\x01"
+_COLUNAS = ["id", "nome", "cpf", "updated_at"]
+
+
+def normalizar_nome(texto: str) -> str:
+    """'  MARIA  da Conceição-Silva ' -> 'maria da conceicao silva'"""
+    decomposto = unicodedata.normalize("NFD", texto or "")
+    sem_acento = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(re.findall(r"[^\W_]+", sem_acento.lower()))
+
+
+def digitos_cpf(texto: str) -> str:
+    """'123.456.789-01' -> '12345678901'"""
+    return re.sub(r"\D", "", texto or "")
+
+
+def _chaves(nome: str, cpf: str) -> list[bytes]:
+    palavras = normalizar_nome(nome).split()
+    chaves = {
+        " ".join(palavras[i:]).encode()
+        for i, palavra in enumerate(palavras)
+        if palavra not in _PREPOSICOES
+    }
+    if digitos_cpf(cpf):
+        chaves.add(_PREFIXO_CPF + digitos_cpf(cpf).encode())
+    return sorted(chaves)
+
+
+class IndiceClientes:
+    """
+    Índice de prefixos de nome e CPF dos clientes
+
+    Registros removidos ou alterados ficam no buffer até a próxima compactação, feita
+    automaticamente quando passam de metade dele. Não é thread-safe: uma instância por sessão.
+    """
+
+    def __init__(
+        self,
+        cliente_dao: Optional[ClienteDAO] = None,
+        tamanho_lote: Optional[int] = None,
+        intervalo_sincronizacao: Optional[float] = None,
+        margem_sincronizacao: Optional[float] = None,
+    ):
+        """
+        Args:
+            cliente_dao: origem dos clientes em carregar()/sincronizar() (padrão: ClienteDAO())
+            tamanho_lote: clientes por página na carga (padrão: INDICE_CLIENTES_CONFIG)
+            intervalo_sincronizacao: segundos entre sincronizações em sincronizar_se_vencido()
+            margem_sincronizacao: segundos relidos antes da marca em cada sincronização
+        """
+        cfg = INDICE_CLIENTES_CONFIG
+        self.cliente_dao = cliente_dao or ClienteDAO()
+        self.tamanho_lote = tamanho_lote or cfg["tamanho_lote"]
+        self.intervalo_sincronizacao = (
+            cfg["intervalo_sincronizacao"]
+            if intervalo_sincronizacao is None
+            else intervalo_sincronizacao
+        )
+        self.margem_sincronizacao = (
+            cfg["margem_sincronizacao"] if margem_sincronizacao is None else margem_sincronizacao
+        )
+        self.marca = None  # maior updated_at já visto (ponto de partida de sincronizar)
+        self.sincronizado_em = None  # time.monotonic() da última carga/sincronização
+        self._limpar()
+
+    def _limpar(self):
+        self._buffer = bytearray()
+        self._posicoes = array("q")  # registros "chave\0id\n", na ordem da chave
+        self._ids = array("q")  # ids em ordem crescente...
+        self._fichas = array("q")  # ... e a posição do registro "nome\0cpf\n" de cada um
+        self._descartados = 0  # bytes de registros que não estão mais no índice
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, cliente_id: int) -> bool:
+        return self._indice_id(cliente_id) is not None
+
+    # ---- Buffer ----
+
+    def _gravar(self, dados: bytes) -> int:
+        posicao = len(self._buffer)
+        self._buffer += dados + _FIM
+        return posicao
+
+    def _registro(self, posicao: int) -> bytes:
+        return bytes(self._buffer[posicao : self._buffer.index(_FIM, posicao)])
+
+    def _bisect(self, alvo: bytes) -> int:
+        """
+        Primeira posição cuja chave, truncada no tamanho do alvo, não é menor que ele
+
+        Truncar preserva a ordem (se a < b, a[:n] <= b[:n]), então os registros com o prefixo
+        procurado formam um trecho contíguo a partir daqui. Equivale a bisect_left(key=...),
+        que só existe a partir do Python 3.10.
+        """
+        buffer, posicoes, tamanho = self._buffer, self._posicoes, len(alvo)
+        inicio, fim = 0, len(posicoes)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            posicao = posicoes[meio]
+            if buffer[posicao : posicao + tamanho] < alvo:
+                inicio = meio + 1
+            else:
+                fim = meio
+        return inicio
+
+    def _indice_id(self, cliente_id: int) -> Optional[int]:
+        i = bisect_left(self._ids, cliente_id)
+        if i < len(self._ids) and self._ids[i] == cliente_id:
+            return i
+        return None
+
+    def _ficha(self, i: int) -> tuple[str, str]:
+        nome, _, cpf = self._registro(self._fichas[i]).partition(_SEPARADOR)
+        return nome.decode(), cpf.decode()
+
+    # ---- Construção ----
+
+    def construir(self, clientes: Iterable[dict[str, Any]]) -> int:
+        """
+        Reconstrói o índice a partir de clientes ({"id", "nome", "cpf"}), ordenando uma vez
+
+        Returns:
+            int: quantidade de clientes indexados
+        """
+        self._limpar()
+        fichas = {}
+        for cliente in clientes:
+            fichas[int(cliente["id"])] = (cliente["nome"] or "", cliente["cpf"] or "")
+            if cliente.get("updated_at") and (
+                self.marca is None or cliente["updated_at"] > self.marca
+            ):
+                self.marca = cliente["updated_at"]
+        registros = []
+        for cliente_id in sorted(fichas):
+            nome, cpf = fichas.pop(cliente_id)
+            self._ids.append(cliente_id)
+            self._fichas.append(self._gravar(nome.encode() + _SEPARADOR + cpf.encode()))
+            sufixo = _SEPARADOR + str(cliente_id).encode()
+            registros.extend(chave + sufixo for chave in _chaves(nome, cpf))
+        # Ordena os bytes (comparação nativa) e grava já em ordem
+        registros.sort()
+        for registro in registros:
+            self._posicoes.append(self._gravar(registro))
+        return len(self)
+
+    def _paginas(self):
+        ultimo_id = 0
+        while True:
+            pagina = self.cliente_dao.filtrar(
+                order_by="id", limit=self.tamanho_lote, colunas=_COLUNAS, id__gt=ultimo_id
+            )
+            yield from pagina
+            if len(pagina) < self.tamanho_lote:
+                return
+            ultimo_id = pagina[-1]["id"]
+
+    def carregar(self) -> int:
+        """Carrega todos os clientes do primário, em páginas de tamanho_lote (keyset por id)"""
+        self.marca = None
+        with leitura_no_primario():
+            total = self.construir(self._paginas())
+        self.sincronizado_em = time.monotonic()
+        return total
+
+    def sincronizar(self) -> int:
+        """
+        Aplica as gravações feitas desde a última carga (inclusive por outros processos)
+
+        Lê do primário, pelo índice idx_updated (updated_at, id), a partir de
+        margem_sincronizacao segundos antes da marca: uma linha com updated_at anterior à
+        marca pode ter sido confirmada depois da última leitura. Exclusões de outros processos
+        não aparecem aqui: o cliente some do índice quando ler_por_id() não o encontra mais
+        (ver remover). Sem carga anterior, faz a carga completa.
+
+        Returns:
+            int: quantidade de clientes lidos
+        """
+        if self.marca is None:
+            return self.carregar()
+        desde = self.marca - timedelta(seconds=self.margem_sincronizacao)
+        with leitura_no_primario():
+            linhas = self.cliente_dao.filtrar(
+                order_by=["updated_at", "id"], colunas=_COLUNAS, updated_at__gte=desde
+            )
+        for linha in linhas:
+            # Linhas relidas na margem e sem alteração não mexem no buffer (ver registrar)
+            self.registrar(linha["id"], linha["nome"], linha["cpf"])
+            self.marca = max(self.marca, linha["updated_at"])
+        self.sincronizado_em = time.monotonic()
+        return len(linhas)
+
+    def sincronizar_se_vencido(self) -> int:
+        """
+        sincronizar() se a última passou de intervalo_sincronizacao segundos
+
+        Returns:
+            int: quantidade de clientes lidos (0 se não sincronizou)
+        """
+        if (
+            self.sincronizado_em is not None
+            and time.monotonic() - self.sincronizado_em < self.intervalo_sincronizacao
+        ):
+            return 0
+        return self.sincronizar()
+
+    # ---- Gravações ----
+
+    def registrar(self, cliente_id: int, nome: str, cpf: str):
+        """Inclui o cliente ou atualiza nome/CPF de um já indexado"""
+        cliente_id, nome, cpf = int(cliente_id), nome or "", cpf or ""
+        i = self._indice_id(cliente_id)
+        if i is not None:
+            if self._ficha(i) == (nome, cpf):
+                return
+            self.remover(cliente_id)
+        i = bisect_left(self._ids, cliente_id)
+        self._ids.insert(i, cliente_id)
+        self._fichas.insert(i, self._gravar(nome.encode() + _SEPARADOR + cpf.encode()))
+        sufixo = _SEPARADOR + str(cliente_id).encode()
+        for chave in _chaves(nome, cpf):
+            registro = chave + sufixo
+            self._posicoes.insert(self._bisect(registro), self._gravar(registro))
+
+    def remover(self, cliente_id: int) -> bool:
+        """Tira o cliente do índice. Returns: False se ele não estava indexado."""
+        i = self._indice_id(int(cliente_id))
+        if i is None:
+            return False
+        nome, cpf = self._ficha(i)
+        sufixo = _SEPARADOR + str(int(cliente_id)).encode()
+        for chave in _chaves(nome, cpf):
+            registro = chave + sufixo
+            j = self._bisect(registro)
+            posicao = self._posicoes[j] if j < len(self._posicoes) else None
+            if posicao is not None and self._registro(posicao) == registro:
+                self._descartados += len(registro) + 1
+                del self._posicoes[j]
+        self._descartados += len(nome.encode()) + len(cpf.encode()) + 2
+        del self._ids[i]
+        del self._fichas[i]
+        if self._descartados > len(self._buffer) // 2:
+            self._compactar()
+        return True
+
+    def _compactar(self):
+        """Regrava o buffer só com os registros vivos"""
+        fichas = []
+        for i, cliente_id in enumerate(self._ids):
+            nome, cpf = self._ficha(i)
+            fichas.append({"id": cliente_id, "nome": nome, "cpf": cpf})
+        self.construir(fichas)
+
+    # ---- Consulta ----
+
+    def buscar(self, termo: str, limite: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        Clientes cujo nome (a partir de qualquer palavra) ou CPF começa com o termo
+
+        Termo só com dígitos e pontuação de CPF procura no CPF; qualquer outro, no nome.
+        Resultados em ordem alfabética da chave que casou, sem repetir cliente.
+
+        Ex: indice.buscar("silva ma") -> [{"id": 7, "nome": "João Silva Martins", "cpf": ...}]
+            indice.buscar("123.456")  -> clientes com CPF começando por 123456
+        """
+        limite = limite or INDICE_CLIENTES_CONFIG["limite_sugestoes"]
+        termo = (termo or "").strip()
+        if termo and re.fullmatch(r"[\d.\-/\s]+", termo):
+            alvo = _PREFIXO_CPF + digitos_cpf(termo).encode()
+        else:
+            alvo = normalizar_nome(termo).encode()
+        if alvo in (b"", _PREFIXO_CPF):
+            return []
+
+        buffer, posicoes, tamanho = self._buffer, self._posicoes, len(alvo)
+        ids = []
+        j = self._bisect(alvo)
+        while j < len(posicoes) and len(ids) < limite:
+            posicao = posicoes[j]
+            if buffer[posicao : posicao + tamanho] != alvo:
+                break
+            fim = buffer.index(_FIM, posicao)
+            cliente_id = int(buffer[buffer.rindex(_SEPARADOR, posicao, fim) + 1 : fim])
+            if cliente_id not in ids:
+                ids.append(cliente_id)
+            j += 1
+
+        resultados = []
+        for cliente_id in ids:
+            nome, cpf = self._ficha(self._indice_id(cliente_id))
+            resultados.append({"id": cliente_id, "nome": nome, "cpf": cpf})
+        return resultados
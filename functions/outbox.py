@@ -0,0 +1,355 @@
+"""
+Outbox Transacional MySQL -> MongoDB
+Os efeitos colaterais no MongoDB (auditoria, perfil, documentos) são gravados na tabela
+'outbox' na mesma transação do registro de negócio. O RelayOutbox drena a tabela em lotes
+e aplica as operações no MongoDB com bulk writes idempotentes.
+"""
+import os
+import sys
+import threading
+import time
+from typing import Any, Optional
+
+import bson
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import OUTBOX_CONFIG
+from database.mongo_setup import CODEC_OPTIONS
+from functions.dao_mysql import conexao_vinculada, get_connection
+
+OPERACAO_INSERIR = "inserir"
+OPERACAO_ATUALIZAR = "atualizar"
+
+# Código de erro do MongoDB para chave duplicada
+_DUPLICATE_KEY = 11000
+
+
+def _payload(
+    operacao: str,
+    documento: Optional[dict[str, Any]] = None,
+    filtro: Optional[dict[str, Any]] = None,
+    atualizacao: Optional[dict[str, Any]] = None,
+    upsert: bool = False,
+) -> bytes:
+    """Payload da entrada em BSON, com o mesmo registro de tipos do MongoDB"""
+    if operacao == OPERACAO_INSERIR:
+        payload = {"documento": documento or {}}
+    elif operacao == OPERACAO_ATUALIZAR:
+        payload = {"filtro": filtro or {}, "atualizacao": atualizacao or {}, "upsert": upsert}
+    else:
+        raise ValueError(f"Operação de outbox inválida: {operacao}")
+    # date, Decimal e objetos de domínio são convertidos como no MongoDB
+    return bson.encode(payload, codec_options=CODEC_OPTIONS)
+
+
+class OutboxDAO:
+    """DAO da tabela outbox - Suporta injeção de dependência"""
+
+    def __init__(self, connection=None):
+        """Inicializa o DAO. Args: connection: Conexão MySQL opcional. Se None, cria uma nova."""
+        self._external_conn = connection
+
+    def _get_conn(self):
+        conn = conexao_vinculada(self)
+        return conn or (self._external_conn if self._external_conn else get_connection())
+
+    def _should_close(self):
+        return self._external_conn is None
+
+    def enfileirar(
+        self,
+        colecao: str,
+        operacao: str,
+        documento: Optional[dict[str, Any]] = None,
+        filtro: Optional[dict[str, Any]] = None,
+        atualizacao: Optional[dict[str, Any]] = None,
+        upsert: bool = False,
+    ) -> int:
+        """
+        Registra uma operação MongoDB pendente
+
+        Args:
+            colecao: Coleção de destino no MongoDB
+            operacao: 'inserir' (usa documento) ou 'atualizar' (usa filtro/atualizacao/upsert)
+        """
+        payload = _payload(operacao, documento, filtro, atualizacao, upsert)
+
+        conn = self._get_conn()
+        if not conn:
+            raise Exception("Erro: Conexão com banco de dados não disponível")
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "INSERT INTO outbox (colecao, operacao, payload) VALUES (%s, %s, %s)",
+                (colecao, operacao, payload),
+            )
+            conn.commit()
+            id_ = cursor.lastrowid
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return id_
+        except Error as e:
+            print(f"Erro ao enfileirar no outbox: {e}")
+            raise Exception(f"Erro ao enfileirar no outbox: {e}") from e
+
+    def enfileirar_lote(
+        self,
+        colecao: str,
+        operacao: str,
+        itens: list[dict[str, Any]],
+        tamanho_lote: Optional[int] = None,
+    ) -> int:
+        """
+        Registra várias operações da mesma coleção com um INSERT de várias linhas por lote
+
+        Ex: outbox.enfileirar_lote("auditoria", "inserir", [{"documento": d} for d in logs])
+
+        Args:
+            itens: argumentos de enfileirar() de cada operação (documento, ou filtro,
+                atualizacao e upsert)
+            tamanho_lote: linhas por INSERT (padrão: OUTBOX_CONFIG)
+
+        Returns:
+            int: quantidade de entradas gravadas
+        """
+        payloads = [_payload(operacao, **item) for item in itens]
+        if not payloads:
+            return 0
+        tamanho = int(tamanho_lote or OUTBOX_CONFIG["tamanho_lote"])
+
+        conn = self._get_conn()
+        if not conn:
+            raise Exception("Erro: Conexão com banco de dados não disponível")
+        try:
+            cursor = conn.cursor()
+            for inicio in range(0, len(payloads), tamanho):
+                lote = payloads[inicio : inicio + tamanho]
+                valores = []
+                for payload in lote:
+                    valores.extend((colecao, operacao, payload))
+                cursor.execute(
+                    "INSERT INTO outbox (colecao, operacao, payload) VALUES "
+                    + ", ".join(["(%s, %s, %s)"] * len(lote)),
+                    tuple(valores),
+                )
+            conn.commit()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return len(payloads)
+        except Error as e:
+            print(f"Erro ao enfileirar lote no outbox: {e}")
+            raise Exception(f"Erro ao enfileirar lote no outbox: {e}") from e
+
+    def contar_pendentes(self) -> int:
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM outbox WHERE processado_em IS NULL")
+            (total,) = cursor.fetchone()
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return total
+        except Error as e:
+            print(f"Erro ao contar pendências do outbox: {e}")
+            return 0
+
+    def limpar_processados(self, dias: int = 7) -> int:
+        """Remove entradas já aplicadas há mais de `dias` dias"""
+        conn = self._get_conn()
+        if not conn:
+            return 0
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                "DELETE FROM outbox WHERE processado_em < NOW(6) - INTERVAL %s DAY", (dias,)
+            )
+            conn.commit()
+            removidos = cursor.rowcount
+            cursor.close()
+            if self._should_close():
+                conn.close()
+            return removidos
+        except Error as e:
+            print(f"Erro ao limpar outbox: {e}")
+            return 0
+
+
+def _operacao_idempotente(outbox_id: int, operacao: str, payload: dict[str, Any]):
+    """Converte uma entrada do outbox numa operação MongoDB que pode ser reaplicada sem efeito"""
+    from pymongo import UpdateOne
+
+    if operacao == OPERACAO_INSERIR:
+        documento = {**payload["documento"], "_outbox_id": outbox_id}
+        return UpdateOne({"_outbox_id": outbox_id}, {"$setOnInsert": documento}, upsert=True)
+
+    # Atualizações registram o id aplicado no próprio documento para não repetir $push/$inc
+    filtro = {**payload["filtro"], "_outbox_ids": {"$ne": outbox_id}}
+    atualizacao = dict(payload["atualizacao"])
+    push = dict(atualizacao.get("$push", {}))
+    push["_outbox_ids"] = {"$each": [outbox_id], "$slice": -100}
+    atualizacao["$push"] = push
+    return UpdateOne(filtro, atualizacao, upsert=payload.get("upsert", False))
+
+
+class RelayOutbox:
+    """Drena o outbox em lotes e aplica as operações no MongoDB"""
+
+    def __init__(
+        self, mysql_connection=None, mongo_database=None, tamanho_lote: Optional[int] = None
+    ):
+        self._external_conn = mysql_connection
+        self._external_db = mongo_database
+        self.tamanho_lote = tamanho_lote or OUTBOX_CONFIG["tamanho_lote"]
+        self._metricas = {
+            "lotes": 0,
+            "processados": 0,
+            "falhas": 0,
+            "lag_segundos": 0.0,
+            "lag_maximo_segundos": 0.0,
+            "duracao_ultimo_lote_ms": 0.0,
+        }
+
+    def _get_conn(self):
+        return self._external_conn if self._external_conn else get_connection()
+
+    def _should_close(self):
+        return self._external_conn is None
+
+    def _get_db(self):
+        if self._external_db is not None:
+            return self._external_db
+        from database.mongo_setup import MongoDBConnection
+
+        return MongoDBConnection.get_database()
+
+    def processar_lote(self) -> int:
+        """
+        Aplica um lote de entradas pendentes no MongoDB
+
+        Returns:
+            int: quantidade de entradas aplicadas
+        """
+        from pymongo.errors import BulkWriteError
+
+        db = self._get_db()
+        conn = self._get_conn()
+        if db is None or not conn:
+            return 0
+
+        inicio = time.perf_counter()
+        cursor = conn.cursor()
+        try:
+            # SKIP LOCKED permite vários relays em paralelo sem processar a mesma entrada
+            cursor.execute(
+                """
+                SELECT id, colecao, operacao, payload,
+                       TIMESTAMPDIFF(MICROSECOND, created_at, NOW(6)) / 1000000
+                FROM outbox
+                WHERE processado_em IS NULL AND tentativas < %s
+                ORDER BY id
+                LIMIT %s
+                FOR UPDATE SKIP LOCKED
+                """,
+                (OUTBOX_CONFIG["max_tentativas"], self.tamanho_lote),
+            )
+            linhas = cursor.fetchall()
+            if not linhas:
+                conn.commit()
+                return 0
+
+            # Agrupa por coleção preservando a ordem de gravação
+            por_colecao: dict[str, list[tuple[int, Any]]] = {}
+            for outbox_id, colecao, operacao, payload, _lag in linhas:
+                por_colecao.setdefault(colecao, []).append(
+                    (
+                        outbox_id,
+                        _operacao_idempotente(outbox_id, operacao, bson.decode(bytes(payload))),
+                    )
+                )
+
+            aplicados, falhos = [], []
+            for colecao, itens in por_colecao.items():
+                ids = [outbox_id for outbox_id, _ in itens]
+                try:
+                    db[colecao].bulk_write([op for _, op in itens], ordered=True)
+                    aplicados.extend(ids)
+                except BulkWriteError as e:
+                    # Em modo ordenado, tudo antes do primeiro erro foi aplicado.
+                    # Chave duplicada num upsert significa que a operação já havia sido aplicada.
+                    # As entradas seguintes ficam pendentes para o próximo lote.
+                    erro = e.details["writeErrors"][0]
+                    indice = erro["index"]
+                    aplicados.extend(ids[:indice])
+                    if erro.get("code") == _DUPLICATE_KEY:
+                        aplicados.append(ids[indice])
+                    else:
+                        print(f"Erro ao aplicar outbox em '{colecao}': {erro.get('errmsg')}")
+                        falhos.append(ids[indice])
+
+            if aplicados:
+                marcadores = ", ".join(["%s"] * len(aplicados))
+                cursor.execute(
+                    f"UPDATE outbox SET processado_em = NOW(6) WHERE id IN ({marcadores})",
+                    tuple(aplicados),
+                )
+            if falhos:
+                marcadores = ", ".join(["%s"] * len(falhos))
+                cursor.execute(
+                    f"UPDATE outbox SET tentativas = tentativas + 1 WHERE id IN ({marcadores})",
+                    tuple(falhos),
+                )
+            conn.commit()
+
+            lag = float(max(linha[4] for linha in linhas))
+            self._metricas["lotes"] += 1
+            self._metricas["processados"] += len(aplicados)
+            self._metricas["falhas"] += len(falhos)
+            self._metricas["lag_segundos"] = lag
+            self._metricas["lag_maximo_segundos"] = max(self._metricas["lag_maximo_segundos"], lag)
+            self._metricas["duracao_ultimo_lote_ms"] = (time.perf_counter() - inicio) * 1000
+            return len(aplicados)
+        except Error as e:
+            print(f"Erro ao processar outbox: {e}")
+            conn.rollback()
+            return 0
+        finally:
+            cursor.close()
+            if self._should_close():
+                conn.close()
+
+    def drenar(self) -> int:
+        """Processa lotes até esvaziar o outbox. Retorna o total aplicado."""
+        total = 0
+        while True:
+            aplicados = self.processar_lote()
+            if not aplicados:
+                return total
+            total += aplicados
+
+    def executar(self, parar: Optional[threading.Event] = None, intervalo: Optional[float] = None):
+        """Loop do worker: drena continuamente e dorme quando não há pendências"""
+        parar = parar or threading.Event()
+        intervalo = intervalo if intervalo is not None else OUTBOX_CONFIG["intervalo_ociosidade"]
+        while not parar.is_set():
+            if not self.processar_lote():
+                parar.wait(intervalo)
+
+    def metricas(self) -> dict[str, Any]:
+        """Retorna métricas de vazão e atraso (lag) do relay"""
+        return {**self._metricas, "pendentes": OutboxDAO(self._external_conn).contar_pendentes()}
+
+
+if __name__ == "__main__":
+    print("=== Relay do Outbox (MySQL -> MongoDB) ===")
+    relay = RelayOutbox()
+    try:
+        relay.executar()
+    except KeyboardInterrupt:
+        print(f"\nRelay encerrado. Métricas: {relay.metricas()}")
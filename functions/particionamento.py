@@ -0,0 +1,180 @@
+"""
+Manutenção das partições de 'sinistros' (variante particionada por data_ocorrencia)
+Mantém PARTICIONAMENTO_CONFIG["particoes_futuras"] períodos criados à frente, dividindo a
+partição p_futuras (vazia, então o REORGANIZE não copia linhas), e remove as partições
+inteiramente anteriores ao período de retenção com DROP PARTITION, que descarta o período
+sem varrer as demais partições. Antes da remoção as linhas vão para 'sinistros_arquivo'
+(arquivar_ao_remover) ou ficam registradas em 'exclusoes' (tombstones); a cópia e a remoção
+rodam sob LOCK TABLES, então as escritas em 'sinistros' esperam por esse trecho.
+
+Deve rodar periodicamente (ex.: cron diário); é idempotente.
+"""
+import os
+import sys
+from datetime import date
+from typing import Any, Optional
+
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import PARTICIONAMENTO_CONFIG
+from database.db_setup import (
+    PARTICAO_FUTURAS,
+    definicao_particao,
+    deslocar_periodo,
+    inicio_periodo,
+    listar_particoes,
+    nome_particao,
+)
+from functions.dao_mysql import SinistroDAO, get_connection
+
+
+class ManutencaoParticoes:
+    """Cria partições futuras e remove antigas de 'sinistros' - Suporta injeção de dependência"""
+
+    def __init__(
+        self,
+        granularidade: Optional[str] = None,
+        particoes_futuras: Optional[int] = None,
+        particoes_retidas: Optional[int] = None,
+        arquivar_ao_remover: Optional[bool] = None,
+        connection=None,
+        hoje: Optional[date] = None,
+    ):
+        """
+        Args:
+            granularidade: "anual" ou "mensal" (padrão: PARTICIONAMENTO_CONFIG)
+            particoes_futuras: períodos à frente do atual que devem existir
+            particoes_retidas: períodos anteriores ao atual mantidos (0 = nunca remove)
+            arquivar_ao_remover: copia as linhas para sinistros_arquivo antes do DROP PARTITION
+            connection: Conexão MySQL opcional. Se None, abre uma por execução.
+            hoje: data de referência (injetável em testes)
+        """
+        cfg = PARTICIONAMENTO_CONFIG
+        self.granularidade = granularidade or cfg["granularidade"]
+        self.particoes_futuras = (
+            cfg["particoes_futuras"] if particoes_futuras is None else particoes_futuras
+        )
+        self.particoes_retidas = (
+            cfg["particoes_retidas"] if particoes_retidas is None else particoes_retidas
+        )
+        self.arquivar_ao_remover = (
+            cfg["arquivar_ao_remover"] if arquivar_ao_remover is None else arquivar_ao_remover
+        )
+        self.hoje = hoje
+        self._external_conn = connection
+
+    def _get_conn(self):
+        return self._external_conn if self._external_conn else get_connection()
+
+    def _should_close(self):
+        return self._external_conn is None
+
+    def _periodo_atual(self) -> date:
+        return inicio_periodo(self.hoje or date.today(), self.granularidade)
+
+    def particoes_a_criar(self, particoes: list[tuple[str, Optional[date]]]) -> list[date]:
+        """Inícios dos períodos que faltam até particoes_futuras à frente do atual"""
+        limites = [limite for _, limite in particoes if limite is not None]
+        proximo = max(limites) if limites else self._periodo_atual()
+        alvo = deslocar_periodo(self._periodo_atual(), self.granularidade, self.particoes_futuras)
+        faltantes = []
+        while proximo <= alvo:
+            faltantes.append(proximo)
+            proximo = deslocar_periodo(proximo, self.granularidade)
+        return faltantes
+
+    def particoes_a_remover(self, particoes: list[tuple[str, Optional[date]]]) -> list[str]:
+        """Partições cujo limite não passa do início do período de retenção"""
+        if self.particoes_retidas <= 0:
+            return []
+        corte = deslocar_periodo(self._periodo_atual(), self.granularidade, -self.particoes_retidas)
+        return [nome for nome, limite in particoes if limite is not None and limite <= corte]
+
+    def _criar(self, cursor, inicios: list[date]):
+        novas = [definicao_particao(inicio, self.granularidade) for inicio in inicios]
+        cursor.execute(
+            f"ALTER TABLE sinistros REORGANIZE PARTITION {PARTICAO_FUTURAS} INTO "
+            f"({', '.join(novas)}, PARTITION {PARTICAO_FUTURAS} VALUES LESS THAN (MAXVALUE))"
+        )
+
+    def _remover(self, conn, cursor, nome: str) -> int:
+        """
+        Arquiva (ou registra a exclusão de) as linhas da partição e a descarta
+
+        A cópia e o DROP PARTITION rodam com 'sinistros' travada para escrita: uma linha
+        gravada no período entre os dois seria descartada sem arquivo nem tombstone.
+        """
+        destino = "sinistros_arquivo" if self.arquivar_ao_remover else "exclusoes"
+        cursor.execute(f"LOCK TABLES sinistros WRITE, {destino} WRITE")
+        try:
+            if self.arquivar_ao_remover:
+                colunas = ", ".join(SinistroDAO._COLUNAS + SinistroDAO._COLUNAS_CONTROLE)
+                # IGNORE: uma execução interrompida entre a cópia e o DROP pode ser repetida
+                cursor.execute(
+                    f"INSERT IGNORE INTO sinistros_arquivo ({colunas}) "
+                    f"SELECT {colunas} FROM sinistros PARTITION ({nome})"
+                )
+            else:
+                cursor.execute(
+                    "INSERT INTO exclusoes (entidade, entidade_id) "
+                    f"SELECT 'sinistros', id FROM sinistros PARTITION ({nome})"
+                )
+            linhas = cursor.rowcount
+            conn.commit()
+            # DROP PARTITION não dispara os triggers de exclusão
+            cursor.execute(f"ALTER TABLE sinistros DROP PARTITION {nome}")
+        finally:
+            cursor.execute("UNLOCK TABLES")
+        return linhas
+
+    def executar(self) -> Optional[dict[str, Any]]:
+        """
+        Executa a manutenção completa
+
+        Returns:
+            dict: {"criadas": [nomes], "removidas": [nomes], "linhas_removidas": n}
+                  ou None se a tabela não é particionada ou houve erro
+        """
+        if not self.granularidade:
+            print("Particionamento de sinistros desabilitado (SINISTROS_PARTICIONAMENTO).")
+            return None
+        resultado = {"criadas": [], "removidas": [], "linhas_removidas": 0}
+        conn = self._get_conn()
+        if not conn:
+            return None
+        try:
+            cursor = conn.cursor()
+            particoes = listar_particoes(cursor)
+            if not particoes:
+                print("Tabela 'sinistros' não é particionada; nada a fazer.")
+                cursor.close()
+                return None
+            faltantes = self.particoes_a_criar(particoes)
+            if faltantes:
+                self._criar(cursor, faltantes)
+                resultado["criadas"] = [nome_particao(i, self.granularidade) for i in faltantes]
+            for nome in self.particoes_a_remover(particoes):
+                resultado["linhas_removidas"] += self._remover(conn, cursor, nome)
+                resultado["removidas"].append(nome)
+            cursor.close()
+            return resultado
+        except Error as e:
+            print(f"Erro na manutenção das partições de sinistros: {e}")
+            conn.rollback()
+            return None
+        finally:
+            if self._should_close():
+                conn.close()
+
+
+if __name__ == "__main__":
+    print("=== Manutenção das partições de sinistros ===")
+    resultado = ManutencaoParticoes().executar()
+    if resultado:
+        print(f"✓ Partições criadas: {', '.join(resultado['criadas']) or 'nenhuma'}")
+        print(
+            f"✓ Partições removidas: {', '.join(resultado['removidas']) or 'nenhuma'} "
+            f"({resultado['linhas_removidas']} sinistros)"
+        )
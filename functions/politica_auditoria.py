@@ -0,0 +1,219 @@
+"""
+Política de Auditoria - amostragem e agregação de eventos de leitura
+Define, por (entidade, operacao), se um evento é registrado integralmente,
+amostrado ou agregado em contadores por minuto e por usuário.
+A política pode ser recarregada a quente a partir de um arquivo JSON.
+"""
+import atexit
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Optional
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import AUDITORIA_CONFIG
+
+MODO_SEMPRE = "sempre"
+MODO_AMOSTRAR = "amostrar"
+MODO_AGREGAR = "agregar"
+MODOS_VALIDOS = (MODO_SEMPRE, MODO_AMOSTRAR, MODO_AGREGAR)
+
+# Apenas operações de leitura podem ser amostradas/agregadas; escritas são sempre registradas
+OPERACOES_LEITURA = {"consultar", "listar"}
+
+
+class PoliticaAuditoria:
+    """
+    Regras de auditoria por (entidade, operacao)
+
+    Formato do arquivo JSON:
+        {
+            "modo_leitura": "agregar",
+            "taxa_amostragem": 0.1,
+            "regras": [
+                {"entidade": "cliente", "operacao": "consultar", "modo": "amostrar", "taxa": 0.05},
+                {"entidade": "*", "operacao": "listar", "modo": "agregar"}
+            ]
+        }
+    """
+
+    def __init__(
+        self,
+        regras: Optional[list[dict[str, Any]]] = None,
+        modo_leitura: Optional[str] = None,
+        taxa_amostragem: Optional[float] = None,
+        arquivo: Optional[str] = None,
+        intervalo_recarga: Optional[float] = None,
+        aleatorio: Optional[Callable[[], float]] = None,
+    ):
+        self._lock = threading.Lock()
+        self._arquivo = arquivo
+        self._intervalo_recarga = (
+            intervalo_recarga
+            if intervalo_recarga is not None
+            else AUDITORIA_CONFIG["intervalo_recarga"]
+        )
+        self._aleatorio = aleatorio or random.random
+        self._mtime_arquivo = None
+        self._ultima_verificacao = 0.0
+        self._aplicar(
+            {
+                "regras": regras or [],
+                "modo_leitura": modo_leitura or AUDITORIA_CONFIG["modo_leitura"],
+                "taxa_amostragem": (
+                    taxa_amostragem
+                    if taxa_amostragem is not None
+                    else AUDITORIA_CONFIG["taxa_amostragem"]
+                ),
+            }
+        )
+        if self._arquivo:
+            self.recarregar()
+
+    def _aplicar(self, configuracao: dict[str, Any]):
+        """Valida e instala um novo conjunto de regras"""
+        modo_leitura = configuracao.get("modo_leitura", MODO_SEMPRE)
+        if modo_leitura not in MODOS_VALIDOS:
+            raise ValueError(f"Modo de auditoria inválido: {modo_leitura}")
+        taxa_padrao = float(configuracao.get("taxa_amostragem", 1.0))
+
+        regras = {}
+        for regra in configuracao.get("regras", []):
+            modo = regra.get("modo", MODO_SEMPRE)
+            if modo not in MODOS_VALIDOS:
+                raise ValueError(f"Modo de auditoria inválido: {modo}")
+            chave = (regra.get("entidade", "*"), regra.get("operacao", "*"))
+            regras[chave] = (modo, float(regra.get("taxa", taxa_padrao)))
+
+        with self._lock:
+            self._regras = regras
+            self._modo_leitura = (modo_leitura, taxa_padrao)
+
+    def recarregar(self) -> bool:
+        """Recarrega as regras do arquivo configurado. Retorna True se houve alteração."""
+        if not self._arquivo:
+            return False
+        try:
+            mtime = os.path.getmtime(self._arquivo)
+            if mtime == self._mtime_arquivo:
+                return False
+            with open(self._arquivo, encoding="utf-8") as f:
+                configuracao = json.load(f)
+            self._aplicar(configuracao)
+            self._mtime_arquivo = mtime
+            return True
+        except (OSError, ValueError) as e:
+            # Mantém as regras atuais se o arquivo estiver ausente ou inválido
+            print(f"Erro ao recarregar política de auditoria: {e}")
+            return False
+
+    def _recarregar_se_necessario(self):
+        agora = time.monotonic()
+        if self._arquivo and agora - self._ultima_verificacao >= self._intervalo_recarga:
+            self._ultima_verificacao = agora
+            self.recarregar()
+
+    def decidir(self, entidade: str, operacao: str, status: str = "sucesso") -> tuple[str, float]:
+        """Retorna (modo, taxa) aplicável ao evento"""
+        if operacao not in OPERACOES_LEITURA or status != "sucesso":
+            return MODO_SEMPRE, 1.0
+
+        self._recarregar_se_necessario()
+        with self._lock:
+            for chave in ((entidade, operacao), ("*", operacao), (entidade, "*"), ("*", "*")):
+                if chave in self._regras:
+                    return self._regras[chave]
+            return self._modo_leitura
+
+    def amostrar(self, taxa: float) -> bool:
+        """Sorteia se um evento amostrado deve ser registrado"""
+        return self._aleatorio() < taxa
+
+
+class AgregadorContadores:
+    """Acumula eventos de leitura em contadores por (minuto, usuario, entidade, operacao)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._contadores: dict[tuple, int] = {}
+        self._minuto_atual = None
+        self._destino: Optional[Callable[[list[dict[str, Any]]], Any]] = None
+
+    @staticmethod
+    def _minuto(timestamp: datetime) -> datetime:
+        return timestamp.replace(second=0, microsecond=0)
+
+    def registrar(
+        self,
+        usuario: str,
+        entidade: str,
+        operacao: str,
+        timestamp: datetime,
+        destino: Optional[Callable[[list[dict[str, Any]]], Any]] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Incrementa o contador do evento
+
+        Returns:
+            list: contadores de minutos já encerrados, prontos para serem gravados
+        """
+        minuto = self._minuto(timestamp)
+        with self._lock:
+            if destino is not None:
+                self._destino = destino
+            encerrados = []
+            if self._minuto_atual is not None and minuto > self._minuto_atual:
+                encerrados = self._extrair(lambda m: m < minuto)
+            self._minuto_atual = max(minuto, self._minuto_atual or minuto)
+            chave = (minuto, usuario, entidade, operacao)
+            self._contadores[chave] = self._contadores.get(chave, 0) + 1
+            return encerrados
+
+    def _extrair(self, criterio: Callable[[datetime], bool]) -> list[dict[str, Any]]:
+        encerrados = []
+        for chave in [c for c in self._contadores if criterio(c[0])]:
+            minuto, usuario, entidade, operacao = chave
+            encerrados.append(
+                {
+                    "minuto": minuto,
+                    "usuario": usuario,
+                    "entidade": entidade,
+                    "operacao": operacao,
+                    "total": self._contadores.pop(chave),
+                }
+            )
+        return encerrados
+
+    def extrair_todos(self) -> list[dict[str, Any]]:
+        """Remove e retorna todos os contadores pendentes (inclusive do minuto corrente)"""
+        with self._lock:
+            return self._extrair(lambda m: True)
+
+    def descarregar_pendentes(self):
+        """Grava os contadores pendentes no último destino conhecido (usado no encerramento)"""
+        pendentes = self.extrair_todos()
+        if pendentes and self._destino is not None:
+            self._destino(pendentes)
+
+
+_politica_padrao: Optional[PoliticaAuditoria] = None
+_agregador_padrao = AgregadorContadores()
+atexit.register(_agregador_padrao.descarregar_pendentes)
+
+
+def obter_politica_padrao() -> PoliticaAuditoria:
+    """Retorna a política compartilhada do processo (configurada via AUDITORIA_CONFIG)"""
+    global _politica_padrao
+    if _politica_padrao is None:
+        _politica_padrao = PoliticaAuditoria(arquivo=AUDITORIA_CONFIG["politica_arquivo"] or None)
+    return _politica_padrao
+
+
+def obter_agregador_padrao() -> AgregadorContadores:
+    """Retorna o agregador de contadores compartilhado do processo"""
+    return _agregador_padrao
@@ -0,0 +1,170 @@
+"""
+Roteamento de leituras para réplicas MySQL
+Escolhe uma réplica por round-robin ou menor número de conexões abertas, ignora réplicas
+atrasadas (Seconds_Behind_Source acima do limite), sem replicação ou fora do ar e, se
+nenhuma servir, devolve None para que a leitura vá ao primário.
+"""
+import itertools
+import os
+import sys
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import mysql.connector
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import MYSQL_CONFIG, MYSQL_REPLICAS_CONFIG
+
+BALANCEAMENTO_ROUND_ROBIN = "round_robin"
+BALANCEAMENTO_MENOS_CONEXOES = "menos_conexoes"
+
+
+class Replica:
+    """Estado de uma réplica: conexões abertas e último atraso medido"""
+
+    def __init__(self, host: str, port: int, replicacao: bool = True):
+        self.host = host
+        self.port = port
+        self.replicacao = replicacao  # False: servidor configurado como não-réplica
+        self.conexoes_abertas = 0
+        self.atraso: Optional[float] = None
+        self.saudavel = True
+        self.verificada_em = 0.0
+
+    def __repr__(self):
+        return f"Replica({self.host}:{self.port})"
+
+
+class _ConexaoReplica:
+    """Conexão de réplica: repassa tudo à conexão real e libera a contagem no close()"""
+
+    def __init__(self, conn, replica: Replica, liberar: Callable[[Replica], None]):
+        self._conn = conn
+        self.replica = replica
+        self._liberar = liberar
+        self._fechada = False
+
+    def close(self):
+        if not self._fechada:
+            self._fechada = True
+            self._liberar(self.replica)
+            self._conn.close()
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+def medir_atraso(conn) -> Optional[float]:
+    """
+    Atraso da réplica em segundos (None se a replicação parou ou o servidor não é réplica)
+    """
+    cursor = conn.cursor(dictionary=True)
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+        except Error:
+            cursor.execute("SHOW SLAVE STATUS")  # MySQL < 8.0.22
+        status = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not status:
+        return None
+    atraso = status.get("Seconds_Behind_Source", status.get("Seconds_Behind_Master"))
+    return None if atraso is None else float(atraso)
+
+
+class RoteadorLeitura:
+    """Balanceador de leituras entre réplicas, com fallback para o primário - thread-safe"""
+
+    def __init__(
+        self,
+        replicas: Optional[list[dict[str, Any]]] = None,
+        balanceamento: Optional[str] = None,
+        atraso_maximo: Optional[float] = None,
+        intervalo_verificacao: Optional[float] = None,
+        config_base: Optional[dict[str, Any]] = None,
+    ):
+        """
+        Args:
+            replicas: [{"host", "port", "replicacao"}] (padrão: MYSQL_REPLICAS_CONFIG);
+                "replicacao": False aceita o servidor sem medir atraso (não é réplica)
+            balanceamento: BALANCEAMENTO_ROUND_ROBIN ou BALANCEAMENTO_MENOS_CONEXOES
+            atraso_maximo: atraso de replicação tolerado, em segundos
+            intervalo_verificacao: validade da medição de atraso de cada réplica, em segundos
+            config_base: parâmetros de conexão (usuário, senha, banco...) comuns às réplicas
+        """
+        cfg = MYSQL_REPLICAS_CONFIG
+        lista = cfg["replicas"] if replicas is None else replicas
+        self.replicas = [
+            Replica(r["host"], int(r.get("port", 3306)), r.get("replicacao", True)) for r in lista
+        ]
+        self.balanceamento = balanceamento or cfg["balanceamento"]
+        if self.balanceamento not in (BALANCEAMENTO_ROUND_ROBIN, BALANCEAMENTO_MENOS_CONEXOES):
+            raise ValueError(f"Balanceamento inválido: {self.balanceamento}")
+        self.atraso_maximo = cfg["atraso_maximo"] if atraso_maximo is None else atraso_maximo
+        self.intervalo_verificacao = (
+            cfg["intervalo_verificacao"] if intervalo_verificacao is None else intervalo_verificacao
+        )
+        self._config_base = dict(config_base if config_base is not None else MYSQL_CONFIG)
+        self._lock = threading.Lock()
+        self._rodizio = itertools.count()
+
+    def _candidatas(self) -> list[Replica]:
+        """Réplicas na ordem de tentativa conforme o balanceamento"""
+        with self._lock:
+            if self.balanceamento == BALANCEAMENTO_MENOS_CONEXOES:
+                return sorted(self.replicas, key=lambda r: r.conexoes_abertas)
+            if not self.replicas:
+                return []
+            inicio = next(self._rodizio) % len(self.replicas)
+            return self.replicas[inicio:] + self.replicas[:inicio]
+
+    def _liberar(self, replica: Replica):
+        with self._lock:
+            replica.conexoes_abertas -= 1
+
+    def _verificacao_vencida(self, replica: Replica) -> bool:
+        return time.monotonic() - replica.verificada_em >= self.intervalo_verificacao
+
+    def _aceitar(self, replica: Replica, conn) -> bool:
+        """Mede o atraso se a última medição venceu; decide se a réplica pode servir"""
+        if not replica.replicacao:
+            return True
+        if self._verificacao_vencida(replica):
+            atraso = medir_atraso(conn)
+            replica.atraso = atraso
+            replica.saudavel = atraso is not None and atraso <= self.atraso_maximo
+            replica.verificada_em = time.monotonic()
+        return replica.saudavel
+
+    def obter_conexao(self):
+        """
+        Conexão com a réplica escolhida, ou None se nenhuma estiver utilizável
+
+        Réplicas marcadas como atrasadas/fora do ar são puladas até a medição vencer.
+        """
+        for replica in self._candidatas():
+            if not replica.saudavel and not self._verificacao_vencida(replica):
+                continue
+            conn = None
+            try:
+                conn = mysql.connector.connect(
+                    **{**self._config_base, "host": replica.host, "port": replica.port}
+                )
+                if not self._aceitar(replica, conn):
+                    conn.close()
+                    continue
+            except Error as e:
+                if conn is not None:
+                    conn.close()
+                print(f"Réplica {replica.host}:{replica.port} indisponível: {e}")
+                replica.saudavel = False
+                replica.verificada_em = time.monotonic()
+                continue
+            with self._lock:
+                replica.conexoes_abertas += 1
+            return _ConexaoReplica(conn, replica, self._liberar)
+        return None
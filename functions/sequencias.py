@@ -0,0 +1,99 @@
+"""
+Sequências com reserva de blocos (hi-lo) persistidas no MySQL
+Cada processo reserva um bloco de números com um único UPDATE atômico e os distribui em
+memória; só há nova ida ao banco quando o bloco acaba. Números de blocos abandonados (fim do
+processo, emissão que falhou) nunca são reutilizados: a sequência é única, mas tem lacunas.
+"""
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Optional
+
+from mysql.connector import Error
+
+# Adiciona o diretório pai ao path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import SEQUENCIA_CONFIG
+from functions.dao_mysql import get_connection
+
+SEQUENCIA_APOLICES = "apolices"
+
+
+class AlocadorSequencia:
+    """
+    Alocador hi-lo thread-safe de uma sequência nomeada
+
+    A reserva do bloco é confirmada (commit) imediatamente. Por isso a conexão informada
+    não deve ter uma transação de negócio em andamento: reserve o número antes de abri-la.
+    """
+
+    def __init__(self, nome: str, tamanho_bloco: Optional[int] = None, connection=None):
+        """
+        Args:
+            nome: nome da sequência (linha da tabela 'sequencias')
+            tamanho_bloco: números reservados por ida ao banco (padrão: SEQUENCIA_CONFIG)
+            connection: Conexão MySQL opcional. Se None, abre uma a cada reserva de bloco.
+        """
+        self.nome = nome
+        self.tamanho_bloco = tamanho_bloco or SEQUENCIA_CONFIG["tamanho_bloco"]
+        self._conexao = connection
+        self._lock = threading.Lock()
+        self._proximo = 0
+        self._limite = 0  # exclusivo
+        self.blocos_reservados = 0
+
+    def _reservar_bloco(self) -> int:
+        """Reserva [inicio, inicio + tamanho_bloco) e retorna o início"""
+        conn = self._conexao if self._conexao else get_connection()
+        if not conn:
+            raise Exception("Erro: Conexão com banco de dados não disponível")
+        try:
+            cursor = conn.cursor()
+            # LAST_INSERT_ID(expr) guarda o novo valor na sessão; o lock de linha do UPDATE
+            # serializa as reservas concorrentes de outros processos
+            cursor.execute(
+                "INSERT IGNORE INTO sequencias (nome, proximo) VALUES (%s, 1)", (self.nome,)
+            )
+            cursor.execute(
+                "UPDATE sequencias SET proximo = LAST_INSERT_ID(proximo + %s) WHERE nome = %s",
+                (self.tamanho_bloco, self.nome),
+            )
+            cursor.execute("SELECT LAST_INSERT_ID()")
+            fim = cursor.fetchone()[0]
+            conn.commit()
+            cursor.close()
+            return fim - self.tamanho_bloco
+        except Error as e:
+            print(f"Erro ao reservar bloco da sequência '{self.nome}': {e}")
+            raise Exception(f"Erro ao reservar bloco da sequência '{self.nome}': {e}") from e
+        finally:
+            if self._conexao is None:
+                conn.close()
+
+    def proximo(self) -> int:
+        with self._lock:
+            if self._proximo >= self._limite:
+                self._proximo = self._reservar_bloco()
+                self._limite = self._proximo + self.tamanho_bloco
+                self.blocos_reservados += 1
+            valor = self._proximo
+            self._proximo += 1
+            return valor
+
+
+def formatar_numero_apolice(sequencial: int, ano: Optional[int] = None) -> str:
+    """Ex.: 1234 -> 'AP2026-00001234' (o ano é informativo; a unicidade vem do sequencial)"""
+    return f"AP{ano or datetime.now().year}-{sequencial:08d}"
+
+
+_alocadores: dict[str, AlocadorSequencia] = {}
+_alocadores_lock = threading.Lock()
+
+
+def obter_alocador(nome: str) -> AlocadorSequencia:
+    """Alocador compartilhado do processo para a sequência (conexões próprias por reserva)"""
+    with _alocadores_lock:
+        if nome not in _alocadores:
+            _alocadores[nome] = AlocadorSequencia(nome)
+        return _alocadores[nome]
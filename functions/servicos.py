@@ -3,43 +3,136 @@ Camada de Serviço Híbrida - REFATORADA
 Sprint 4 - Orquestra operações entre MySQL (dados principais) e MongoDB (logs/documentos)
 Suporta injeção de dependência para testes isolados
 """
+import functools
 import os
 import sys
-from datetime import date, datetime
+from contextlib import contextmanager
+from datetime import datetime
 from typing import Any, Optional
 
 # Adiciona o diretório pai ao path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from config import CONCORRENCIA_CONFIG, OUTBOX_CONFIG, PAGINACAO_CONFIG
 from functions.auditoria_service import (
     AuditoriaService,
     ClientePerfilService,
     SinistroDocumentosService,
 )
-from functions.dao_mysql import ApoliceDAO, ClienteDAO, SeguroDAO, SinistroDAO
+from functions.concorrencia import GrupoEfeitos, Prazo, aguardar, submeter
+from functions.dao_mysql import (
+    ApoliceDAO,
+    ClienteDAO,
+    SeguroDAO,
+    SinistroDAO,
+    conexao_vinculada,
+    get_connection,
+    leitura_no_primario,
+    transacao,
+    vincular_conexao,
+)
+from functions.exceptions import FonteIndisponivelError, LoteInterrompidoError
+from functions.outbox import OutboxDAO
+from functions.sequencias import (
+    SEQUENCIA_APOLICES,
+    AlocadorSequencia,
+    formatar_numero_apolice,
+    obter_alocador,
+)
+
+
+def _criar_outbox(mysql_connection, usar_outbox: Optional[bool]):
+    """Retorna um OutboxDAO se o outbox estiver habilitado (parâmetro ou OUTBOX_CONFIG)"""
+    habilitado = OUTBOX_CONFIG["habilitado"] if usar_outbox is None else usar_outbox
+    return OutboxDAO(mysql_connection) if habilitado else None
+
+
+@contextmanager
+def _escopo_transacional(servico):
+    """
+    Com outbox habilitado, executa os DAOs e o outbox do serviço numa única transação MySQL,
+    de modo que o registro de negócio e seus efeitos no MongoDB sejam gravados atomicamente.
+    Sem outbox, mantém o comportamento original (commit por operação do DAO).
+
+    A conexão da transação é vinculada aos DAOs só no contexto desta chamada: o serviço pode
+    ser usado ao mesmo tempo por outras threads, que seguem com as próprias conexões.
+    """
+    if servico.outbox is None or conexao_vinculada(servico.outbox) is not None:
+        yield
+        return
+
+    daos = [v for v in vars(servico).values() if hasattr(v, "_external_conn")]
+    with transacao(servico.mysql_connection) as conn, vincular_conexao(daos, conn):
+        yield
+
+
+def _efeitos(servico, operacao: str) -> GrupoEfeitos:
+    """
+    Efeitos colaterais independentes da operação (auditoria, perfil, documentos) em paralelo.
+    Com outbox, rodam em sequência: são INSERTs na conexão MySQL da transação corrente.
+    """
+    return GrupoEfeitos(operacao, modo=servico.modo_efeitos, paralelo=servico.outbox is None)
+
 
+def _transacional(metodo):
+    """Decora operações de escrita dos serviços com _escopo_transacional"""
 
-def _serializar_para_mongo(obj):
-    """Converte objetos Python para formatos compatíveis com MongoDB"""
-    if isinstance(obj, dict):
-        return {k: _serializar_para_mongo(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_serializar_para_mongo(item) for item in obj]
-    elif isinstance(obj, (date, datetime)):
-        return obj.isoformat() if hasattr(obj, "isoformat") else str(obj)
-    else:
-        return obj
+    @functools.wraps(metodo)
+    def wrapper(self, *args, **kwargs):
+        with _escopo_transacional(self):
+            return metodo(self, *args, **kwargs)
+
+    return wrapper
+
+
+def _em_lotes(servico, transicionar, efeitos_do_lote):
+    """
+    Executa uma transição em lotes do DAO (transicionar(ao_alterar_lote=...)), que confirma
+    cada lote numa transação própria. Com outbox, os efeitos de cada lote são enfileirados na
+    transação do próprio lote; sem outbox, rodam ao final, só para os lotes confirmados.
+
+    Returns:
+        tuple: (ids alterados, LoteInterrompidoError do lote que falhou ou None)
+    """
+    daos = [v for v in vars(servico).values() if hasattr(v, "_external_conn")]
+
+    def ao_alterar_lote(lote, conn):
+        with vincular_conexao(daos, conn):
+            efeitos_do_lote(lote)
+
+    erro = None
+    try:
+        alterados = transicionar(ao_alterar_lote=ao_alterar_lote if servico.outbox else None)
+    except LoteInterrompidoError as e:
+        alterados, erro = e.confirmados, e
+    if servico.outbox is None and alterados:
+        efeitos_do_lote(alterados)
+    return alterados, erro
 
 
 class ClienteService:
     """Serviço para operações com clientes (MySQL + MongoDB) - Suporta injeção de dependência"""
 
-    def __init__(self, mysql_connection=None, mongo_database=None):
-        """Inicializa o serviço com DAOs e Services configurados"""
+    def __init__(
+        self, mysql_connection=None, mongo_database=None, usar_outbox=None, conectar_mysql=None
+    ):
+        """
+        Inicializa o serviço com DAOs e Services configurados
+
+        conectar_mysql: fábrica de conexões para as consultas MySQL que rodam no pool de
+        threads (visao_completa), que não podem usar a conexão injetada, de outra thread.
+        """
+        self.mysql_connection = mysql_connection
+        self.conectar_mysql = conectar_mysql
+        self.outbox = _criar_outbox(mysql_connection, usar_outbox)
         self.cliente_dao = ClienteDAO(mysql_connection)
-        self.auditoria = AuditoriaService(mongo_database)
-        self.perfil = ClientePerfilService(mongo_database)
+        self.seguro_dao = SeguroDAO(mysql_connection)
+        self.apolice_dao = ApoliceDAO(mysql_connection)
+        self.auditoria = AuditoriaService(mongo_database, outbox=self.outbox)
+        self.perfil = ClientePerfilService(mongo_database, outbox=self.outbox)
+        self.documentos = SinistroDocumentosService(mongo_database)
 
+    @_transacional
     def criar_cliente(self, dados: dict[str, Any], usuario: str) -> int:
         """Cria cliente no MySQL e registra log no MongoDB"""
         cliente_id = self.cliente_dao.criar(dados)
@@ -70,6 +163,30 @@ class ClienteService:
 
         return cliente_id
 
+    def sincronizar_clientes(
+        self, clientes: list[dict[str, Any]], usuario: str, origem: Optional[str] = None
+    ) -> dict[str, int]:
+        """
+        Aplica o snapshot de clientes de um parceiro (upsert idempotente pelo CPF)
+
+        Registra um único log de auditoria com as contagens do lote, em vez de um por cliente.
+        Perfis de clientes novos não são inicializados aqui: são criados no primeiro contato.
+
+        Returns:
+            dict: {"inseridos": n, "atualizados": n, "inalterados": n}
+        """
+        resultado = self.cliente_dao.upsert_em_lote(clientes)
+
+        self.auditoria.registrar_log(
+            usuario=usuario,
+            operacao="sincronizar",
+            entidade="cliente",
+            detalhes={**resultado, "recebidos": len(clientes), "origem": origem},
+            status="sucesso",
+        )
+
+        return resultado
+
     def criar(
         self, usuario: str, dados: Optional[dict[str, Any]] = None, dados_cliente: Optional[dict[str, Any]] = None
     ) -> int:
@@ -80,6 +197,7 @@ class ClienteService:
         dados_finais = dados_cliente if dados_cliente is not None else dados
         return self.criar_cliente(dados_finais, usuario)
 
+    @_transacional
     def atualizar_cliente(self, cliente_id: int, dados: dict[str, Any], usuario: str) -> bool:
         """Atualiza cliente no MySQL e registra log no MongoDB"""
         sucesso = self.cliente_dao.atualizar(cliente_id, dados)
@@ -103,21 +221,20 @@ class ClienteService:
         """Alias para atualizar_cliente - compatibilidade com testes"""
         return self.atualizar_cliente(cliente_id, dados_atualizacao, usuario)
 
+    @_transacional
     def deletar_cliente(self, cliente_id: int, usuario: str) -> bool:
         """Deleta cliente do MySQL e registra log no MongoDB"""
         # Busca dados antes de deletar para o log
         cliente = self.cliente_dao.ler_por_id(cliente_id)
         sucesso = self.cliente_dao.deletar(cliente_id)
 
-        # Serializa cliente para MongoDB (converte dates para strings)
-        cliente_serializado = _serializar_para_mongo(cliente) if cliente else {}
-
+        # Datas e Decimals são convertidos pelo registro de tipos BSON (database.mongo_setup)
         self.auditoria.registrar_log(
             usuario=usuario,
             operacao="deletar",
             entidade="cliente",
             entidade_id=cliente_id,
-            detalhes={"cliente_deletado": cliente_serializado},
+            detalhes={"cliente_deletado": cliente or {}},
             status="sucesso" if sucesso else "erro",
         )
 
@@ -143,34 +260,185 @@ class ClienteService:
 
         return cliente
 
-    def listar_clientes(self, usuario: str) -> list[dict[str, Any]]:
-        """Lista todos os clientes"""
-        clientes = self.cliente_dao.listar()
+    def listar_clientes(
+        self, usuario: str, limite: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Lista todos os clientes (ou uma página, com limite/offset)"""
+        if limite is None:
+            clientes = self.cliente_dao.listar()
+            total = len(clientes)
+        else:
+            clientes = self.cliente_dao.filtrar(order_by="id", limit=limite, offset=offset)
+            total = self.cliente_dao.contar()
 
         self.auditoria.registrar_log(
             usuario=usuario,
             operacao="listar",
             entidade="cliente",
-            detalhes={"total": len(clientes)},
+            detalhes={"total": total},
             status="sucesso",
         )
 
         return clientes
 
+    def _visao_mysql(self, cliente_id: int, dedicada: bool = False) -> Optional[dict[str, Any]]:
+        """
+        Lado MySQL da visão completa: 3 consultas em sequência na mesma conexão
+
+        Os seguros vêm em páginas de listar_por_cliente(); cada página cheia custa mais uma
+        consulta, pela seguinte (apos_id = último id lido).
+
+        dedicada=True (tarefa do pool): abre uma conexão só desta tarefa e a fecha ao final,
+        para uma tarefa que estourou o prazo não disputar a conexão com quem a chamou.
+        """
+        conn = None
+        if dedicada:
+            conn = self.conectar_mysql() if self.conectar_mysql else get_connection(leitura=True)
+            if not conn:
+                raise Exception("Erro: Conexão com banco de dados não disponível")
+        try:
+            if conn is None:
+                daos = (self.cliente_dao, self.seguro_dao, self.apolice_dao)
+            else:
+                daos = (ClienteDAO(conn), SeguroDAO(conn), ApoliceDAO(conn))
+            cliente_dao, seguro_dao, apolice_dao = daos
+            cliente = cliente_dao.ler_por_id(cliente_id)
+            if not cliente:
+                return None
+            seguros = pagina = seguro_dao.listar_por_cliente(cliente_id)
+            while len(pagina) == PAGINACAO_CONFIG["tamanho_pagina"]:
+                pagina = seguro_dao.listar_por_cliente(cliente_id, apos_id=pagina[-1]["id"])
+                seguros = seguros + pagina
+            return {
+                "cliente": cliente,
+                "seguros": seguros,
+                "apolices": apolice_dao.listar_com_sinistros_por_cliente(cliente_id),
+            }
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def visao_completa(
+        self, cliente_id: int, usuario: str, orcamento: Optional[float] = None
+    ) -> Optional[dict[str, Any]]:
+        """
+        Visão 360 do cliente: cadastro, seguros, apólices, sinistros, documentos e perfil
+
+        O MySQL e o perfil no MongoDB são consultados em paralelo; os documentos dos
+        sinistros (uma consulta $in) partem assim que os ids dos sinistros chegam.
+        Cada fonte tem o seu timeout (CONCORRENCIA_CONFIG) dentro do orçamento total;
+        fontes que não respondem a tempo ficam em "indisponiveis" e o resultado é parcial.
+
+        A consulta MySQL roda no pool com uma conexão própria (conectar_mysql ou uma nova
+        conexão de leitura). Com uma conexão injetada e sem conectar_mysql, ela roda na thread
+        de quem chamou, sem timeout: a conexão injetada não pode ser usada por duas threads.
+
+        Returns:
+            dict: {"cliente", "seguros", "apolices" (com "sinistros" e seus "documentos"),
+                   "perfil", "parcial", "indisponiveis"}, ou None se o cliente não existir
+
+        Raises:
+            FonteIndisponivelError: o MySQL não respondeu a tempo ou falhou (sem o cadastro
+                não há visão; não se confunde com cliente inexistente)
+        """
+        prazo = Prazo(orcamento)
+        indisponiveis: dict[str, str] = {}
+
+        no_pool = self.mysql_connection is None or self.conectar_mysql is not None
+        if no_pool:
+            futuro_mysql = submeter(self._visao_mysql, cliente_id, dedicada=True)
+        futuro_perfil = submeter(self.perfil.obter_perfil, cliente_id)
+        limite_perfil = prazo.ate(CONCORRENCIA_CONFIG["timeout_mongo"])
+
+        if no_pool:
+            visao, erro = aguardar(futuro_mysql, prazo.ate(CONCORRENCIA_CONFIG["timeout_mysql"]))
+        else:
+            try:
+                visao, erro = self._visao_mysql(cliente_id), None
+            except Exception as e:
+                visao, erro = None, str(e) or type(e).__name__
+        erro_mysql = erro
+        if erro:
+            indisponiveis["mysql"] = erro
+
+        documentos: Optional[dict[int, list]] = {}
+        if visao is not None:
+            sinistro_ids = [s["id"] for a in visao["apolices"] for s in a["sinistros"]]
+            if sinistro_ids:
+                futuro_documentos = submeter(
+                    self.documentos.listar_documentos_por_sinistros, sinistro_ids
+                )
+                documentos, erro = aguardar(
+                    futuro_documentos, prazo.ate(CONCORRENCIA_CONFIG["timeout_mongo"])
+                )
+                if erro or documentos is None:
+                    indisponiveis["documentos"] = erro or "MongoDB não disponível"
+
+        perfil, erro = aguardar(futuro_perfil, limite_perfil)
+        if erro:
+            indisponiveis["perfil"] = erro
+
+        self.auditoria.registrar_log(
+            usuario=usuario,
+            operacao="consultar",
+            entidade="cliente",
+            entidade_id=cliente_id,
+            detalhes={
+                "visao": "completa",
+                "duracao_ms": round(prazo.decorrido() * 1000, 1),
+                "indisponiveis": sorted(indisponiveis),
+            },
+            status="warning" if indisponiveis else "sucesso",
+        )
+
+        if erro_mysql:
+            raise FonteIndisponivelError(f"MySQL não respondeu na visão do cliente: {erro_mysql}")
+        if visao is None:
+            return None
+        for apolice in visao["apolices"]:
+            for sinistro in apolice["sinistros"]:
+                sinistro["documentos"] = (documentos or {}).get(sinistro["id"], [])
+        return {
+            **visao,
+            "perfil": perfil,
+            "parcial": bool(indisponiveis),
+            "indisponiveis": indisponiveis,
+        }
+
 
 class ApoliceService:
     """Serviço para operações com apólices (MySQL + MongoDB) - Suporta injeção de dependência"""
 
-    def __init__(self, mysql_connection=None, mongo_database=None):
+    def __init__(self, mysql_connection=None, mongo_database=None, usar_outbox=None):
         """Inicializa o serviço com DAOs e Services configurados"""
+        self.mysql_connection = mysql_connection
+        self.outbox = _criar_outbox(mysql_connection, usar_outbox)
         self.apolice_dao = ApoliceDAO(mysql_connection)
         self.cliente_dao = ClienteDAO(mysql_connection)
         self.seguro_dao = SeguroDAO(mysql_connection)
-        self.auditoria = AuditoriaService(mongo_database)
-        self.perfil = ClientePerfilService(mongo_database)
+        self.auditoria = AuditoriaService(mongo_database, outbox=self.outbox)
+        self.perfil = ClientePerfilService(mongo_database, outbox=self.outbox)
+        if mysql_connection is None:
+            self.numeracao = obter_alocador(SEQUENCIA_APOLICES)
+        else:
+            self.numeracao = AlocadorSequencia(SEQUENCIA_APOLICES, connection=mysql_connection)
+        self.modo_efeitos: Optional[str] = None  # None: CONCORRENCIA_CONFIG["modo_efeitos"]
 
     def emitir_apolice(self, dados: dict[str, Any], usuario: str) -> int:
-        """Emite apólice no MySQL e registra log detalhado no MongoDB"""
+        """
+        Emite apólice no MySQL e registra log detalhado no MongoDB
+
+        O dict recebido não é alterado: o número gerado é lido da apólice criada.
+        """
+        # O número é reservado fora da transação (a reserva de bloco tem commit próprio);
+        # se a emissão falhar, o número é descartado
+        dados = dict(dados)
+        if not dados.get("numero"):
+            dados["numero"] = formatar_numero_apolice(self.numeracao.proximo())
+        return self._emitir_apolice(dados, usuario)
+
+    @_transacional
+    def _emitir_apolice(self, dados: dict[str, Any], usuario: str) -> int:
         # Define data de emissão se não fornecida
         if "data_emissao" not in dados:
             dados["data_emissao"] = datetime.now().date()
@@ -185,12 +453,16 @@ class ApoliceService:
             cliente = self.cliente_dao.ler_por_id(dados["cliente_id"])
             seguro = self.seguro_dao.ler_por_id(dados["seguro_id"])
 
-            self.auditoria.registrar_log(
+            efeitos = _efeitos(self, "emitir_apolice")
+            efeitos.adicionar(
+                "auditoria",
+                self.auditoria.registrar_log,
                 usuario=usuario,
                 operacao="emitir",
                 entidade="apolice",
                 entidade_id=apolice_id,
                 detalhes={
+                    "numero": dados["numero"],
                     "cliente_nome": cliente["nome"] if cliente else "Desconhecido",
                     "cliente_cpf": cliente["cpf"] if cliente else "Desconhecido",
                     "seguro_tipo": seguro["tipo"] if seguro else "Desconhecido",
@@ -204,12 +476,15 @@ class ApoliceService:
 
             # Registra no histórico de contato do cliente
             if cliente:
-                self.perfil.adicionar_contato(
+                efeitos.adicionar(
+                    "perfil",
+                    self.perfil.adicionar_contato,
                     dados["cliente_id"],
                     "emissao_apolice",
                     f"Apólice {apolice_id} emitida",
                     {"apolice_id": apolice_id, "seguro_tipo": seguro["tipo"] if seguro else None},
                 )
+            efeitos.executar()
         else:
             self.auditoria.registrar_log(
                 usuario=usuario,
@@ -234,7 +509,6 @@ class ApoliceService:
         dados = {
             "cliente_id": cliente_id,
             "seguro_id": seguro_id,
-            "numero": f"AP{datetime.now().year}{cliente_id:04d}",
             "data_inicio": data_inicio,
             "data_fim": data_fim,
             "data_emissao": datetime.now().date(),
@@ -243,21 +517,35 @@ class ApoliceService:
         }
         return self.emitir_apolice(dados, usuario)
 
-    def cancelar_apolice(self, apolice_id: int, usuario: str, motivo: Optional[str] = None) -> bool:
-        """Cancela apólice e registra log detalhado"""
-        apolice = self.apolice_dao.ler_por_id(apolice_id)
-
-        if not apolice:
-            return False
+    @_transacional
+    def cancelar_apolice(
+        self,
+        apolice_id: int,
+        usuario: str,
+        motivo: Optional[str] = None,
+        apolice: Optional[dict[str, Any]] = None,
+    ) -> bool:
+        """
+        Cancela apólice ativa e registra log detalhado
 
-        # Atualiza status para cancelada
-        dados_atualizados = apolice.copy()
-        dados_atualizados["status"] = "cancelada"
+        Args:
+            apolice: versão já lida pelo chamador (evita reler a linha para o histórico)
 
-        sucesso = self.apolice_dao.atualizar(apolice_id, dados_atualizados)
+        Returns:
+            bool: False se a apólice não existe ou não está mais ativa
+        """
+        # Compare-and-set: só a transição ativa -> cancelada é gravada, sem leitura prévia
+        sucesso = self.apolice_dao.transicionar_status(apolice_id, "ativa", "cancelada")
 
         if sucesso:
-            self.auditoria.registrar_log(
+            if not apolice:
+                # A leitura precisa ver o cancelamento recém-gravado: réplica não serve
+                with leitura_no_primario():
+                    apolice = self.apolice_dao.ler_por_id(apolice_id)
+            efeitos = _efeitos(self, "cancelar_apolice")
+            efeitos.adicionar(
+                "auditoria",
+                self.auditoria.registrar_log,
                 usuario=usuario,
                 operacao="cancelar",
                 entidade="apolice",
@@ -270,28 +558,110 @@ class ApoliceService:
             )
 
             # Registra no histórico do cliente
-            self.perfil.adicionar_contato(
-                apolice["cliente_id"],
-                "cancelamento_apolice",
-                f"Apólice {apolice_id} cancelada",
-                {"apolice_id": apolice_id, "motivo": motivo},
-            )
+            if apolice:
+                efeitos.adicionar(
+                    "perfil",
+                    self.perfil.adicionar_contato,
+                    apolice["cliente_id"],
+                    "cancelamento_apolice",
+                    f"Apólice {apolice_id} cancelada",
+                    {"apolice_id": apolice_id, "motivo": motivo},
+                )
+            efeitos.executar()
 
         return sucesso
 
+    def cancelar_por_cliente(
+        self, cliente_id: int, usuario: str, motivo: Optional[str] = None
+    ) -> list[int]:
+        """
+        Cancela todas as apólices ativas do cliente
+
+        Um UPDATE por lote no MySQL, cada lote na sua transação; auditoria com um insert_many e
+        histórico do cliente com $push/$each, em vez de uma leitura, um UPDATE e dois efeitos
+        por apólice. Com outbox, os efeitos são INSERTs de várias linhas na transação do lote.
+
+        Returns:
+            list[int]: ids das apólices canceladas (se um lote falhar, as dos lotes confirmados
+                antes dele; a falha é auditada com status "erro")
+        """
+
+        def efeitos_do_lote(canceladas):
+            efeitos = _efeitos(self, "cancelar_por_cliente")
+            efeitos.adicionar(
+                "auditoria",
+                self.auditoria.registrar_logs,
+                usuario=usuario,
+                operacao="cancelar",
+                entidade="apolice",
+                entidade_ids=canceladas,
+                detalhes={
+                    "motivo": motivo or "Não informado",
+                    "data_cancelamento": str(datetime.now()),
+                    "lote": len(canceladas),
+                },
+                status="sucesso",
+            )
+            efeitos.adicionar(
+                "perfil",
+                self.perfil.adicionar_contatos,
+                cliente_id,
+                [
+                    {
+                        "tipo": "cancelamento_apolice",
+                        "descricao": f"Apólice {apolice_id} cancelada",
+                        "metadados": {"apolice_id": apolice_id, "motivo": motivo},
+                    }
+                    for apolice_id in canceladas
+                ],
+            )
+            efeitos.executar()
+
+        canceladas, erro = _em_lotes(
+            self,
+            functools.partial(
+                self.apolice_dao.transicionar_status_em_lote,
+                "cancelada",
+                de="ativa",
+                cliente_id=cliente_id,
+            ),
+            efeitos_do_lote,
+        )
+        if erro:
+            self.auditoria.registrar_log(
+                usuario=usuario,
+                operacao="cancelar",
+                entidade="apolice",
+                detalhes={
+                    "cliente_id": cliente_id,
+                    "erro": str(erro),
+                    "canceladas": len(canceladas),
+                },
+                status="erro",
+            )
+
+        return canceladas
+
     def cancelar(self, usuario: str, apolice_id: int, motivo: Optional[str] = None) -> bool:
         """Alias para cancelar_apolice - compatibilidade com testes"""
         return self.cancelar_apolice(apolice_id, usuario, motivo)
 
-    def listar_apolices(self, usuario: str) -> list[dict[str, Any]]:
-        """Lista todas as apólices"""
-        apolices = self.apolice_dao.listar()
+    def listar_apolices(
+        self, usuario: str, limite: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Lista todas as apólices (ou uma página, com limite/offset)"""
+        if limite is None:
+            apolices = self.apolice_dao.listar()
+            total = len(apolices)
+        else:
+            apolices = self.apolice_dao.filtrar(order_by="id", limit=limite, offset=offset)
+            total = self.apolice_dao.contar()
 
         self.auditoria.registrar_log(
             usuario=usuario,
             operacao="listar",
             entidade="apolice",
-            detalhes={"total": len(apolices)},
+            detalhes={"total": total},
             status="sucesso",
         )
 
@@ -301,18 +671,32 @@ class ApoliceService:
 class SinistroService:
     """Serviço para operações com sinistros (MySQL + MongoDB) - Suporta injeção de dependência"""
 
-    def __init__(self, mysql_connection=None, mongo_database=None):
+    def __init__(self, mysql_connection=None, mongo_database=None, usar_outbox=None):
         """Inicializa o serviço com DAOs e Services configurados"""
+        self.mysql_connection = mysql_connection
+        self.outbox = _criar_outbox(mysql_connection, usar_outbox)
         self.sinistro_dao = SinistroDAO(mysql_connection)
         self.apolice_dao = ApoliceDAO(mysql_connection)
-        self.auditoria = AuditoriaService(mongo_database)
-        self.documentos = SinistroDocumentosService(mongo_database)
-        self.perfil = ClientePerfilService(mongo_database)
+        self.auditoria = AuditoriaService(mongo_database, outbox=self.outbox)
+        self.documentos = SinistroDocumentosService(mongo_database, outbox=self.outbox)
+        self.perfil = ClientePerfilService(mongo_database, outbox=self.outbox)
+        self.modo_efeitos: Optional[str] = None  # None: CONCORRENCIA_CONFIG["modo_efeitos"]
 
+    @_transacional
     def registrar_sinistro(
-        self, dados: dict[str, Any], usuario: str, observacoes: Optional[str] = None
+        self,
+        dados: dict[str, Any],
+        usuario: str,
+        observacoes: Optional[str] = None,
+        documentos: Optional[list[dict[str, Any]]] = None,
     ) -> int:
-        """Registra sinistro no MySQL e documentos no MongoDB"""
+        """
+        Registra sinistro no MySQL e documentos no MongoDB
+
+        Args:
+            documentos: documentos anexados (formato de SinistroDocumentosService.adicionar_documentos),
+                gravados junto com as observações num único lote
+        """
         if "data_ocorrencia" not in dados:
             dados["data_ocorrencia"] = datetime.now().date()
 
@@ -325,7 +709,10 @@ class SinistroService:
             # Busca dados da apólice para log detalhado
             apolice = self.apolice_dao.ler_por_id(dados["apolice_id"])
 
-            self.auditoria.registrar_log(
+            efeitos = _efeitos(self, "registrar_sinistro")
+            efeitos.adicionar(
+                "auditoria",
+                self.auditoria.registrar_log,
                 usuario=usuario,
                 operacao="registrar",
                 entidade="sinistro",
@@ -338,24 +725,38 @@ class SinistroService:
                 status="sucesso",
             )
 
-            # Adiciona documentos/observações detalhadas no MongoDB
+            # Adiciona documentos/observações detalhadas no MongoDB (um único lote)
+            lote = list(documentos or [])
             if observacoes:
-                self.documentos.adicionar_documento(
-                    sinistro_id=sinistro_id,
-                    apolice_id=dados["apolice_id"],
-                    tipo_documento="observacao_inicial",
-                    conteudo=observacoes,
-                    metadados={"registrado_por": usuario, "data_registro": str(datetime.now())},
+                lote.insert(
+                    0,
+                    {
+                        "tipo_documento": "observacao_inicial",
+                        "conteudo": observacoes,
+                        "metadados": {"data_registro": str(datetime.now())},
+                    },
+                )
+            if lote:
+                efeitos.adicionar(
+                    "documentos",
+                    self._anexar_documentos,
+                    sinistro_id,
+                    lote,
+                    dados["apolice_id"],
+                    usuario,
                 )
 
             # Registra no histórico do cliente
             if apolice:
-                self.perfil.adicionar_contato(
+                efeitos.adicionar(
+                    "perfil",
+                    self.perfil.adicionar_contato,
                     apolice["cliente_id"],
                     "registro_sinistro",
                     f"Sinistro {sinistro_id} registrado",
                     {"sinistro_id": sinistro_id, "apolice_id": dados["apolice_id"]},
                 )
+            efeitos.executar()
         else:
             self.auditoria.registrar_log(
                 usuario=usuario,
@@ -367,6 +768,31 @@ class SinistroService:
 
         return sinistro_id
 
+    def _anexar_documentos(
+        self, sinistro_id: int, lote: list[dict[str, Any]], apolice_id: int, usuario: str
+    ):
+        """Grava o lote de documentos do sinistro e audita as falhas parciais"""
+        resultado = self.documentos.adicionar_documentos(
+            sinistro_id,
+            lote,
+            apolice_id=apolice_id,
+            metadados={"registrado_por": usuario},
+        )
+        if resultado["falhas"]:
+            self.auditoria.registrar_log(
+                usuario=usuario,
+                operacao="anexar_documentos",
+                entidade="sinistro",
+                entidade_id=sinistro_id,
+                detalhes={
+                    "total": len(lote),
+                    "inseridos": len(lote) - len(resultado["falhas"]),
+                    "falhas": resultado["falhas"],
+                },
+                status="erro",
+            )
+
+    @_transacional
     def registrar(
         self,
         usuario: str,
@@ -387,21 +813,19 @@ class SinistroService:
             "status": "aberto",
         }
 
-        sinistro_id = self.registrar_sinistro(dados, usuario)
-
         # Adiciona documentos se fornecidos
-        if documentos and sinistro_id:
-            for doc in documentos:
-                self.documentos.adicionar_documento(
-                    sinistro_id=sinistro_id,
-                    tipo_documento=doc.get("tipo", "OUTROS"),
-                    caminho_arquivo=doc.get("caminho", ""),
-                    descricao=doc.get("descricao", ""),
-                    metadados={"registrado_por": usuario},
-                )
-
-        return sinistro_id
-
+        lote = [
+            {
+                "tipo_documento": doc.get("tipo", "OUTROS"),
+                "caminho_arquivo": doc.get("caminho", ""),
+                "descricao": doc.get("descricao", ""),
+            }
+            for doc in documentos or []
+        ]
+
+        return self.registrar_sinistro(dados, usuario, documentos=lote)
+
+    @_transacional
     def atualizar_sinistro(
         self,
         sinistro_id: int,
@@ -409,11 +833,19 @@ class SinistroService:
         usuario: str,
         observacoes: Optional[str] = None,
         operacao: str = "atualizar_sinistro",
+        anterior: Optional[dict[str, Any]] = None,
     ) -> bool:
-        """Atualiza sinistro e adiciona observações no MongoDB"""
-        sucesso = self.sinistro_dao.atualizar(sinistro_id, dados)
+        """
+        Atualiza sinistro e adiciona observações no MongoDB
+
+        Args:
+            anterior: versão já lida pelo chamador; se informada, só as colunas alteradas são
+                gravadas e a atualização falha se o sinistro mudou desde a leitura
+        """
+        sucesso = self.sinistro_dao.atualizar(sinistro_id, dados, anterior=anterior)
 
         if sucesso:
+            anterior = anterior or {}
             self.auditoria.registrar_log(
                 usuario=usuario,
                 operacao=operacao,
@@ -432,13 +864,13 @@ class SinistroService:
             if observacoes:
                 self.documentos.adicionar_documento(
                     sinistro_id=sinistro_id,
-                    apolice_id=dados["apolice_id"],
+                    apolice_id=dados.get("apolice_id", anterior.get("apolice_id")),
                     tipo_documento="observacao_atualizacao",
                     conteudo=observacoes,
                     metadados={
                         "atualizado_por": usuario,
                         "data_atualizacao": str(datetime.now()),
-                        "status_anterior": dados.get("status_anterior"),
+                        "status_anterior": dados.get("status_anterior", anterior.get("status")),
                         "status_novo": dados.get("status"),
                     },
                 )
@@ -463,22 +895,86 @@ class SinistroService:
         dados = {"status": novo_status}
         if valor_aprovado is not None:
             dados["valor_aprovado"] = valor_aprovado
-        if sinistro.get("apolice_id"):
-            dados["apolice_id"] = sinistro["apolice_id"]  # Necessário para registro de documento
 
         return self.atualizar_sinistro(
-            sinistro_id, dados, usuario, observacoes, operacao="atualizar_status"
+            sinistro_id, dados, usuario, observacoes, operacao="atualizar_status", anterior=sinistro
         )
 
-    def listar_sinistros(self, usuario: str) -> list[dict[str, Any]]:
-        """Lista todos os sinistros"""
-        sinistros = self.sinistro_dao.listar()
+    def atualizar_status_em_lote(
+        self,
+        ids: list[int],
+        novo_status: str,
+        usuario: str,
+        de=None,
+        observacoes: Optional[str] = None,
+    ) -> list[int]:
+        """
+        Muda o status de vários sinistros (ex.: fechamento em massa no fim do trimestre)
+
+        Um UPDATE por lote no MySQL, cada lote na sua transação, e a auditoria com um
+        insert_many (com outbox, INSERTs de várias linhas na transação do lote); as observações
+        vão para os detalhes da auditoria (não geram um documento por sinistro).
+
+        Args:
+            de: status de origem aceito(s) (padrão: qualquer status diferente de novo_status)
+
+        Returns:
+            list[int]: ids dos sinistros alterados (se um lote falhar, os dos lotes confirmados
+                antes dele; a falha é auditada com status "erro")
+        """
+
+        def efeitos_do_lote(alterados):
+            self.auditoria.registrar_logs(
+                usuario=usuario,
+                operacao="atualizar_status",
+                entidade="sinistro",
+                entidade_ids=alterados,
+                detalhes={
+                    "novo_status": novo_status,
+                    "observacoes": observacoes,
+                    "lote": len(alterados),
+                },
+                status="sucesso",
+            )
+
+        alterados, erro = _em_lotes(
+            self,
+            functools.partial(
+                self.sinistro_dao.transicionar_status_em_lote, novo_status, de=de, ids=ids
+            ),
+            efeitos_do_lote,
+        )
+        if erro:
+            self.auditoria.registrar_log(
+                usuario=usuario,
+                operacao="atualizar_status",
+                entidade="sinistro",
+                detalhes={
+                    "novo_status": novo_status,
+                    "erro": str(erro),
+                    "alterados": len(alterados),
+                },
+                status="erro",
+            )
+
+        return alterados
+
+    def listar_sinistros(
+        self, usuario: str, limite: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Lista todos os sinistros (ou uma página, com limite/offset)"""
+        if limite is None:
+            sinistros = self.sinistro_dao.listar()
+            total = len(sinistros)
+        else:
+            sinistros = self.sinistro_dao.filtrar(order_by="id", limit=limite, offset=offset)
+            total = self.sinistro_dao.contar()
 
         self.auditoria.registrar_log(
             usuario=usuario,
             operacao="listar",
             entidade="sinistro",
-            detalhes={"total": len(sinistros)},
+            detalhes={"total": total},
             status="sucesso",
         )
 
@@ -492,11 +988,14 @@ class SinistroService:
 class SeguroService:
     """Serviço para operações com seguros (MySQL + MongoDB) - Suporta injeção de dependência"""
 
-    def __init__(self, mysql_connection=None, mongo_database=None):
+    def __init__(self, mysql_connection=None, mongo_database=None, usar_outbox=None):
         """Inicializa o serviço com DAOs e Services configurados"""
+        self.mysql_connection = mysql_connection
+        self.outbox = _criar_outbox(mysql_connection, usar_outbox)
         self.seguro_dao = SeguroDAO(mysql_connection)
-        self.auditoria = AuditoriaService(mongo_database)
+        self.auditoria = AuditoriaService(mongo_database, outbox=self.outbox)
 
+    @_transacional
     def criar_seguro(self, dados: dict[str, Any], usuario: str) -> int:
         """Cria seguro no MySQL e registra log no MongoDB"""
         seguro_id = self.seguro_dao.criar(dados)
@@ -521,15 +1020,22 @@ class SeguroService:
 
         return seguro_id
 
-    def listar_seguros(self, usuario: str) -> list[dict[str, Any]]:
-        """Lista todos os seguros"""
-        seguros = self.seguro_dao.listar()
+    def listar_seguros(
+        self, usuario: str, limite: Optional[int] = None, offset: int = 0
+    ) -> list[dict[str, Any]]:
+        """Lista todos os seguros (ou uma página, com limite/offset)"""
+        if limite is None:
+            seguros = self.seguro_dao.listar()
+            total = len(seguros)
+        else:
+            seguros = self.seguro_dao.filtrar(order_by="id", limit=limite, offset=offset)
+            total = self.seguro_dao.contar()
 
         self.auditoria.registrar_log(
             usuario=usuario,
             operacao="listar",
             entidade="seguro",
-            detalhes={"total": len(seguros)},
+            detalhes={"total": total},
             status="sucesso",
         )
 
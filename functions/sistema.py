@@ -1,8 +1,17 @@
-from datetime import datetime
 import getpass
+from datetime import datetime
+
+from config import PAGINACAO_CONFIG
 
 # Sprint 4 - Persistência Híbrida (MySQL + MongoDB)
-from functions.dao_mysql import ApoliceDAO, ClienteDAO, SeguroDAO, SinistroDAO, UsuarioDAO
+from functions.dao_mysql import (
+    ApoliceDAO,
+    ClienteDAO,
+    SeguroDAO,
+    SinistroDAO,
+    UsuarioDAO,
+    leitura_no_primario,
+)
 from functions.exceptions import (
     ApoliceInexistente,
     ClienteInexistente,
@@ -18,6 +27,7 @@ from functions.exporta_relatorios import (
     sinistros_status_periodo_cli_export,
     top_clientes_valor_segurado_cli_export,
 )
+from functions.indice_clientes import IndiceClientes
 from functions.logger import registrar_log
 from functions.seguro import Automovel, Residencial, Vida
 from functions.servicos import ApoliceService, ClienteService, SeguroService, SinistroService
@@ -48,6 +58,8 @@ class SistemaSeguros:
         self.sinistros = self.sinistro_dao.listar()
         self.usuario_atual = None
         self.tipo_usuario = None
+        # Índice de nome/CPF para escolher clientes na CLI; carregado no primeiro uso
+        self._indice_clientes = None
 
         # Instanciar Services (para operações que envolvem MySQL + MongoDB)
         self.cliente_service = ClienteService(mysql_connection, mongo_database)
@@ -55,9 +67,58 @@ class SistemaSeguros:
         self.apolice_service = ApoliceService(mysql_connection, mongo_database)
         self.sinistro_service = SinistroService(mysql_connection, mongo_database)
 
-        # Cria usuário admin padrão se não existir
-        if not self.usuario_dao.listar():
-            self.usuario_dao.criar({"username": "admin", "senha": "senha123", "tipo": "admin"})
+        # Cria usuário admin padrão se não existir (verificado no primário, não numa réplica)
+        with leitura_no_primario():
+            if not self.usuario_dao.existe():
+                self.usuario_dao.criar({"username": "admin", "senha": "senha123", "tipo": "admin"})
+
+    @property
+    def indice_clientes(self) -> IndiceClientes:
+        if self._indice_clientes is None:
+            self._indice_clientes = IndiceClientes(self.cliente_dao)
+            self._indice_clientes.carregar()
+        return self._indice_clientes
+
+    def _indexar_cliente(self, cliente_id, nome, cpf):
+        # Sem índice carregado não há o que manter: a carga já lerá o cliente
+        if self._indice_clientes is not None:
+            self._indice_clientes.registrar(cliente_id, nome, cpf)
+
+    def escolher_cliente(self, mensagem="Cliente (ID, nome ou CPF): "):
+        """
+        Pede o cliente pelo ID ou pelo início do nome (de qualquer palavra) ou do CPF,
+        listando as sugestões do índice em memória para o operador escolher ou refinar.
+
+        Returns:
+            dict do cliente ou None (não encontrado ou busca cancelada)
+        """
+        termo = input(mensagem).strip()
+        while termo:
+            # Só dígitos: ID, como antes; exceto os 11 dígitos de um CPF
+            if termo.isdigit() and len(termo) != 11:
+                return self.cliente_dao.ler_por_id(int(termo))
+            indice = self.indice_clientes
+            indice.sincronizar_se_vencido()
+            sugestoes = indice.buscar(termo)
+            if not sugestoes:
+                print("Nenhum cliente encontrado.")
+                return None
+            for i, sugestao in enumerate(sugestoes, 1):
+                print(f"{i}: {sugestao['nome']} - CPF {sugestao['cpf']} (ID {sugestao['id']})")
+            escolha = input("Número do cliente, ou digite mais para refinar (Enter cancela): ")
+            escolha = escolha.strip()
+            if escolha.isdigit() and len(escolha) != 11:
+                if not 1 <= int(escolha) <= len(sugestoes):
+                    print("Escolha inválida. Tente novamente.")
+                    continue
+                cliente_id = sugestoes[int(escolha) - 1]["id"]
+                cliente = self.cliente_dao.ler_por_id(cliente_id)
+                if not cliente:
+                    # Excluído por outro processo depois da carga do índice
+                    indice.remover(cliente_id)
+                return cliente
+            termo = escolha
+        return None
 
     def atualizar_status_sinistro(self):
         """
@@ -87,14 +148,14 @@ class SistemaSeguros:
 
             observacoes = input("Observações sobre a atualização (opcional): ").strip()
 
-            # Prepara dados para atualização
-            dados_atualizados = sinistro.copy()
-            dados_atualizados["status"] = novo_status
-            dados_atualizados["status_anterior"] = sinistro["status"]
-
-            # Usa SinistroService (grava no MySQL + observações no MongoDB)
+            # Usa SinistroService (grava no MySQL + observações no MongoDB); só o status é
+            # gravado, e apenas se o sinistro não mudou desde a leitura acima
             sucesso = self.sinistro_service.atualizar_sinistro(
-                int(sinistro_id), dados_atualizados, self.usuario_atual, observacoes or None
+                int(sinistro_id),
+                {"status": novo_status},
+                self.usuario_atual,
+                observacoes or None,
+                anterior=sinistro,
             )
 
             if sucesso:
@@ -104,7 +165,7 @@ class SistemaSeguros:
                     "INFO", self.usuario_atual, "atualizar_status_sinistro", id_obj=sinistro_id
                 )
             else:
-                print("Erro ao atualizar sinistro.")
+                print("Erro ao atualizar sinistro (ele pode ter sido alterado por outro usuário).")
         except (SinistroInexistente, OperacaoNaoPermitida) as e:
             print(f"[ERRO] {e}")
 
@@ -134,7 +195,7 @@ class SistemaSeguros:
 
             # Usa ApoliceService (grava no MySQL + log detalhado no MongoDB)
             sucesso = self.apolice_service.cancelar_apolice(
-                int(apolice_id), self.usuario_atual, motivo or None
+                int(apolice_id), self.usuario_atual, motivo or None, apolice=apolice
             )
 
             if sucesso:
@@ -153,10 +214,10 @@ class SistemaSeguros:
         """
         print("=== Alterar Dados do Cliente ===")
         try:
-            cliente_id = input("ID do cliente a alterar: ").strip()
-            cliente = self.cliente_dao.ler_por_id(int(cliente_id))
+            cliente = self.escolher_cliente("Cliente a alterar (ID, nome ou CPF): ")
             if not cliente:
                 raise OperacaoNaoPermitida("Cliente não encontrado.")
+            cliente_id = cliente["id"]
 
             print(
                 f"Dados atuais: Nome: {cliente['nome']}, CPF: {cliente['cpf']}, Telefone: {cliente.get('telefone','')}, Email: {cliente.get('email','')}, Data Nasc: {cliente['data_nasc']}, Endereço: {cliente['endereco']}"
@@ -201,6 +262,7 @@ class SistemaSeguros:
 
             if sucesso:
                 self.clientes = self.cliente_dao.listar()
+                self._indexar_cliente(cliente_id, nome, cpf)
                 print("Dados do cliente atualizados com sucesso!")
                 registrar_log(
                     "INFO", self.usuario_atual, "alterar_dados_cliente", id_obj=cliente_id
@@ -227,7 +289,9 @@ class SistemaSeguros:
                 cpf = input("CPF: ").strip()
                 if not validar_cpf(cpf):
                     raise CpfInvalido("CPF inválido. Tente novamente.")
-                if any(c["cpf"] == cpf for c in self.cliente_dao.listar()):
+                with leitura_no_primario():
+                    cpf_existente = self.cliente_dao.existe(cpf=cpf)
+                if cpf_existente:
                     raise OperacaoNaoPermitida("Já existe um cliente com esse CPF.")
                 break
             telefone = input("Telefone: ").strip()
@@ -253,6 +317,7 @@ class SistemaSeguros:
 
             if cliente_id:
                 self.clientes = self.cliente_dao.listar()
+                self._indexar_cliente(cliente_id, nome, cpf)
                 print(f"Cliente cadastrado com sucesso! ID: {cliente_id}")
                 registrar_log("INFO", self.usuario_atual, "cadastrar_cliente", id_obj=cliente_id)
             else:
@@ -285,7 +350,9 @@ class SistemaSeguros:
             if not usuario:
                 print("Usuário não pode ser vazio.")
                 continue
-            if self.usuario_dao.ler_por_username(usuario):
+            with leitura_no_primario():
+                existente = self.usuario_dao.ler_por_username(usuario)
+            if existente:
                 print("Usuário já existe. Tente outro.")
                 continue
             senha = getpass.getpass("Digite a senha: ").strip()
@@ -305,7 +372,9 @@ class SistemaSeguros:
             print("=== Login ===")
             usuario = input("Usuário: ").strip()
             senha = getpass.getpass("Senha: ").strip()
-            user = self.usuario_dao.ler_por_username(usuario)
+            # Primário: o login logo após o cadastro precisa enxergar o novo usuário
+            with leitura_no_primario():
+                user = self.usuario_dao.ler_por_username(usuario)
             if user and user["senha"] == senha:
                 self.usuario_atual = usuario
                 self.tipo_usuario = user["tipo"]
@@ -323,8 +392,7 @@ class SistemaSeguros:
         try:
             print("=== Cadastro de Seguro ===")
             if not cliente:
-                cliente_id = input("ID do cliente: ").strip()
-                cliente = self.cliente_dao.ler_por_id(int(cliente_id))
+                cliente = self.escolher_cliente()
                 if not cliente:
                     raise ClienteInexistente("Cliente não encontrado.")
             data_nasc = cliente.get("data_nasc")
@@ -466,24 +534,39 @@ class SistemaSeguros:
         """
         print("=== Emissão de Apólice ===")
         while True:
-            cliente_id = input("ID do cliente: ").strip()
-            cliente = self.cliente_dao.ler_por_id(int(cliente_id))
+            cliente = self.escolher_cliente()
             if not cliente:
                 print("Cliente não encontrado. Tente novamente.")
                 continue
             break
 
         print("Seguros disponíveis:")
-        seguros = self.seguro_dao.listar()
-        seguros_cliente = [s for s in seguros if s.get("cliente_id") == cliente["id"]]
-        if not seguros_cliente:
+        # Uma página por vez (keyset por id); Enter pede a seguinte enquanto a atual vier cheia
+        pagina = self.seguro_dao.listar_por_cliente(cliente["id"])
+        if not pagina:
             print("Este cliente não possui seguros cadastrados.")
             return
-        for i, s in enumerate(seguros_cliente):
-            print(f"{i+1}: {s['tipo']} - {s['descricao']}")
+        seguros_cliente = []
         while True:
+            for s in pagina:
+                seguros_cliente.append(s)
+                print(f"{len(seguros_cliente)}: {s['tipo']} - {s['descricao']}")
+            mais = len(pagina) == PAGINACAO_CONFIG["tamanho_pagina"]
+            pagina = []
+            entrada = input(
+                "Escolha o número do seguro (Enter para mais): "
+                if mais
+                else "Escolha o número do seguro: "
+            ).strip()
+            if not entrada and mais:
+                pagina = self.seguro_dao.listar_por_cliente(
+                    cliente["id"], apos_id=seguros_cliente[-1]["id"]
+                )
+                if not pagina:
+                    print("Não há mais seguros.")
+                continue
             try:
-                escolha = int(input("Escolha o número do seguro: ").strip())
+                escolha = int(entrada)
                 if 1 <= escolha <= len(seguros_cliente):
                     break
                 else:
@@ -495,9 +578,6 @@ class SistemaSeguros:
         valor_mensal = 0
         tipo = seguro["tipo"]
         valor = seguro.get("valor", 0)
-        # Converte Decimal para float se necessário (MySQL retorna Decimal)
-        if valor:
-            valor = float(valor)
         if tipo == "Automóvel":
             valor_mensal = 200.0
         elif tipo == "Residencial":
@@ -517,7 +597,10 @@ class SistemaSeguros:
 
         if apolice_id:
             self.apolices = self.apolice_dao.listar()
-            print(f"Apólice emitida com sucesso! ID: {apolice_id}")
+            with leitura_no_primario():
+                apolice = self.apolice_dao.ler_por_id(apolice_id)
+            numero = apolice["numero"] if apolice else "?"
+            print(f"Apólice emitida com sucesso! Número: {numero} (ID: {apolice_id})")
             print(f"Valor mensal estimado: R$ {valor_mensal:.2f}")
             registrar_log("INFO", self.usuario_atual, "emitir_apolice", id_obj=apolice_id)
         else:
@@ -616,7 +699,7 @@ class SistemaSeguros:
                 # Valor total segurado por cliente (CLI)
                 clientes = self.cliente_dao.listar()
                 apolices = self.apolice_dao.listar()
-                seguros = self.seguro_dao.listar()
+                seguros = self.seguro_dao.listar(colunas=["id", "valor"])
                 print("\n--- Valor total segurado por cliente ---")
                 print(f"{'ID':<6} {'Nome':<20} {'Valor Segurado':<15}")
                 for cliente in clientes:
@@ -631,29 +714,27 @@ class SistemaSeguros:
                     print(f"{cliente['id']:<6} {cliente['nome']:<20} R$ {valor:<12.2f}")
             elif opcao == "2":
                 # Apólices emitidas por tipo de seguro (CLI)
-                apolices = self.apolice_dao.listar()
-                seguros = self.seguro_dao.listar()
+                por_seguro = self.apolice_dao.contar(agrupar_por="seguro_id")
+                seguros = self.seguro_dao.filtrar(id=list(por_seguro), colunas=["id", "tipo"])
                 contagem = {"Automóvel": 0, "Residencial": 0, "Vida": 0}
-                for apolice in apolices:
-                    seguro = next((s for s in seguros if s["id"] == apolice.get("seguro_id")), None)
-                    tipo = seguro["tipo"] if seguro else None
-                    if tipo in contagem:
-                        contagem[tipo] += 1
+                for seguro in seguros:
+                    if seguro["tipo"] in contagem:
+                        contagem[seguro["tipo"]] += por_seguro[seguro["id"]]
                 print("\n--- Apólices por tipo de seguro ---")
                 for tipo, qtd in contagem.items():
                     print(f"{tipo}: {qtd} apólices")
             elif opcao == "3":
                 # Quantidade de sinistros abertos/fechados (CLI)
-                sinistros = self.sinistro_dao.listar()
-                abertos = sum(1 for s in sinistros if s["status"] == "aberto")
-                fechados = sum(1 for s in sinistros if s["status"] == "fechado")
+                por_status = self.sinistro_dao.contar(agrupar_por="status")
+                abertos = por_status.get("aberto", 0)
+                fechados = por_status.get("fechado", 0)
                 print("\n--- Sinistros por status ---")
                 print(f"Abertos: {abertos}")
                 print(f"Fechados: {fechados}")
             elif opcao == "4":
-                receita_mensal_prevista_cli_export()
+                receita_mensal_prevista_cli_export(usuario=self.usuario_atual)
             elif opcao == "5":
-                top_clientes_valor_segurado_cli_export()
+                top_clientes_valor_segurado_cli_export(usuario=self.usuario_atual)
             elif opcao == "6":
                 print("Informe o período (pressione Enter para ignorar):")
                 data_ini = input("Data inicial (DD/MM/AAAA): ").strip()
@@ -662,18 +743,18 @@ class SistemaSeguros:
 
                 dt_ini = datetime.strptime(data_ini, "%d/%m/%Y") if data_ini else None
                 dt_fim = datetime.strptime(data_fim, "%d/%m/%Y") if data_fim else None
-                sinistros_status_periodo_cli_export(dt_ini, dt_fim)
+                sinistros_status_periodo_cli_export(dt_ini, dt_fim, usuario=self.usuario_atual)
             elif opcao == "7":
-                exportar_clientes_csv()
+                exportar_clientes_csv(usuario=self.usuario_atual)
                 print("Clientes exportados para CSV.")
             elif opcao == "8":
-                exportar_seguros_csv()
+                exportar_seguros_csv(usuario=self.usuario_atual)
                 print("Seguros exportados para CSV.")
             elif opcao == "9":
-                exportar_apolices_csv()
+                exportar_apolices_csv(usuario=self.usuario_atual)
                 print("Apólices exportadas para CSV.")
             elif opcao == "10":
-                exportar_sinistros_csv()
+                exportar_sinistros_csv(usuario=self.usuario_atual)
                 print("Sinistros exportados para CSV.")
             elif opcao == "0":
                 break
@@ -10,7 +10,15 @@ import mysql.connector
 import pytest
 from pymongo import MongoClient
 
+from config import DOCUMENTOS_CONFIG
 from config_test import MONGODB_TEST_CONFIG, MYSQL_TEST_CONFIG
+from database.db_setup import (
+    SQL_SEM_STOPWORDS,
+    criar_tabelas_arquivo,
+    criar_triggers_exclusao,
+    ddl_colunas_geradas_seguros,
+    ddl_indice_textual,
+)
 
 
 @pytest.fixture(scope="session")
@@ -30,8 +38,15 @@ def mysql_test_connection():
     # Cria banco de teste se não existir (ignora se já existe)
     cursor.execute(f"CREATE DATABASE IF NOT EXISTS {database_name}")
     cursor.execute(f"USE {database_name}")
+    cursor.execute(SQL_SEM_STOPWORDS)
 
     # Limpa tabelas existentes (DROP IF EXISTS para garantir schema limpo)
+    cursor.execute("DROP TABLE IF EXISTS outbox")
+    cursor.execute("DROP TABLE IF EXISTS exclusoes")
+    cursor.execute("DROP TABLE IF EXISTS marcas_exportacao")
+    cursor.execute("DROP TABLE IF EXISTS sequencias")
+    cursor.execute("DROP TABLE IF EXISTS sinistros_arquivo")
+    cursor.execute("DROP TABLE IF EXISTS apolices_arquivo")
     cursor.execute("DROP TABLE IF EXISTS sinistros")
     cursor.execute("DROP TABLE IF EXISTS apolices")
     cursor.execute("DROP TABLE IF EXISTS seguros")
@@ -59,7 +74,7 @@ def mysql_test_connection():
     )
 
     cursor.execute(
-        """
+        f"""
         CREATE TABLE clientes (
             id INT AUTO_INCREMENT PRIMARY KEY,
             nome VARCHAR(200) NOT NULL,
@@ -68,16 +83,19 @@ def mysql_test_connection():
             email VARCHAR(100),
             data_nasc DATE,
             endereco TEXT,
+            hash_conteudo CHAR(64) NULL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             INDEX idx_cpf (cpf),
-            INDEX idx_nome (nome)
+            INDEX idx_nome (nome),
+            INDEX idx_updated (updated_at, id),
+            {ddl_indice_textual("clientes")}
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """
     )
 
     cursor.execute(
-        """
+        f"""
         CREATE TABLE seguros (
             id INT AUTO_INCREMENT PRIMARY KEY,
             tipo VARCHAR(50) NOT NULL,
@@ -89,7 +107,9 @@ def mysql_test_connection():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
             INDEX idx_cliente (cliente_id),
-            INDEX idx_tipo (tipo)
+            INDEX idx_tipo (tipo),
+            INDEX idx_updated (updated_at, id),
+            {ddl_colunas_geradas_seguros()}
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """
     )
@@ -100,6 +120,7 @@ def mysql_test_connection():
             id INT AUTO_INCREMENT PRIMARY KEY,
             cliente_id INT NOT NULL,
             seguro_id INT NOT NULL,
+            numero VARCHAR(20) NULL,
             data_emissao DATE,
             status VARCHAR(50) DEFAULT 'ativa',
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
@@ -107,14 +128,16 @@ def mysql_test_connection():
             FOREIGN KEY (cliente_id) REFERENCES clientes(id) ON DELETE CASCADE,
             FOREIGN KEY (seguro_id) REFERENCES seguros(id) ON DELETE CASCADE,
             INDEX idx_cliente (cliente_id),
+            UNIQUE KEY uq_numero (numero),
             INDEX idx_seguro (seguro_id),
-            INDEX idx_status (status)
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """
     )
 
     cursor.execute(
-        """
+        f"""
         CREATE TABLE sinistros (
             id INT AUTO_INCREMENT PRIMARY KEY,
             apolice_id INT NOT NULL,
@@ -125,11 +148,67 @@ def mysql_test_connection():
             updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
             FOREIGN KEY (apolice_id) REFERENCES apolices(id) ON DELETE CASCADE,
             INDEX idx_apolice (apolice_id),
-            INDEX idx_status (status)
+            INDEX idx_status (status),
+            INDEX idx_updated (updated_at, id),
+            {ddl_indice_textual("sinistros")}
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE outbox (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            colecao VARCHAR(64) NOT NULL,
+            operacao ENUM('inserir', 'atualizar') NOT NULL,
+            payload LONGBLOB NOT NULL,
+            tentativas INT NOT NULL DEFAULT 0,
+            created_at TIMESTAMP(6) DEFAULT CURRENT_TIMESTAMP(6),
+            processado_em TIMESTAMP(6) NULL,
+            INDEX idx_pendentes (processado_em, id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE exclusoes (
+            id BIGINT AUTO_INCREMENT PRIMARY KEY,
+            entidade VARCHAR(32) NOT NULL,
+            entidade_id INT NOT NULL,
+            excluido_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            INDEX idx_entidade (entidade, id)
         ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
     """
     )
 
+    cursor.execute(
+        """
+        CREATE TABLE marcas_exportacao (
+            entidade VARCHAR(32) PRIMARY KEY,
+            ultimo_updated_at TIMESTAMP NULL,
+            ultimo_id INT NOT NULL DEFAULT 0,
+            ultima_exclusao_id BIGINT NOT NULL DEFAULT 0,
+            ultimo_corte TIMESTAMP NULL,
+            exportado_em TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    )
+
+    cursor.execute(
+        """
+        CREATE TABLE sequencias (
+            nome VARCHAR(32) PRIMARY KEY,
+            proximo BIGINT NOT NULL DEFAULT 1,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
+    """
+    )
+
+    # Tabelas de arquivo e triggers de exclusão (tombstones) - mesma definição do setup
+    criar_tabelas_arquivo(cursor)
+    criar_triggers_exclusao(cursor)
+
     conn.commit()
     cursor.close()
     conn.close()
@@ -164,6 +243,12 @@ def mysql_db(mysql_test_connection):
     cursor.execute("TRUNCATE TABLE seguros")
     cursor.execute("TRUNCATE TABLE clientes")
     cursor.execute("TRUNCATE TABLE usuarios")
+    cursor.execute("TRUNCATE TABLE outbox")
+    cursor.execute("TRUNCATE TABLE exclusoes")
+    cursor.execute("TRUNCATE TABLE marcas_exportacao")
+    cursor.execute("TRUNCATE TABLE sequencias")
+    cursor.execute("TRUNCATE TABLE apolices_arquivo")
+    cursor.execute("TRUNCATE TABLE sinistros_arquivo")
     cursor.execute("SET FOREIGN_KEY_CHECKS = 1")
     conn.commit()
     cursor.close()
@@ -190,12 +275,24 @@ def mongodb_test_connection():
     db.auditoria.create_index([("timestamp", -1)])
     db.auditoria.create_index([("usuario", 1)])
     db.auditoria.create_index([("entidade", 1), ("entidade_id", 1)])
+    db.auditoria.create_index([("_outbox_id", 1)], unique=True, sparse=True)
+
+    # Coleção de contadores agregados de auditoria
+    if "auditoria_contadores" not in db.list_collection_names():
+        db.create_collection("auditoria_contadores")
+    db.auditoria_contadores.create_index(
+        [("minuto", -1), ("usuario", 1), ("entidade", 1), ("operacao", 1)], unique=True
+    )
 
     # Coleção de documentos de sinistros
     if "sinistros_documentos" not in db.list_collection_names():
         db.create_collection("sinistros_documentos")
     db.sinistros_documentos.create_index([("sinistro_id", 1)])
     db.sinistros_documentos.create_index([("tipo_documento", 1)])
+    db.sinistros_documentos.create_index([("_outbox_id", 1)], unique=True, sparse=True)
+
+    # Arquivos de sinistros (GridFS) deduplicados pelo SHA-256
+    db[f"{DOCUMENTOS_CONFIG['bucket']}.files"].create_index([("filename", 1)], unique=True)
 
     # Coleção de perfis de clientes
     if "clientes_perfil" not in db.list_collection_names():
@@ -225,7 +322,10 @@ def mongodb_db(mongodb_test_connection):
 
     # Limpa todas as coleções antes de cada teste
     db.auditoria.delete_many({})
+    db.auditoria_contadores.delete_many({})
     db.sinistros_documentos.delete_many({})
+    db[f"{DOCUMENTOS_CONFIG['bucket']}.files"].delete_many({})
+    db[f"{DOCUMENTOS_CONFIG['bucket']}.chunks"].delete_many({})
     db.clientes_perfil.delete_many({})
     db.relatorios_exportados.delete_many({})
 
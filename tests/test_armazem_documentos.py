@@ -0,0 +1,120 @@
+"""
+Testes do armazém de arquivos de sinistros (GridFS)
+Deduplicação por SHA-256, streaming em chunks e referência no documento do sinistro
+"""
+import hashlib
+import io
+import tracemalloc
+
+import pytest
+
+from config import DOCUMENTOS_CONFIG
+from functions.armazem_documentos import ArmazemDocumentos
+from functions.auditoria_service import SinistroDocumentosService
+
+
+class _ArquivoGerado(io.RawIOBase):
+    """Stream binário de `tamanho` bytes gerado sob demanda (não fica em memória)"""
+
+    def __init__(self, tamanho: int):
+        self._restante = tamanho
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = min(len(buffer), self._restante)
+        buffer[:n] = b"\xab" * n
+        self._restante -= n
+        return n
+
+
+class TestArmazemDocumentos:
+    """Gravação e leitura de arquivos"""
+
+    def test_round_trip_em_chunks(self, mongodb_db):
+        """O arquivo é lido de volta em chunks de tamanho fixo"""
+        armazem = ArmazemDocumentos(mongodb_db, tamanho_chunk=1024)
+        conteudo = bytes(range(256)) * 20
+
+        referencia = armazem.armazenar(conteudo, nome_arquivo="foto.jpg")
+        chunks = list(armazem.ler_em_chunks(referencia["sha256"]))
+
+        assert referencia["sha256"] == hashlib.sha256(conteudo).hexdigest()
+        assert referencia["tamanho"] == len(conteudo)
+        assert b"".join(chunks) == conteudo
+        assert max(len(c) for c in chunks) <= 1024
+
+    def test_deduplica_por_sha256(self, mongodb_db, tmp_path):
+        """O mesmo conteúdo gravado duas vezes ocupa um único arquivo"""
+        caminho = tmp_path / "boletim.pdf"
+        caminho.write_bytes(b"%PDF boletim de ocorrencia")
+        armazem = ArmazemDocumentos(mongodb_db)
+
+        primeira = armazem.armazenar(str(caminho))
+        segunda = armazem.armazenar(io.BytesIO(caminho.read_bytes()), nome_arquivo="copia.pdf")
+
+        assert primeira["gridfs_id"] == segunda["gridfs_id"]
+        assert primeira["nome_arquivo"] == "boletim.pdf"
+        assert armazem.existe(primeira["sha256"])
+        assert mongodb_db[f"{DOCUMENTOS_CONFIG['bucket']}.files"].count_documents({}) == 1
+
+    def test_conteudo_repetido_nao_e_enviado(self, mongodb_db, monkeypatch):
+        """O hash é calculado antes: conteúdo já armazenado não gera upload"""
+        armazem = ArmazemDocumentos(mongodb_db, tamanho_chunk=1024)
+        bucket = armazem._get_bucket()
+        envios = []
+        abrir_envio = bucket.open_upload_stream
+
+        def contar_envio(*args, **kwargs):
+            envios.append(args)
+            return abrir_envio(*args, **kwargs)
+
+        monkeypatch.setattr(bucket, "open_upload_stream", contar_envio)
+
+        primeira = armazem.armazenar(_ArquivoGerado(5000))
+        segunda = armazem.armazenar(_ArquivoGerado(5000))
+
+        assert len(envios) == 1
+        assert segunda["gridfs_id"] == primeira["gridfs_id"]
+        assert segunda["tamanho"] == 5000
+
+
+class TestDocumentosComArquivo:
+    """Integração com o SinistroDocumentosService"""
+
+    def test_documento_guarda_apenas_referencia(self, mongodb_db, tmp_path):
+        """Dois sinistros com o mesmo anexo referenciam o mesmo arquivo"""
+        service = SinistroDocumentosService(mongodb_db)
+
+        for sinistro_id in (1, 2):
+            service.adicionar_documento(sinistro_id, "FOTOS", arquivo=b"foto do veiculo")
+
+        doc1 = service.listar_documentos(1)[0]
+        doc2 = service.listar_documentos(2)[0]
+        assert "conteudo" not in doc1
+        assert doc1["arquivo"]["sha256"] == doc2["arquivo"]["sha256"]
+
+        destino = tmp_path / "download.jpg"
+        assert service.baixar_arquivo(doc1["arquivo"]["sha256"], str(destino)) == 15
+        assert destino.read_bytes() == b"foto do veiculo"
+
+
+@pytest.mark.slow
+class TestBenchmarkArmazemDocumentos:
+    """Benchmark: memória limitada ao tamanho do chunk em anexos grandes"""
+
+    def test_memoria_limitada_upload_download(self, mongodb_db):
+        tamanho_chunk = 1024 * 1024
+        tamanho = 256 * tamanho_chunk
+        armazem = ArmazemDocumentos(mongodb_db, tamanho_chunk=tamanho_chunk)
+
+        tracemalloc.start()
+        referencia = armazem.armazenar(_ArquivoGerado(tamanho), nome_arquivo="laudo.bin")
+        total = sum(len(chunk) for chunk in armazem.ler_em_chunks(referencia["sha256"]))
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        print(f"\nArquivo: {tamanho / 2**20:.0f} MiB | pico de memória: {pico / 2**20:.1f} MiB")
+        assert total == tamanho
+        assert pico < 8 * tamanho_chunk
@@ -0,0 +1,140 @@
+"""
+Testes do arquivamento de apólices canceladas e sinistros fechados (tabelas *_arquivo)
+"""
+import time
+
+import pytest
+
+from functions.arquivamento import Arquivador
+from functions.dao_mysql import ApoliceDAO, ClienteDAO
+
+
+def _envelhecer(mysql_db, tabela, ids, dias=400):
+    cursor = mysql_db.cursor()
+    cursor.execute(
+        f"UPDATE {tabela} SET updated_at = NOW() - INTERVAL %s DAY "
+        f"WHERE id IN ({', '.join(['%s'] * len(ids))})",
+        (dias, *ids),
+    )
+    mysql_db.commit()
+    cursor.close()
+
+
+def _contar(mysql_db, tabela):
+    cursor = mysql_db.cursor()
+    cursor.execute(f"SELECT COUNT(*) FROM {tabela}")
+    total = cursor.fetchone()[0]
+    cursor.close()
+    return total
+
+
+class TestOrigem:
+    """FROM com ou sem as linhas arquivadas (sem banco)"""
+
+    def test_so_com_incluir_arquivados(self):
+        assert ApoliceDAO()._origem() == "apolices"
+        assert "UNION ALL SELECT" in ApoliceDAO()._origem(incluir_arquivados=True)
+        assert ApoliceDAO()._origem(incluir_arquivados=True).endswith("AS apolices")
+
+    def test_tabela_sem_arquivo(self):
+        assert ClienteDAO()._origem(incluir_arquivados=True) == "clientes"
+
+
+class TestArquivador:
+    """Movimentação para as tabelas de arquivo no MySQL"""
+
+    def test_sinistros_fechados_antigos(self, mysql_db, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+
+        def criar(status):
+            return sinistro_dao.criar({"apolice_id": apolice_teste_id, "status": status})
+
+        antigos = [criar("fechado") for _ in range(5)]
+        aberto, recente = criar("aberto"), criar("fechado")
+        _envelhecer(mysql_db, "sinistros", [*antigos, aberto])
+
+        arquivador = Arquivador(dias_retencao=365, tamanho_lote=2, connection=mysql_db)
+
+        assert arquivador.arquivar_sinistros() == 5
+        assert [s["id"] for s in sinistro_dao.filtrar(order_by="id")] == [aberto, recente]
+        assert sinistro_dao.contar(incluir_arquivados=True) == 7
+        assert sinistro_dao.contar(status="fechado", incluir_arquivados=True) == 6
+
+    def test_apolice_cancelada_leva_os_sinistros(self, mysql_db, dao_factories, apolice_teste_id):
+        apolice_dao, sinistro_dao = dao_factories["apolice"], dao_factories["sinistro"]
+        sinistro_id = sinistro_dao.criar({"apolice_id": apolice_teste_id, "status": "fechado"})
+        apolice_dao.transicionar_status(apolice_teste_id, "ativa", "cancelada")
+        _envelhecer(mysql_db, "apolices", [apolice_teste_id])
+
+        resultado = Arquivador(connection=mysql_db).arquivar_tudo()
+
+        assert resultado == {"sinistros": 0, "apolices": 1}
+        assert apolice_dao.ler_por_id(apolice_teste_id) is None
+        assert _contar(mysql_db, "sinistros_arquivo") == 1
+        arquivado = sinistro_dao.filtrar(id=sinistro_id, incluir_arquivados=True)
+        assert arquivado[0]["apolice_id"] == apolice_teste_id
+
+    def test_apolice_com_sinistro_aberto_fica(self, mysql_db, dao_factories, apolice_teste_id):
+        apolice_dao = dao_factories["apolice"]
+        dao_factories["sinistro"].criar({"apolice_id": apolice_teste_id, "status": "aberto"})
+        apolice_dao.transicionar_status(apolice_teste_id, "ativa", "cancelada")
+        _envelhecer(mysql_db, "apolices", [apolice_teste_id])
+
+        assert Arquivador(connection=mysql_db).arquivar_apolices() == 0
+        assert apolice_dao.ler_por_id(apolice_teste_id)["status"] == "cancelada"
+
+    def test_nao_gera_tombstones(self, mysql_db, dao_factories, apolice_teste_id):
+        sinistro_id = dao_factories["sinistro"].criar(
+            {"apolice_id": apolice_teste_id, "status": "fechado"}
+        )
+        _envelhecer(mysql_db, "sinistros", [sinistro_id])
+
+        Arquivador(connection=mysql_db).arquivar_sinistros()
+
+        assert _contar(mysql_db, "exclusoes") == 0
+        cursor = mysql_db.cursor()
+        cursor.execute("SELECT @arquivamento")
+        assert cursor.fetchone()[0] is None
+        cursor.close()
+
+
+@pytest.mark.slow
+class TestBenchmarkArquivamento:
+    """Benchmark: listagem das apólices de um cliente com e sem o histórico cancelado"""
+
+    def test_consulta_quente_mais_rapida(self, mysql_db, cliente_teste_id, seguro_teste_id):
+        apolice_dao = ApoliceDAO(mysql_db)
+        canceladas, ativas, repeticoes = 50_000, 1_000, 20
+        cursor = mysql_db.cursor()
+        cursor.executemany(
+            "INSERT INTO apolices (cliente_id, seguro_id, status, updated_at) "
+            "VALUES (%s, %s, %s, NOW() - INTERVAL 400 DAY)",
+            [(cliente_teste_id, seguro_teste_id, "cancelada")] * canceladas
+            + [(cliente_teste_id, seguro_teste_id, "ativa")] * ativas,
+        )
+        mysql_db.commit()
+        cursor.close()
+
+        def medir():
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                linhas = apolice_dao.filtrar(cliente_id=cliente_teste_id, order_by="id")
+            return (time.perf_counter() - inicio) / repeticoes * 1000, len(linhas)
+
+        ms_antes, linhas_antes = medir()
+        inicio = time.perf_counter()
+        arquivadas = Arquivador(connection=mysql_db).arquivar_apolices()
+        duracao = time.perf_counter() - inicio
+        ms_depois, linhas_depois = medir()
+
+        print(
+            f"\narquivamento: {arquivadas / duracao:,.0f} apólices/s | listagem do cliente: "
+            f"{ms_antes:.1f} ms -> {ms_depois:.1f} ms"
+        )
+        assert (arquivadas, linhas_antes, linhas_depois) == (
+            canceladas,
+            canceladas + ativas,
+            ativas,
+        )
+        assert apolice_dao.contar(incluir_arquivados=True) == canceladas + ativas
+        assert ms_depois * 5 < ms_antes
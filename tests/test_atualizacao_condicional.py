@@ -0,0 +1,132 @@
+"""
+Testes das atualizações por diferença e das transições de status condicionais (compare-and-set)
+"""
+import time
+
+import pytest
+
+from functions.dao_mysql import ApoliceDAO, SeguroDAO, SinistroDAO
+
+
+class TestDiferenca:
+    """Cálculo das colunas alteradas (sem banco)"""
+
+    def test_so_colunas_alteradas(self):
+        anterior = {"id": 1, "apolice_id": 3, "descricao": "Colisão", "status": "aberto"}
+        dados = {**anterior, "status": "fechado", "status_anterior": "aberto"}
+
+        assert SinistroDAO().diferenca(dados, anterior) == {"status": "fechado"}
+
+    def test_ignora_id_e_chaves_desconhecidas(self):
+        assert ApoliceDAO().diferenca({"id": 9, "motivo": "x"}, {"id": 1}) == {}
+
+
+class TestAtualizacaoCondicional:
+    """UPDATEs condicionais no MySQL"""
+
+    def test_transicionar_status(self, dao_factories, apolice_teste_id):
+        apolice_dao = dao_factories["apolice"]
+
+        assert apolice_dao.transicionar_status(apolice_teste_id, "ativa", "cancelada")
+        assert not apolice_dao.transicionar_status(apolice_teste_id, "ativa", "cancelada")
+        assert apolice_dao.ler_por_id(apolice_teste_id)["status"] == "cancelada"
+
+    def test_transicionar_status_de_varios(self, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+        sinistro_id = sinistro_dao.criar({"apolice_id": apolice_teste_id, "status": "pendente"})
+
+        assert sinistro_dao.transicionar_status(sinistro_id, ["aberto", "pendente"], "fechado")
+
+    def test_linha_que_ja_tinha_os_valores_conta_como_atualizada(
+        self, dao_factories, apolice_teste_id
+    ):
+        sinistro_dao = dao_factories["sinistro"]
+        sinistro_id = sinistro_dao.criar({"apolice_id": apolice_teste_id, "status": "fechado"})
+
+        # rowcount 0 (nada mudou), mas a linha atendia às condições
+        assert sinistro_dao.transicionar_status(sinistro_id, ["aberto", "fechado"], "fechado")
+        assert not sinistro_dao.transicionar_status(sinistro_id, "aberto", "fechado")
+
+    def test_atualizar_diferenca_falha_se_a_linha_mudou(self, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+        sinistro_id = sinistro_dao.criar({"apolice_id": apolice_teste_id, "status": "aberto"})
+        lido = sinistro_dao.ler_por_id(sinistro_id)
+        sinistro_dao.transicionar_status(sinistro_id, "aberto", "em_analise")
+
+        assert not sinistro_dao.atualizar(sinistro_id, {"status": "fechado"}, anterior=lido)
+        assert sinistro_dao.ler_por_id(sinistro_id)["status"] == "em_analise"
+
+    def test_atualizar_diferenca_sem_mudanca(self, dao_factories, seguro_teste_id):
+        seguro_dao = dao_factories["seguro"]
+        lido = seguro_dao.ler_por_id(seguro_teste_id)
+
+        assert seguro_dao.atualizar(seguro_teste_id, dict(lido), anterior=lido)
+
+    def test_cancelar_apolice_ja_cancelada(self, servicos_factories, apolice_teste_id):
+        apolice_service = servicos_factories["apolice"]
+
+        assert apolice_service.cancelar_apolice(apolice_teste_id, "admin")
+        assert not apolice_service.cancelar_apolice(apolice_teste_id, "admin")
+
+
+class _CursorContado:
+    def __init__(self, cursor, idas):
+        self._cursor = cursor
+        self._idas = idas
+
+    def execute(self, *args, **kwargs):
+        self._idas.append(args[0])
+        return self._cursor.execute(*args, **kwargs)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class _ConexaoContada:
+    """Conexão que conta os comandos enviados ao servidor"""
+
+    def __init__(self, conn):
+        self._conn = conn
+        self.idas: list[str] = []
+
+    def cursor(self, *args, **kwargs):
+        return _CursorContado(self._conn.cursor(*args, **kwargs), self.idas)
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+
+@pytest.mark.slow
+class TestBenchmarkAtualizacaoCondicional:
+    """Benchmark: cancelamento por leitura + UPDATE da linha inteira vs. compare-and-set"""
+
+    def test_menos_idas_e_lock_mais_curto(self, mysql_db, cliente_teste_id, seguro_teste_id):
+        conn = _ConexaoContada(mysql_db)
+        apolice_dao = ApoliceDAO(conn)
+        dados = {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id, "status": "ativa"}
+        total = 300
+        ids = [apolice_dao.criar(dados) for _ in range(2 * total)]
+
+        def medir(cancelar, alvos):
+            conn.idas.clear()
+            inicio = time.perf_counter()
+            for apolice_id in alvos:
+                assert cancelar(apolice_id)
+            return (time.perf_counter() - inicio) / total * 1000, len(conn.idas) / total
+
+        def linha_inteira(apolice_id):
+            apolice = apolice_dao.ler_por_id(apolice_id)
+            return apolice_dao.atualizar(apolice_id, {**apolice, "status": "cancelada"})
+
+        def condicional(apolice_id):
+            return apolice_dao.transicionar_status(apolice_id, "ativa", "cancelada")
+
+        ms_antes, idas_antes = medir(linha_inteira, ids[:total])
+        ms_depois, idas_depois = medir(condicional, ids[total:])
+
+        print(
+            f"\nleitura + linha inteira: {ms_antes:.2f} ms, {idas_antes:.0f} idas | "
+            f"compare-and-set: {ms_depois:.2f} ms, {idas_depois:.0f} ida"
+        )
+        assert (idas_antes, idas_depois) == (2, 1)
+        assert ms_depois < ms_antes
@@ -0,0 +1,168 @@
+"""
+Testes da busca textual com índices FULLTEXT (ngram) em clientes e sinistros
+"""
+import random
+import time
+
+import pytest
+
+from database.db_setup import desparticionar_sinistros, particionar_sinistros
+from functions.dao_mysql import ClienteDAO, SinistroDAO
+from tests.conftest import gerar_cpf_unico
+from utils.utils import destacar_trecho
+
+
+def _criar_clientes(mysql_db, cliente_teste, pessoas):
+    cliente_dao = ClienteDAO(mysql_db)
+    return [
+        cliente_dao.criar(
+            {**cliente_teste, "cpf": gerar_cpf_unico(), "nome": nome, "endereco": endereco}
+        )
+        for nome, endereco in pessoas
+    ]
+
+
+class TestTrecho:
+    """Trecho destacado e montagem da busca (sem banco)"""
+
+    def test_destaca_sem_caixa_e_sem_acento(self):
+        assert destacar_trecho("Maria da Silva", ["silv"]) == "Maria da **Silv**a"
+        assert destacar_trecho("Rua São João, 10", ["joao"]) == "Rua São **João**, 10"
+        assert destacar_trecho("Colisão", ["vidro"]) is None
+
+    def test_janela_em_volta_da_ocorrencia(self):
+        texto = "x" * 100 + " vidro quebrado " + "y" * 100
+
+        trecho = destacar_trecho(texto, ["vidro"], tamanho=40)
+
+        assert trecho.startswith("…") and trecho.endswith("…")
+        assert "**vidro**" in trecho
+        assert len(trecho.replace("**", "").strip("…")) == 40
+
+    def test_termo_vazio(self):
+        assert ClienteDAO().buscar_texto("  +-*() ") == []
+
+    def test_busca_por_like(self):
+        sql, parametros = ClienteDAO()._sql_busca_like(
+            ["id", "nome"], ["silva", "rua"], {"id__gt": 5}, 10, 20
+        )
+
+        assert "WHERE id > %s AND (nome LIKE %s OR endereco LIKE %s) AND (nome LIKE" in sql
+        assert parametros == (5, "%silva%", "%silva%", "%rua%", "%rua%", 10, 20)
+
+
+class TestBuscaTextual:
+    """buscar_texto no MySQL"""
+
+    def test_clientes_por_trecho_de_nome_e_endereco(self, mysql_db, cliente_teste):
+        silva, silveira, _ = _criar_clientes(
+            mysql_db,
+            cliente_teste,
+            [
+                ("Maria da Silva", "Avenida Paulista, 1000"),
+                ("Pedro Silveira", "Rua das Flores, 15"),
+                ("Ana Souza", "Avenida Paulista, 200"),
+            ],
+        )
+        cliente_dao = ClienteDAO(mysql_db)
+
+        resultados = cliente_dao.buscar_texto("silv")
+
+        assert sorted(r["id"] for r in resultados) == sorted([silva, silveira])
+        assert all(r["relevancia"] > 0 for r in resultados)
+        assert "**Silv**" in resultados[0]["trecho"]
+        # Todas as palavras precisam ocorrer, em qualquer das colunas do índice
+        assert [r["id"] for r in cliente_dao.buscar_texto("silva paulista")] == [silva]
+
+    def test_paginacao_e_filtros(self, mysql_db, cliente_teste):
+        ids = _criar_clientes(
+            mysql_db, cliente_teste, [(f"Cliente Oliveira {i}", "Rua A") for i in range(5)]
+        )
+        cliente_dao = ClienteDAO(mysql_db)
+
+        primeira = cliente_dao.buscar_texto("oliveira", limite=3)
+        segunda = cliente_dao.buscar_texto("oliveira", limite=3, offset=3)
+
+        assert sorted(r["id"] for r in primeira + segunda) == ids
+        assert [r["id"] for r in cliente_dao.buscar_texto("oliveira", id__gt=ids[3])] == [ids[4]]
+
+    def test_sinistros_por_descricao(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        vidro = sinistro_dao.criar(
+            {
+                "apolice_id": apolice_teste_id,
+                "descricao": "Vidro traseiro quebrado no estacionamento",
+            }
+        )
+        sinistro_dao.criar({"apolice_id": apolice_teste_id, "descricao": "Colisão lateral"})
+        fechado = sinistro_dao.criar(
+            {"apolice_id": apolice_teste_id, "descricao": "Vidro dianteiro trincado"}
+        )
+        sinistro_dao.transicionar_status(fechado, "aberto", "fechado")
+
+        assert sorted(r["id"] for r in sinistro_dao.buscar_texto("vidro")) == [vidro, fechado]
+        assert [r["id"] for r in sinistro_dao.buscar_texto("vidro", status="aberto")] == [vidro]
+
+    def test_sinistros_particionados_usam_like(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        sinistro_id = sinistro_dao.criar(
+            {"apolice_id": apolice_teste_id, "descricao": "Alagamento na garagem"}
+        )
+        cursor = mysql_db.cursor()
+        particionar_sinistros(cursor, "anual", particoes_futuras=1)
+        try:
+            resultados = sinistro_dao.buscar_texto("alagamento")
+        finally:
+            cursor.execute("TRUNCATE TABLE sinistros")
+            desparticionar_sinistros(cursor)
+            mysql_db.commit()
+            cursor.close()
+
+        assert [r["id"] for r in resultados] == [sinistro_id]
+        assert resultados[0]["trecho"] == "**Alagamento** na garagem"
+
+
+@pytest.mark.slow
+class TestBenchmarkBuscaTextual:
+    """Benchmark: busca por trecho de nome com listar() + filtro em Python vs. FULLTEXT"""
+
+    def test_fulltext_mais_rapido_que_varredura(self, mysql_db, cliente_teste):
+        total, repeticoes = 200_000, 10
+        sobrenomes = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Costa"]
+        aleatorio = random.Random(42)
+        cursor = mysql_db.cursor()
+        cursor.executemany(
+            "INSERT INTO clientes (nome, cpf, endereco) VALUES (%s, %s, %s)",
+            [
+                (
+                    f"Cliente {i} {aleatorio.choice(sobrenomes)}",
+                    f"{i:011d}",
+                    f"Rua {aleatorio.choice(sobrenomes)}, {i}",
+                )
+                for i in range(total)
+            ],
+        )
+        mysql_db.commit()
+        cursor.execute("UPDATE clientes SET nome = 'Beatriz Quaresma' WHERE cpf = '00000012345'")
+        mysql_db.commit()
+        cursor.close()
+        cliente_dao = ClienteDAO(mysql_db)
+
+        def varredura():
+            return [c for c in cliente_dao.listar() if "quaresm" in c["nome"].lower()]
+
+        def medir(busca):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                encontrados = busca()
+            return (time.perf_counter() - inicio) / repeticoes * 1000, len(encontrados)
+
+        ms_varredura, achados_varredura = medir(varredura)
+        ms_fulltext, achados_fulltext = medir(lambda: cliente_dao.buscar_texto("quaresm"))
+
+        print(
+            f"\nbusca por 'quaresm' em {total} clientes: varredura {ms_varredura:.0f} ms | "
+            f"FULLTEXT {ms_fulltext:.1f} ms"
+        )
+        assert achados_varredura == achados_fulltext == 1
+        assert ms_fulltext * 20 < ms_varredura
@@ -0,0 +1,69 @@
+"""
+Testes do cache de relatórios exportados
+A exportação é reaproveitada enquanto a versão dos dados (MAX(updated_at) + COUNT(*)) não muda
+"""
+from functions.auditoria_service import RelatorioMetadadosService
+from functions.dao_mysql import ClienteDAO, versao_dados
+from functions.exporta_relatorios import _exportar_com_cache
+
+
+class TestCacheRelatorios:
+    """Hits e misses do cache de relatórios"""
+
+    def test_versao_dados_muda_com_insercao(self, mysql_db, cliente_teste):
+        antes = versao_dados(("clientes",), connection=mysql_db)
+        ClienteDAO(mysql_db).criar(cliente_teste)
+        depois = versao_dados(("clientes",), connection=mysql_db)
+
+        assert antes["clientes"]["total"] == 0
+        assert depois["clientes"]["total"] == 1
+        assert depois != antes
+
+    def test_reaproveita_arquivo_ate_dados_mudarem(
+        self, mysql_db, mongodb_db, cliente_teste, tmp_path
+    ):
+        caminho = tmp_path / "clientes.csv"
+        execucoes = []
+
+        def gerar(destino):
+            execucoes.append(destino)
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write("id,nome\n")
+            return 0
+
+        def exportar():
+            return _exportar_com_cache(
+                "clientes",
+                str(caminho),
+                ("clientes",),
+                gerar,
+                usuario="admin",
+                mysql_connection=mysql_db,
+                mongo_database=mongodb_db,
+            )
+
+        assert exportar() is False
+        assert exportar() is True
+        ClienteDAO(mysql_db).criar(cliente_teste)
+        assert exportar() is False
+
+        assert len(execucoes) == 2
+        estatisticas = RelatorioMetadadosService(mongodb_db).estatisticas_cache("clientes")
+        assert estatisticas["hit"] == 1
+        assert estatisticas["miss"] == 2
+
+    def test_arquivo_sobrescrito_invalida_cache(self, mysql_db, mongodb_db, tmp_path):
+        caminho = tmp_path / "seguros.csv"
+
+        def gerar(destino):
+            with open(destino, "w", encoding="utf-8") as f:
+                f.write("id\n")
+            return 0
+
+        argumentos = {"mysql_connection": mysql_db, "mongo_database": mongodb_db}
+        _exportar_com_cache("seguros", str(caminho), ("seguros",), gerar, **argumentos)
+        caminho.write_text("conteudo alterado por outra exportacao\n", encoding="utf-8")
+
+        assert (
+            _exportar_com_cache("seguros", str(caminho), ("seguros",), gerar, **argumentos) is False
+        )
@@ -0,0 +1,117 @@
+"""
+Testes do registro de tipos BSON (MongoDB) e do decodificador de linhas dos DAOs (MySQL)
+"""
+import tracemalloc
+from datetime import date, datetime
+from decimal import Decimal
+
+import bson
+import pytest
+
+from database.mongo_setup import CODEC_OPTIONS, aplicar_codecs
+from functions.cliente import Cliente
+from functions.dao_mysql import _decodificar_linha
+
+
+class TestCodecsMongo:
+    """Codificação nativa de date, Decimal e objetos de domínio"""
+
+    def test_round_trip_tipos(self):
+        """date vira string ISO, Decimal ida e volta, datetime continua nativo"""
+        documento = {
+            "nascimento": date(1990, 5, 17),
+            "valor": Decimal("1234.56"),
+            "criado_em": datetime(2025, 1, 1, 10, 30),
+            "itens": [{"data": date(2025, 2, 1)}],
+        }
+
+        decodificado = bson.decode(
+            bson.encode(documento, codec_options=CODEC_OPTIONS), CODEC_OPTIONS
+        )
+
+        assert decodificado["nascimento"] == "1990-05-17"
+        assert decodificado["valor"] == Decimal("1234.56")
+        assert decodificado["criado_em"] == datetime(2025, 1, 1, 10, 30)
+        assert decodificado["itens"][0]["data"] == "2025-02-01"
+
+    def test_objeto_dominio(self):
+        """Objetos de domínio são gravados a partir dos seus atributos públicos"""
+        cliente = Cliente(
+            "ana silva", "12345678900", date(1990, 1, 1), "rua a", "11999999999", "ANA@X.COM"
+        )
+
+        decodificado = bson.decode(
+            bson.encode({"cliente": cliente}, codec_options=CODEC_OPTIONS), CODEC_OPTIONS
+        )
+
+        assert decodificado["cliente"]["nome"] == "Ana Silva"
+        assert decodificado["cliente"]["data_nascimento"] == "01/01/1990"
+
+    def test_aplicar_codecs_no_database_injetado(self, mongodb_db):
+        """O database injetado nos serviços recebe o registro de tipos"""
+        db = aplicar_codecs(mongodb_db)
+        db.auditoria.insert_one({"valor": Decimal("10.50"), "data": date(2025, 3, 1)})
+
+        documento = db.auditoria.find_one()
+        assert documento["valor"] == Decimal("10.50")
+        assert documento["data"] == "2025-03-01"
+        assert aplicar_codecs(db) is db
+
+
+class TestDecodificadorLinhas:
+    """Decodificador de linhas do MySQL"""
+
+    def test_decodifica_valor_e_detalhes(self):
+        linha = _decodificar_linha(
+            ["id", "valor", "detalhes"], (1, Decimal("99.90"), '{"placa": "ABC1D23"}')
+        )
+
+        assert linha == {"id": 1, "valor": 99.9, "detalhes": {"placa": "ABC1D23"}}
+
+    def test_mantem_detalhes_invalidos(self):
+        linha = _decodificar_linha(["detalhes", "valor"], ("texto livre", None))
+
+        assert linha == {"detalhes": "texto livre", "valor": None}
+
+
+def _serializar_com_copia(obj):
+    """Abordagem anterior: copia recursivamente o documento antes de gravar"""
+    if isinstance(obj, dict):
+        return {k: _serializar_com_copia(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [_serializar_com_copia(item) for item in obj]
+    elif isinstance(obj, (date, datetime)):
+        return obj.isoformat()
+    elif isinstance(obj, Decimal):
+        return float(obj)
+    return obj
+
+
+@pytest.mark.slow
+class TestBenchmarkCodecs:
+    """Benchmark: pico de memória ao codificar 'detalhes' grandes"""
+
+    def test_alocacao_codec_vs_copia(self):
+        documento = {
+            "detalhes": {
+                "itens": [
+                    {"data": date(2025, 1, 1 + i % 28), "valor": Decimal(i), "descricao": "x" * 50}
+                    for i in range(20000)
+                ]
+            }
+        }
+
+        def pico(funcao):
+            tracemalloc.start()
+            funcao()
+            _, maximo = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            return maximo
+
+        copia = pico(lambda: bson.encode(_serializar_com_copia(documento)))
+        codec = pico(lambda: bson.encode(documento, codec_options=CODEC_OPTIONS))
+
+        print(
+            f"\nPico de memória cópia+encode: {copia / 1024:.0f} KiB | codec: {codec / 1024:.0f} KiB"
+        )
+        assert codec < copia
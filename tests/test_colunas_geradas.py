@@ -0,0 +1,138 @@
+"""
+Testes das colunas geradas de seguros.detalhes (placa, ano, valor_segurado) e seus índices
+"""
+import json
+import time
+
+import pytest
+
+from database.db_setup import COLUNAS_GERADAS_SEGUROS, ddl_colunas_geradas_seguros
+from functions.dao_mysql import SeguroDAO
+from functions.seguro import Automovel, Residencial, Vida
+
+
+def _criar(seguro_dao, cliente_id, seguro, valor=100.0):
+    return seguro_dao.criar(
+        {"tipo": seguro.tipo, "valor": valor, "detalhes": seguro.dados, "cliente_id": cliente_id}
+    )
+
+
+class TestColunasGeradasSemBanco:
+    """DDL e validação das colunas geradas (sem banco)"""
+
+    def test_ddl(self):
+        ddl = ddl_colunas_geradas_seguros()
+
+        assert all(f"{nome} " in ddl for nome in COLUNAS_GERADAS_SEGUROS)
+        assert "INDEX idx_placa (placa)" in ddl
+
+    def test_filtraveis_mas_nao_gravaveis(self):
+        where, valores = SeguroDAO()._compilar_filtros({"placa": "ABC1D23", "ano__gte": 2020})
+
+        assert where == " WHERE placa = %s AND ano >= %s"
+        assert valores == ["ABC1D23", 2020]
+        with pytest.raises(ValueError):
+            SeguroDAO().atualizar_se(1, {"placa": "XYZ9999"})
+
+
+class TestBuscasPorColunasGeradas:
+    """Buscas de SeguroDAO pelas colunas geradas no MySQL"""
+
+    def test_buscar_por_placa_normaliza(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        carro = _criar(seguro_dao, cliente_teste_id, Automovel("gol", 2019, "abc1d23"))
+        _criar(seguro_dao, cliente_teste_id, Automovel("uno", 2015, "XYZ9876"))
+        # Gravado fora do modelo, com a placa em minúsculas
+        minusculas = seguro_dao.criar(
+            {"tipo": "Automóvel", "detalhes": {"placa": "abc1d23"}, "cliente_id": cliente_teste_id}
+        )
+
+        encontrados = seguro_dao.buscar_por_placa(" abc1D23 ")
+
+        assert [s["id"] for s in encontrados] == [carro, minusculas]
+        assert encontrados[0]["detalhes"]["modelo"] == "Gol"
+        assert "placa" not in encontrados[0]
+        assert seguro_dao.buscar_por_placa("AAA0000") == []
+
+    def test_ano_e_valor_segurado(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        antigo = _criar(seguro_dao, cliente_teste_id, Automovel("gol", 2010, "AAA1111"))
+        novo = _criar(seguro_dao, cliente_teste_id, Automovel("onix", 2022, "BBB2222"))
+        casa = _criar(seguro_dao, cliente_teste_id, Residencial("rua a", 350000))
+        vida = _criar(seguro_dao, cliente_teste_id, Vida(500000, ["ana"]))
+        # JSON com tipos inválidos não impede a gravação: as colunas geradas ficam NULL
+        invalido = seguro_dao.criar(
+            {"tipo": "Automóvel", "detalhes": {"ano": "novo"}, "cliente_id": cliente_teste_id}
+        )
+
+        assert [s["id"] for s in seguro_dao.listar_por_ano(2015)] == [novo]
+        assert [s["id"] for s in seguro_dao.listar_por_ano(2000, 2012)] == [antigo]
+        assert [s["id"] for s in seguro_dao.listar_por_valor_segurado(100000)] == [vida, casa]
+        assert seguro_dao.somar("valor_segurado") == 850000.0
+        assert seguro_dao.contar(ano=None) == 3
+        assert seguro_dao.ler_por_id(invalido)["detalhes"] == {"ano": "novo"}
+
+    def test_acompanham_atualizacao_do_json(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        seguro_id = _criar(seguro_dao, cliente_teste_id, Automovel("gol", 2019, "AAA1111"))
+
+        seguro_dao.atualizar(seguro_id, {"detalhes": Automovel("gol", 2019, "ccc3333").dados})
+
+        assert seguro_dao.buscar_por_placa("AAA1111") == []
+        assert [s["id"] for s in seguro_dao.buscar_por_placa("CCC3333")] == [seguro_id]
+
+    def test_busca_usa_o_indice(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        for placa in ("AAA1111", "BBB2222", "CCC3333"):
+            _criar(seguro_dao, cliente_teste_id, Automovel("gol", 2019, placa))
+        cursor = mysql_db.cursor(dictionary=True)
+        cursor.execute("EXPLAIN SELECT id FROM seguros WHERE placa = 'ABC1D23'")
+        plano = cursor.fetchone()
+        cursor.close()
+
+        assert plano["key"] == "idx_placa"
+
+
+@pytest.mark.slow
+class TestBenchmarkBuscaPorPlaca:
+    """Benchmark: busca por placa com listar() + json.loads em Python vs. índice idx_placa"""
+
+    def test_indice_mais_rapido_que_varredura(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        total, repeticoes = 50_000, 20
+        cursor = mysql_db.cursor()
+        cursor.executemany(
+            "INSERT INTO seguros (tipo, valor, detalhes, cliente_id) VALUES (%s, %s, %s, %s)",
+            [
+                (
+                    "Automóvel",
+                    100.0,
+                    json.dumps(Automovel("gol", 2019, f"AAA{i:04d}").dados),
+                    cliente_teste_id,
+                )
+                for i in range(total)
+            ],
+        )
+        mysql_db.commit()
+        cursor.close()
+        alvo = f"aaa{total - 1:04d}"
+
+        def varredura():
+            return [
+                s
+                for s in seguro_dao.listar()
+                if (s["detalhes"] or {}).get("placa", "").upper() == alvo.upper()
+            ]
+
+        def medir(busca):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                encontrados = busca()
+            return (time.perf_counter() - inicio) / repeticoes * 1000, len(encontrados)
+
+        ms_varredura, achados_varredura = medir(varredura)
+        ms_indice, achados_indice = medir(lambda: seguro_dao.buscar_por_placa(alvo))
+
+        print(f"\nbusca por placa: varredura {ms_varredura:.1f} ms | índice {ms_indice:.2f} ms")
+        assert achados_varredura == achados_indice == 1
+        assert ms_indice * 20 < ms_varredura
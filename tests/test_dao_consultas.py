@@ -0,0 +1,185 @@
+"""
+Testes da API de consulta dos DAOs (filtro, ordenação e limite executados no MySQL)
+"""
+import statistics
+import time
+
+import pytest
+
+from functions.dao_mysql import ApoliceDAO, ClienteDAO, SeguroDAO, SinistroDAO
+from tests.conftest import gerar_cpf_unico
+
+
+class TestCompilacaoFiltros:
+    """Compilação dos filtros para SQL parametrizado (sem banco)"""
+
+    def test_igualdade_in_e_operadores(self):
+        where, valores = SeguroDAO()._compilar_filtros(
+            {"cliente_id": 7, "tipo": ["Vida", "Residencial"], "valor__gte": 1000, "detalhes": None}
+        )
+
+        assert where == (
+            " WHERE cliente_id = %s AND tipo IN (%s, %s) AND valor >= %s AND detalhes IS NULL"
+        )
+        assert valores == [7, "Vida", "Residencial", 1000]
+
+    def test_lista_vazia_nao_retorna_nada(self):
+        where, valores = SeguroDAO()._compilar_filtros({"id": []})
+
+        assert where == " WHERE 1 = 0"
+        assert valores == []
+
+    def test_ordem(self):
+        assert ApoliceDAO()._compilar_ordem(["-data_emissao", "id"]) == (
+            " ORDER BY data_emissao DESC, id"
+        )
+
+    @pytest.mark.parametrize(
+        "filtros",
+        [{"status; DROP TABLE apolices": "x"}, {"status__like": "a%"}, {"nome": "x"}],
+    )
+    def test_rejeita_coluna_ou_operador_invalido(self, filtros):
+        with pytest.raises(ValueError):
+            ApoliceDAO()._compilar_filtros(filtros)
+
+    def test_rejeita_ordem_invalida(self):
+        with pytest.raises(ValueError):
+            SinistroDAO()._compilar_ordem("status DESC")
+
+    def test_rejeita_agregacao_em_coluna_invalida(self):
+        with pytest.raises(ValueError):
+            SeguroDAO().somar("valor) FROM seguros; --")
+        with pytest.raises(ValueError):
+            SinistroDAO().contar(agrupar_por="nome")
+
+
+class TestFiltrar:
+    """filtrar() contra o MySQL"""
+
+    def test_filtrar_por_cliente_ordenado_e_limitado(self, mysql_db, cliente_teste, seguro_teste):
+        cliente_id = ClienteDAO(mysql_db).criar(cliente_teste)
+        seguro_dao = SeguroDAO(mysql_db)
+        for valor in (300.0, 100.0, 200.0):
+            seguro_dao.criar({**seguro_teste, "cliente_id": cliente_id, "valor": valor})
+
+        seguros = seguro_dao.filtrar(cliente_id=cliente_id, order_by="-valor", limit=2)
+
+        assert [s["valor"] for s in seguros] == [300.0, 200.0]
+        assert seguros[0]["detalhes"]["cobertura"] == "Completa"
+        assert seguro_dao.filtrar(cliente_id=cliente_id + 1) == []
+
+    def test_filtrar_por_status(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        for status in ("aberto", "aberto", "fechado"):
+            sinistro_dao.criar(
+                {"apolice_id": apolice_teste_id, "descricao": "Teste", "status": status}
+            )
+
+        assert len(sinistro_dao.filtrar(status="aberto")) == 2
+        assert len(sinistro_dao.filtrar(status__ne="aberto")) == 1
+
+
+class TestAgregacoes:
+    """contar(), existe() e somar() executados no MySQL"""
+
+    def test_contar_e_existe(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        assert sinistro_dao.contar() == 0
+        assert not sinistro_dao.existe()
+
+        for status in ("aberto", "aberto", "fechado"):
+            sinistro_dao.criar(
+                {"apolice_id": apolice_teste_id, "descricao": "Teste", "status": status}
+            )
+
+        assert sinistro_dao.contar() == 3
+        assert sinistro_dao.contar(status="aberto") == 2
+        assert sinistro_dao.contar(agrupar_por="status") == {"aberto": 2, "fechado": 1}
+        assert sinistro_dao.existe(status="fechado")
+        assert not sinistro_dao.existe(status="em análise")
+
+    def test_somar_por_grupo(self, mysql_db, cliente_teste, seguro_teste):
+        cliente_id = ClienteDAO(mysql_db).criar(cliente_teste)
+        seguro_dao = SeguroDAO(mysql_db)
+        for tipo, valor in (("Vida", 100.0), ("Vida", 50.5), ("Residencial", 200.0)):
+            seguro_dao.criar(
+                {**seguro_teste, "cliente_id": cliente_id, "tipo": tipo, "valor": valor}
+            )
+
+        assert seguro_dao.somar("valor", cliente_id=cliente_id) == 350.5
+        assert seguro_dao.somar("valor", agrupar_por="tipo") == {
+            "Vida": 150.5,
+            "Residencial": 200.0,
+        }
+        assert seguro_dao.somar("valor", cliente_id=cliente_id + 1) == 0
+
+
+class TestListagemPorChave:
+    """listar_por_cliente() / listar_por_apolice() paginados por id"""
+
+    def test_seguros_e_apolices_do_cliente(self, mysql_db, cliente_teste, seguro_teste):
+        cliente_dao, seguro_dao = ClienteDAO(mysql_db), SeguroDAO(mysql_db)
+        apolice_dao = ApoliceDAO(mysql_db)
+        cliente_id = cliente_dao.criar(cliente_teste)
+        outro_id = cliente_dao.criar({**cliente_teste, "cpf": gerar_cpf_unico()})
+        ids = [seguro_dao.criar({**seguro_teste, "cliente_id": cliente_id}) for _ in range(5)]
+        seguro_dao.criar({**seguro_teste, "cliente_id": outro_id})
+        apolice_id = apolice_dao.criar({"cliente_id": cliente_id, "seguro_id": ids[0]})
+
+        primeira = seguro_dao.listar_por_cliente(cliente_id, limite=3)
+        segunda = seguro_dao.listar_por_cliente(cliente_id, apos_id=primeira[-1]["id"], limite=3)
+
+        assert [s["id"] for s in primeira + segunda] == ids
+        assert primeira[0]["detalhes"]["cobertura"] == "Completa"
+        assert len(seguro_dao.listar_por_cliente(outro_id)) == 1
+        assert [a["id"] for a in apolice_dao.listar_por_cliente(cliente_id)] == [apolice_id]
+        assert apolice_dao.listar_por_cliente(outro_id) == []
+
+    def test_sinistros_da_apolice(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        ids = [
+            sinistro_dao.criar({"apolice_id": apolice_teste_id, "descricao": f"Sinistro {i}"})
+            for i in range(3)
+        ]
+
+        assert [s["id"] for s in sinistro_dao.listar_por_apolice(apolice_teste_id)] == ids
+        pagina = sinistro_dao.listar_por_apolice(apolice_teste_id, apos_id=ids[1])
+        assert [s["id"] for s in pagina] == [ids[2]]
+        assert sinistro_dao.listar_por_apolice(apolice_teste_id + 1) == []
+
+
+@pytest.mark.slow
+class TestBenchmarkListagemPorChave:
+    """Benchmark: latência de listar_por_cliente() constante com o crescimento da tabela"""
+
+    def test_latencia_nao_cresce_com_a_tabela(self, mysql_db, cliente_teste, seguro_teste):
+        cliente_dao, seguro_dao = ClienteDAO(mysql_db), SeguroDAO(mysql_db)
+        alvo = cliente_dao.criar(cliente_teste)
+        outros = [cliente_dao.criar({**cliente_teste, "cpf": gerar_cpf_unico()}) for _ in range(20)]
+        for _ in range(20):
+            seguro_dao.criar({**seguro_teste, "cliente_id": alvo})
+
+        def inserir_seguros(quantidade):
+            cursor = mysql_db.cursor()
+            cursor.executemany(
+                "INSERT INTO seguros (tipo, descricao, valor, cliente_id) VALUES (%s, %s, %s, %s)",
+                [("AUTO", "Carga", 100.0, outros[i % len(outros)]) for i in range(quantidade)],
+            )
+            mysql_db.commit()
+            cursor.close()
+
+        def mediana_ms():
+            amostras = []
+            for _ in range(30):
+                inicio = time.perf_counter()
+                assert len(seguro_dao.listar_por_cliente(alvo, limite=20)) == 20
+                amostras.append((time.perf_counter() - inicio) * 1000)
+            return statistics.median(amostras)
+
+        latencias = {}
+        for tamanho in (1_000, 10_000, 50_000):
+            inserir_seguros(tamanho - seguro_dao.contar())
+            latencias[tamanho] = mediana_ms()
+
+        print("\n" + " | ".join(f"{n} linhas: {ms:.2f} ms" for n, ms in latencias.items()))
+        assert latencias[50_000] < 3 * latencias[1_000] + 1
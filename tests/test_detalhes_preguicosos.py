@@ -0,0 +1,126 @@
+"""
+Testes da decodificação preguiçosa de seguros.detalhes (LinhaPreguicosa) e da projeção colunas=
+"""
+import csv
+import json
+import time
+from decimal import Decimal
+
+import pytest
+
+from functions.dao_mysql import LinhaPreguicosa, SeguroDAO, _decodificar_linha
+from functions.exporta_relatorios import _gravar_csv
+
+COLUNAS = ["id", "tipo", "valor", "detalhes"]
+DETALHES = {"modelo": "Gol", "placa": "ABC1D23", "coberturas": ["roubo", "colisão"]}
+
+
+def _linha():
+    return _decodificar_linha(COLUNAS, (1, "Automóvel", Decimal("99.90"), json.dumps(DETALHES)))
+
+
+class TestLinhaPreguicosa:
+    """Comportamento de dict sem decodificar antes do acesso (sem banco)"""
+
+    def test_decodifica_so_no_acesso(self):
+        linha = _linha()
+
+        assert isinstance(linha, LinhaPreguicosa)
+        assert (linha["tipo"], linha["valor"]) == ("Automóvel", 99.9)
+        assert not linha.decodificada
+        assert linha["detalhes"] == DETALHES
+        assert linha.decodificada
+
+    def test_equivale_a_um_dict(self):
+        esperado = {"id": 1, "tipo": "Automóvel", "valor": 99.9, "detalhes": DETALHES}
+
+        assert _linha() == esperado
+        assert dict(_linha()) == esperado and {**_linha()} == esperado
+        assert json.loads(json.dumps(_linha())) == esperado
+        assert "detalhes" in _linha() and len(_linha()) == 4
+
+    def test_bruto_e_csv_sem_decodificar(self, tmp_path):
+        linha = _linha()
+        caminho = tmp_path / "seguros.csv"
+
+        _gravar_csv(caminho, [linha])
+
+        assert not linha.decodificada
+        with open(caminho, newline="", encoding="utf-8") as f:
+            assert json.loads(next(csv.DictReader(f))["detalhes"]) == DETALHES
+
+    def test_sem_coluna_json_e_dict_comum(self):
+        assert type(_decodificar_linha(["id", "valor"], (1, Decimal("1.5")))) is dict
+
+    def test_projecao_validada(self):
+        assert SeguroDAO()._projecao(["tipo", "placa"]) == ["tipo", "placa"]
+        with pytest.raises(ValueError):
+            SeguroDAO()._projecao(["valor; DROP TABLE seguros"])
+
+
+class TestProjecaoSeguros:
+    """ler_por_id/listar/filtrar com colunas= no MySQL"""
+
+    def test_colunas(self, mysql_db, cliente_teste_id, seguro_teste):
+        seguro_dao = SeguroDAO(mysql_db)
+        seguro_id = seguro_dao.criar({**seguro_teste, "cliente_id": cliente_teste_id})
+
+        assert seguro_dao.ler_por_id(seguro_id, colunas=["tipo", "valor"]) == {
+            "tipo": "AUTO",
+            "valor": 1200.0,
+        }
+        assert seguro_dao.listar(colunas=["id"]) == [{"id": seguro_id}]
+        assert seguro_dao.filtrar(id=seguro_id, colunas=["id", "cliente_id"]) == [
+            {"id": seguro_id, "cliente_id": cliente_teste_id}
+        ]
+
+    def test_regravar_linha_nao_decodificada(self, mysql_db, cliente_teste_id, seguro_teste):
+        seguro_dao = SeguroDAO(mysql_db)
+        original = seguro_dao.ler_por_id(
+            seguro_dao.criar({**seguro_teste, "cliente_id": cliente_teste_id})
+        )
+
+        dados = {coluna: original[coluna] for coluna in ("tipo", "valor", "cliente_id")}
+        copia_id = seguro_dao.criar({**dados, "detalhes": original.bruto("detalhes")})
+
+        assert not original.decodificada
+        assert seguro_dao.ler_por_id(copia_id)["detalhes"] == seguro_teste["detalhes"]
+
+
+@pytest.mark.slow
+class TestBenchmarkDetalhesPreguicosos:
+    """Benchmark: relatório de tipo/valor sobre 1M de seguros (eager x lazy x projeção)"""
+
+    def test_relatorio_sem_decodificar_detalhes(self, mysql_db, cliente_teste_id):
+        seguro_dao = SeguroDAO(mysql_db)
+        total, lote = 1_000_000, 20_000
+        detalhes = json.dumps({**DETALHES, "observacoes": "x" * 200})
+        cursor = mysql_db.cursor()
+        for _ in range(total // lote):
+            cursor.executemany(
+                "INSERT INTO seguros (tipo, valor, detalhes, cliente_id) VALUES (%s, %s, %s, %s)",
+                [("Automóvel", 100.0, detalhes, cliente_teste_id)] * lote,
+            )
+            mysql_db.commit()
+        cursor.close()
+
+        def medir(consultar, ler_detalhes=False):
+            inicio = time.perf_counter()
+            seguros = consultar()
+            soma = sum(s["valor"] for s in seguros if s["tipo"] == "Automóvel")
+            if ler_detalhes:
+                # Custo do comportamento anterior: json.loads de todas as linhas
+                assert all(s["detalhes"] for s in seguros)
+            return time.perf_counter() - inicio, soma
+
+        s_eager, soma_eager = medir(seguro_dao.listar, ler_detalhes=True)
+        s_lazy, soma_lazy = medir(seguro_dao.listar)
+        s_projecao, soma_projecao = medir(lambda: seguro_dao.listar(colunas=["tipo", "valor"]))
+
+        print(
+            f"\n1M seguros (tipo/valor): eager {s_eager:.1f}s | lazy {s_lazy:.1f}s | "
+            f"colunas= {s_projecao:.1f}s"
+        )
+        assert soma_eager == soma_lazy == soma_projecao == total * 100.0
+        assert s_lazy < s_eager
+        assert s_projecao * 2 < s_eager
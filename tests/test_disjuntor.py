@@ -0,0 +1,165 @@
+"""
+Testes dos disjuntores (circuit breakers) de MySQL e MongoDB
+Os testes de integração simulam a queda apontando o backend para uma porta fechada
+"""
+import time
+
+import pytest
+
+from functions import disjuntor as modulo_disjuntor
+from functions.disjuntor import (
+    DISJUNTOR_MONGODB,
+    DISJUNTOR_MYSQL,
+    ESTADO_ABERTO,
+    ESTADO_FECHADO,
+    ESTADO_SEMIABERTO,
+    Disjuntor,
+    metricas_disjuntores,
+    obter_disjuntor,
+)
+
+
+class RelogioFalso:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return RelogioFalso()
+
+
+@pytest.fixture
+def disjuntores_isolados(monkeypatch):
+    """Registro de disjuntores vazio durante o teste"""
+    monkeypatch.setattr(modulo_disjuntor, "_disjuntores", {})
+    return modulo_disjuntor._disjuntores
+
+
+def _abrir(d: Disjuntor):
+    for _ in range(d.limite_falhas):
+        d.registrar_falha()
+
+
+class TestMaquinaDeEstados:
+    """Transições fechado/aberto/semiaberto (sem banco)"""
+
+    def test_abre_apos_limite_de_falhas_consecutivas(self, relogio):
+        d = Disjuntor("teste", limite_falhas=3, espera_inicial=1, relogio=relogio)
+
+        d.registrar_falha()
+        d.registrar_falha()
+        assert d.estado == ESTADO_FECHADO
+        d.registrar_falha()
+
+        assert d.estado == ESTADO_ABERTO
+        assert not d.permitir()
+
+    def test_sucesso_zera_falhas_consecutivas(self, relogio):
+        d = Disjuntor("teste", limite_falhas=2, relogio=relogio)
+
+        d.registrar_falha()
+        d.registrar_sucesso()
+        d.registrar_falha()
+
+        assert d.estado == ESTADO_FECHADO
+
+    def test_uma_unica_sondagem_apos_a_espera(self, relogio):
+        d = Disjuntor("teste", limite_falhas=1, espera_inicial=1, relogio=relogio)
+        _abrir(d)
+
+        relogio.agora = 1.0
+
+        assert d.permitir()
+        assert d.estado == ESTADO_SEMIABERTO
+        assert not d.permitir()
+
+    def test_sondagem_com_sucesso_fecha(self, relogio):
+        d = Disjuntor("teste", limite_falhas=1, espera_inicial=1, relogio=relogio)
+        _abrir(d)
+        relogio.agora = 1.0
+        d.permitir()
+
+        d.registrar_sucesso()
+
+        assert d.estado == ESTADO_FECHADO
+        assert d.permitir()
+
+    def test_espera_dobra_ate_o_maximo(self, relogio):
+        d = Disjuntor("teste", limite_falhas=1, espera_inicial=1, espera_maxima=5, relogio=relogio)
+        _abrir(d)
+        esperas = []
+        for _ in range(4):
+            relogio.agora += d.espera
+            assert d.permitir()
+            d.registrar_falha()
+            esperas.append(d.espera)
+
+        assert esperas == [2, 4, 5, 5]
+        assert not d.permitir()
+
+    def test_metricas(self, relogio):
+        d = Disjuntor("teste", limite_falhas=1, espera_inicial=10, relogio=relogio)
+        d.registrar_sucesso()
+        _abrir(d)
+        relogio.agora = 4.0
+        d.permitir()
+
+        metricas = d.metricas()
+
+        assert metricas["estado"] == ESTADO_ABERTO
+        assert metricas["proxima_sondagem_em"] == 6.0
+        assert (metricas["sucessos"], metricas["falhas"], metricas["rejeitadas"]) == (1, 1, 1)
+        assert metricas["aberturas"] == 1
+
+    def test_registro_por_backend(self, disjuntores_isolados):
+        assert obter_disjuntor(DISJUNTOR_MYSQL) is obter_disjuntor(DISJUNTOR_MYSQL)
+        obter_disjuntor(DISJUNTOR_MONGODB)
+
+        assert set(metricas_disjuntores()) == {DISJUNTOR_MYSQL, DISJUNTOR_MONGODB}
+
+
+class TestBackendForaDoAr:
+    """Falha rápida com o backend inalcançável"""
+
+    def test_mysql_deixa_de_tentar_conectar(self, disjuntores_isolados, monkeypatch):
+        from functions import dao_mysql
+
+        monkeypatch.setitem(dao_mysql.MYSQL_CONFIG, "host", "127.0.0.1")
+        monkeypatch.setitem(dao_mysql.MYSQL_CONFIG, "port", 1)
+        disjuntores_isolados[DISJUNTOR_MYSQL] = Disjuntor(
+            DISJUNTOR_MYSQL, limite_falhas=2, espera_inicial=60
+        )
+
+        conexoes = [dao_mysql.get_connection() for _ in range(10)]
+
+        metricas = metricas_disjuntores()[DISJUNTOR_MYSQL]
+        assert conexoes == [None] * 10
+        assert metricas["estado"] == ESTADO_ABERTO
+        assert (metricas["falhas"], metricas["rejeitadas"]) == (2, 8)
+
+    def test_auditoria_so_em_arquivo_sem_esperar_o_mongodb(self, disjuntores_isolados, monkeypatch):
+        from database.mongo_setup import MONGODB_CONFIG, MongoDBConnection
+        from functions.auditoria_service import AuditoriaService
+
+        monkeypatch.setitem(MONGODB_CONFIG, "host", "127.0.0.1")
+        monkeypatch.setitem(MONGODB_CONFIG, "port", 1)
+        monkeypatch.setitem(MONGODB_CONFIG, "timeout_selecao_ms", 200)
+        monkeypatch.setattr(MongoDBConnection, "_client", None)
+        monkeypatch.setattr(MongoDBConnection, "_db", None)
+        disjuntores_isolados[DISJUNTOR_MONGODB] = Disjuntor(
+            DISJUNTOR_MONGODB, limite_falhas=1, espera_inicial=60
+        )
+        auditoria = AuditoriaService()
+
+        auditoria.registrar_log("admin", "criar", "cliente", 1)  # abre o circuito
+        inicio = time.perf_counter()
+        for i in range(50):
+            assert auditoria.registrar_log("admin", "criar", "cliente", i) is None
+        duracao = time.perf_counter() - inicio
+
+        assert duracao < 0.5
+        assert metricas_disjuntores()[DISJUNTOR_MONGODB]["rejeitadas"] == 50
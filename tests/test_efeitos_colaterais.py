@@ -0,0 +1,131 @@
+"""
+Testes dos efeitos colaterais concorrentes (auditoria, perfil e documentos em paralelo)
+"""
+import logging
+import threading
+import time
+
+import pytest
+
+from functions.concorrencia import ERRO_TIMEOUT, MODO_AGUARDAR, MODO_DISPARAR, GrupoEfeitos
+
+
+def _falhar():
+    raise RuntimeError("MongoDB fora do ar")
+
+
+def _sobrepostos(rastro) -> bool:
+    """Verdadeiro se algum efeito começou antes de outro terminar"""
+    intervalos = sorted((r["inicio_ms"], r["fim_ms"]) for r in rastro)
+    return any(
+        inicio < fim_anterior for (_, fim_anterior), (inicio, _) in zip(intervalos, intervalos[1:])
+    )
+
+
+class TestGrupoEfeitos:
+    """Execução, isolamento de erros e rastro (sem banco)"""
+
+    def test_efeitos_em_paralelo(self):
+        efeitos = GrupoEfeitos("teste", modo=MODO_AGUARDAR)
+        for nome in ("auditoria", "perfil", "documentos"):
+            efeitos.adicionar(nome, time.sleep, 0.1)
+
+        inicio = time.monotonic()
+        resultado = efeitos.executar()
+
+        assert time.monotonic() - inicio < 0.25
+        assert resultado == {"auditoria": None, "perfil": None, "documentos": None}
+        assert _sobrepostos(efeitos.rastro)
+
+    def test_erro_isolado(self):
+        gravados = []
+        efeitos = GrupoEfeitos("teste", modo=MODO_AGUARDAR)
+        efeitos.adicionar("auditoria", _falhar)
+        efeitos.adicionar("perfil", gravados.append, "contato")
+
+        resultado = efeitos.executar()
+
+        assert resultado == {"auditoria": "MongoDB fora do ar", "perfil": None}
+        assert gravados == ["contato"]
+
+    def test_timeout_no_modo_aguardar(self):
+        efeitos = GrupoEfeitos("teste", modo=MODO_AGUARDAR, timeout=0.05)
+        efeitos.adicionar("lento", time.sleep, 0.5)
+        efeitos.adicionar("rapido", int)
+
+        assert efeitos.executar() == {"lento": ERRO_TIMEOUT, "rapido": None}
+
+    def test_modo_disparar_nao_espera(self):
+        concluido = threading.Event()
+        efeitos = GrupoEfeitos("teste", modo=MODO_DISPARAR)
+        efeitos.adicionar("lento", lambda: time.sleep(0.2) or concluido.set())
+
+        inicio = time.monotonic()
+        assert efeitos.executar() == {}
+        assert time.monotonic() - inicio < 0.1
+        assert concluido.wait(2)
+
+    def test_sequencial_roda_na_thread_atual(self):
+        efeitos = GrupoEfeitos("teste", paralelo=False)
+        efeitos.adicionar("a", time.sleep, 0.01)
+        efeitos.adicionar("b", time.sleep, 0.01)
+
+        efeitos.executar()
+
+        assert {r["thread"] for r in efeitos.rastro} == {threading.current_thread().name}
+        assert not _sobrepostos(efeitos.rastro)
+
+    def test_modo_invalido(self):
+        with pytest.raises(ValueError):
+            GrupoEfeitos("teste", modo="talvez")
+
+    def test_rastro_no_log(self, caplog):
+        efeitos = GrupoEfeitos("emitir_apolice", modo=MODO_AGUARDAR)
+        efeitos.adicionar("auditoria", int)
+        efeitos.adicionar("perfil", int)
+
+        with caplog.at_level(logging.DEBUG, logger="concorrencia.rastro"):
+            efeitos.executar()
+
+        mensagens = [r.getMessage() for r in caplog.records]
+        assert len(mensagens) == 2
+        assert all(m.startswith("operacao=emitir_apolice") for m in mensagens)
+
+
+class TestEfeitosNosServicos:
+    """Operações de escrita com efeitos colaterais concorrentes"""
+
+    def test_emitir_apolice_grava_auditoria_e_perfil(
+        self, servicos_factories, cliente_teste_id, seguro_teste_id, caplog
+    ):
+        apolice_service = servicos_factories["apolice"]
+        apolice_service.modo_efeitos = MODO_AGUARDAR
+
+        with caplog.at_level(logging.DEBUG, logger="concorrencia.rastro"):
+            apolice_id = apolice_service.emitir_apolice(
+                {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id}, "admin"
+            )
+
+        perfil = apolice_service.perfil.obter_perfil(cliente_teste_id)
+        logs = servicos_factories["auditoria"].buscar_logs_por_entidade("apolice")
+        assert any(log["entidade_id"] == apolice_id and log["operacao"] == "emitir" for log in logs)
+        assert perfil["historico_contato"][-1]["metadados"]["apolice_id"] == apolice_id
+        rastro = [r.getMessage() for r in caplog.records]
+        assert len(rastro) == 2
+        assert all(m.startswith("operacao=emitir_apolice") for m in rastro)
+
+    def test_registrar_sinistro_falha_no_perfil_nao_afeta_operacao(
+        self, servicos_factories, apolice_teste_id
+    ):
+        sinistro_service = servicos_factories["sinistro"]
+        sinistro_service.perfil.adicionar_contato = lambda *args, **kwargs: _falhar()
+
+        sinistro_id = sinistro_service.registrar_sinistro(
+            {"apolice_id": apolice_teste_id, "descricao": "Colisão"},
+            "admin",
+            observacoes="Sem feridos",
+        )
+
+        assert sinistro_id
+        documentos = sinistro_service.documentos.listar_documentos(sinistro_id)
+        assert [d["tipo_documento"] for d in documentos] == ["observacao_inicial"]
@@ -0,0 +1,133 @@
+"""
+Testes da exportação incremental (delta)
+Marca d'água (updated_at, id) por entidade e tombstones de exclusão
+"""
+import json
+import time
+
+import pytest
+
+from functions.dao_mysql import ClienteDAO, SeguroDAO
+from functions.exportacao_incremental import ExportacaoIncrementalDAO, exportar_incremental
+from tests.conftest import gerar_cpf_unico
+
+# Atraso negativo inclui as linhas gravadas no segundo corrente (evita sleep nos testes)
+SEM_ATRASO = -1
+
+
+def _ler_jsonl(caminho):
+    with open(caminho, encoding="utf-8") as f:
+        return [json.loads(linha) for linha in f]
+
+
+def _exportar(entidade, mysql_db, diretorio, **kwargs):
+    # Sem janela de sobreposição, salvo nos testes dela: cada execução exporta só o novo
+    kwargs.setdefault("sobreposicao", 0)
+    return exportar_incremental(
+        entidade,
+        str(diretorio),
+        connection=mysql_db,
+        atraso_seguranca=SEM_ATRASO,
+        **kwargs,
+    )
+
+
+class TestExportacaoIncremental:
+    """Exportação apenas do que mudou desde a última execução"""
+
+    def test_exporta_apenas_alteracoes(self, mysql_db, cliente_teste, tmp_path):
+        dao = ClienteDAO(mysql_db)
+        cliente_id = dao.criar(cliente_teste)
+
+        primeira = _exportar("clientes", mysql_db, tmp_path)
+        segunda = _exportar("clientes", mysql_db, tmp_path)
+
+        assert primeira["alterados"] == 1
+        assert _ler_jsonl(primeira["arquivo"])[0]["dados"]["id"] == cliente_id
+        assert segunda["alterados"] == 0
+        assert segunda["arquivo"] is None
+
+        # updated_at tem resolução de segundos
+        time.sleep(1.1)
+        dao.atualizar(cliente_id, {**cliente_teste, "nome": "Nome Alterado"})
+        terceira = _exportar("clientes", mysql_db, tmp_path)
+
+        registros = _ler_jsonl(terceira["arquivo"])
+        assert terceira["alterados"] == 1
+        assert registros[0]["dados"]["nome"] == "Nome Alterado"
+
+    def test_paginacao_por_keyset(self, mysql_db, cliente_teste, tmp_path):
+        dao = ClienteDAO(mysql_db)
+        for _ in range(5):
+            dao.criar({**cliente_teste, "cpf": gerar_cpf_unico()})
+
+        resultado = _exportar("clientes", mysql_db, tmp_path, tamanho_lote=2)
+
+        ids = [r["dados"]["id"] for r in _ler_jsonl(resultado["arquivo"])]
+        assert resultado["alterados"] == 5
+        assert ids == sorted(set(ids))
+
+    def test_exclusao_em_cascata_gera_tombstones(
+        self, mysql_db, cliente_teste, seguro_teste, tmp_path
+    ):
+        cliente_id = ClienteDAO(mysql_db).criar(cliente_teste)
+        seguro_id = SeguroDAO(mysql_db).criar({**seguro_teste, "cliente_id": cliente_id})
+        _exportar("clientes", mysql_db, tmp_path)
+        _exportar("seguros", mysql_db, tmp_path)
+
+        ClienteDAO(mysql_db).deletar(cliente_id)
+        clientes = _exportar("clientes", mysql_db, tmp_path)
+        seguros = _exportar("seguros", mysql_db, tmp_path)
+
+        assert clientes["excluidos"] == 1
+        registros = _ler_jsonl(seguros["arquivo"])
+        assert [(r["operacao"], r["id"]) for r in registros] == [("excluir", seguro_id)]
+        assert ExportacaoIncrementalDAO(mysql_db).limpar_exclusoes_exportadas(sobreposicao=0) == 2
+
+    def test_janela_de_sobreposicao(self, mysql_db, cliente_teste, tmp_path):
+        """Linha confirmada depois da exportação com updated_at anterior à marca"""
+        dao = ClienteDAO(mysql_db)
+        dao.criar(cliente_teste)
+        _exportar("clientes", mysql_db, tmp_path)
+        atrasado = dao.criar({**cliente_teste, "cpf": gerar_cpf_unico()})
+        cursor = mysql_db.cursor()
+        cursor.execute(
+            "UPDATE clientes SET updated_at = NOW() - INTERVAL 30 SECOND WHERE id = %s",
+            (atrasado,),
+        )
+        mysql_db.commit()
+        cursor.close()
+
+        sem_janela = _exportar("clientes", mysql_db, tmp_path)
+        com_janela = _exportar("clientes", mysql_db, tmp_path, sobreposicao=3600)
+
+        assert sem_janela["alterados"] == 0
+        ids = [r["dados"]["id"] for r in _ler_jsonl(com_janela["arquivo"])]
+        assert atrasado in ids
+
+
+@pytest.mark.slow
+class TestBenchmarkExportacaoIncremental:
+    """Benchmark: exportação completa x delta com 1% das linhas alteradas"""
+
+    def test_delta_mais_rapido_que_completo(self, mysql_db, cliente_teste, tmp_path):
+        dao = ClienteDAO(mysql_db)
+        total = 2000
+        ids = [dao.criar({**cliente_teste, "cpf": gerar_cpf_unico()}) for _ in range(total)]
+
+        inicio = time.perf_counter()
+        completo = _exportar("clientes", mysql_db, tmp_path)
+        tempo_completo = time.perf_counter() - inicio
+
+        time.sleep(1.1)
+        for cliente_id in ids[:: total // 20]:
+            dao.atualizar(cliente_id, {**cliente_teste, "cpf": gerar_cpf_unico()})
+
+        inicio = time.perf_counter()
+        delta = _exportar("clientes", mysql_db, tmp_path)
+        tempo_delta = time.perf_counter() - inicio
+
+        print(f"\nCompleto: {tempo_completo * 1000:.0f} ms | delta: {tempo_delta * 1000:.0f} ms")
+        assert completo["alterados"] == total
+        assert delta["alterados"] == 20
+        assert tempo_delta < tempo_completo
@@ -0,0 +1,176 @@
+"""
+Testes do índice de prefixos de clientes em memória (functions/indice_clientes.py)
+"""
+import random
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from functions.dao_mysql import ClienteDAO
+from functions.indice_clientes import IndiceClientes, digitos_cpf, normalizar_nome
+from tests.conftest import gerar_cpf_unico
+
+
+def _ids(resultados):
+    return [r["id"] for r in resultados]
+
+
+@pytest.fixture
+def indice():
+    indice = IndiceClientes()
+    indice.construir(
+        [
+            {"id": 1, "nome": "Maria da Silva", "cpf": "11122233344"},
+            {"id": 2, "nome": "João Silveira", "cpf": "11199988877"},
+            {"id": 3, "nome": "ANA SOUZA", "cpf": "55566677788"},
+        ]
+    )
+    return indice
+
+
+class TestIndiceClientes:
+    """Construção, busca e gravações (sem banco)"""
+
+    def test_normalizacao(self):
+        assert normalizar_nome("  MARIA  da Conceição-Silva ") == "maria da conceicao silva"
+        assert digitos_cpf("123.456.789-01") == "12345678901"
+
+    def test_busca_por_prefixo_de_qualquer_palavra(self, indice):
+        assert _ids(indice.buscar("silv")) == [1, 2]
+        assert _ids(indice.buscar("SILVA")) == [1]
+        assert _ids(indice.buscar("joão")) == [2]
+        assert _ids(indice.buscar("maria da s")) == [1]
+        assert _ids(indice.buscar("souza")) == [3]
+        assert indice.buscar("da") == indice.buscar("  ") == []
+
+    def test_busca_por_cpf(self, indice):
+        assert _ids(indice.buscar("111")) == [1, 2]
+        assert _ids(indice.buscar("111.222")) == [1]
+        assert indice.buscar("555.666.777-88") == [
+            {"id": 3, "nome": "ANA SOUZA", "cpf": "55566677788"}
+        ]
+
+    def test_limite(self, indice):
+        assert _ids(indice.buscar("s", limite=2)) == [1, 2]
+
+    def test_registrar_e_remover(self, indice):
+        indice.registrar(4, "Silvana Costa", "99988877766")
+        indice.registrar(2, "João Pereira", "11199988877")
+
+        assert _ids(indice.buscar("silv")) == [1, 4]
+        assert _ids(indice.buscar("pereira")) == [2]
+        assert indice.remover(1) is True
+        assert indice.remover(1) is False
+        assert 1 not in indice and len(indice) == 3
+        assert _ids(indice.buscar("silv")) == [4]
+        assert _ids(indice.buscar("111")) == [2]
+
+    def test_compacta_registros_descartados(self, indice):
+        tamanho = len(indice._buffer)
+        for i in range(50):
+            indice.registrar(2, f"João Versão {i}", "11199988877")
+        indice.registrar(2, "João Final", "11199988877")
+
+        # Sem compactação seriam mais de 50 versões de ~60 bytes no buffer
+        assert len(indice._buffer) < 3 * tamanho
+        assert _ids(indice.buscar("final")) == [2]
+        assert indice.buscar("versao") == []
+        assert _ids(indice.buscar("silva")) == [1]
+
+
+class _ClienteDAOFalso:
+    """Devolve as linhas com updated_at >= o filtro e guarda os filtros recebidos"""
+
+    def __init__(self, linhas):
+        self.linhas, self.filtros = linhas, []
+
+    def filtrar(self, order_by=None, limit=None, colunas=None, **filtros):
+        self.filtros.append(filtros)
+        desde = filtros.get("updated_at__gte")
+        return [linha for linha in self.linhas if desde is None or linha["updated_at"] >= desde]
+
+
+class TestSincronizacao:
+    """Intervalo e margem de sincronizar() (sem banco)"""
+
+    def test_margem_e_intervalo(self):
+        marca = datetime(2024, 5, 1, 12, 0, 0)
+        dao = _ClienteDAOFalso([{"id": 1, "nome": "Ana", "cpf": "1", "updated_at": marca}])
+        indice = IndiceClientes(dao, intervalo_sincronizacao=3600, margem_sincronizacao=60)
+        indice.carregar()
+        # Confirmada depois da carga, mas gravada antes da marca
+        dao.linhas.append(
+            {"id": 2, "nome": "Bia", "cpf": "2", "updated_at": marca - timedelta(seconds=30)}
+        )
+
+        assert indice.sincronizar_se_vencido() == 0
+        assert indice.sincronizar() == 2
+        assert dao.filtros[-1] == {"updated_at__gte": marca - timedelta(seconds=60)}
+        assert _ids(indice.buscar("bia")) == [2]
+        indice.sincronizado_em -= 3600
+        assert indice.sincronizar_se_vencido() == 2
+
+
+class TestCargaDoBanco:
+    """carregar() em páginas e sincronizar() pelo updated_at"""
+
+    def test_carrega_e_sincroniza(self, mysql_db, cliente_teste):
+        cliente_dao = ClienteDAO(mysql_db)
+        ids = [
+            cliente_dao.criar({**cliente_teste, "cpf": gerar_cpf_unico(), "nome": f"Índice {i}"})
+            for i in range(5)
+        ]
+        indice = IndiceClientes(cliente_dao, tamanho_lote=2)
+
+        assert indice.carregar() == len(cliente_dao.listar())
+        assert _ids(indice.buscar("indice", limite=10)) == ids
+
+        cliente_dao.atualizar(ids[0], {"nome": "Renomeado Índice"})
+        novo = cliente_dao.criar({**cliente_teste, "cpf": gerar_cpf_unico(), "nome": "Índice Novo"})
+        assert indice.sincronizar() >= 2
+        assert _ids(indice.buscar("renomeado")) == [ids[0]]
+        assert novo in _ids(indice.buscar("indice novo"))
+
+
+@pytest.mark.slow
+class TestBenchmarkIndiceClientes:
+    """Benchmark: busca por prefixo com 1 milhão de clientes"""
+
+    def test_busca_abaixo_de_1ms(self):
+        aleatorio = random.Random(42)
+        nomes = ["Maria", "José", "Ana", "João", "Antônio", "Francisca", "Carlos", "Paulo"]
+        sobrenomes = ["Silva", "Santos", "Oliveira", "Souza", "Pereira", "Lima", "Ferreira"]
+        clientes = (
+            {
+                "id": i,
+                "nome": f"{aleatorio.choice(nomes)} {aleatorio.choice(sobrenomes)} "
+                f"{aleatorio.choice(sobrenomes)}{i}",
+                "cpf": f"{aleatorio.randrange(10**11):011d}",
+            }
+            for i in range(1, 1_000_001)
+        )
+        indice = IndiceClientes()
+        inicio = time.perf_counter()
+        indice.construir(clientes)
+        carga = time.perf_counter() - inicio
+
+        termos = ["silva", "maria so", "jose", "olive", "123", "ferreira77", "antonio lima"]
+        tempos = []
+        for _ in range(200):
+            for termo in termos:
+                inicio = time.perf_counter()
+                indice.buscar(termo)
+                tempos.append(time.perf_counter() - inicio)
+        tempos.sort()
+        inicio = time.perf_counter()
+        indice.registrar(1_000_001, "Cliente Novo", "00000000000")
+        gravacao = time.perf_counter() - inicio
+
+        print(
+            f"\nÍndice com 1M clientes: carga {carga:.1f}s, buffer {len(indice._buffer) >> 20} MB | "
+            f"busca p50 {tempos[len(tempos) // 2] * 1e6:.0f} µs, "
+            f"p99 {tempos[int(len(tempos) * 0.99)] * 1e6:.0f} µs | registrar {gravacao * 1e3:.1f} ms"
+        )
+        assert len(indice) == 1_000_001
+        assert tempos[int(len(tempos) * 0.99)] < 0.001
@@ -0,0 +1,227 @@
+"""
+Testes das migrações versionadas com DDL online e cópia e troca (database/migracoes.py)
+"""
+import threading
+import time
+
+import mysql.connector
+import pytest
+
+from config_test import MYSQL_TEST_CONFIG
+from database.migracoes import (
+    ALGORITMO_INPLACE,
+    ALGORITMO_INSTANT,
+    ESTRATEGIA_COPIA,
+    ESTRATEGIA_JA_APLICADA,
+    AlteracaoOnline,
+    ComandosSQL,
+    ExecutorMigracoes,
+    Migracao,
+    calcular_eta,
+    ddl_da_copia,
+)
+
+
+def _conectar():
+    config = {k: v for k, v in MYSQL_TEST_CONFIG.items() if k != "raise_on_warnings"}
+    return mysql.connector.connect(**config)
+
+
+@pytest.fixture
+def tabela_migracao(mysql_db):
+    """Tabela descartável com linhas e um trigger, e schema_version limpa"""
+    cursor = mysql_db.cursor()
+    cursor.execute("DROP TABLE IF EXISTS migracao_teste")
+    cursor.execute("DROP TABLE IF EXISTS schema_version")
+    cursor.execute(
+        "CREATE TABLE migracao_teste (id INT AUTO_INCREMENT PRIMARY KEY, "
+        "nome VARCHAR(20), contador INT NOT NULL DEFAULT 0) ENGINE=InnoDB"
+    )
+    cursor.executemany(
+        "INSERT INTO migracao_teste (nome) VALUES (%s)", [(f"n{i}",) for i in range(25)]
+    )
+    cursor.execute(
+        "CREATE TRIGGER trg_migracao_teste BEFORE UPDATE ON migracao_teste FOR EACH ROW "
+        "SET NEW.contador = OLD.contador + 1"
+    )
+    mysql_db.commit()
+    yield mysql_db
+    cursor.execute("DROP TABLE IF EXISTS migracao_teste")
+    cursor.execute("DROP TABLE IF EXISTS schema_version")
+    mysql_db.commit()
+    cursor.close()
+
+
+def _consultar(mysql_db, sql):
+    cursor = mysql_db.cursor()
+    cursor.execute(sql)
+    linhas = cursor.fetchall()
+    cursor.close()
+    return linhas
+
+
+class TestAuxiliares:
+    """ETA e DDL da cópia (sem banco)"""
+
+    def test_eta(self):
+        assert calcular_eta(25, 100, 10.0) == 30.0
+        assert calcular_eta(0, 100, 10.0) is None
+
+    def test_ddl_da_copia(self):
+        ddl = (
+            "CREATE TABLE `apolices` (\n  `id` int NOT NULL,\n"
+            "  CONSTRAINT `apolices_ibfk_1` FOREIGN KEY (`cliente_id`) REFERENCES `clientes` (`id`)"
+        )
+
+        copia = ddl_da_copia(ddl, "apolices", "_apolices_nova")
+
+        assert copia.startswith("CREATE TABLE `_apolices_nova`")
+        assert "CONSTRAINT" not in copia and "FOREIGN KEY (`cliente_id`)" in copia
+
+    def test_versoes_repetidas(self):
+        with pytest.raises(ValueError):
+            ExecutorMigracoes(None, [Migracao(1, "a"), Migracao(1, "b")])
+
+
+class TestExecutorMigracoes:
+    """Execução e registro no MySQL"""
+
+    def test_aplica_pendentes_em_ordem(self, tabela_migracao):
+        mysql_db = tabela_migracao
+        migracoes = [
+            Migracao(2, "Índice", AlteracaoOnline("migracao_teste", "ADD INDEX idx_nome (nome)")),
+            Migracao(1, "Coluna", AlteracaoOnline("migracao_teste", "ADD COLUMN extra INT NULL")),
+        ]
+        executor = ExecutorMigracoes(mysql_db, migracoes)
+
+        assert executor.executar() == [1, 2]
+        assert executor.executar() == []
+        estrategias = dict(_consultar(mysql_db, "SELECT versao, estrategia FROM schema_version"))
+        assert estrategias == {1: ALGORITMO_INSTANT, 2: ALGORITMO_INPLACE}
+
+    def test_ate_e_passo_ja_aplicado(self, tabela_migracao):
+        mysql_db = tabela_migracao
+        _consultar(mysql_db, "ALTER TABLE migracao_teste ADD INDEX idx_nome (nome)")
+        migracoes = [
+            Migracao(1, "Índice", AlteracaoOnline("migracao_teste", "ADD INDEX idx_nome (nome)")),
+            Migracao(2, "SQL", ComandosSQL("UPDATE migracao_teste SET nome = 'x'")),
+        ]
+
+        assert ExecutorMigracoes(mysql_db, migracoes).executar(ate=1) == [1]
+        assert _consultar(mysql_db, "SELECT estrategia FROM schema_version") == [
+            (ESTRATEGIA_JA_APLICADA,)
+        ]
+
+    def test_copia_e_troca(self, tabela_migracao):
+        mysql_db = tabela_migracao
+        progresso = []
+        migracao = Migracao(
+            1,
+            "Aumenta nome",
+            AlteracaoOnline("migracao_teste", "MODIFY nome VARCHAR(100)", algoritmos=()),
+        )
+        executor = ExecutorMigracoes(
+            mysql_db, [migracao], tamanho_lote=10, progresso=lambda *args: progresso.append(args)
+        )
+
+        assert executor.executar() == [1]
+        assert _consultar(mysql_db, "SELECT COUNT(*) FROM migracao_teste") == [(25,)]
+        tipo = _consultar(
+            mysql_db,
+            "SELECT CHARACTER_MAXIMUM_LENGTH FROM information_schema.COLUMNS WHERE "
+            "TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'migracao_teste' AND COLUMN_NAME = 'nome'",
+        )
+        assert tipo == [(100,)]
+        assert [(feitas, total) for _, _, feitas, total, _ in progresso] == [
+            (10, 25),
+            (20, 25),
+            (25, 25),
+        ]
+        # O trigger original foi recriado na nova tabela; os de sincronia e a antiga sumiram
+        _consultar(mysql_db, "UPDATE migracao_teste SET nome = 'y' WHERE id = 1")
+        mysql_db.commit()
+        assert _consultar(mysql_db, "SELECT contador FROM migracao_teste WHERE id = 1") == [(1,)]
+        triggers = _consultar(
+            mysql_db,
+            "SELECT TRIGGER_NAME FROM information_schema.TRIGGERS WHERE "
+            "TRIGGER_SCHEMA = DATABASE() AND EVENT_OBJECT_TABLE LIKE '%migracao_teste%'",
+        )
+        assert triggers == [("trg_migracao_teste",)]
+        assert _consultar(mysql_db, "SHOW TABLES LIKE '\\_migracao_teste%'") == []
+        assert _consultar(mysql_db, "SELECT estrategia FROM schema_version") == [
+            (ESTRATEGIA_COPIA,)
+        ]
+
+    def test_copia_com_coluna_gerada(self, tabela_migracao):
+        mysql_db = tabela_migracao
+        _consultar(
+            mysql_db,
+            "ALTER TABLE migracao_teste ADD COLUMN dobro INT AS (contador * 2) STORED",
+        )
+        migracao = Migracao(
+            1,
+            "Aumenta nome",
+            AlteracaoOnline("migracao_teste", "MODIFY nome VARCHAR(100)", algoritmos=()),
+        )
+
+        assert ExecutorMigracoes(mysql_db, [migracao], tamanho_lote=10).executar() == [1]
+        _consultar(mysql_db, "UPDATE migracao_teste SET nome = 'y' WHERE id = 1")
+        mysql_db.commit()
+        assert _consultar(mysql_db, "SELECT COUNT(*) FROM migracao_teste") == [(25,)]
+        assert _consultar(mysql_db, "SELECT dobro FROM migracao_teste WHERE id = 1") == [(2,)]
+
+    def test_copia_recusada_em_tabela_referenciada(self, tabela_migracao):
+        migracao = Migracao(
+            1, "Troca apolices", AlteracaoOnline("apolices", "COMMENT = 'x'", algoritmos=())
+        )
+
+        assert ExecutorMigracoes(tabela_migracao, [migracao]).executar() == []
+        assert ExecutorMigracoes(tabela_migracao, [migracao]).pendentes() == [migracao]
+
+
+@pytest.mark.slow
+class TestBenchmarkMigracaoOnline:
+    """Benchmark: escritas concorrentes durante a criação de um índice em tabela grande"""
+
+    def test_escritas_nao_bloqueiam(self, tabela_migracao):
+        mysql_db = tabela_migracao
+        cursor = mysql_db.cursor()
+        for _ in range(10):
+            cursor.executemany(
+                "INSERT INTO migracao_teste (nome) VALUES (%s)", [("carga",)] * 30_000
+            )
+        mysql_db.commit()
+        cursor.close()
+        latencias, parar = [], threading.Event()
+
+        def escrever():
+            conn = _conectar()
+            escrita = conn.cursor()
+            while not parar.is_set():
+                inicio = time.perf_counter()
+                escrita.execute("INSERT INTO migracao_teste (nome) VALUES ('durante')")
+                conn.commit()
+                latencias.append(time.perf_counter() - inicio)
+            escrita.close()
+            conn.close()
+
+        escritor = threading.Thread(target=escrever)
+        escritor.start()
+        inicio = time.perf_counter()
+        migracao = Migracao(
+            1,
+            "Índice",
+            AlteracaoOnline("migracao_teste", "ADD INDEX idx_nome_contador (nome, contador)"),
+        )
+        aplicadas = ExecutorMigracoes(mysql_db, [migracao], conectar=_conectar).executar()
+        duracao = time.perf_counter() - inicio
+        parar.set()
+        escritor.join()
+
+        print(
+            f"\nADD INDEX em 300k linhas: {duracao:.2f}s | {len(latencias)} escritas concorrentes, "
+            f"pior latência {max(latencias) * 1000:.0f} ms"
+        )
+        assert aplicadas == [1]
+        assert len(latencias) > 10
+        assert max(latencias) < duracao / 2
@@ -191,6 +191,31 @@ class TestSinistroDocumentos:
         assert documentos[0]["metadados"]["resolucao"] == "1920x1080"
         assert documentos[0]["metadados"]["formato"] == "JPEG"
 
+    def test_adicionar_documentos_em_lote(self, mongodb_db):
+        """Deve inserir vários documentos de uma vez e apontar os inválidos"""
+        from functions.auditoria_service import SinistroDocumentosService
+
+        docs_service = SinistroDocumentosService(mongodb_db)
+
+        resultado = docs_service.adicionar_documentos(
+            103,
+            [
+                {"tipo_documento": "FOTOS", "caminho_arquivo": "/docs/foto1.jpg"},
+                {"caminho_arquivo": "/docs/sem_tipo.pdf"},
+                {"tipo_documento": "ORCAMENTO", "metadados": {"oficina": "Centro"}},
+            ],
+            apolice_id=7,
+            metadados={"registrado_por": "admin"},
+        )
+
+        assert len(resultado["inseridos"]) == 2
+        assert [falha["indice"] for falha in resultado["falhas"]] == [1]
+        documentos = docs_service.listar_documentos_sinistro(103)
+        assert len(documentos) == 2
+        assert all(doc["apolice_id"] == 7 for doc in documentos)
+        orcamento = docs_service.buscar_por_tipo(103, "ORCAMENTO")[0]
+        assert orcamento["metadados"] == {"registrado_por": "admin", "oficina": "Centro"}
+
 
 class TestClientePerfil:
     """Testes para perfis de clientes no MongoDB"""
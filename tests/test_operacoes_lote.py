@@ -0,0 +1,148 @@
+"""
+Testes das transições de status em lote (sinistros e apólices)
+"""
+import time
+
+import pytest
+from mysql.connector import Error
+
+from functions.exceptions import LoteInterrompidoError
+from functions.outbox import OutboxDAO
+from functions.servicos import SinistroService
+
+
+def _inserir_sinistros(mysql_db, apolice_id, quantidade, status="aberto"):
+    cursor = mysql_db.cursor()
+    cursor.executemany(
+        "INSERT INTO sinistros (apolice_id, descricao, status) VALUES (%s, %s, %s)",
+        [(apolice_id, f"Sinistro {i}", status) for i in range(quantidade)],
+    )
+    mysql_db.commit()
+    cursor.execute("SELECT id FROM sinistros WHERE apolice_id = %s ORDER BY id", (apolice_id,))
+    ids = [linha[0] for linha in cursor.fetchall()]
+    cursor.close()
+    return ids
+
+
+class TestTransicaoEmLoteDAO:
+    """UPDATE por lote no MySQL"""
+
+    def test_por_ids_em_varios_lotes(self, mysql_db, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+        ids = _inserir_sinistros(mysql_db, apolice_teste_id, 25)
+        sinistro_dao.transicionar_status(ids[0], "aberto", "fechado")
+
+        alterados = sinistro_dao.transicionar_status_em_lote(
+            "fechado", de="aberto", ids=ids, tamanho_lote=10
+        )
+
+        assert alterados == ids[1:]
+        assert sinistro_dao.contar(apolice_id=apolice_teste_id, status="fechado") == 25
+
+    def test_por_filtro(self, dao_factories, cliente_teste_id, seguro_teste_id):
+        apolice_dao = dao_factories["apolice"]
+        dados = {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id, "status": "ativa"}
+        ids = [apolice_dao.criar(dados) for _ in range(5)]
+
+        alterados = apolice_dao.transicionar_status_em_lote(
+            "cancelada", de="ativa", tamanho_lote=2, cliente_id=cliente_teste_id
+        )
+
+        assert sorted(alterados) == ids
+        assert apolice_dao.contar(cliente_id=cliente_teste_id, status="ativa") == 0
+
+    def test_lote_com_erro_desfaz_so_o_lote(self, mysql_db, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+        ids = _inserir_sinistros(mysql_db, apolice_teste_id, 25)
+        lotes = []
+
+        def ao_alterar_lote(lote, conn):
+            lotes.append(lote)
+            if len(lotes) == 2:
+                raise Error("falha no segundo lote")
+
+        with pytest.raises(LoteInterrompidoError) as erro:
+            sinistro_dao.transicionar_status_em_lote(
+                "fechado", ids=ids, tamanho_lote=10, ao_alterar_lote=ao_alterar_lote
+            )
+
+        assert erro.value.confirmados == ids[:10]
+        assert sinistro_dao.contar(apolice_id=apolice_teste_id, status="fechado") == 10
+
+    def test_sem_candidatos(self, dao_factories):
+        assert dao_factories["sinistro"].transicionar_status_em_lote("fechado", ids=[]) == []
+
+
+class TestOperacoesEmLoteServicos:
+    """Efeitos colaterais agregados"""
+
+    def test_cancelar_por_cliente(self, servicos_factories, cliente_teste_id, seguro_teste_id):
+        apolice_service = servicos_factories["apolice"]
+        ids = [
+            apolice_service.emitir_apolice(
+                {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id}, "admin"
+            )
+            for _ in range(3)
+        ]
+
+        canceladas = apolice_service.cancelar_por_cliente(cliente_teste_id, "admin", "Óbito")
+
+        assert sorted(canceladas) == sorted(ids)
+        logs = servicos_factories["auditoria"].buscar_logs_por_entidade("apolice")
+        assert {log["entidade_id"] for log in logs if log["operacao"] == "cancelar"} == set(ids)
+        historico = apolice_service.perfil.obter_perfil(cliente_teste_id)["historico_contato"]
+        cancelamentos = [c for c in historico if c["tipo"] == "cancelamento_apolice"]
+        assert {c["metadados"]["apolice_id"] for c in cancelamentos} == set(ids)
+        assert apolice_service.cancelar_por_cliente(cliente_teste_id, "admin") == []
+
+    def test_atualizar_status_em_lote(self, mysql_db, servicos_factories, apolice_teste_id):
+        sinistro_service = servicos_factories["sinistro"]
+        ids = _inserir_sinistros(mysql_db, apolice_teste_id, 4)
+
+        alterados = sinistro_service.atualizar_status_em_lote(
+            ids, "fechado", "admin", de="aberto", observacoes="Fechamento trimestral"
+        )
+
+        assert alterados == ids
+        logs = servicos_factories["auditoria"].buscar_logs_por_entidade("sinistro")
+        lote = [log for log in logs if log["operacao"] == "atualizar_status"]
+        assert {log["entidade_id"] for log in lote} == set(ids)
+        assert all(log["detalhes"]["observacoes"] == "Fechamento trimestral" for log in lote)
+
+    def test_em_lote_com_outbox(self, mysql_db, mongodb_db, apolice_teste_id):
+        """Com outbox, a auditoria do lote entra na transação dos UPDATEs, sem ir ao MongoDB"""
+        ids = _inserir_sinistros(mysql_db, apolice_teste_id, 4)
+        sinistro_service = SinistroService(mysql_db, mongodb_db, usar_outbox=True)
+
+        alterados = sinistro_service.atualizar_status_em_lote(ids, "fechado", "admin")
+
+        assert alterados == ids
+        assert mongodb_db.auditoria.count_documents({}) == 0
+        assert OutboxDAO(mysql_db).contar_pendentes() == len(ids)
+
+
+@pytest.mark.slow
+class TestBenchmarkFechamentoEmLote:
+    """Benchmark: fechamento em massa vs. um atualizar_status por sinistro"""
+
+    def test_vazao_do_fechamento(self, mysql_db, servicos_factories, apolice_teste_id):
+        sinistro_service = servicos_factories["sinistro"]
+        total, amostra = 20_000, 200
+        ids = _inserir_sinistros(mysql_db, apolice_teste_id, total + amostra)
+
+        inicio = time.perf_counter()
+        for sinistro_id in ids[total:]:
+            sinistro_service.atualizar_status("admin", sinistro_id, "fechado")
+        por_linha = (time.perf_counter() - inicio) / amostra
+
+        inicio = time.perf_counter()
+        alterados = sinistro_service.atualizar_status_em_lote(ids[:total], "fechado", "admin")
+        em_lote = (time.perf_counter() - inicio) / total
+
+        print(
+            f"\npor linha: {1 / por_linha:,.0f} sinistros/s | em lote: {1 / em_lote:,.0f} "
+            f"sinistros/s | 200k em lote: {200_000 * em_lote:.0f}s"
+        )
+        assert len(alterados) == total
+        assert em_lote * 10 < por_linha
+        assert 200_000 * em_lote < 300
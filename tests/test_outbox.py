@@ -0,0 +1,124 @@
+"""
+Testes do Outbox Transacional (MySQL -> MongoDB)
+Garante atomicidade com o registro de negócio e idempotência do relay
+"""
+import threading
+
+import pytest
+
+from functions.auditoria_service import SinistroDocumentosService
+from functions.dao_mysql import ClienteDAO, conexao_vinculada, transacao, vincular_conexao
+from functions.outbox import OutboxDAO, RelayOutbox
+from functions.servicos import ClienteService
+
+
+class TestVinculoDeConexao:
+    """Conexão da unidade de trabalho vinculada por contexto (sem banco)"""
+
+    def test_vinculo_nao_vaza_para_outras_threads(self):
+        dao, outro_dao, conexao = ClienteDAO(), ClienteDAO(), object()
+        vistas = []
+
+        with vincular_conexao([dao], conexao):
+            assert dao._get_conn() is conexao
+            assert conexao_vinculada(outro_dao) is None
+            thread = threading.Thread(target=lambda: vistas.append(conexao_vinculada(dao)))
+            thread.start()
+            thread.join()
+
+        assert vistas == [None]
+        assert conexao_vinculada(dao) is None
+
+
+class TestOutboxTransacional:
+    """Gravação no outbox dentro da transação de negócio"""
+
+    def test_servico_enfileira_em_vez_de_gravar_no_mongo(self, mysql_db, mongodb_db, cliente_teste):
+        """Com outbox habilitado, nada é gravado no MongoDB até o relay rodar"""
+        service = ClienteService(mysql_db, mongodb_db, usar_outbox=True)
+
+        cliente_id = service.criar_cliente(cliente_teste, usuario="admin")
+
+        assert cliente_id > 0
+        assert mongodb_db.auditoria.count_documents({}) == 0
+        # Auditoria + inicialização do perfil
+        assert OutboxDAO(mysql_db).contar_pendentes() == 2
+
+    def test_rollback_descarta_outbox(self, mysql_db, cliente_teste):
+        """Se a transação falha, nem o cliente nem o outbox são gravados"""
+        with pytest.raises(RuntimeError), transacao(mysql_db) as tx:
+            ClienteDAO(tx).criar(cliente_teste)
+            OutboxDAO(tx).enfileirar("auditoria", "inserir", documento={"x": 1})
+            raise RuntimeError("falha simulada")
+
+        assert ClienteDAO(mysql_db).ler_por_cpf(cliente_teste["cpf"]) is None
+        assert OutboxDAO(mysql_db).contar_pendentes() == 0
+
+    def test_enfileirar_lote(self, mysql_db):
+        """Várias entradas com um INSERT de várias linhas por lote, na ordem recebida"""
+        outbox = OutboxDAO(mysql_db)
+
+        gravadas = outbox.enfileirar_lote(
+            "auditoria", "inserir", [{"documento": {"n": i}} for i in range(5)], tamanho_lote=2
+        )
+
+        assert gravadas == 5
+        assert outbox.contar_pendentes() == 5
+        assert outbox.enfileirar_lote("auditoria", "inserir", []) == 0
+
+
+class TestRelayOutbox:
+    """Aplicação das entradas no MongoDB"""
+
+    def test_relay_aplica_em_lote(self, mysql_db, mongodb_db, cliente_teste):
+        """O relay aplica auditoria e perfil e zera as pendências"""
+        service = ClienteService(mysql_db, mongodb_db, usar_outbox=True)
+        cliente_id = service.criar_cliente(cliente_teste, usuario="admin")
+
+        relay = RelayOutbox(mysql_db, mongodb_db, tamanho_lote=10)
+        aplicados = relay.drenar()
+
+        assert aplicados == 2
+        assert mongodb_db.auditoria.count_documents({"entidade_id": cliente_id}) == 1
+        assert mongodb_db.clientes_perfil.count_documents({"cliente_id": cliente_id}) == 1
+        metricas = relay.metricas()
+        assert metricas["pendentes"] == 0
+        assert metricas["processados"] == 2
+
+    def test_documentos_enfileirados_tem_ids(self, mysql_db, mongodb_db):
+        """Os ids devolvidos com outbox são os dos documentos que o relay grava"""
+        documentos = SinistroDocumentosService(mongodb_db, outbox=OutboxDAO(mysql_db))
+
+        resultado = documentos.adicionar_documentos(
+            7, [{"tipo_documento": "FOTOS"}, {"tipo_documento": "LAUDO"}]
+        )
+        RelayOutbox(mysql_db, mongodb_db).drenar()
+
+        gravados = {str(d["_id"]) for d in mongodb_db.sinistros_documentos.find({})}
+        assert len(resultado["inseridos"]) == 2
+        assert set(resultado["inseridos"]) == gravados
+
+    def test_reaplicacao_idempotente(self, mysql_db, mongodb_db):
+        """Reprocessar entradas já aplicadas não duplica documentos nem contatos"""
+        outbox = OutboxDAO(mysql_db)
+        outbox.enfileirar("auditoria", "inserir", documento={"operacao": "criar"})
+        outbox.enfileirar(
+            "clientes_perfil",
+            "atualizar",
+            filtro={"cliente_id": 7},
+            atualizacao={"$push": {"historico_contato": {"tipo": "teste"}}},
+            upsert=True,
+        )
+        relay = RelayOutbox(mysql_db, mongodb_db)
+        relay.drenar()
+
+        # Simula queda do relay antes de marcar as entradas como processadas
+        cursor = mysql_db.cursor()
+        cursor.execute("UPDATE outbox SET processado_em = NULL")
+        mysql_db.commit()
+        cursor.close()
+        relay.drenar()
+
+        assert mongodb_db.auditoria.count_documents({}) == 1
+        perfil = mongodb_db.clientes_perfil.find_one({"cliente_id": 7})
+        assert len(perfil["historico_contato"]) == 1
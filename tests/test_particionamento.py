@@ -0,0 +1,193 @@
+"""
+Testes da variante particionada de 'sinistros' (RANGE COLUMNS por data_ocorrencia)
+"""
+import time
+from datetime import date
+
+import pytest
+from mysql.connector import IntegrityError
+
+from database.db_setup import (
+    definicao_particoes,
+    deslocar_periodo,
+    desparticionar_sinistros,
+    inicio_periodo,
+    listar_particoes,
+    nome_particao,
+    particionar_sinistros,
+    periodos_entre,
+)
+from functions.dao_mysql import SinistroDAO
+from functions.particionamento import ManutencaoParticoes
+
+ANO = date.today().year
+
+
+@pytest.fixture
+def sinistros_particionados(mysql_db):
+    """Converte 'sinistros' para a variante anual durante o teste e desfaz ao final"""
+    cursor = mysql_db.cursor()
+    particionar_sinistros(cursor, "anual", particoes_futuras=1)
+    mysql_db.commit()
+    yield mysql_db
+    cursor.execute("TRUNCATE TABLE sinistros")
+    desparticionar_sinistros(cursor)
+    mysql_db.commit()
+    cursor.close()
+
+
+def _inserir_sinistros(mysql_db, apolice_id, datas):
+    cursor = mysql_db.cursor()
+    cursor.executemany(
+        "INSERT INTO sinistros (apolice_id, data_ocorrencia, descricao) VALUES (%s, %s, %s)",
+        [(apolice_id, data, "Colisão") for data in datas],
+    )
+    mysql_db.commit()
+    cursor.close()
+
+
+def _particoes_lidas(mysql_db, where):
+    cursor = mysql_db.cursor(dictionary=True)
+    cursor.execute(f"EXPLAIN SELECT id FROM sinistros WHERE {where}")
+    particoes = cursor.fetchone()["partitions"]
+    cursor.close()
+    return particoes
+
+
+class TestPeriodos:
+    """Limites e nomes das partições (sem banco)"""
+
+    def test_inicio_e_deslocamento(self):
+        assert inicio_periodo(date(2025, 7, 15), "anual") == date(2025, 1, 1)
+        assert inicio_periodo(date(2025, 7, 15), "mensal") == date(2025, 7, 1)
+        assert deslocar_periodo(date(2025, 1, 1), "mensal", -1) == date(2024, 12, 1)
+        assert deslocar_periodo(date(2025, 11, 1), "mensal", 3) == date(2026, 2, 1)
+        assert periodos_entre(date(2024, 11, 1), date(2025, 2, 1), "mensal") == 3
+
+    def test_nomes_e_definicao(self):
+        assert nome_particao(date(2025, 3, 1), "mensal") == "p202503"
+        definicao = definicao_particoes("anual", date(2025, 6, 1), 2)
+
+        assert "p_antigas VALUES LESS THAN ('2025-01-01')" in definicao
+        assert "p2026 VALUES LESS THAN ('2027-01-01')" in definicao
+        assert definicao.endswith("p_futuras VALUES LESS THAN (MAXVALUE)\n)")
+
+    def test_granularidade_invalida(self):
+        with pytest.raises(ValueError):
+            inicio_periodo(date.today(), "semanal")
+
+    def test_plano_da_manutencao(self):
+        particoes = [
+            ("p_antigas", date(2023, 1, 1)),
+            ("p2023", date(2024, 1, 1)),
+            ("p2024", date(2025, 1, 1)),
+            ("p_futuras", None),
+        ]
+        manutencao = ManutencaoParticoes(
+            "anual", particoes_futuras=1, particoes_retidas=1, hoje=date(2025, 5, 1)
+        )
+
+        assert manutencao.particoes_a_criar(particoes) == [date(2025, 1, 1), date(2026, 1, 1)]
+        assert manutencao.particoes_a_remover(particoes) == ["p_antigas", "p2023"]
+
+
+class TestSinistrosParticionados:
+    """Variante particionada no MySQL"""
+
+    def test_consulta_do_periodo_le_uma_particao(
+        self, sinistros_particionados, dao_factories, apolice_teste_id
+    ):
+        mysql_db = sinistros_particionados
+        _inserir_sinistros(mysql_db, apolice_teste_id, [date(ANO - 1, 3, 1), date(ANO, 3, 1)])
+
+        periodo = dao_factories["sinistro"].listar_por_periodo(
+            date(ANO - 1, 1, 1), date(ANO - 1, 12, 31)
+        )
+
+        assert [s["data_ocorrencia"] for s in periodo] == [date(ANO - 1, 3, 1)]
+        where = f"data_ocorrencia BETWEEN '{ANO - 1}-01-01' AND '{ANO - 1}-12-31'"
+        assert _particoes_lidas(mysql_db, where) == f"p{ANO - 1}"
+
+    def test_integridade_sem_fk(self, sinistros_particionados, dao_factories, apolice_teste_id):
+        sinistro_dao = dao_factories["sinistro"]
+
+        with pytest.raises(Exception, match="Erro ao criar sinistro") as erro:
+            sinistro_dao.criar({"apolice_id": apolice_teste_id + 999})
+        assert isinstance(erro.value.__cause__, IntegrityError)
+        sinistro_id = sinistro_dao.criar({"apolice_id": apolice_teste_id})
+
+        assert sinistro_dao.ler_por_id(sinistro_id)["data_ocorrencia"] == date.today()
+
+    def test_cascata_com_um_tombstone_por_sinistro(
+        self, sinistros_particionados, dao_factories, apolice_teste_id
+    ):
+        mysql_db = sinistros_particionados
+        _inserir_sinistros(mysql_db, apolice_teste_id, [date(ANO, 1, 1)] * 3)
+
+        dao_factories["apolice"].deletar(apolice_teste_id)
+
+        cursor = mysql_db.cursor()
+        cursor.execute("SELECT COUNT(*) FROM sinistros")
+        assert cursor.fetchone()[0] == 0
+        cursor.execute("SELECT entidade, COUNT(*) FROM exclusoes GROUP BY entidade")
+        assert dict(cursor.fetchall()) == {"apolices": 1, "sinistros": 3}
+        cursor.close()
+
+    def test_manutencao_cria_e_remove(
+        self, sinistros_particionados, dao_factories, apolice_teste_id
+    ):
+        mysql_db = sinistros_particionados
+        _inserir_sinistros(mysql_db, apolice_teste_id, [date(ANO - 2, 5, 1), date(ANO, 5, 1)])
+        manutencao = ManutencaoParticoes(
+            "anual", particoes_futuras=3, particoes_retidas=1, connection=mysql_db
+        )
+
+        resultado = manutencao.executar()
+
+        assert resultado["criadas"] == [f"p{ANO + 2}", f"p{ANO + 3}"]
+        assert f"p{ANO - 2}" in resultado["removidas"]
+        assert resultado["linhas_removidas"] == 1
+        cursor = mysql_db.cursor()
+        nomes = [nome for nome, _ in listar_particoes(cursor)]
+        assert nomes == [f"p{ANO - 1}", f"p{ANO}", *[f"p{ANO + i}" for i in (1, 2, 3)], "p_futuras"]
+        cursor.close()
+        assert dao_factories["sinistro"].contar(incluir_arquivados=True) == 2
+        assert manutencao.executar() == {"criadas": [], "removidas": [], "linhas_removidas": 0}
+
+
+@pytest.mark.slow
+class TestBenchmarkParticionamento:
+    """Benchmark: relatório de um ano com a tabela única vs. particionada por ano"""
+
+    def test_pruning_no_relatorio_do_periodo(self, mysql_db, apolice_teste_id):
+        sinistro_dao = SinistroDAO(mysql_db)
+        total, anos, repeticoes = 200_000, 5, 10
+        datas = [date(ANO - anos + 1 + i % anos, 1 + i % 12, 1 + i % 28) for i in range(total)]
+        _inserir_sinistros(mysql_db, apolice_teste_id, datas)
+        periodo = {
+            "data_ocorrencia__gte": date(ANO, 1, 1),
+            "data_ocorrencia__lte": date(ANO, 12, 31),
+        }
+
+        def medir():
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                por_status = sinistro_dao.contar(agrupar_por="status", **periodo)
+            return (time.perf_counter() - inicio) / repeticoes * 1000, sum(por_status.values())
+
+        ms_heap, linhas_heap = medir()
+        cursor = mysql_db.cursor()
+        particionar_sinistros(cursor, "anual", particoes_futuras=1)
+        try:
+            ms_particionada, linhas_particionada = medir()
+        finally:
+            cursor.execute("TRUNCATE TABLE sinistros")
+            desparticionar_sinistros(cursor)
+            cursor.close()
+
+        print(
+            f"\nsinistros do ano: tabela única {ms_heap:.1f} ms | "
+            f"particionada {ms_particionada:.1f} ms"
+        )
+        assert linhas_heap == linhas_particionada == total // anos
+        assert ms_particionada * 2 < ms_heap
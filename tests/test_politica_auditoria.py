@@ -0,0 +1,145 @@
+"""
+Testes da Política de Auditoria
+Amostragem, agregação em contadores e recarga a quente das regras
+"""
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from functions.auditoria_service import AuditoriaService
+from functions.politica_auditoria import (
+    MODO_AGREGAR,
+    MODO_AMOSTRAR,
+    MODO_SEMPRE,
+    AgregadorContadores,
+    PoliticaAuditoria,
+)
+from functions.servicos import ClienteService
+
+
+class TestPoliticaAuditoria:
+    """Testes das regras de decisão da política"""
+
+    def test_escritas_sempre_registradas(self):
+        """Operações de escrita ignoram regras de amostragem/agregação"""
+        politica = PoliticaAuditoria(
+            regras=[{"entidade": "*", "operacao": "*", "modo": "agregar"}],
+            modo_leitura="agregar",
+        )
+
+        assert politica.decidir("cliente", "criar") == (MODO_SEMPRE, 1.0)
+        assert politica.decidir("cliente", "consultar", status="erro") == (MODO_SEMPRE, 1.0)
+
+    def test_regra_especifica_tem_prioridade(self):
+        """Regra (entidade, operacao) vence curingas e o modo padrão de leitura"""
+        politica = PoliticaAuditoria(
+            regras=[
+                {"entidade": "cliente", "operacao": "consultar", "modo": "amostrar", "taxa": 0.5},
+                {"entidade": "*", "operacao": "consultar", "modo": "sempre"},
+            ],
+            modo_leitura="agregar",
+        )
+
+        assert politica.decidir("cliente", "consultar") == (MODO_AMOSTRAR, 0.5)
+        assert politica.decidir("apolice", "consultar")[0] == MODO_SEMPRE
+        assert politica.decidir("apolice", "listar")[0] == MODO_AGREGAR
+
+    def test_recarga_a_quente(self, tmp_path):
+        """Alterações no arquivo de política são aplicadas sem reiniciar"""
+        arquivo = tmp_path / "politica.json"
+        arquivo.write_text(json.dumps({"modo_leitura": "sempre"}), encoding="utf-8")
+        politica = PoliticaAuditoria(arquivo=str(arquivo), intervalo_recarga=0)
+
+        assert politica.decidir("cliente", "listar")[0] == MODO_SEMPRE
+
+        arquivo.write_text(json.dumps({"modo_leitura": "agregar"}), encoding="utf-8")
+        # Garante mtime diferente em sistemas de arquivos com baixa resolução
+        novo_mtime = time.time() + 10
+        os.utime(arquivo, (novo_mtime, novo_mtime))
+
+        assert politica.decidir("cliente", "listar")[0] == MODO_AGREGAR
+
+    def test_agregador_encerra_minuto(self):
+        """Contadores do minuto anterior são liberados quando o minuto vira"""
+        agregador = AgregadorContadores()
+        inicio = datetime(2025, 1, 1, 10, 0, 5)
+
+        assert agregador.registrar("admin", "cliente", "listar", inicio) == []
+        assert agregador.registrar("admin", "cliente", "listar", inicio) == []
+        encerrados = agregador.registrar(
+            "admin", "cliente", "listar", inicio + timedelta(minutes=1)
+        )
+
+        assert len(encerrados) == 1
+        assert encerrados[0]["total"] == 2
+        assert agregador.extrair_todos()[0]["total"] == 1
+
+
+class TestAuditoriaComPolitica:
+    """Integração da política com o AuditoriaService (MongoDB)"""
+
+    def test_leituras_agregadas_em_contadores(self, mongodb_db):
+        """Leituras agregadas não geram documentos individuais de auditoria"""
+        auditoria = AuditoriaService(
+            mongodb_db,
+            politica=PoliticaAuditoria(modo_leitura="agregar"),
+            agregador=AgregadorContadores(),
+        )
+
+        for _ in range(5):
+            auditoria.registrar_log("admin", "listar", "cliente", detalhes={"total": 0})
+        auditoria.registrar_log("admin", "criar", "cliente", entidade_id=1)
+        auditoria.descarregar_contadores()
+
+        logs = auditoria.listar_logs()
+        contadores = auditoria.consultar_contadores(usuario="admin")
+
+        assert [log["operacao"] for log in logs] == ["criar"]
+        assert len(contadores) == 1
+        assert contadores[0]["total"] == 5
+
+    def test_leituras_amostradas(self, mongodb_db):
+        """Leituras amostradas registram a taxa aplicada nos detalhes"""
+        sorteios = iter([0.05, 0.9, 0.05])
+        auditoria = AuditoriaService(
+            mongodb_db,
+            politica=PoliticaAuditoria(
+                modo_leitura="amostrar", taxa_amostragem=0.1, aleatorio=lambda: next(sorteios)
+            ),
+        )
+
+        for _ in range(3):
+            auditoria.registrar_log("admin", "consultar", "cliente", entidade_id=1)
+
+        logs = auditoria.listar_logs()
+        assert len(logs) == 2
+        assert all(log["detalhes"]["taxa_amostragem"] == 0.1 for log in logs)
+
+
+@pytest.mark.slow
+class TestBenchmarkPoliticaAuditoria:
+    """Benchmark: throughput de leituras com auditoria integral x agregada"""
+
+    def test_throughput_leituras_agregadas(self, mysql_db, mongodb_db, cliente_teste):
+        service = ClienteService(mysql_db, mongodb_db)
+        cliente_id = service.criar_cliente(cliente_teste, usuario="admin")
+        total_chamadas = 300
+
+        def medir(politica):
+            service.auditoria = AuditoriaService(
+                mongodb_db, politica=politica, agregador=AgregadorContadores()
+            )
+            inicio = time.perf_counter()
+            for _ in range(total_chamadas):
+                service.buscar_cliente(cliente_id, usuario="admin")
+            service.auditoria.descarregar_contadores()
+            return total_chamadas / (time.perf_counter() - inicio)
+
+        integral = medir(PoliticaAuditoria(modo_leitura="sempre"))
+        agregado = medir(PoliticaAuditoria(modo_leitura="agregar"))
+
+        print(f"\nLeituras/s auditoria integral: {integral:.0f} | agregada: {agregado:.0f}")
+        assert agregado > integral
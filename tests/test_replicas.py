@@ -0,0 +1,143 @@
+"""
+Testes do roteamento de leituras para réplicas MySQL
+Os testes com réplica real usam uma segunda instância local (MYSQL_TEST_REPLICA_HOST/PORT)
+"""
+import pytest
+from mysql.connector import Error
+
+from config import _ler_replicas
+from config_test import MYSQL_TEST_CONFIG, MYSQL_TEST_REPLICA_CONFIG
+from functions import replicas
+from functions.replicas import (
+    BALANCEAMENTO_MENOS_CONEXOES,
+    BALANCEAMENTO_ROUND_ROBIN,
+    RoteadorLeitura,
+)
+
+REPLICAS = [{"host": "r1", "port": 3307}, {"host": "r2", "port": 3308}]
+
+
+def _config_base():
+    config = {k: v for k, v in MYSQL_TEST_CONFIG.items() if k != "raise_on_warnings"}
+    config.pop("database")
+    return config
+
+
+class TestBalanceamento:
+    """Ordem de escolha das réplicas (sem banco)"""
+
+    def test_ler_replicas_da_configuracao(self):
+        assert _ler_replicas("r1:3307, r2") == [
+            {"host": "r1", "port": 3307},
+            {"host": "r2", "port": 3306},
+        ]
+        assert _ler_replicas("") == []
+
+    def test_round_robin(self):
+        roteador = RoteadorLeitura(REPLICAS, balanceamento=BALANCEAMENTO_ROUND_ROBIN)
+
+        primeiras = [roteador._candidatas()[0].host for _ in range(4)]
+
+        assert primeiras == ["r1", "r2", "r1", "r2"]
+
+    def test_menos_conexoes(self):
+        roteador = RoteadorLeitura(REPLICAS, balanceamento=BALANCEAMENTO_MENOS_CONEXOES)
+        roteador.replicas[0].conexoes_abertas = 3
+        roteador.replicas[1].conexoes_abertas = 1
+
+        assert [r.host for r in roteador._candidatas()] == ["r2", "r1"]
+
+    def test_sem_replicas_usa_primario(self):
+        assert RoteadorLeitura([]).obter_conexao() is None
+
+    def test_balanceamento_invalido(self):
+        with pytest.raises(ValueError):
+            RoteadorLeitura(REPLICAS, balanceamento="aleatorio")
+
+
+class _ConexaoFalsa:
+    """Conexão cujo SHOW REPLICA STATUS devolve 'status' ou levanta 'erro'"""
+
+    def __init__(self, status=None, erro=None):
+        self.status, self.erro, self.fechada = status, erro, False
+
+    def cursor(self, dictionary=False):
+        return self
+
+    def execute(self, sql):
+        if self.erro:
+            raise self.erro
+
+    def fetchone(self):
+        return self.status
+
+    def close(self):
+        self.fechada = True
+
+
+class TestSaudeDaReplica:
+    """Medição de atraso e descarte de conexões (sem banco)"""
+
+    def _roteador(self, monkeypatch, conn, **replica):
+        monkeypatch.setattr(replicas.mysql.connector, "connect", lambda **_: conn)
+        return RoteadorLeitura([{"host": "r1", "port": 3307, **replica}])
+
+    def test_sem_status_de_replicacao_e_fora_do_ar(self, monkeypatch):
+        conn = _ConexaoFalsa(status=None)
+        roteador = self._roteador(monkeypatch, conn)
+
+        assert replicas.medir_atraso(_ConexaoFalsa(status=None)) is None
+        assert roteador.obter_conexao() is None
+        assert roteador.replicas[0].saudavel is False and conn.fechada
+
+    def test_servidor_configurado_como_nao_replica(self, monkeypatch):
+        roteador = self._roteador(monkeypatch, _ConexaoFalsa(status=None), replicacao=False)
+
+        assert roteador.obter_conexao() is not None
+
+    def test_erro_na_medicao_fecha_a_conexao(self, monkeypatch):
+        conn = _ConexaoFalsa(erro=Error("sem privilégio REPLICATION CLIENT"))
+        roteador = self._roteador(monkeypatch, conn)
+
+        assert roteador.obter_conexao() is None
+        assert conn.fechada
+        assert roteador.replicas[0].saudavel is False
+
+
+@pytest.mark.skipif(
+    not MYSQL_TEST_REPLICA_CONFIG["host"], reason="MYSQL_TEST_REPLICA_HOST não definido"
+)
+class TestRoteamentoComReplica:
+    """Roteamento contra uma segunda instância MySQL local"""
+
+    def _roteador(self, **kwargs):
+        return RoteadorLeitura([MYSQL_TEST_REPLICA_CONFIG], config_base=_config_base(), **kwargs)
+
+    def test_leitura_vai_para_a_replica(self):
+        roteador = self._roteador()
+
+        conn = roteador.obter_conexao()
+        cursor = conn.cursor()
+        cursor.execute("SELECT @@port")
+        porta = cursor.fetchone()[0]
+        cursor.close()
+
+        assert porta == MYSQL_TEST_REPLICA_CONFIG["port"]
+        assert roteador.replicas[0].conexoes_abertas == 1
+        conn.close()
+        assert roteador.replicas[0].conexoes_abertas == 0
+
+    def test_replica_atrasada_volta_ao_primario(self):
+        roteador = self._roteador(atraso_maximo=-1)
+
+        assert roteador.obter_conexao() is None
+        assert roteador.replicas[0].saudavel is False
+
+    def test_replica_fora_do_ar_volta_ao_primario(self):
+        roteador = RoteadorLeitura(
+            [{"host": MYSQL_TEST_REPLICA_CONFIG["host"], "port": 1}],
+            config_base={**_config_base(), "connection_timeout": 1},
+        )
+
+        assert roteador.obter_conexao() is None
+        assert roteador.replicas[0].saudavel is False
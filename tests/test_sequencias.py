@@ -0,0 +1,110 @@
+"""
+Testes da sequência hi-lo e da numeração de apólices
+"""
+import threading
+import time
+
+import pytest
+from mysql.connector import IntegrityError
+
+from functions.sequencias import SEQUENCIA_APOLICES, AlocadorSequencia, formatar_numero_apolice
+
+
+def test_formatar_numero_apolice():
+    assert formatar_numero_apolice(1234, ano=2026) == "AP2026-00001234"
+
+
+class TestAlocadorSequencia:
+    """Reserva de blocos no MySQL"""
+
+    def test_um_bloco_por_tamanho_bloco_numeros(self, mysql_db):
+        alocador = AlocadorSequencia("teste", tamanho_bloco=10, connection=mysql_db)
+
+        numeros = [alocador.proximo() for _ in range(25)]
+
+        assert numeros == list(range(1, 26))
+        assert alocador.blocos_reservados == 3
+
+    def test_processos_recebem_blocos_disjuntos(self, mysql_db):
+        """Dois alocadores (um por processo) nunca repetem números; sobras viram lacunas"""
+        a = AlocadorSequencia("teste", tamanho_bloco=5, connection=mysql_db)
+        b = AlocadorSequencia("teste", tamanho_bloco=5, connection=mysql_db)
+
+        numeros_a = [a.proximo() for _ in range(7)]
+        numeros_b = [b.proximo() for _ in range(7)]
+
+        assert not set(numeros_a) & set(numeros_b)
+        assert numeros_b[0] == 6
+
+    def test_threads_recebem_numeros_unicos(self, mysql_db):
+        alocador = AlocadorSequencia("teste", tamanho_bloco=100, connection=mysql_db)
+        numeros, lock = [], threading.Lock()
+
+        def alocar():
+            locais = [alocador.proximo() for _ in range(50)]
+            with lock:
+                numeros.extend(locais)
+
+        threads = [threading.Thread(target=alocar) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert sorted(numeros) == list(range(1, 401))
+
+
+class TestNumeroApolice:
+    """Número persistido e único na emissão"""
+
+    def test_apolices_do_mesmo_cliente_tem_numeros_distintos(
+        self, servicos_factories, cliente_teste_id, seguro_teste_id
+    ):
+        apolice_service = servicos_factories["apolice"]
+        ids = [
+            apolice_service.emitir("admin", cliente_teste_id, seguro_teste_id, "", "", 100.0)
+            for _ in range(2)
+        ]
+
+        numeros = [apolice_service.apolice_dao.ler_por_id(i)["numero"] for i in ids]
+
+        assert len(set(numeros)) == 2
+        assert all(n.startswith("AP") for n in numeros)
+
+    def test_nao_altera_os_dados_recebidos(
+        self, servicos_factories, cliente_teste_id, seguro_teste_id
+    ):
+        apolice_service = servicos_factories["apolice"]
+        dados = {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id}
+
+        apolice_id = apolice_service.emitir_apolice(dados, usuario="admin")
+
+        assert dados == {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id}
+        assert apolice_service.apolice_dao.ler_por_id(apolice_id)["numero"].startswith("AP")
+
+    def test_indice_unico(self, dao_factories, cliente_teste_id, seguro_teste_id):
+        apolice_dao = dao_factories["apolice"]
+        dados = {"cliente_id": cliente_teste_id, "seguro_id": seguro_teste_id, "numero": "AP1"}
+        apolice_dao.criar(dados)
+
+        with pytest.raises(Exception, match="Erro ao criar apólice") as erro:
+            apolice_dao.criar(dados)
+        assert isinstance(erro.value.__cause__, IntegrityError)
+
+
+@pytest.mark.slow
+class TestBenchmarkSequencia:
+    """Benchmark: números alocados em memória, uma ida ao banco a cada bloco"""
+
+    def test_vazao_em_memoria(self, mysql_db):
+        alocador = AlocadorSequencia(SEQUENCIA_APOLICES, tamanho_bloco=1000, connection=mysql_db)
+        total = 100_000
+
+        inicio = time.perf_counter()
+        for _ in range(total):
+            formatar_numero_apolice(alocador.proximo())
+        duracao = time.perf_counter() - inicio
+
+        print(f"\n{total / duracao:,.0f} números/s | {alocador.blocos_reservados} reservas")
+        assert alocador.blocos_reservados == total // 1000
+        assert total / duracao > 50_000
@@ -0,0 +1,149 @@
+"""
+Testes da sincronização de clientes por CPF (upsert em lote com hash de conteúdo)
+"""
+import time
+from datetime import date
+
+import pytest
+
+from functions.dao_mysql import ClienteDAO, hash_conteudo_cliente
+from tests.conftest import gerar_cpf_unico
+
+
+def _snapshot(quantidade):
+    return [
+        {
+            "nome": f"Cliente {i}",
+            "cpf": gerar_cpf_unico(),
+            "telefone": "11999990000",
+            "email": f"cliente{i}@exemplo.com",
+            "data_nasc": "1990-01-01",
+            "endereco": "Rua A, 1",
+        }
+        for i in range(quantidade)
+    ]
+
+
+class TestHashConteudo:
+    """Hash do conteúdo sincronizado (sem banco)"""
+
+    def test_ignora_cpf_e_id(self):
+        cliente = _snapshot(1)[0]
+
+        assert hash_conteudo_cliente(cliente) == hash_conteudo_cliente(
+            {**cliente, "cpf": "outro", "id": 9}
+        )
+
+    def test_data_como_texto_ou_date(self):
+        cliente = _snapshot(1)[0]
+
+        assert hash_conteudo_cliente(cliente) == hash_conteudo_cliente(
+            {**cliente, "data_nasc": date(1990, 1, 1)}
+        )
+
+    def test_muda_com_o_conteudo(self):
+        cliente = _snapshot(1)[0]
+
+        assert hash_conteudo_cliente(cliente) != hash_conteudo_cliente(
+            {**cliente, "telefone": "11888880000"}
+        )
+
+
+class TestUpsertEmLote:
+    """Upsert por CPF no MySQL"""
+
+    def test_inseridos_atualizados_inalterados(self, dao_factories):
+        cliente_dao = dao_factories["cliente"]
+        snapshot = _snapshot(5)
+        assert cliente_dao.upsert_em_lote(snapshot, tamanho_lote=2) == {
+            "inseridos": 5,
+            "atualizados": 0,
+            "inalterados": 0,
+        }
+
+        snapshot[0]["email"] = "novo@exemplo.com"
+        resultado = cliente_dao.upsert_em_lote(snapshot + _snapshot(1))
+
+        assert resultado == {"inseridos": 1, "atualizados": 1, "inalterados": 4}
+        assert cliente_dao.ler_por_cpf(snapshot[0]["cpf"])["email"] == "novo@exemplo.com"
+
+    def test_reenvio_nao_regrava(self, mysql_db, dao_factories):
+        cliente_dao = dao_factories["cliente"]
+        snapshot = _snapshot(3)
+        cliente_dao.upsert_em_lote(snapshot)
+        cursor = mysql_db.cursor()
+        cursor.execute("UPDATE clientes SET updated_at = '2020-01-01 00:00:00'")
+        mysql_db.commit()
+
+        assert cliente_dao.upsert_em_lote(snapshot)["inalterados"] == 3
+        cursor.execute("SELECT COUNT(*) FROM clientes WHERE updated_at > '2020-01-01'")
+        assert cursor.fetchone()[0] == 0
+        cursor.close()
+
+    def test_alteracao_local_invalida_hash(self, dao_factories):
+        cliente_dao = dao_factories["cliente"]
+        snapshot = _snapshot(1)
+        cliente_dao.upsert_em_lote(snapshot)
+        cliente = cliente_dao.ler_por_cpf(snapshot[0]["cpf"])
+        cliente_dao.atualizar(cliente["id"], {"telefone": "11000000000"})
+
+        assert cliente_dao.upsert_em_lote(snapshot)["atualizados"] == 1
+        assert cliente_dao.ler_por_cpf(snapshot[0]["cpf"])["telefone"] == "11999990000"
+
+    def test_cpf_repetido_vale_a_ultima_ocorrencia(self, dao_factories):
+        cliente_dao = dao_factories["cliente"]
+        primeiro = _snapshot(1)[0]
+        segundo = {**primeiro, "nome": "Nome corrigido"}
+
+        assert cliente_dao.upsert_em_lote([primeiro, segundo])["inseridos"] == 1
+        assert cliente_dao.ler_por_cpf(primeiro["cpf"])["nome"] == "Nome corrigido"
+
+
+class TestSincronizarClientes:
+    """Serviço: um log de auditoria por lote"""
+
+    def test_um_log_por_lote(self, servicos_factories):
+        cliente_service = servicos_factories["cliente"]
+
+        resultado = cliente_service.sincronizar_clientes(_snapshot(10), "parceiro", "seguradora_x")
+
+        logs = servicos_factories["auditoria"].buscar_logs_por_entidade("cliente")
+        sincronizacoes = [log for log in logs if log["operacao"] == "sincronizar"]
+        assert resultado["inseridos"] == 10
+        assert len(sincronizacoes) == 1
+        assert sincronizacoes[0]["detalhes"]["origem"] == "seguradora_x"
+        assert sincronizacoes[0]["detalhes"]["inseridos"] == 10
+
+
+@pytest.mark.slow
+class TestBenchmarkSincronizacao:
+    """Benchmark: ler_por_cpf + criar/atualizar por linha vs. upsert em lote"""
+
+    def test_vazao_do_snapshot(self, mysql_db):
+        cliente_dao = ClienteDAO(mysql_db)
+        total = 5_000
+        por_linha, em_lote = _snapshot(total), _snapshot(total)
+
+        inicio = time.perf_counter()
+        for cliente in por_linha:
+            existente = cliente_dao.ler_por_cpf(cliente["cpf"])
+            if existente:
+                cliente_dao.atualizar(existente["id"], cliente)
+            else:
+                cliente_dao.criar(cliente)
+        tempo_por_linha = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        cliente_dao.upsert_em_lote(em_lote)
+        tempo_em_lote = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        reenvio = cliente_dao.upsert_em_lote(em_lote)
+        tempo_reenvio = time.perf_counter() - inicio
+
+        print(
+            f"\npor linha: {total / tempo_por_linha:,.0f}/s | em lote: "
+            f"{total / tempo_em_lote:,.0f}/s | reenvio sem mudanças: {total / tempo_reenvio:,.0f}/s"
+        )
+        assert reenvio["inalterados"] == total
+        assert tempo_em_lote * 5 < tempo_por_linha
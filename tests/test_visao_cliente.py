@@ -0,0 +1,188 @@
+"""
+Testes da visão 360 do cliente (consultas paralelas MySQL + MongoDB com prazo por fonte)
+"""
+import time
+
+import mysql.connector
+import pytest
+
+from config_test import MYSQL_TEST_CONFIG
+from functions.concorrencia import ERRO_TIMEOUT, Prazo, aguardar, submeter
+from functions.exceptions import FonteIndisponivelError
+from functions.servicos import ClienteService
+
+
+def _conectar():
+    config = {k: v for k, v in MYSQL_TEST_CONFIG.items() if k != "raise_on_warnings"}
+    return mysql.connector.connect(**config)
+
+
+class TestConcorrencia:
+    """Pool compartilhado, prazos e timeouts (sem banco)"""
+
+    def test_aguardar_resultado_e_excecao(self):
+        prazo = Prazo(1.0)
+
+        assert aguardar(submeter(sum, [1, 2, 3]), prazo.ate(1.0)) == (6, None)
+        assert aguardar(submeter(int, "x"), prazo.ate(1.0), padrao=0)[1].startswith("invalid")
+
+    def test_timeout_devolve_padrao(self):
+        prazo = Prazo(0.05)
+        inicio = time.monotonic()
+
+        resultado, erro = aguardar(submeter(time.sleep, 0.5), prazo.ate(10), padrao=[])
+
+        assert (resultado, erro) == ([], ERRO_TIMEOUT)
+        assert time.monotonic() - inicio < 0.3
+
+    def test_prazo_da_fonte_limitado_pelo_orcamento(self):
+        prazo = Prazo(0.2)
+
+        assert prazo.ate(5.0) == prazo.fim
+        assert prazo.ate(0.01) < prazo.fim
+
+
+class TestVisaoCompleta:
+    """ClienteService.visao_completa contra MySQL e MongoDB"""
+
+    def _montar_cliente(self, servicos_factories, dao_factories, cliente_teste, seguro_teste):
+        cliente_id = dao_factories["cliente"].criar(cliente_teste)
+        seguro_id = dao_factories["seguro"].criar({**seguro_teste, "cliente_id": cliente_id})
+        apolice_id = dao_factories["apolice"].criar(
+            {"cliente_id": cliente_id, "seguro_id": seguro_id}
+        )
+        sinistro_id = dao_factories["sinistro"].criar(
+            {"apolice_id": apolice_id, "descricao": "Colisão"}
+        )
+        servicos_factories["cliente"].perfil.atualizar_perfil(cliente_id, {"canal": "email"})
+        servicos_factories["sinistro"].documentos.adicionar_documento(
+            sinistro_id, "BOLETIM_OCORRENCIA", descricao="BO 123"
+        )
+        return cliente_id, apolice_id, sinistro_id
+
+    def test_visao_completa(self, servicos_factories, dao_factories, cliente_teste, seguro_teste):
+        cliente_id, apolice_id, sinistro_id = self._montar_cliente(
+            servicos_factories, dao_factories, cliente_teste, seguro_teste
+        )
+
+        visao = servicos_factories["cliente"].visao_completa(cliente_id, "admin")
+
+        assert visao["parcial"] is False
+        assert visao["cliente"]["id"] == cliente_id
+        assert len(visao["seguros"]) == 1
+        apolice = visao["apolices"][0]
+        assert apolice["id"] == apolice_id
+        assert apolice["seguro"]["tipo"] == seguro_teste["tipo"]
+        assert [s["id"] for s in apolice["sinistros"]] == [sinistro_id]
+        assert apolice["sinistros"][0]["documentos"][0]["descricao"] == "BO 123"
+        assert visao["perfil"]["preferencias"] == {"canal": "email"}
+
+    def test_cliente_inexistente(self, servicos_factories):
+        assert servicos_factories["cliente"].visao_completa(999999, "admin") is None
+
+    def test_resultado_parcial_com_fonte_lenta(
+        self, servicos_factories, dao_factories, cliente_teste, seguro_teste
+    ):
+        """Um MongoDB lento não atrasa a resposta: o perfil fica de fora e o resultado é parcial"""
+        cliente_id, _, _ = self._montar_cliente(
+            servicos_factories, dao_factories, cliente_teste, seguro_teste
+        )
+        service = servicos_factories["cliente"]
+        obter_perfil = service.perfil.obter_perfil
+        service.perfil.obter_perfil = lambda cid: time.sleep(2) or obter_perfil(cid)
+
+        inicio = time.monotonic()
+        visao = service.visao_completa(cliente_id, "admin", orcamento=0.5)
+        duracao = time.monotonic() - inicio
+
+        assert duracao < 1.0
+        assert visao["parcial"] is True
+        assert visao["indisponiveis"] == {"perfil": ERRO_TIMEOUT}
+        assert visao["perfil"] is None
+        assert visao["apolices"][0]["sinistros"][0]["documentos"]
+
+    def test_mysql_no_pool_com_conexao_propria(
+        self, mysql_db, mongodb_db, servicos_factories, dao_factories, cliente_teste, seguro_teste
+    ):
+        cliente_id, apolice_id, _ = self._montar_cliente(
+            servicos_factories, dao_factories, cliente_teste, seguro_teste
+        )
+        service = ClienteService(mysql_db, mongodb_db, conectar_mysql=_conectar)
+
+        visao = service.visao_completa(cliente_id, "admin")
+
+        assert visao["apolices"][0]["id"] == apolice_id
+        assert service.visao_completa(999999, "admin") is None
+
+    def test_timeout_do_mysql_nao_parece_cliente_inexistente(
+        self, mysql_db, mongodb_db, servicos_factories, dao_factories, cliente_teste, seguro_teste
+    ):
+        cliente_id, _, _ = self._montar_cliente(
+            servicos_factories, dao_factories, cliente_teste, seguro_teste
+        )
+        service = ClienteService(
+            mysql_db, mongodb_db, conectar_mysql=lambda: time.sleep(2) or _conectar()
+        )
+
+        inicio = time.monotonic()
+        with pytest.raises(FonteIndisponivelError, match=ERRO_TIMEOUT):
+            service.visao_completa(cliente_id, "admin", orcamento=0.5)
+
+        assert time.monotonic() - inicio < 1.0
+
+
+@pytest.mark.slow
+class TestBenchmarkVisaoCompleta:
+    """Benchmark: visão paralela x chamadas sequenciais de DAO e MongoDB"""
+
+    def test_paralelo_mais_rapido_que_sequencial(
+        self, servicos_factories, dao_factories, cliente_teste, seguro_teste
+    ):
+        cliente_id, _, _ = self._preparar(dao_factories, cliente_teste, seguro_teste)
+        service = servicos_factories["cliente"]
+        documentos = servicos_factories["sinistro"].documentos
+
+        def sequencial():
+            dao_factories["cliente"].ler_por_id(cliente_id)
+            seguros = [s for s in dao_factories["seguro"].listar() if s["cliente_id"] == cliente_id]
+            apolices = [
+                a for a in dao_factories["apolice"].listar() if a["cliente_id"] == cliente_id
+            ]
+            for apolice in apolices:
+                sinistros = [
+                    s
+                    for s in dao_factories["sinistro"].listar()
+                    if s["apolice_id"] == apolice["id"]
+                ]
+                for sinistro in sinistros:
+                    documentos.listar_documentos(sinistro["id"])
+            service.perfil.obter_perfil(cliente_id)
+            return seguros
+
+        def medir(funcao, repeticoes=20):
+            inicio = time.perf_counter()
+            for _ in range(repeticoes):
+                funcao()
+            return (time.perf_counter() - inicio) / repeticoes * 1000
+
+        tempo_sequencial = medir(sequencial)
+        tempo_paralelo = medir(lambda: service.visao_completa(cliente_id, "admin", orcamento=5))
+
+        print(f"\nSequencial: {tempo_sequencial:.1f} ms | paralelo: {tempo_paralelo:.1f} ms")
+        assert tempo_paralelo < tempo_sequencial
+
+    def _preparar(self, dao_factories, cliente_teste, seguro_teste, apolices=10):
+        cliente_id = dao_factories["cliente"].criar(cliente_teste)
+        seguro_id = dao_factories["seguro"].criar({**seguro_teste, "cliente_id": cliente_id})
+        ids = []
+        for _ in range(apolices):
+            apolice_id = dao_factories["apolice"].criar(
+                {"cliente_id": cliente_id, "seguro_id": seguro_id}
+            )
+            for _ in range(3):
+                ids.append(
+                    dao_factories["sinistro"].criar(
+                        {"apolice_id": apolice_id, "descricao": "Sinistro"}
+                    )
+                )
+        return cliente_id, seguro_id, ids
@@ -1,5 +1,6 @@
 import json
 import re
+import unicodedata
 
 
 def validar_cpf(cpf):
@@ -26,6 +27,42 @@ def validar_placa(placa):
     )
 
 
+def _sem_acento(caractere):
+    # Um caractere por caractere, para os índices do texto dobrado valerem no original
+    return unicodedata.normalize("NFD", caractere)[0].lower()[0]
+
+
+def destacar_trecho(texto, palavras, tamanho=80, marcas=("**", "**")):
+    """
+    Trecho de até `tamanho` caracteres em volta da primeira ocorrência de uma das palavras,
+    com as ocorrências entre as marcas. Compara sem caixa e sem acento, como a collation
+    utf8mb4_unicode_ci. Retorna None se nenhuma palavra ocorre no texto.
+    """
+    if not texto:
+        return None
+    dobrado = "".join(_sem_acento(c) for c in texto)
+    ocorrencias = []
+    for palavra in palavras:
+        alvo = "".join(_sem_acento(c) for c in palavra)
+        inicio = dobrado.find(alvo) if alvo else -1
+        while inicio >= 0:
+            ocorrencias.append((inicio, inicio + len(alvo)))
+            inicio = dobrado.find(alvo, inicio + len(alvo))
+    if not ocorrencias:
+        return None
+    ocorrencias.sort()
+    inicio = max(0, min(ocorrencias[0][0] - tamanho // 3, len(texto) - tamanho))
+    fim = min(len(texto), inicio + tamanho)
+    partes, posicao = [], inicio
+    for de, ate in ocorrencias:
+        if de < posicao or ate > fim:
+            continue
+        partes += [texto[posicao:de], marcas[0], texto[de:ate], marcas[1]]
+        posicao = ate
+    partes.append(texto[posicao:fim])
+    return ("…" if inicio > 0 else "") + "".join(partes) + ("…" if fim < len(texto) else "")
+
+
 def salvar_dados(arquivo, dados):
     with open(arquivo, "w", encoding="utf-8") as f:
         json.dump(dados, f, ensure_ascii=False, indent=4)